@@ -1,13 +1,15 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from collections import defaultdict
 from models.customer import Customer
 from models.order import Order
 from models.payment import Payment
+from analytics.order_batch import OrderBatch
 
 class CustomerAnalytics:
-    def __init__(self, customers: List[Customer], orders: List[Order], payments: List[Payment]):
+    def __init__(self, customers: List[Customer], orders: Union[List[Order], OrderBatch], payments: List[Payment]):
         self.customers = customers
-        self.orders = orders
+        self.batch = orders if isinstance(orders, OrderBatch) else None
+        self.orders = [] if self.batch is not None else orders
         self.payments = payments
 
     def customer_lifetime_value(self) -> Dict[str, float]:
@@ -27,11 +29,14 @@ class CustomerAnalytics:
         """
         مشتریان وفادار بر اساس تعداد سفارش
         """
-        counts = defaultdict(int)
-        for o in self.orders:
-            cust_name = getattr(getattr(o, "customer", None), "name", None)
-            if cust_name:
-                counts[cust_name] += 1
+        if self.batch is not None:
+            counts = self.batch.order_counts_by_customer_name()
+        else:
+            counts = defaultdict(int)
+            for o in self.orders:
+                cust_name = getattr(getattr(o, "customer", None), "name", None)
+                if cust_name:
+                    counts[cust_name] += 1
         ranked = sorted(counts.items(), key=lambda x: x[1], reverse=True)
         return [{"name": name, "orders": orders} for name, orders in ranked[:limit]]
 
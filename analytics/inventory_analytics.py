@@ -1,12 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 from collections import defaultdict
 from models.inventory import Inventory
 from models.order import Order
+from analytics.order_batch import OrderBatch
 
 class InventoryAnalytics:
-    def __init__(self, inventory: Inventory, orders: List[Order]):
+    def __init__(self, inventory: Inventory, orders: Union[List[Order], OrderBatch]):
         self.inventory = inventory
-        self.orders = orders
+        self.batch = orders if isinstance(orders, OrderBatch) else None
+        self.orders = [] if self.batch is not None else orders
 
     def inventory_value_by_category(self) -> Dict[str, float]:
         report = defaultdict(float)
@@ -16,6 +18,11 @@ class InventoryAnalytics:
         return dict(report)
 
     def fast_moving_products(self, limit: int = 5) -> List[Dict[str, Any]]:
+        if self.batch is not None:
+            names, name_codes = self.batch.product_name_codes()
+            sums = OrderBatch.sum_by(name_codes[self.batch.product], self.batch.qty, len(names))
+            ranked = sorted(zip(names, sums.tolist()), key=lambda x: x[1], reverse=True)
+            return [{"name": name, "qty": qty} for name, qty in ranked[:limit]]
         counts = defaultdict(int)
         for o in self.orders:
             for item in o.products:
@@ -0,0 +1,224 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+from models.order import Order
+from models.money import to_minor_array, from_minor_array, line_totals_minor
+
+# واحد datetime64 برای هر بازه‌ی زمانی (هم‌قالب با strftime کلاس‌های تحلیل)
+_PERIOD_UNITS = {"daily": "D", "monthly": "M"}
+
+class OrderBatch:
+    """
+    نمایش ستونی سفارش‌ها برای تحلیل و گزارش برداری.
+    یک بار از لیست Order یا از کوئری SQL ساخته می‌شود؛ تجمیع‌ها به جای حلقه روی اشیاء
+    با bincount روی آرایه‌های NumPy انجام می‌شوند.
+
+    ستون‌های سطح سفارش: order_ids, order_timestamp, order_customer_id, order_total,
+        order_delivery_fee, order_discount (و نسخه‌های *_minor صحیح)
+    ستون‌های سطح سطر: line_order (اندیس سفارش)، product (کد محصول)، qty، unit_price، line_total
+        (و unit_price_minor / line_total_minor) و ستون‌های مشتق order_id, timestamp, customer_id,
+        product_id, category
+    دیکشنری‌ها (به ترتیب اولین مشاهده): product_ids/product_names/product_category، categories،
+        customer_names
+    زمان‌ها datetime64[s] بدون منطقه‌ی زمانی (مثل created_at مدل‌ها) هستند؛ مقدار نامعلوم NaT است.
+    """
+
+    def __init__(self, orders: List[Tuple], lines: List[Tuple]):
+        """
+        orders: [(order_id, created_at, customer_id, customer_name, delivery_fee, discount, total)]
+        lines:  [(order_index, product_id, product_name, category, quantity, unit_price)]
+        """
+        n = len(orders)
+        oid, ts, cid, cname, fee, disc, total = zip(*orders) if n else ([],) * 7
+        self.order_ids = np.asarray(oid, dtype=np.int64)
+        self.order_timestamp = np.array(
+            [t.replace(tzinfo=None) if t is not None else None for t in ts], dtype="datetime64[s]"
+        )
+        self.order_customer_id = np.asarray([c if c is not None else -1 for c in cid], dtype=np.int64)
+        self.order_delivery_fee = np.asarray(fee, dtype=np.float64)
+        self.order_discount_minor = to_minor_array(np.asarray(disc, dtype=np.float64))
+        self.order_total_minor = to_minor_array(np.asarray(total, dtype=np.float64))
+        self.order_discount = from_minor_array(self.order_discount_minor)
+        self.order_total = from_minor_array(self.order_total_minor)
+        self.customer_names: Dict[int, str] = {}
+        for c, name in zip(cid, cname):
+            if c is not None and name:
+                self.customer_names.setdefault(c, name)
+
+        # کدگذاری دیکشنری محصول و دسته
+        product_index: Dict[Any, int] = {}
+        category_index: Dict[Any, int] = {}
+        self.product_names: List[str] = []
+        product_category: List[int] = []
+        codes: List[int] = []
+        for _, pid, pname, cat, _, _ in lines:
+            code = product_index.get(pid)
+            if code is None:
+                code = product_index[pid] = len(self.product_names)
+                self.product_names.append(pname)
+                product_category.append(category_index.setdefault(cat, len(category_index)))
+            codes.append(code)
+        self.product_ids = np.asarray(list(product_index.keys()), dtype=np.int64)
+        self.product_category = np.asarray(product_category, dtype=np.int32)
+        self.categories: List[Optional[str]] = list(category_index.keys())
+
+        self.line_order = np.asarray([ln[0] for ln in lines], dtype=np.int64)
+        self.product = np.asarray(codes, dtype=np.int64)
+        qty = [ln[4] for ln in lines]
+        # تعداد صحیح را صحیح نگه می‌داریم تا خروجی گزارش‌ها با مسیر لیستی یکسان بماند
+        self.qty = np.asarray(qty, dtype=np.int64 if all(isinstance(q, int) for q in qty) else np.float64)
+        self.unit_price = np.asarray([ln[5] for ln in lines], dtype=np.float64)
+        # مبالغ سطرها به صورت صحیح در واحد خُرد (دقیق) و نسخه‌ی float برای نمایش
+        self.unit_price_minor = to_minor_array(self.unit_price)
+        self.line_total_minor = line_totals_minor(self.unit_price_minor, self.qty)
+        self.line_total = from_minor_array(self.line_total_minor)
+
+    # ---------- Construction ----------
+    @classmethod
+    def from_orders(cls, orders: Iterable[Order]) -> "OrderBatch":
+        order_rows: List[Tuple] = []
+        line_rows: List[Tuple] = []
+        for i, o in enumerate(orders):
+            cust = getattr(o, "customer", None)
+            order_rows.append((
+                o.order_id,
+                getattr(o, "created_at", None),
+                getattr(cust, "customer_id", None),
+                getattr(cust, "name", None),
+                float(o.delivery_fee or 0.0),
+                float(getattr(o, "discount_amount", 0.0) or 0.0),
+                o.calculate_total(),
+            ))
+            for item in o.products:
+                p = item.product
+                line_rows.append((i, p.product_id, p.name, getattr(p, "category", None), item.quantity, p.price))
+        return cls(order_rows, line_rows)
+
+    @classmethod
+    def from_sql(cls, db: Any, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "OrderBatch":
+        """
+        ساخت مستقیم از جداول orders/order_items یک DatabaseManager با یک کوئری، بدون ساخت اشیای Order.
+        سفارش‌های لغوشده کنار گذاشته می‌شوند.
+        """
+        where = ["o.status != 'cancelled'"]
+        params: List[Any] = []
+        if start:
+            where.append("o.created_at >= ?")
+            params.append(start.strftime("%Y-%m-%d %H:%M:%S"))
+        if end:
+            where.append("o.created_at <= ?")
+            params.append(end.strftime("%Y-%m-%d %H:%M:%S"))
+        query = f"""
+            SELECT o.order_id, o.created_at, o.customer_id, cu.name, o.delivery_fee, o.discount_amount,
+                   o.total_amount, oi.product_id, p.name, c.name, oi.quantity, oi.unit_price
+            FROM orders o
+            LEFT JOIN customers cu ON cu.customer_id = o.customer_id
+            LEFT JOIN order_items oi ON oi.order_id = o.order_id
+            LEFT JOIN products p ON p.product_id = oi.product_id
+            LEFT JOIN categories c ON c.category_id = p.category_id
+            WHERE {" AND ".join(where)}
+            ORDER BY o.order_id, oi.order_item_id
+        """
+        order_rows: List[Tuple] = []
+        line_rows: List[Tuple] = []
+        last_id = None
+        for row in db.execute_query(query, tuple(params)).fetchall():
+            row = tuple(row)
+            if row[0] != last_id:
+                last_id = row[0]
+                created = datetime.fromisoformat(str(row[1])) if row[1] else None
+                order_rows.append((row[0], created, row[2], row[3], row[4] or 0.0, row[5] or 0.0, row[6] or 0.0))
+            if row[7] is not None:
+                line_rows.append((len(order_rows) - 1, row[7], row[8], row[9], row[10], row[11]))
+        return cls(order_rows, line_rows)
+
+    # ---------- Derived columns ----------
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+    @property
+    def n_lines(self) -> int:
+        return len(self.line_order)
+
+    @property
+    def order_id(self) -> np.ndarray:
+        return self.order_ids[self.line_order]
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.order_timestamp[self.line_order]
+
+    @property
+    def customer_id(self) -> np.ndarray:
+        return self.order_customer_id[self.line_order]
+
+    @property
+    def product_id(self) -> np.ndarray:
+        return self.product_ids[self.product]
+
+    @property
+    def category(self) -> np.ndarray:
+        return self.product_category[self.product]
+
+    # ---------- Filtering ----------
+    def range_mask(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """
+        ماسک بولی سفارش‌های داخل بازه‌ی بسته‌ی [start, end] (هر مرز None یعنی بدون محدودیت از آن سمت)؛
+        سفارش بدون زمان فقط وقتی پذیرفته می‌شود که هیچ مرزی داده نشده باشد.
+        """
+        if start is None and end is None:
+            return np.ones(len(self), dtype=bool)
+        ts = self.order_timestamp
+        mask = ~np.isnat(ts)
+        if start is not None:
+            mask &= ts >= np.datetime64(start.replace(tzinfo=None), "s")
+        if end is not None:
+            mask &= ts <= np.datetime64(end.replace(tzinfo=None), "s")
+        return mask
+
+    # ---------- Aggregation helpers ----------
+    def period_codes(self, period: str) -> Tuple[List[str], np.ndarray]:
+        """
+        (کلیدهای بازه، کد بازه برای هر سفارش)؛ سفارش‌های بدون زمان کد -1 می‌گیرند.
+        بازه‌ی ناشناخته مثل کلاس‌های تحلیل کلید "unknown" دارد.
+        """
+        ts = self.order_timestamp
+        valid = ~np.isnat(ts)
+        codes = np.full(len(self), -1, dtype=np.int64)
+        unit = _PERIOD_UNITS.get(period)
+        if unit is None:
+            codes[valid] = 0
+            return (["unknown"] if valid.any() else []), codes
+        buckets = ts[valid].astype(f"datetime64[{unit}]")
+        uniq, inv = np.unique(buckets, return_inverse=True)
+        codes[valid] = inv.ravel()
+        return [str(k) for k in np.datetime_as_string(uniq, unit=unit)], codes
+
+    @staticmethod
+    def sum_by(codes: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+        """جمع وزن‌ها به ازای هر کد؛ برای تعداد صحیح نوع صحیح حفظ می‌شود"""
+        sums = np.bincount(codes, weights=weights, minlength=size)
+        if weights.dtype.kind == "i":
+            return np.rint(sums).astype(np.int64)
+        return sums
+
+    def product_name_codes(self) -> Tuple[List[str], np.ndarray]:
+        """(نام‌های یکتای محصول به ترتیب اولین مشاهده، کد نام برای هر کد محصول)"""
+        index: Dict[str, int] = {}
+        codes = np.asarray([index.setdefault(n, len(index)) for n in self.product_names], dtype=np.int64)
+        return list(index.keys()), codes
+
+    def order_counts_by_customer_name(self) -> Dict[str, int]:
+        """تعداد سفارش هر مشتری (بر اساس نام، به ترتیب اولین مشاهده)"""
+        known = self.order_customer_id >= 0
+        if not known.any():
+            return {}
+        ids, first, counts = np.unique(self.order_customer_id[known], return_index=True, return_counts=True)
+        result: Dict[str, int] = {}
+        for j in np.argsort(first, kind="stable"):
+            name = self.customer_names.get(int(ids[j]))
+            if name:
+                result[name] = result.get(name, 0) + int(counts[j])
+        return result
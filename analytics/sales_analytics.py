@@ -1,17 +1,28 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from datetime import datetime
 from collections import defaultdict
+import numpy as np
 from models.order import Order
+from models.money import SCALE, round_money
+from analytics.order_batch import OrderBatch
 
 class SalesAnalytics:
-    def __init__(self, orders: List[Order]):
-        self.orders = orders
+    def __init__(self, orders: Union[List[Order], OrderBatch]):
+        # با OrderBatch محاسبات به صورت برداری روی ستون‌ها انجام می‌شود
+        self.batch = orders if isinstance(orders, OrderBatch) else None
+        self.orders = [] if self.batch is not None else orders
 
     def sales_trend(self, period: str = "daily") -> Dict[str, float]:
         """
         تحلیل روند فروش بر اساس بازه زمانی (daily, monthly)
         """
-        trend = defaultdict(float)
+        if self.batch is not None:
+            keys, codes = self.batch.period_codes(period)
+            valid = codes >= 0
+            sums = OrderBatch.sum_by(codes[valid], self.batch.order_total_minor[valid], len(keys))
+            return {k: v / SCALE for k, v in zip(keys, sums.tolist())}
+        # جمع در واحد خُرد صحیح انجام می‌شود تا نتیجه دقیق باشد
+        trend = defaultdict(int)
         for o in self.orders:
             dt: datetime = getattr(o, "created_at", None)
             if not dt:
@@ -22,19 +33,21 @@ class SalesAnalytics:
                 key = dt.strftime("%Y-%m")
             else:
                 key = "unknown"
-            trend[key] += o.calculate_total()
-        return dict(trend)
+            trend[key] += o.total_minor()
+        return {k: v / SCALE for k, v in trend.items()}
 
     def average_sales(self, period: str = "daily") -> float:
         trend = self.sales_trend(period)
         if not trend:
             return 0.0
-        return round(sum(trend.values()) / len(trend), 2)
+        return round_money(sum(trend.values()) / len(trend))
 
     def top_products_over_time(self, period: str = "daily") -> Dict[str, Dict[str, int]]:
         """
         محصولات پرفروش در هر بازه زمانی
         """
+        if self.batch is not None:
+            return self._top_products_over_time_batch(period)
         result: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
         for o in self.orders:
             dt: datetime = getattr(o, "created_at", None)
@@ -52,6 +65,24 @@ class SalesAnalytics:
                 result[key][p.name] += q
         return result
 
+    def _top_products_over_time_batch(self, period: str) -> Dict[str, Dict[str, int]]:
+        b = self.batch
+        keys, order_codes = b.period_codes(period)
+        names, name_codes = b.product_name_codes()
+        line_period = order_codes[b.line_order]
+        valid = line_period >= 0
+        # کلید ترکیبی (بازه × نام محصول) و یک bincount
+        flat = line_period[valid] * len(names) + name_codes[b.product[valid]]
+        sums = OrderBatch.sum_by(flat, b.qty[valid], len(keys) * len(names)).reshape(len(keys), len(names))
+        seen = np.zeros(len(keys) * len(names), dtype=bool)
+        seen[flat] = True
+        seen = seen.reshape(len(keys), len(names))
+        result: Dict[str, Dict[str, int]] = {}
+        for i, key in enumerate(keys):
+            cols = np.flatnonzero(seen[i])
+            result[key] = {names[j]: sums[i, j].item() for j in cols}
+        return result
+
     def render_text_analysis(self, period: str = "daily") -> str:
         trend = self.sales_trend(period)
         avg = self.average_sales(period)
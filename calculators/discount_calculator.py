@@ -0,0 +1,228 @@
+# calculators/discount_calculator.py
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from models.discount import Discount
+from models.money import SCALE
+from models.order import Order
+
+class DiscountCalculator:
+    """
+    موتور ارزیابی تخفیف‌ها برای تعداد زیادی کد فعال.
+    - تخفیف‌ها بر اساس دامنه (product_id / category / order) ایندکس می‌شوند.
+    - مجموعه‌ی فعال فقط وقتی زمان از مرز بازه‌ی یکی از تخفیف‌ها (start_at / end_at) عبور کند بازسازی می‌شود.
+    - برای هر سفارش یک گذر روی سطرها انجام می‌شود و بهترین ترکیب بدون تداخل انتخاب می‌شود.
+
+    قاعده‌ی تداخل: هر سطر حداکثر یک تخفیف سطری (محصول یا دسته) می‌گیرد و تخفیف سطح سفارش
+    با همه‌ی تخفیف‌های سطری تداخل دارد. چون دامنه‌ها تودرتو هستند (سفارش ⊃ دسته ⊃ محصول)،
+    انتخاب بهینه با مقایسه‌ی هر دسته با مجموع بهترین تخفیف محصولاتش به دست می‌آید.
+
+    اگر PromotionService داده شود، فعال بودن کدهایی که در آن ثبت شده‌اند از تقویم آن خوانده می‌شود
+    (پس از ثبت یا حذف تبلیغ در آن سرویس، invalidate() را صدا بزنید).
+    """
+
+    def __init__(self, discounts: Optional[Iterable[Discount]] = None, promotions: Optional[Any] = None):
+        self._discounts: Dict[str, Discount] = {}
+        self._promotions = promotions
+        # ایندکس‌های مجموعه‌ی فعال
+        self._by_product: Dict[Any, List[Discount]] = {}
+        self._by_category: Dict[str, List[Discount]] = {}
+        self._order_level: List[Discount] = []
+        # مرزهای زمانی بعدی که مجموعه‌ی فعال را تغییر می‌دهند
+        self._dirty = True
+        self._built_at: Optional[datetime] = None
+        self._next_start: Optional[datetime] = None
+        self._next_end: Optional[datetime] = None
+        for d in discounts or []:
+            self.add(d)
+
+    # ---------- Registry ----------
+    def add(self, discount: Discount) -> None:
+        """افزودن یا جایگزینی تخفیف بر اساس کد"""
+        if not discount.code:
+            raise ValueError("Discount code is required")
+        self._discounts[discount.code] = discount
+        self._dirty = True
+
+    def remove(self, code: str) -> bool:
+        removed = self._discounts.pop(code, None) is not None
+        if removed:
+            self._dirty = True
+        return removed
+
+    def get(self, code: str) -> Optional[Discount]:
+        return self._discounts.get(code)
+
+    def list_discounts(self) -> List[Discount]:
+        return list(self._discounts.values())
+
+    def invalidate(self) -> None:
+        """اگر بازه یا دامنه‌ی یک تخفیف ثبت‌شده مستقیماً ویرایش شد، این متد را صدا بزنید."""
+        self._dirty = True
+
+    # ---------- Active-window index ----------
+    def _stale(self, now: datetime) -> bool:
+        if self._dirty or self._built_at is None or now < self._built_at:
+            return True
+        if self._next_start is not None and now >= self._next_start:
+            return True
+        if self._next_end is not None and now > self._next_end:
+            return True
+        return False
+
+    def _rebuild(self, now: datetime) -> None:
+        by_product: Dict[Any, List[Discount]] = {}
+        by_category: Dict[str, List[Discount]] = {}
+        order_level: List[Discount] = []
+        next_start: Optional[datetime] = None
+        next_end: Optional[datetime] = None
+        scheduled = set()
+        if self._promotions is not None:
+            scheduled = set(self._promotions.active_codes(now))
+            next_start = self._promotions.next_change_at(now)
+        for d in self._discounts.values():
+            if self._promotions is not None and self._promotions.get(d.code) is not None:
+                if d.code not in scheduled:
+                    continue
+            elif d.start_at and d.start_at > now:
+                next_start = d.start_at if next_start is None else min(next_start, d.start_at)
+                continue
+            if d.end_at and d.end_at < now:
+                continue
+            if d.end_at:
+                next_end = d.end_at if next_end is None else min(next_end, d.end_at)
+            if d.scope == "order":
+                order_level.append(d)
+            elif d.scope == "product" and d.product_id:
+                by_product.setdefault(d.product_id, []).append(d)
+            elif d.scope == "category" and d.category:
+                by_category.setdefault(d.category, []).append(d)
+        self._by_product = by_product
+        self._by_category = by_category
+        self._order_level = order_level
+        self._next_start = next_start
+        self._next_end = next_end
+        self._built_at = now
+        self._dirty = False
+
+    def active_discounts(self, now: Optional[datetime] = None) -> List[Discount]:
+        now = now or datetime.now()
+        if self._stale(now):
+            self._rebuild(now)
+        result = list(self._order_level)
+        for group in (self._by_category, self._by_product):
+            for ds in group.values():
+                result.extend(ds)
+        return result
+
+    # ---------- Evaluation ----------
+    def _candidates(self, order: Order, now: Optional[datetime]) -> Tuple[List[Tuple[Discount, Any, int]], Dict[str, Any]]:
+        """
+        یک گذر روی سطرها: جمع هر محصول و هر دسته، سپس مبلغ هر تخفیف قابل اعمال از روی همین جمع‌ها.
+        خروجی: ([(discount, target, amount_minor)], {"subtotal", "total", "category_of"})
+        """
+        now = now or datetime.now()
+        if self._stale(now):
+            self._rebuild(now)
+
+        by_product: Dict[Any, int] = {}
+        by_category: Dict[str, int] = {}
+        category_of: Dict[Any, str] = {}
+        for line in order.products:
+            p = line.product
+            amount = line.line_total_minor
+            by_product[p.product_id] = by_product.get(p.product_id, 0) + amount
+            if p.category is not None:
+                by_category[p.category] = by_category.get(p.category, 0) + amount
+                category_of[p.product_id] = p.category
+        subtotal = order.subtotal_minor()
+        total = order.total_minor()
+
+        found: List[Tuple[Discount, Any, int]] = []
+
+        def consider(d: Discount, target: Any, base: int) -> None:
+            if d.is_exhausted() or not d.accepts(order, total):
+                return
+            amount = d.amount_for(base)
+            if amount > 0:
+                found.append((d, target, amount))
+
+        # فقط تخفیف‌هایی بررسی می‌شوند که کلیدشان در سفارش هست
+        for pid, base in by_product.items():
+            for d in self._by_product.get(pid, ()):
+                consider(d, pid, base)
+        for cat, base in by_category.items():
+            for d in self._by_category.get(cat, ()):
+                consider(d, cat, base)
+        for d in self._order_level:
+            consider(d, None, subtotal)
+        return found, {"subtotal": subtotal, "total": total, "category_of": category_of}
+
+    @staticmethod
+    def _row(d: Discount, target: Any, amount: int) -> Dict[str, Any]:
+        return {"code": d.code, "scope": d.scope, "target": target, "amount": amount / SCALE}
+
+    def applicable(self, order: Order, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """همه‌ی تخفیف‌های قابل اعمال روی سفارش (مستقل از هم)، به ترتیب مبلغ نزولی"""
+        found, _ = self._candidates(order, now)
+        found.sort(key=lambda x: x[2], reverse=True)
+        return [self._row(*f) for f in found]
+
+    def best_combination(self, order: Order, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        بهترین ترکیب بدون تداخل تخفیف‌ها.
+        خروجی: {"discounts": [...], "discount_total", "new_total"}؛ سفارش تغییر نمی‌کند.
+        """
+        found, ctx = self._candidates(order, now)
+        best_product: Dict[Any, Tuple[Discount, Any, int]] = {}
+        best_category: Dict[str, Tuple[Discount, Any, int]] = {}
+        best_order: Optional[Tuple[Discount, Any, int]] = None
+        for f in found:
+            d, target, amount = f
+            if d.scope == "product":
+                slot = best_product
+            elif d.scope == "category":
+                slot = best_category
+            else:
+                if best_order is None or amount > best_order[2]:
+                    best_order = f
+                continue
+            if target not in slot or amount > slot[target][2]:
+                slot[target] = f
+
+        # در هر دسته: بهترین تخفیف دسته در برابر مجموع بهترین تخفیف محصولات آن دسته
+        products_in: Dict[Any, List[Tuple[Discount, Any, int]]] = {}
+        for pid, f in best_product.items():
+            products_in.setdefault(ctx["category_of"].get(pid), []).append(f)
+        line_level: List[Tuple[Discount, Any, int]] = []
+        for cat in set(products_in) | set(best_category):
+            prods = products_in.get(cat, [])
+            cat_pick = best_category.get(cat) if cat is not None else None
+            if cat_pick is not None and cat_pick[2] >= sum(f[2] for f in prods):
+                line_level.append(cat_pick)
+            else:
+                line_level.extend(prods)
+
+        line_total = sum(f[2] for f in line_level)
+        if best_order is not None and best_order[2] > line_total:
+            chosen = [best_order]
+        else:
+            chosen = sorted(line_level, key=lambda x: x[2], reverse=True)
+        discount = min(sum(f[2] for f in chosen), ctx["subtotal"])
+        return {
+            "discounts": [self._row(*f) for f in chosen],
+            "discount_total": discount / SCALE,
+            "new_total": max(0, ctx["total"] - discount) / SCALE,
+        }
+
+    def apply_best(self, order: Order, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        اعمال بهترین ترکیب: ثبت discount_amount روی سفارش و مصرف کدهای انتخاب‌شده.
+        مصرف از Discount.consume می‌گذرد؛ برای کدهای ثبت‌شده در DiscountUsageService روی شمارنده‌ی پایدار
+        ثبت می‌شود و اگر کد در این فاصله در ترمینال دیگری تمام شده باشد ValueError می‌دهد.
+        """
+        result = self.best_combination(order, now)
+        for row in result["discounts"]:
+            self._discounts[row["code"]].consume()
+        order.discount_amount = result["discount_total"]
+        return result
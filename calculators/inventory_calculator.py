@@ -0,0 +1,244 @@
+# calculators/inventory_calculator.py
+import math
+import time
+from datetime import datetime, date, time as dtime, timedelta
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import numpy as np
+
+from services.inventory_service import InventoryService
+
+class InventoryCalculator:
+    """
+    پیش‌بینی تقاضا و محاسبه‌ی نقطه‌ی سفارش برای همه‌ی SKUها به صورت برداری.
+    - منبع داده: دفتر تراکنش InventoryService (خواندن افزایشی) و تاریخچه‌ی سفارش‌ها (record_orders).
+    - خروجی‌ها: تقاضای روزانه/ساعتی، EWMA، ضریب فصلی روز هفته، موجودی اطمینان و نقطه‌ی سفارش.
+    - نتایج تا رسیدن داده‌ی جدید (یا تغییر روز) کش می‌شوند.
+    """
+
+    def __init__(
+        self,
+        inventory_service: Optional[InventoryService] = None,
+        history_days: int = 28,
+        alpha: float = 0.3,
+        lead_time_days: float = 2.0,
+        service_level: float = 0.95,
+        demand_reasons: Iterable[str] = ("sale", "recipe_depletion"),
+    ):
+        if history_days < 7:
+            raise ValueError("history_days must be at least 7")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if not 0.5 <= service_level < 1:
+            raise ValueError("service_level must be in [0.5, 1)")
+        self._inventory = inventory_service
+        self.history_days = int(history_days)
+        self.alpha = float(alpha)
+        self.lead_time_days = float(lead_time_days)
+        self.service_level = float(service_level)
+        self._demand_reasons = set(demand_reasons)
+
+        # رویدادهای تقاضا به صورت ستونی (افزایشی پر می‌شوند)
+        self._sku_index: Dict[str, int] = {}
+        self._ev_sku: List[int] = []
+        self._ev_ts: List[int] = []
+        self._ev_qty: List[float] = []
+        self._ledger_offset = 0
+
+        self._cache_key: Optional[Tuple[Any, ...]] = None
+        self._cache: Optional[Dict[str, Any]] = None
+
+    def _now(self) -> int:
+        return int(time.time())
+
+    def _sku(self, sku: Any) -> int:
+        key = str(sku).strip()
+        idx = self._sku_index.get(key)
+        if idx is None:
+            idx = self._sku_index[key] = len(self._sku_index)
+        return idx
+
+    # ---------- Data ingestion ----------
+    def _sync_ledger(self) -> None:
+        """خواندن فقط تراکنش‌های جدید دفتر موجودی از آخرین موقعیت خوانده‌شده"""
+        if not self._inventory:
+            return
+        tail = self._inventory.transactions(self._ledger_offset)
+        if not tail:
+            return
+        self._ledger_offset += len(tail)
+        for tx in tail:
+            reason = str(tx.get("reason", ""))
+            if reason.startswith("commit:"):
+                qty = float((tx.get("meta") or {}).get("reserved_qty", 0) or 0)
+            elif reason in self._demand_reasons and float(tx.get("delta", 0)) < 0:
+                qty = -float(tx["delta"])
+            else:
+                continue
+            if qty > 0:
+                self._ev_sku.append(self._sku(tx["sku"]))
+                self._ev_ts.append(int(tx.get("at", 0)))
+                self._ev_qty.append(qty)
+
+    def record_orders(self, orders: Iterable[Dict[str, Any]]) -> int:
+        """
+        افزودن تاریخچه‌ی سفارش‌ها (خروجی OrderService: created_at + lines[{sku, qty}]).
+        توجه: اگر همین فروش‌ها در دفتر موجودی هم ثبت شده‌اند، آن‌ها را دوباره اضافه نکنید.
+        """
+        added = 0
+        for o in orders:
+            ts = int(o.get("created_at", 0) or 0)
+            for ln in o.get("lines") or o.get("items") or []:
+                qty = float(ln.get("qty", ln.get("quantity", 0)) or 0)
+                sku = ln.get("sku", ln.get("product_id"))
+                if sku is None or qty <= 0:
+                    continue
+                self._ev_sku.append(self._sku(sku))
+                self._ev_ts.append(ts)
+                self._ev_qty.append(qty)
+                added += 1
+        return added
+
+    # ---------- Core computation ----------
+    def _window_start(self, as_of: int) -> int:
+        """نیمه‌شب (به وقت محلی) اولین روز پنجره‌ی تاریخچه"""
+        today = datetime.fromtimestamp(as_of).date()
+        first = today - timedelta(days=self.history_days - 1)
+        return int(datetime.combine(first, dtime.min).timestamp())
+
+    def _stock_vector(self, n: int) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        items = self._inventory.list_items() if self._inventory else []
+        for it in items:
+            self._sku(it["sku"])
+        stock = np.zeros(max(n, len(self._sku_index)), dtype=np.float64)
+        for it in items:
+            stock[self._sku_index[it["sku"]]] = float(it["stock"])
+        return stock, items
+
+    def compute(self, as_of: Optional[int] = None) -> Dict[str, Any]:
+        """
+        محاسبه‌ی کامل در یک گذر NumPy برای همه‌ی SKUها.
+        خروجی: دیکشنری آرایه‌ها هم‌ترتیب با لیست skus.
+        """
+        self._sync_ledger()
+        as_of = int(as_of if as_of is not None else self._now())
+        start = self._window_start(as_of)
+        stock, items = self._stock_vector(len(self._sku_index))
+        key = (len(self._ev_qty), start, stock.tobytes())
+        if self._cache is not None and self._cache_key == key:
+            return self._cache
+
+        n_sku = len(self._sku_index)
+        n_days = self.history_days
+        sku = np.asarray(self._ev_sku, dtype=np.int64)
+        ts = np.asarray(self._ev_ts, dtype=np.int64)
+        qty = np.asarray(self._ev_qty, dtype=np.float64)
+
+        offset = ts - start
+        in_window = (offset >= 0) & (offset < n_days * 86400)
+        sku, offset, qty = sku[in_window], offset[in_window], qty[in_window]
+        day = offset // 86400
+        hour = (offset % 86400) // 3600
+
+        # ماتریس‌های تقاضا با یک bincount روی اندیس تخت
+        daily = np.bincount(sku * n_days + day, weights=qty, minlength=n_sku * n_days).reshape(n_sku, n_days)
+        hourly = np.bincount(sku * 24 + hour, weights=qty, minlength=n_sku * 24).reshape(n_sku, 24)
+
+        # EWMA روی محور روز به صورت یک ضرب ماتریس-بردار
+        a = self.alpha
+        powers = (1.0 - a) ** np.arange(n_days - 1, -1, -1, dtype=np.float64)
+        weights = a * powers
+        weights[0] = powers[0]
+        ewma = daily @ weights
+
+        # ضریب فصلی روز هفته: میانگین هر روز هفته / میانگین کل
+        first_dow = date.fromtimestamp(start).weekday()
+        dow = (first_dow + np.arange(n_days)) % 7
+        dow_counts = np.bincount(dow, minlength=7).astype(np.float64)
+        dow_sums = daily @ np.eye(7)[dow]
+        mean_daily = daily.mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seasonal = np.where(mean_daily[:, None] > 0, (dow_sums / dow_counts) / mean_daily[:, None], 1.0)
+
+        next_dow = (date.fromtimestamp(as_of).weekday() + 1) % 7
+        forecast_next_day = ewma * seasonal[:, next_dow]
+
+        sigma = daily.std(axis=1, ddof=1)
+        z = NormalDist().inv_cdf(self.service_level)
+        safety_stock = z * sigma * math.sqrt(self.lead_time_days)
+        reorder_point = ewma * self.lead_time_days + safety_stock
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            days_of_cover = np.where(ewma > 0, stock / ewma, np.inf)
+
+        result = {
+            "as_of": as_of,
+            "skus": list(self._sku_index.keys()),
+            "stock": stock,
+            "daily_demand": daily,
+            "hourly_profile": hourly / n_days,
+            "mean_daily": mean_daily,
+            "ewma": ewma,
+            "seasonal": seasonal,
+            "forecast_next_day": forecast_next_day,
+            "sigma": sigma,
+            "safety_stock": safety_stock,
+            "reorder_point": reorder_point,
+            "days_of_cover": days_of_cover,
+            "items": {it["sku"]: it for it in items},
+        }
+        self._cache_key = key
+        self._cache = result
+        return result
+
+    # ---------- Consumers ----------
+    def demand_table(self, as_of: Optional[int] = None) -> List[Dict[str, Any]]:
+        """جدول خلاصه‌ی پیش‌بینی برای هر SKU (برای گزارش‌ها و UI)"""
+        r = self.compute(as_of)
+        cols = [r["mean_daily"], r["ewma"], r["forecast_next_day"], r["safety_stock"], r["reorder_point"]]
+        rows = np.round(np.column_stack(cols), 2).tolist() if r["skus"] else []
+        return [
+            {"sku": sku, "avg_daily": row[0], "ewma": row[1], "forecast_next_day": row[2],
+             "safety_stock": row[3], "reorder_point": row[4]}
+            for sku, row in zip(r["skus"], rows)
+        ]
+
+    def low_stock_alerts(self, as_of: Optional[int] = None) -> List[Dict[str, Any]]:
+        """SKUهایی که موجودی‌شان به نقطه‌ی سفارش یا کمتر رسیده است"""
+        r = self.compute(as_of)
+        hits = np.flatnonzero((r["stock"] <= r["reorder_point"]) & (r["reorder_point"] > 0))
+        out = []
+        for i in hits[np.argsort(r["days_of_cover"][hits], kind="stable")]:
+            sku = r["skus"][i]
+            it = r["items"].get(sku, {})
+            out.append({
+                "sku": sku,
+                "name": it.get("name", sku),
+                "stock": float(r["stock"][i]),
+                "reorder_point": round(float(r["reorder_point"][i]), 2),
+                "days_of_cover": round(float(r["days_of_cover"][i]), 2),
+            })
+        return out
+
+    def purchase_suggestions(self, review_days: float = 7.0, as_of: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        پیشنهاد خرید به تفکیک تأمین‌کننده (meta.supplier آیتم‌ها):
+        مقدار = نقطه‌ی سفارش + تقاضای دوره‌ی بازبینی - موجودی فعلی (گرد به بالا).
+        """
+        r = self.compute(as_of)
+        target = r["reorder_point"] + r["ewma"] * float(review_days)
+        qty = np.ceil(np.maximum(target - r["stock"], 0.0))
+        need = np.flatnonzero((r["stock"] <= r["reorder_point"]) & (qty > 0))
+        by_supplier: Dict[str, List[Dict[str, Any]]] = {}
+        for i in need:
+            sku = r["skus"][i]
+            it = r["items"].get(sku, {})
+            supplier = str((it.get("meta") or {}).get("supplier", "-"))
+            by_supplier.setdefault(supplier, []).append({
+                "sku": sku,
+                "name": it.get("name", sku),
+                "quantity": int(qty[i]),
+                "unit_price": float(it.get("price", 0.0)),
+            })
+        return by_supplier
@@ -0,0 +1,284 @@
+# calculators/tax_calculator.py
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Union
+
+import numpy as np
+
+from analytics.order_batch import OrderBatch
+from models.invoice import Invoice
+from models.money import SCALE, to_minor, to_minor_array
+from models.order import Order
+from models.product import Product
+
+# نرخ‌ها با دقت یک میلیونیم (ppm) به صورت صحیح نگه داشته می‌شوند تا محاسبه‌ی مالیات دقیق باشد
+_PPM = 1_000_000
+ROUNDING_MODES = ("half_even", "half_up", "floor", "ceil")
+EXEMPT = "exempt"
+
+
+def _round_div(num: np.ndarray, den: Union[int, np.ndarray], mode: str) -> np.ndarray:
+    """تقسیم صحیح num/den (den مثبت) با قاعده‌ی گرد کردن"""
+    num = np.asarray(num, dtype=np.int64)
+    q = np.floor_divide(num, den)
+    r2 = 2 * (num - q * den)
+    if mode == "floor":
+        return q
+    if mode == "ceil":
+        return q + (r2 > 0)
+    if mode == "half_up":
+        return q + (r2 >= den)
+    return q + ((r2 > den) | ((r2 == den) & (q % 2 != 0)))
+
+
+class TaxCalculator:
+    """
+    موتور مالیات بر ارزش افزوده با چند نرخ.
+    - اولویت تعیین نرخ هر محصول: معافیت محصول، نرخ محصول، معافیت دسته، نرخ دسته، نرخ پیش‌فرض.
+      جدول product_id -> نرخ با compile() (یا در اولین محاسبه) از قواعد و محصولات شناخته‌شده ساخته
+      می‌شود و فقط پس از تغییر قواعد دوباره ساخته می‌شود.
+    - inclusive=True یعنی قیمت‌ها شامل مالیات‌اند (مالیات = gross × r / (1 + r))؛ در غیر این صورت مالیات
+      روی مبلغ خالص اضافه می‌شود.
+    - تخفیف سطح سفارش به نسبت مبلغ بین سطرها و هزینه‌ی ارسال تقسیم می‌شود (بزرگ‌ترین باقیمانده، صحیح و
+      دقیق)؛ سپس مالیات هر سطر جداگانه با قاعده‌ی rounding گرد می‌شود. پس جمع gross همه‌ی سطرها دقیقاً برابر
+      جمع فاکتور (inclusive) یا جمع فاکتور به‌علاوه‌ی مالیات (exclusive) است.
+    - محاسبه‌ی دسته‌ای روی ستون‌های OrderBatch به صورت برداری (NumPy) انجام می‌شود.
+    """
+
+    def __init__(self, default_rate: float = 0.09, category_rates: Optional[Dict[str, float]] = None,
+                 product_rates: Optional[Dict[int, float]] = None, exempt_categories: Optional[Iterable[str]] = None,
+                 exempt_products: Optional[Iterable[int]] = None, delivery_rate: Optional[float] = None,
+                 delivery_exempt: bool = False, inclusive: bool = False, rounding: str = "half_even"):
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"Unsupported rounding mode: {rounding}")
+        self.default_rate = self._check_rate(default_rate)
+        self.delivery_rate = self._check_rate(delivery_rate) if delivery_rate is not None else None
+        self.delivery_exempt = bool(delivery_exempt)
+        self.inclusive = bool(inclusive)
+        self.rounding = rounding
+        self._category_rates: Dict[str, float] = {}
+        self._product_rates: Dict[int, float] = {}
+        self._exempt_categories = set(exempt_categories or [])
+        self._exempt_products = set(exempt_products or [])
+        for cat, rate in (category_rates or {}).items():
+            self.set_category_rate(cat, rate)
+        for pid, rate in (product_rates or {}).items():
+            self.set_product_rate(pid, rate)
+        # جدول نرخ‌ها: کلید (نرخ یا EXEMPT) -> اندیس؛ و ppm هر اندیس
+        self._keys: List[Union[float, str]] = []
+        self._key_index: Dict[Union[float, str], int] = {}
+        self._lookup: Dict[int, int] = {}
+        self._dirty = True
+
+    @staticmethod
+    def _check_rate(rate: float) -> float:
+        rate = float(rate)
+        if rate < 0 or rate >= 1:
+            raise ValueError("Tax rate must be in [0, 1)")
+        return rate
+
+    # ---------- Rules ----------
+    def set_category_rate(self, category: str, rate: float) -> None:
+        self._category_rates[category] = self._check_rate(rate)
+        self._dirty = True
+
+    def set_product_rate(self, product_id: int, rate: float) -> None:
+        self._product_rates[product_id] = self._check_rate(rate)
+        self._dirty = True
+
+    def exempt_category(self, category: str) -> None:
+        self._exempt_categories.add(category)
+        self._dirty = True
+
+    def exempt_product(self, product_id: int) -> None:
+        self._exempt_products.add(product_id)
+        self._dirty = True
+
+    def _resolve(self, product_id: Any, category: Optional[str]) -> Union[float, str]:
+        if product_id in self._exempt_products:
+            return EXEMPT
+        if product_id in self._product_rates:
+            return self._product_rates[product_id]
+        if category in self._exempt_categories:
+            return EXEMPT
+        return self._category_rates.get(category, self.default_rate)
+
+    def _key_id(self, key: Union[float, str]) -> int:
+        idx = self._key_index.get(key)
+        if idx is None:
+            idx = self._key_index[key] = len(self._keys)
+            self._keys.append(key)
+        return idx
+
+    def compile(self, products: Iterable[Product] = ()) -> None:
+        """ساخت جدول product_id -> نرخ برای محصولات داده‌شده (محصولات دیگر هنگام محاسبه اضافه می‌شوند)"""
+        if self._dirty:
+            self._keys, self._key_index, self._lookup = [], {}, {}
+            self._dirty = False
+        for p in products:
+            self._lookup[p.product_id] = self._key_id(self._resolve(p.product_id, getattr(p, "category", None)))
+
+    def rate_for(self, product: Product) -> Union[float, str]:
+        """نرخ مؤثر محصول (EXEMPT برای معاف)"""
+        self.compile([product])
+        return self._keys[self._lookup[product.product_id]]
+
+    def _delivery_key(self) -> Union[float, str]:
+        if self.delivery_exempt:
+            return EXEMPT
+        return self.delivery_rate if self.delivery_rate is not None else self.default_rate
+
+    def _ppm(self) -> np.ndarray:
+        return np.asarray([0 if k == EXEMPT else int(round(k * _PPM)) for k in self._keys], dtype=np.int64)
+
+    @staticmethod
+    def label(key: Union[float, str]) -> str:
+        return EXEMPT if key == EXEMPT else f"{key * 100:g}%"
+
+    # ---------- Vectorized core ----------
+    @staticmethod
+    def _allocate(comp_order: np.ndarray, amount: np.ndarray, discount: np.ndarray, delivery_pos: np.ndarray) -> np.ndarray:
+        """
+        تقسیم تخفیف هر سفارش بین اجزایش به نسبت مبلغ (بزرگ‌ترین باقیمانده)؛ جمع سهم‌ها دقیقاً برابر تخفیف است.
+        سفارش با پایه‌ی صفر کل تخفیف را روی جزء ارسال می‌گیرد.
+        """
+        n_orders = len(discount)
+        base = np.zeros(n_orders, dtype=np.int64)
+        np.add.at(base, comp_order, amount)
+        alloc = np.zeros(len(amount), dtype=np.int64)
+        has = (discount != 0) & (base != 0)
+        if has.any():
+            sel = has[comp_order]
+            exact = amount[sel] * (discount[comp_order[sel]] / base[comp_order[sel]])
+            share = np.floor(exact).astype(np.int64)
+            alloc[sel] = share
+            given = np.zeros(n_orders, dtype=np.int64)
+            np.add.at(given, comp_order[sel], share)
+            left = discount - given
+            # رتبه‌ی هر جزء در سفارش خودش بر اساس باقیمانده (نزولی)
+            idx = np.flatnonzero(sel)
+            rem = exact - share
+            order = np.lexsort((-rem, comp_order[idx]))
+            sorted_orders = comp_order[idx][order]
+            starts = np.searchsorted(sorted_orders, sorted_orders, "left")
+            rank = np.arange(len(order)) - starts
+            counts = np.bincount(sorted_orders, minlength=n_orders)
+            lo = left[sorted_orders]
+            plus = rank < lo
+            # کسری منفی (خطای ممیز شناور) از کم‌باقیمانده‌ترین اجزا کم می‌شود
+            minus = (lo < 0) & (rank >= counts[sorted_orders] + lo)
+            alloc[idx[order]] += plus.astype(np.int64) - minus.astype(np.int64)
+        zero = (discount != 0) & (base == 0)
+        alloc[delivery_pos[zero]] += discount[zero]
+        return alloc
+
+    def _compute(self, comp_order: np.ndarray, rate_idx: np.ndarray, amount: np.ndarray,
+                 discount: np.ndarray, delivery_pos: np.ndarray) -> Dict[str, np.ndarray]:
+        charged = amount - self._allocate(comp_order, amount, discount, delivery_pos)
+        ppm = self._ppm()[rate_idx]
+        if self.inclusive:
+            tax = _round_div(charged * ppm, _PPM + ppm, self.rounding)
+            net, gross = charged - tax, charged
+        else:
+            tax = _round_div(charged * ppm, _PPM, self.rounding)
+            net, gross = charged, charged + tax
+        return {"net": net, "tax": tax, "gross": gross, "charged": charged}
+
+    # ---------- Batch API ----------
+    def calculate_batch(self, batch: OrderBatch, discounts: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        محاسبه‌ی برداری برای همه‌ی سطرهای OrderBatch (به‌علاوه‌ی یک جزء ارسال برای هر سفارش).
+        discounts: تخفیف هر سفارش در واحد خُرد؛ پیش‌فرض order_discount_minor.
+        خروجی (آرایه‌های واحد خُرد): line_rate (اندیس جدول rates)، line_net، line_tax، line_gross،
+        delivery_net/tax/gross، order_tax، order_gross، order_charged و rates (کلیدهای جدول).
+        """
+        self.compile()
+        n_orders, n_lines = len(batch), batch.n_lines
+        for pid, cat in zip(batch.product_ids.tolist(), batch.product_category.tolist()):
+            if pid not in self._lookup:
+                self._lookup[pid] = self._key_id(self._resolve(pid, batch.categories[cat]))
+        product_rate = np.asarray([self._lookup[pid] for pid in batch.product_ids.tolist()], dtype=np.int64)
+        delivery_key = self._key_id(self._delivery_key())
+        comp_order = np.concatenate([batch.line_order, np.arange(n_orders, dtype=np.int64)])
+        rate_idx = np.concatenate([product_rate[batch.product] if n_lines else np.zeros(0, dtype=np.int64),
+                                   np.full(n_orders, delivery_key, dtype=np.int64)])
+        amount = np.concatenate([batch.line_total_minor, to_minor_array(batch.order_delivery_fee)])
+        disc = batch.order_discount_minor if discounts is None else np.asarray(discounts, dtype=np.int64)
+        delivery_pos = n_lines + np.arange(n_orders)
+        r = self._compute(comp_order, rate_idx, amount, disc, delivery_pos)
+
+        def per_order(values: np.ndarray) -> np.ndarray:
+            out = np.zeros(n_orders, dtype=np.int64)
+            np.add.at(out, comp_order, values)
+            return out
+
+        return {
+            "rates": list(self._keys),
+            "comp_order": comp_order, "comp_rate": rate_idx, "comp_net": r["net"], "comp_tax": r["tax"],
+            "comp_gross": r["gross"],
+            "line_rate": rate_idx[:n_lines], "line_net": r["net"][:n_lines], "line_tax": r["tax"][:n_lines],
+            "line_gross": r["gross"][:n_lines],
+            "delivery_net": r["net"][n_lines:], "delivery_tax": r["tax"][n_lines:],
+            "delivery_gross": r["gross"][n_lines:],
+            "order_tax": per_order(r["tax"]), "order_gross": per_order(r["gross"]),
+            "order_charged": per_order(r["charged"]),
+        }
+
+    def calculate_order(self, order: Order, discount_amount: Optional[float] = None) -> Dict[str, Any]:
+        """
+        مالیات یک سفارش؛ discount_amount (مثلاً Invoice.discount_amount) پیش‌فرض order.discount_amount است.
+        خروجی: {"lines": [{product_id, name, category, rate, net, tax, gross}], "delivery": {...},
+                "net", "tax", "gross", "total"}
+        """
+        batch = OrderBatch.from_orders([order])
+        disc = None if discount_amount is None else to_minor_array([float(discount_amount)])
+        r = self.calculate_batch(batch, disc)
+        rates = r["rates"]
+        lines = []
+        for i, item in enumerate(order.products):
+            p = item.product
+            lines.append({"product_id": p.product_id, "name": p.name, "category": getattr(p, "category", None),
+                          "rate": rates[int(r["line_rate"][i])], "net": int(r["line_net"][i]) / SCALE,
+                          "tax": int(r["line_tax"][i]) / SCALE, "gross": int(r["line_gross"][i]) / SCALE})
+        net = int(r["comp_net"].sum())
+        return {
+            "lines": lines,
+            "delivery": {"rate": self._delivery_key(), "net": int(r["delivery_net"][0]) / SCALE,
+                         "tax": int(r["delivery_tax"][0]) / SCALE, "gross": int(r["delivery_gross"][0]) / SCALE},
+            "net": net / SCALE,
+            "tax": int(r["order_tax"][0]) / SCALE,
+            "gross": int(r["order_gross"][0]) / SCALE,
+            "total": int(r["order_charged"][0]) / SCALE,
+        }
+
+    def tax_report(self, orders: Union[List[Order], OrderBatch],
+                   invoices: Optional[Iterable[Invoice]] = None) -> Dict[str, Any]:
+        """
+        گزارش مالیات به تفکیک نرخ.
+        خروجی: {"rates": [{"rate", "label", "net", "tax", "gross", "lines"}], "totals": {"net", "tax", "gross"}}
+        با invoices (فاکتورهای صادرشده‌ی همین سفارش‌ها) گزارش با جمع summary.total فاکتورها تطبیق داده می‌شود و
+        totals شامل "invoice_total" و "difference" (gross منهای جمع فاکتورها، به‌علاوه‌ی مالیات در حالت exclusive)
+        و خروجی شامل "reconciled" می‌شود. مالیات از discount_amount سفارش حساب می‌شود و فاکتور تخفیف خودش را دارد،
+        پس اختلاف این دو در difference دیده می‌شود.
+        """
+        batch = orders if isinstance(orders, OrderBatch) else OrderBatch.from_orders(orders)
+        r = self.calculate_batch(batch)
+        n = len(r["rates"])
+        sums = {}
+        for name in ("net", "tax", "gross"):
+            out = np.zeros(n, dtype=np.int64)
+            np.add.at(out, r["comp_rate"], r["comp_" + name])
+            sums[name] = out
+        nonzero = r["comp_gross"] != 0
+        counts = np.bincount(r["comp_rate"][nonzero], minlength=n)
+        keys = r["rates"]
+        order = sorted(range(n), key=lambda i: (keys[i] != EXEMPT, keys[i] if keys[i] != EXEMPT else 0))
+        rows = [{"rate": keys[i], "label": self.label(keys[i]), "net": int(sums["net"][i]) / SCALE,
+                 "tax": int(sums["tax"][i]) / SCALE, "gross": int(sums["gross"][i]) / SCALE, "lines": int(counts[i])}
+                for i in order if counts[i] or sums["gross"][i]]
+        net, tax, gross = (int(sums[k].sum()) for k in ("net", "tax", "gross"))
+        report: Dict[str, Any] = {"rates": rows, "totals": {"net": net / SCALE, "tax": tax / SCALE, "gross": gross / SCALE}}
+        if invoices is not None:
+            invoice_total = sum(to_minor(inv.generate_data()["summary"]["total"]) for inv in invoices)
+            expected = invoice_total if self.inclusive else invoice_total + tax
+            report["totals"].update(invoice_total=invoice_total / SCALE, difference=(gross - expected) / SCALE)
+            report["reconciled"] = gross == expected
+        return report
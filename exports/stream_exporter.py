@@ -0,0 +1,144 @@
+# exports/stream_exporter.py
+import io
+import os
+import csv
+import gzip
+import json
+import time
+import threading
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Callable
+
+try:
+    import zstandard
+except ImportError:  # فشرده‌سازی zstd اختیاری است
+    zstandard = None
+
+FORMATS = ("csv", "jsonl")
+COMPRESSIONS = (None, "gzip", "zstd")
+
+
+def rows_from_cursor(cursor: Any, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    تبدیل cursor پایگاه داده (sqlite3 / DB-API) به generator دیکشنری‌ها با fetchmany؛
+    کل نتیجه هیچ‌وقت در حافظه نیست.
+    """
+    names = [d[0] for d in cursor.description or ()]
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        for row in batch:
+            yield dict(zip(names, row))
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class StreamExporter:
+    """
+    خروجی جریانی (generator ورودی، نوشتن تکه‌ای) به CSV یا JSON Lines با فشرده‌سازی اختیاری gzip/zstd.
+    - سطرها در تکه‌های chunk_rows تایی سریال و نوشته می‌شوند، پس مصرف حافظه مستقل از تعداد سطرهاست.
+    - خروجی ابتدا در فایل <filename>.part نوشته و در پایان با os.replace جایگزین می‌شود؛ با لغو یا خطا
+      فایل ناقص حذف می‌شود و فایل قبلی دست‌نخورده می‌ماند.
+    - progress(rows, bytes) پس از هر تکه فراخوانی می‌شود؛ cancel() یا cancel_event بین تکه‌ها بررسی می‌شود.
+    - ستون‌های CSV از fieldnames یا کلیدهای اولین سطر؛ کلید اضافه نادیده و کلید ناموجود خالی نوشته می‌شود.
+    """
+
+    def __init__(self, filename: str, format: str = "csv", compression: Optional[str] = None,
+                 fieldnames: Optional[List[str]] = None, chunk_rows: int = 1000, compresslevel: int = 6,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        fmt = str(format or "csv").lower()
+        if fmt not in FORMATS:
+            raise ValueError("Unsupported export format")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self.filename = filename
+        self.format = fmt
+        self.compression = compression
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.chunk_rows = int(chunk_rows)
+        self.compresslevel = int(compresslevel)
+        self.progress = progress
+        self._cancel = cancel_event or threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _open(self, raw: Any) -> Any:
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self.compresslevel, mtime=0)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=self.compresslevel).stream_writer(raw, closefd=False)
+        return raw
+
+    def _chunks(self, rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def export(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        خروجی: {"path", "rows", "bytes" (حجم فایل نهایی), "elapsed", "cancelled"}؛ با لغو path برابر None است.
+        """
+        started = time.perf_counter()
+        part = self.filename + ".part"
+        written_rows = 0
+        buf = io.StringIO()
+        writer = None
+        cancelled = False
+        try:
+            with open(part, "wb") as raw:
+                out = self._open(raw)
+                try:
+                    for chunk in self._chunks(rows):
+                        if self._cancel.is_set():
+                            raise ExportCancelled()
+                        if self.format == "csv":
+                            if writer is None:
+                                fields = self.fieldnames or list(chunk[0].keys())
+                                writer = csv.DictWriter(buf, fieldnames=fields, extrasaction="ignore")
+                                writer.writeheader()
+                            writer.writerows(chunk)
+                            text = buf.getvalue()
+                            buf.seek(0)
+                            buf.truncate()
+                        else:
+                            text = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in chunk)
+                        out.write(text.encode("utf-8"))
+                        written_rows += len(chunk)
+                        if self.progress is not None:
+                            try:
+                                self.progress(written_rows, raw.tell())
+                            except Exception:
+                                pass
+                    if writer is None and self.format == "csv" and self.fieldnames:
+                        # بدون سطر: فقط سطر عنوان
+                        csv.DictWriter(buf, fieldnames=self.fieldnames).writeheader()
+                        out.write(buf.getvalue().encode("utf-8"))
+                finally:
+                    if out is not raw:
+                        out.close()
+            os.replace(part, self.filename)
+        except ExportCancelled:
+            cancelled = True
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+        return {
+            "path": None if cancelled else self.filename,
+            "rows": written_rows,
+            "bytes": 0 if cancelled else os.path.getsize(self.filename),
+            "elapsed": time.perf_counter() - started,
+            "cancelled": cancelled,
+        }
@@ -0,0 +1,186 @@
+# i18n/text_shaping.py
+from typing import Dict, List, Optional, Tuple
+
+# شکل‌های نمایشی: 0=تنها، 1=پایانی، 2=آغازی، 3=میانی
+ISOLATED, FINAL, INITIAL, MEDIAL = 0, 1, 2, 3
+NONE = -1
+
+# حرف -> (اولین کد در Presentation Forms، تعداد شکل‌ها)؛ 4 = دوطرفه، 2 = فقط اتصال از راست، 1 = بدون اتصال
+_LETTERS: Dict[str, Tuple[int, int]] = {
+    "ء": (0xFE80, 1), "آ": (0xFE81, 2), "أ": (0xFE83, 2), "ؤ": (0xFE85, 2),
+    "إ": (0xFE87, 2), "ئ": (0xFE89, 4), "ا": (0xFE8D, 2), "ب": (0xFE8F, 4),
+    "ة": (0xFE93, 2), "ت": (0xFE95, 4), "ث": (0xFE99, 4), "ج": (0xFE9D, 4),
+    "ح": (0xFEA1, 4), "خ": (0xFEA5, 4), "د": (0xFEA9, 2), "ذ": (0xFEAB, 2),
+    "ر": (0xFEAD, 2), "ز": (0xFEAF, 2), "س": (0xFEB1, 4), "ش": (0xFEB5, 4),
+    "ص": (0xFEB9, 4), "ض": (0xFEBD, 4), "ط": (0xFEC1, 4), "ظ": (0xFEC5, 4),
+    "ع": (0xFEC9, 4), "غ": (0xFECD, 4), "ف": (0xFED1, 4), "ق": (0xFED5, 4),
+    "ك": (0xFED9, 4), "ل": (0xFEDD, 4), "م": (0xFEE1, 4), "ن": (0xFEE5, 4),
+    "ه": (0xFEE9, 4), "و": (0xFEED, 2), "ى": (0xFEEF, 2), "ي": (0xFEF1, 4),
+    # حروف فارسی
+    "پ": (0xFB56, 4), "چ": (0xFB7A, 4), "ژ": (0xFB8A, 2), "ک": (0xFB8E, 4),
+    "گ": (0xFB92, 4), "ی": (0xFBFC, 4),
+}
+
+# لام + الف -> (لیگچر تنها، لیگچر پایانی)
+_LAM_ALEF: Dict[str, Tuple[int, int]] = {
+    "آ": (0xFEF5, 0xFEF6), "أ": (0xFEF7, 0xFEF8),
+    "إ": (0xFEF9, 0xFEFA), "ا": (0xFEFB, 0xFEFC),
+}
+_LAM = "ل"
+_TATWEEL = "ـ"
+_ZWNJ = "‌"
+
+# جایگزین عربی حروف فارسی برای کدپیج‌هایی که آن‌ها را ندارند (مثل cp864)
+FALLBACK_LETTERS: Dict[str, str] = {
+    "پ": "ب", "چ": "ج", "ژ": "ز",
+    "ک": "ك", "گ": "ك", "ی": "ي",
+}
+
+_MIRROR = {"(": ")", ")": "(", "[": "]", "]": "[", "{": "}", "}": "{", "<": ">", ">": "<", "«": "»", "»": "«"}
+
+# یک گلیف: (حرف یا "ل"+الف برای لیگچر، شکل)؛ نویسه‌های غیرعربی شکل NONE دارند
+Glyph = Tuple[str, int]
+
+
+def _forms(ch: str) -> int:
+    if ch == _TATWEEL:
+        return 4
+    entry = _LETTERS.get(ch)
+    return entry[1] if entry else 0
+
+
+def _is_mark(ch: str) -> bool:
+    # اعراب (فتحه، کسره، تشدید و ...) شفاف‌اند و اتصال را قطع نمی‌کنند
+    return "ً" <= ch <= "ٟ" or ch == "ٰ"
+
+
+def is_rtl(ch: str) -> bool:
+    return ("؀" <= ch <= "ۿ" and not ch.isdigit()) or "ﭐ" <= ch <= "﻿"
+
+
+def shape(text: str) -> List[Glyph]:
+    """
+    تبدیل متن منطقی به گلیف‌های متصل (ترتیب منطقی). اعراب حذف می‌شوند چون چاپگرهای حرارتی
+    آن‌ها را روی حرف قبل ترکیب نمی‌کنند.
+    """
+    chars = [c for c in text if not _is_mark(c)]
+    glyphs: List[Glyph] = []
+    i, n = 0, len(chars)
+    prev_joins = False  # آیا نویسه‌ی قبلی به سمت چپ (بعدی) وصل می‌شود
+    while i < n:
+        ch = chars[i]
+        if ch == _ZWNJ:
+            # نیم‌فاصله فقط اتصال را قطع می‌کند و چاپ نمی‌شود
+            prev_joins = False
+            i += 1
+            continue
+        forms = _forms(ch)
+        if forms == 0:
+            glyphs.append((ch, NONE))
+            prev_joins = False
+            i += 1
+            continue
+        nxt = chars[i + 1] if i + 1 < n else None
+        if ch == _LAM and nxt in _LAM_ALEF:
+            glyphs.append((ch + nxt, FINAL if prev_joins else ISOLATED))
+            prev_joins = False
+            i += 2
+            continue
+        next_joins = forms == 4 and nxt is not None and _forms(nxt) >= 2
+        if forms == 1:
+            form = ISOLATED
+        elif prev_joins and next_joins:
+            form = MEDIAL
+        elif prev_joins:
+            form = FINAL
+        elif next_joins:
+            form = INITIAL
+        else:
+            form = ISOLATED
+        glyphs.append((ch, form))
+        prev_joins = next_joins
+        i += 1
+    return glyphs
+
+
+def presentation_char(glyph: Glyph) -> str:
+    """کد یونیکد Presentation Form گلیف (برای پیش‌نمایش/آزمون)"""
+    ch, form = glyph
+    if form == NONE:
+        return ch
+    if len(ch) == 2:
+        return chr(_LAM_ALEF[ch[1]][form])
+    if ch == _TATWEEL:
+        return ch
+    start, count = _LETTERS[ch]
+    if count == 1:
+        return chr(start)
+    if count == 2:
+        form = FINAL if form in (FINAL, MEDIAL) else ISOLATED
+    return chr(start + form)
+
+
+def visual_order(glyphs: List[Glyph]) -> List[Glyph]:
+    """
+    ترتیب نمایشی چپ‌به‌راست برای چاپگر: اگر خط نویسه‌ی راست‌به‌چپ داشته باشد کل خط وارونه
+    و بخش‌های چپ‌به‌راست (عدد، متن لاتین) دوباره به ترتیب خود برگردانده می‌شوند.
+    """
+    if not any(is_rtl(g[0][0]) for g in glyphs):
+        return list(glyphs)
+    out = list(reversed(glyphs))
+
+    def ltr(g: Glyph) -> bool:
+        return g[1] == NONE and not is_rtl(g[0]) and (g[0].isalnum())
+
+    i, n = 0, len(out)
+    while i < n:
+        if not ltr(out[i]):
+            ch = out[i][0]
+            if out[i][1] == NONE and ch in _MIRROR:
+                out[i] = (_MIRROR[ch], NONE)
+            i += 1
+            continue
+        j = i
+        # یک بخش چپ‌به‌راست می‌تواند فاصله و علائم میانی (مثل 12.50 یا Coca Cola) داشته باشد
+        last = i
+        while j < n and (ltr(out[j]) or (out[j][1] == NONE and not is_rtl(out[j][0]))):
+            if ltr(out[j]):
+                last = j
+            j += 1
+        out[i:last + 1] = reversed(out[i:last + 1])
+        i = last + 1
+    return out
+
+
+def shape_text(text: str, rtl_order: bool = True) -> str:
+    """متن شکل‌دهی‌شده با Presentation Forms (و در صورت نیاز به ترتیب نمایشی)"""
+    glyphs = shape(text)
+    if rtl_order:
+        glyphs = visual_order(glyphs)
+    return "".join(presentation_char(g) for g in glyphs)
+
+
+def glyph_candidates(glyph: Glyph) -> List[str]:
+    """
+    نویسه‌های جایگزین یک گلیف به ترتیب ترجیح، برای کدپیج‌هایی که همه‌ی شکل‌ها را ندارند:
+    شکل دقیق، شکل ساده‌تر (میانی->آغازی، پایانی->تنها)، همان شکل‌ها برای حرف عربی جایگزین، و خود حرف.
+    """
+    ch, form = glyph
+    if form == NONE:
+        if "۰" <= ch <= "۹":
+            return [ch, chr(0x0660 + ord(ch) - 0x06F0), chr(0x30 + ord(ch) - 0x06F0)]
+        return [ch]
+    order = {ISOLATED: [ISOLATED], FINAL: [FINAL, ISOLATED],
+             INITIAL: [INITIAL, ISOLATED], MEDIAL: [MEDIAL, INITIAL, FINAL, ISOLATED]}[form]
+    letters = [ch]
+    fallback: Optional[str] = FALLBACK_LETTERS.get(ch)
+    if fallback:
+        # ی پایانی/تنها به شکل ى (بدون نقطه) نزدیک‌تر است
+        letters.append("ى" if ch == "ی" and form in (ISOLATED, FINAL) else fallback)
+    out: List[str] = []
+    for letter in letters:
+        for f in order:
+            out.append(presentation_char((letter, f)))
+    # آخرین چاره: خود حروف پایه (برای کدپیج‌هایی مثل cp1256 که چاپگر خودش شکل‌دهی می‌کند)
+    out.extend(letters)
+    return out
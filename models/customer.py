@@ -2,6 +2,11 @@ from datetime import datetime
 from typing import Optional
 
 class Customer:
+    __slots__ = (
+        "customer_id", "name", "phone", "email", "address",
+        "membership_code", "loyalty_points", "active", "created_at"
+    )
+
     def __init__(
         self,
         customer_id: int,
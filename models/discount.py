@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List, Dict
 from models.order import Order
+from models.money import SCALE, to_minor
 
 class Discount:
     def __init__(
@@ -29,57 +30,82 @@ class Discount:
         self.requires_membership = requires_membership
         self.usage_limit = usage_limit
         self.used_count = 0
+        # اگر DiscountUsageService وصل باشد شمارش مصرف از شمارنده‌ی پایدار آن خوانده می‌شود
+        self.usage_service = None
 
-    def is_valid(self, order: Order) -> bool:
-        now = datetime.now()
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
         if self.start_at and now < self.start_at:
             return False
         if self.end_at and now > self.end_at:
             return False
-        if self.usage_limit is not None and self.used_count >= self.usage_limit:
-            return False
+        return True
+
+    def is_exhausted(self) -> bool:
+        if self.usage_service is not None and self.usage_limit is not None:
+            return not self.usage_service.can_use(self.code)
+        return self.usage_limit is not None and self.used_count >= self.usage_limit
+
+    def accepts(self, order: Order, total_minor: Optional[int] = None) -> bool:
+        """قوانین وابسته به سفارش (عضویت و حداقل مبلغ)؛ total_minor برای جلوگیری از محاسبه‌ی دوباره"""
         if self.requires_membership and not order.customer.has_membership():
             return False
-        if order.calculate_total() < self.min_order_total:
+        total = order.total_minor() if total_minor is None else total_minor
+        if total < to_minor(self.min_order_total):
             return False
         return True
 
-    def _eligible_line_totals(self, order: Order) -> float:
-        total = 0.0
-        for item in order.products:
-            p = item["product"]
-            q = item["quantity"]
-            if self.scope == "order":
-                total += p.price * q
-            elif self.scope == "category" and self.category and p.category == self.category:
-                total += p.price * q
-            elif self.scope == "product" and self.product_id and p.product_id == self.product_id:
-                total += p.price * q
+    def is_valid(self, order: Order) -> bool:
+        return self.is_active() and not self.is_exhausted() and self.accepts(order)
+
+    def _eligible_line_totals(self, order: Order) -> int:
+        """جمع سطرهای مشمول تخفیف در واحد خُرد"""
+        if self.scope == "order":
+            return order.subtotal_minor()
+        if self.scope == "product":
+            if not self.product_id:
+                return 0
+            return sum(l.line_total_minor for l in order.lines_for(self.product_id))
+        total = 0
+        if self.scope == "category" and self.category:
+            for item in order.products:
+                if item.product.category == self.category:
+                    total += item.line_total_minor
         return total
 
-    def calculate_discount(self, order: Order) -> float:
-        if not self.is_valid(order):
-            return 0.0
-        base = self._eligible_line_totals(order)
+    def amount_for(self, base: int) -> int:
+        """مبلغ تخفیف (واحد خُرد) برای جمع مشمول base"""
         if self.kind == "percentage":
             if self.value < 0 or self.value > 100:
-                return 0.0
-            return round(base * (self.value / 100.0), 2)
+                return 0
+            return to_minor(base * self.value / 100.0, 1)
         elif self.kind == "fixed":
-            return round(min(self.value, base), 2)
+            return min(to_minor(self.value), base)
         else:
-            return 0.0
+            return 0
+
+    def discount_minor(self, order: Order) -> int:
+        if not self.is_valid(order):
+            return 0
+        return self.amount_for(self._eligible_line_totals(order))
+
+    def calculate_discount(self, order: Order) -> float:
+        return self.discount_minor(order) / SCALE
 
     def apply_to_order(self, order: Order) -> (float, float):
         """
         Returns (discount_amount, new_order_total).
         Does not mutate order prices. Delivery fee is included in new total.
         """
-        discount_amount = self.calculate_discount(order)
-        new_total = max(0.0, round(order.calculate_total() - discount_amount, 2))
-        return discount_amount, new_total
+        discount = self.discount_minor(order)
+        new_total = max(0, order.total_minor() - discount)
+        return discount / SCALE, new_total / SCALE
 
     def consume(self) -> None:
+        if self.usage_service is not None:
+            if not self.usage_service.try_consume(self.code, self):
+                raise ValueError("Usage limit reached")
+            return
         if self.usage_limit is not None and self.used_count >= self.usage_limit:
             raise ValueError("Usage limit reached")
         self.used_count += 1
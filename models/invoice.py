@@ -1,9 +1,21 @@
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 from models.order import Order
 from models.payment import Payment
+from models.money import SCALE, to_minor, round_money
 
 class Invoice:
+    """
+    فاکتور سفارش.
+    خروجی generate_data کش می‌شود و فقط با تغییر داده‌ی سفارش (Order.data_key: نسخه، قیمت/نام محصولات و سطرها)،
+    نسخه‌ی پرداخت (Payment.version)،
+    اطلاعات مشتری یا فیلدهای خود فاکتور دوباره ساخته می‌شود. دیکشنری برگشتی فقط‌خواندنی در نظر گرفته شود.
+    """
+    __slots__ = (
+        "invoice_id", "order", "payment", "discount_amount", "store_name", "store_address", "created_at",
+        "_data", "_data_key"
+    )
+
     def __init__(
         self,
         invoice_id: int,
@@ -17,41 +29,92 @@ class Invoice:
         self.invoice_id = invoice_id
         self.order = order
         self.payment = payment
-        self.discount_amount = round(discount_amount, 2)
+        self.discount_amount = round_money(discount_amount)
         self.store_name = store_name
         self.store_address = store_address or "Tehran, Iran"
         self.created_at = created_at or datetime.now()
+        self._data: Optional[Dict[str, Any]] = None
+        self._data_key: Optional[Tuple] = None
+
+    def _stamp(self) -> Tuple:
+        c = self.order.customer
+        return (
+            self.order.data_key(), self.payment.version, id(c), c.name, c.address, c.membership_code,
+            self.discount_amount, self.store_name, self.store_address, self.created_at,
+        )
+
+    def data_key(self) -> Tuple:
+        """کلید وضعیت داده‌ی فاکتور (سفارش و محصولات، پرداخت، مشتری و فیلدهای فاکتور)؛ مثلاً برای کش پیش‌نمایش"""
+        return self._stamp()
+
+    def _store_data(self) -> Dict[str, Any]:
+        return {"name": self.store_name, "address": self.store_address}
+
+    def _customer_data(self) -> Dict[str, Any]:
+        c = self.order.customer
+        return {
+            "id": c.customer_id,
+            "name": c.name,
+            "address": c.address,
+            "membership": c.membership_code or "-"
+        }
 
     def generate_data(self) -> Dict[str, Any]:
+        key = self._stamp()
+        if self._data is None or self._data_key != key:
+            self._data = self._build(self._store_data(), self._customer_data())
+            self._data_key = key
+        return self._data
+
+    @staticmethod
+    def generate_many(invoices: Iterable["Invoice"]) -> List[Dict[str, Any]]:
+        """
+        ساخت دسته‌ای داده‌ی فاکتورها (مثلاً گزارش پایان روز).
+        زیر‌دیکشنری‌های store و customer بین فاکتورهای هم‌فروشگاه / هم‌مشتری مشترک‌اند و
+        فاکتورهایی که کش معتبر دارند دوباره ساخته نمی‌شوند.
+        """
+        stores: Dict[Tuple, Dict[str, Any]] = {}
+        customers: Dict[Tuple, Dict[str, Any]] = {}
+        result: List[Dict[str, Any]] = []
+        for inv in invoices:
+            key = inv._stamp()
+            if inv._data is None or inv._data_key != key:
+                store = stores.get(key[7:9])
+                if store is None:
+                    store = stores[key[7:9]] = inv._store_data()
+                customer = customers.get(key[2:6])
+                if customer is None:
+                    customer = customers[key[2:6]] = inv._customer_data()
+                inv._data = inv._build(store, customer)
+                inv._data_key = key
+            result.append(inv._data)
+        return result
+
+    def _build(self, store: Dict[str, Any], customer: Dict[str, Any]) -> Dict[str, Any]:
+        # جمع‌ها به صورت صحیح در واحد خُرد محاسبه و فقط در خروجی به float تبدیل می‌شوند
         lines: List[Dict[str, Any]] = []
-        subtotal = 0.0
+        subtotal = 0
         for item in self.order.products:
-            p = item["product"]
-            q = item["quantity"]
-            line_total = round(p.price * q, 2)
+            p = item.product
+            line_total = item.line_total_minor
             lines.append({
                 "name": p.name,
-                "quantity": q,
+                "quantity": item.quantity,
                 "unit_price": p.price,
-                "line_total": line_total,
+                "line_total": line_total / SCALE,
                 "category": getattr(p, "category", None)
             })
             subtotal += line_total
 
-        delivery = round(self.order.delivery_fee, 2)
-        discount = self.discount_amount
-        total = round(subtotal + delivery - discount, 2)
+        delivery = to_minor(self.order.delivery_fee)
+        discount = to_minor(self.discount_amount)
+        total = subtotal + delivery - discount
 
         return {
             "invoice_id": self.invoice_id,
             "created_at": self.created_at.isoformat(timespec="seconds"),
-            "store": {"name": self.store_name, "address": self.store_address},
-            "customer": {
-                "id": self.order.customer.customer_id,
-                "name": self.order.customer.name,
-                "address": self.order.customer.address,
-                "membership": self.order.customer.membership_code or "-"
-            },
+            "store": store,
+            "customer": customer,
             "order": {"id": self.order.order_id, "status": self.order.status},
             "payment": {
                 "id": self.payment.payment_id,
@@ -62,10 +125,10 @@ class Invoice:
             },
             "lines": lines,
             "summary": {
-                "subtotal": round(subtotal, 2),
-                "delivery": delivery,
-                "discount": discount,
-                "total": total
+                "subtotal": subtotal / SCALE,
+                "delivery": delivery / SCALE,
+                "discount": discount / SCALE,
+                "total": total / SCALE
             }
         }
 
@@ -92,6 +155,25 @@ class Invoice:
     def to_dict(self) -> Dict[str, Any]:
         return self.generate_data()
 
+    def to_print_data(self) -> Dict[str, Any]:
+        """داده‌ی فاکتور در قالب PrintService / قالب‌های چاپ (header, lines, totals)"""
+        data = self.generate_data()
+        s = data["summary"]
+        return {
+            "header": {
+                "order_id": data["order"]["id"],
+                "customer_id": data["customer"]["id"],
+                "status": data["order"]["status"],
+                "created_at": int(self.created_at.timestamp()),
+            },
+            "lines": [
+                {"name": li["name"], "qty": li["quantity"], "price": li["unit_price"], "discount": 0,
+                 "line_total": li["line_total"]}
+                for li in data["lines"]
+            ],
+            "totals": {"subtotal": s["subtotal"], "discount_total": s["discount"], "tax": 0, "grand_total": s["total"]},
+        }
+
     def print_preview(self) -> str:
         # In real system, send to printer; here we just return the preview string.
         return self.render_text_preview()
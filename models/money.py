@@ -0,0 +1,168 @@
+import math
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Any, Iterable, Union
+
+import numpy as np
+
+# تعداد رقم اعشار مبالغ و ضریب واحد خُرد (minor unit)؛ همه‌ی APIهای موجود مبالغ را با دو رقم اعشار برمی‌گردانند.
+DECIMALS = 2
+SCALE = 10 ** DECIMALS
+
+Number = Union[int, float, Decimal, str]
+
+
+def to_minor(amount: Any, scale: int = SCALE) -> int:
+    """
+    تبدیل مبلغ به واحد خُرد صحیح با گرد کردن بانکی (half-even) دقیق.
+    برای float، تساوی‌های ظاهری ناشی از خطای دودویی (مثل 2.675) به عنوان نیمه‌ی واقعی در نظر گرفته می‌شوند.
+    """
+    if isinstance(amount, int):
+        return amount * scale
+    if isinstance(amount, (Decimal, str)):
+        return int((Decimal(amount) * scale).to_integral_value(rounding=ROUND_HALF_EVEN))
+    f = float(amount) * scale
+    n = round(f)
+    d = f - n
+    # فاصله تا نیمه کمتر از چند ulp → تساوی واقعی؛ عدد زوج انتخاب می‌شود
+    if d != 0 and abs(abs(d) - 0.5) <= 8 * math.ulp(f):
+        other = n + (1 if d > 0 else -1)
+        n = n if n % 2 == 0 else other
+    return int(n)
+
+
+def from_minor(minor: int, scale: int = SCALE) -> float:
+    return minor / scale
+
+
+def round_money(amount: Any) -> float:
+    """جایگزین دقیق round(x, 2) برای مبالغ"""
+    return to_minor(amount) / SCALE
+
+
+def format_money(amount: Any, decimals: int = 0) -> str:
+    """قالب‌بندی با جداکننده‌ی هزارگان؛ پیش‌فرض بدون اعشار (ریال)"""
+    if decimals == 0:
+        return f"{to_minor(amount, 1):,}"
+    return f"{to_minor(amount, 10 ** decimals) / 10 ** decimals:,.{decimals}f}"
+
+
+# ---------- نسخه‌های برداری ----------
+def to_minor_array(values: Any, scale: int = SCALE) -> np.ndarray:
+    """معادل برداری to_minor؛ خروجی int64"""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iu":
+        return arr.astype(np.int64) * scale
+    f = arr.astype(np.float64) * scale
+    n = np.rint(f)
+    d = f - n
+    tie = (d != 0) & (np.abs(np.abs(d) - 0.5) <= 8 * np.spacing(np.abs(f)))
+    odd = np.remainder(n, 2) != 0
+    n = np.where(tie & odd, n + np.sign(d), n)
+    return n.astype(np.int64)
+
+
+def from_minor_array(minor: np.ndarray, scale: int = SCALE) -> np.ndarray:
+    return np.asarray(minor, dtype=np.int64) / scale
+
+
+def round_money_array(values: Any) -> np.ndarray:
+    return to_minor_array(values) / SCALE
+
+
+def line_totals_minor(unit_minor: np.ndarray, qty: np.ndarray) -> np.ndarray:
+    """جمع سطرها در واحد خُرد؛ برای تعداد صحیح ضرب صحیح و دقیق است"""
+    qty = np.asarray(qty)
+    if qty.dtype.kind in "iu":
+        return np.asarray(unit_minor, dtype=np.int64) * qty.astype(np.int64)
+    return to_minor_array(np.asarray(unit_minor, dtype=np.float64) * qty, scale=1)
+
+
+class Money:
+    """
+    مبلغ با نمایش صحیح در واحد خُرد (int).
+    جمع و تفریق دقیق‌اند؛ ضرب در عدد اعشاری با گرد کردن بانکی انجام می‌شود.
+    """
+    __slots__ = ("minor",)
+
+    def __init__(self, minor: int = 0):
+        self.minor = int(minor)
+
+    @classmethod
+    def of(cls, amount: Number) -> "Money":
+        return cls(to_minor(amount))
+
+    @classmethod
+    def sum(cls, items: Iterable["Money"]) -> "Money":
+        return cls(sum(m.minor for m in items))
+
+    @property
+    def amount(self) -> float:
+        return self.minor / SCALE
+
+    # --- حساب ---
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor + other.minor)
+
+    def __radd__(self, other: Any) -> "Money":
+        # برای sum() با مقدار اولیه‌ی صفر
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor - other.minor)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor)
+
+    def __mul__(self, factor: Union[int, float]) -> "Money":
+        if isinstance(factor, int):
+            return Money(self.minor * factor)
+        if isinstance(factor, float):
+            return Money(to_minor(self.minor * factor, 1))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def percent(self, rate: float) -> "Money":
+        """rate درصد از این مبلغ (مثلاً 10 برای ده درصد)"""
+        return Money(to_minor(self.minor * rate / 100.0, 1))
+
+    # --- مقایسه ---
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Money) and self.minor == other.minor
+
+    def __lt__(self, other: "Money") -> bool:
+        return self.minor < other.minor
+
+    def __le__(self, other: "Money") -> bool:
+        return self.minor <= other.minor
+
+    def __gt__(self, other: "Money") -> bool:
+        return self.minor > other.minor
+
+    def __ge__(self, other: "Money") -> bool:
+        return self.minor >= other.minor
+
+    def __hash__(self) -> int:
+        return hash(self.minor)
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    # --- تبدیل ---
+    def __float__(self) -> float:
+        return self.amount
+
+    def __str__(self) -> str:
+        return f"{self.amount:.{DECIMALS}f}"
+
+    def __repr__(self) -> str:
+        return f"<Money {self}>"
+
+    def format(self, decimals: int = 0) -> str:
+        return format_money(Decimal(self.minor).scaleb(-DECIMALS), decimals)
@@ -1,14 +1,92 @@
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union, Any, Iterator, Tuple
 from models.customer import Customer
 from models.product import Product
+from models.money import SCALE, to_minor, round_money
+
+class OrderLine:
+    """
+    یک سطر سفارش (محصول + تعداد) با __slots__ به جای دیکشنری.
+    برای سازگاری با کدهای قدیمی، دسترسی دیکشنری‌وار line["product"] / line["quantity"] هم پشتیبانی می‌شود.
+    """
+    __slots__ = ("product", "quantity")
+
+    _KEYS = ("product", "quantity")
+
+    def __init__(self, product: Product, quantity: int):
+        self.product = product
+        self.quantity = quantity
+
+    @classmethod
+    def coerce(cls, line: Union["OrderLine", Dict[str, Any]]) -> "OrderLine":
+        if isinstance(line, OrderLine):
+            return line
+        return cls(line["product"], line["quantity"])
+
+    @property
+    def line_total_minor(self) -> int:
+        q = self.quantity
+        if isinstance(q, int):
+            return self.product._price_minor * q
+        return to_minor(self.product._price_minor * q, 1)
+
+    @property
+    def line_total(self) -> float:
+        return self.line_total_minor / SCALE
+
+    # --- سازگاری با دیکشنری ---
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._KEYS else default
+
+    def keys(self):
+        return self._KEYS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"product": self.product, "quantity": self.quantity}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (OrderLine, dict)):
+            return self.product is other["product"] and self.quantity == other["quantity"]
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<OrderLine product={self.product.product_id} quantity={self.quantity}>"
+
 
 class Order:
+    """
+    سفارش مشتری.
+    جمع جزء و جمع کل کش می‌شوند و با متدهای سفارش (add/remove/update_quantity/set_delivery/apply_discount)
+    یا تغییر نسخه‌ی محصولات همین سفارش (Product.version) باطل می‌شوند؛ پس تغییر قیمت یک محصول مشترک در
+    همه‌ی سفارش‌های آن دیده می‌شود. پس از تغییر مستقیم products یا سطرها invalidate_totals() را صدا بزنید.
+    """
+    __slots__ = (
+        "order_id", "customer", "products", "status", "delivery_method",
+        "delivery_fee", "discount_amount", "created_at", "updated_at",
+        "_totals", "_line_index", "_version"
+    )
+
     def __init__(
         self,
         order_id: int,
         customer: Customer,
-        products: Optional[List[Dict]] = None,
+        products: Optional[List[Union[OrderLine, Dict]]] = None,
         status: str = "Pending",
         delivery_method: Optional[str] = None,
         delivery_fee: float = 0.0,
@@ -16,44 +94,115 @@ class Order:
     ):
         self.order_id = order_id
         self.customer = customer
-        self.products = products or []  # [{ "product": Product, "quantity": int }]
+        self.products: List[OrderLine] = [OrderLine.coerce(p) for p in (products or [])]
         self.status = status
         self.delivery_method = delivery_method
         self.delivery_fee = delivery_fee
+        self.discount_amount = 0.0
         self.created_at = created_at or datetime.now()
         self.updated_at = self.created_at
+        # (کلید، جمع جزء، جمع کل)؛ در یک اسلات تا حافظه‌ی هر سفارش زیاد نشود
+        self._totals: Optional[Tuple[tuple, int, int]] = None
+        # (تعداد سطرها، product_id -> سطرهای آن محصول)؛ به صورت تنبل ساخته می‌شود تا سفارش‌های فقط‌خواندنی
+        # (مثلاً بارگذاری‌شده برای تحلیل) هزینه‌ی حافظه‌ی ایندکس را نپردازند.
+        self._line_index: Optional[Tuple[int, Dict[int, List[OrderLine]]]] = None
+        # شماره‌ی نسخه؛ با هر تغییر از طریق متدها افزایش می‌یابد (کلید کش فاکتور)
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _mark_dirty(self) -> None:
+        self._totals = None
+        self._version += 1
+
+    def invalidate_totals(self) -> None:
+        """باطل‌سازی کش جمع‌ها و ایندکس سطرها پس از تغییر مستقیم products یا قیمت‌ها"""
+        self._mark_dirty()
+        self._line_index = None
+
+    def _index(self) -> Dict[int, List[OrderLine]]:
+        # ایندکس به تعداد (نه قیمت یا مقدار) سطرها وابسته است؛ تغییر طول products آن را بازسازی می‌کند
+        if self._line_index is None or self._line_index[0] != len(self.products):
+            index: Dict[int, List[OrderLine]] = {}
+            for line in self.products:
+                index.setdefault(line.product.product_id, []).append(line)
+            self._line_index = (len(self.products), index)
+        return self._line_index[1]
+
+    def get_line(self, product_id: int) -> Optional[OrderLine]:
+        lines = self._index().get(product_id)
+        return lines[0] if lines else None
+
+    def lines_for(self, product_id: int) -> List[OrderLine]:
+        return list(self._index().get(product_id, ()))
 
     # --- مدیریت محصولات ---
     def add_product(self, product: Product, quantity: int) -> None:
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
-        self.products.append({"product": product, "quantity": quantity})
+        line = OrderLine(product, quantity)
+        self.products.append(line)
+        if self._line_index is not None and self._line_index[0] == len(self.products) - 1:
+            index = self._line_index[1]
+            index.setdefault(product.product_id, []).append(line)
+            self._line_index = (len(self.products), index)
+        self._mark_dirty()
         self.updated_at = datetime.now()
 
     def remove_product(self, product_id: int) -> None:
-        self.products = [p for p in self.products if p["product"].product_id != product_id]
+        index = self._index()
+        removed = index.pop(product_id, None)
+        if removed:
+            gone = {id(line) for line in removed}
+            self.products = [p for p in self.products if id(p) not in gone]
+            self._line_index = (len(self.products), index)
+            self._mark_dirty()
         self.updated_at = datetime.now()
 
     def update_quantity(self, product_id: int, quantity: int) -> None:
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
-        for p in self.products:
-            if p["product"].product_id == product_id:
-                p["quantity"] = quantity
-                self.updated_at = datetime.now()
-                return
-        raise ValueError("Product not found in order")
+        line = self.get_line(product_id)
+        if line is None:
+            raise ValueError("Product not found in order")
+        line.quantity = quantity
+        self._mark_dirty()
+        self.updated_at = datetime.now()
+
+    # --- محاسبات مالی (صحیح در واحد خُرد) ---
+    def data_key(self) -> tuple:
+        """کلید وضعیت محاسباتی سفارش: نسخه‌ی سفارش، تعداد سطرها، مجموع نسخه‌ی محصولات و هزینه‌ی ارسال"""
+        return (self._version, len(self.products), sum(line.product._version for line in self.products),
+                self.delivery_fee)
+
+    def _cached_totals(self) -> Tuple[tuple, int, int]:
+        key = self.data_key()
+        totals = self._totals
+        if totals is None or totals[0] != key:
+            subtotal = sum(p.line_total_minor for p in self.products)
+            totals = self._totals = (key, subtotal, subtotal + to_minor(self.delivery_fee))
+        return totals
+
+    def subtotal_minor(self) -> int:
+        return self._cached_totals()[1]
+
+    def total_minor(self) -> int:
+        return self._cached_totals()[2]
+
+    def calculate_subtotal(self) -> float:
+        return self.subtotal_minor() / SCALE
 
-    # --- محاسبات مالی ---
     def calculate_total(self) -> float:
-        total = sum(p["product"].price * p["quantity"] for p in self.products)
-        return round(total + self.delivery_fee, 2)
+        return self.total_minor() / SCALE
 
     def apply_discount(self, percent: float) -> None:
         if percent < 0 or percent > 100:
             raise ValueError("Discount percent must be between 0 and 100")
         for p in self.products:
-            p["product"].price = round(p["product"].price * (1 - percent / 100), 2)
+            p.product.price = round_money(p.product.price * (1 - percent / 100))
+        self._mark_dirty()
         self.updated_at = datetime.now()
 
     # --- مدیریت وضعیت ---
@@ -62,6 +211,7 @@ class Order:
         if new_status not in valid_statuses:
             raise ValueError("Invalid status")
         self.status = new_status
+        self._version += 1
         self.updated_at = datetime.now()
 
     def is_completed(self) -> bool:
@@ -73,6 +223,8 @@ class Order:
             raise ValueError("Delivery method cannot be empty")
         self.delivery_method = method
         self.delivery_fee = fee
+        self._totals = None
+        self._version += 1
         self.updated_at = datetime.now()
 
     def get_delivery_info(self) -> str:
@@ -3,6 +3,8 @@ from typing import Optional
 from models.order import Order
 
 class Payment:
+    __slots__ = ("payment_id", "order", "amount", "method", "status", "transaction_code", "paid_at", "_version")
+
     def __init__(
         self,
         payment_id: int,
@@ -20,6 +22,16 @@ class Payment:
         self.status = status
         self.transaction_code = transaction_code
         self.paid_at = paid_at
+        # شماره‌ی نسخه؛ با هر تغییر وضعیت افزایش می‌یابد (کلید کش فاکتور)
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def mark_changed(self) -> None:
+        """پس از تغییر مستقیم فیلدها (مثلاً paid_at) صدا بزنید تا کش‌های وابسته باطل شوند."""
+        self._version += 1
 
     # --- مدیریت وضعیت پرداخت ---
     def process_payment(self, success: bool, transaction_code: Optional[str] = None) -> None:
@@ -35,17 +47,20 @@ class Payment:
             self.paid_at = datetime.now()
         else:
             self.status = "Failed"
+        self._version += 1
 
     def refund(self) -> None:
         if self.status != "Completed":
             raise ValueError("Only completed payments can be refunded")
         self.status = "Refunded"
+        self._version += 1
 
     def update_status(self, new_status: str) -> None:
         valid_statuses = ["Pending", "Completed", "Failed", "Refunded"]
         if new_status not in valid_statuses:
             raise ValueError("Invalid payment status")
         self.status = new_status
+        self._version += 1
 
     # --- اطلاعات پرداخت ---
     def get_payment_info(self) -> str:
@@ -63,9 +78,7 @@ class Payment:
         lines.append(f"Transaction Code: {self.transaction_code or '-'}")
         lines.append("Products:")
         for item in self.order.products:
-            p = item["product"]
-            q = item["quantity"]
-            lines.append(f" - {p.name} x{q} = {round(p.price * q, 2)}")
+            lines.append(f" - {item.product.name} x{item.quantity} = {item.line_total}")
         lines.append(f"Delivery: {self.order.delivery_method} ({self.order.delivery_fee})")
         lines.append(f"Order Total: {self.order.calculate_total()}")
         lines.append(f"Paid Amount: {self.amount}")
@@ -1,7 +1,17 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
+from models.money import SCALE, to_minor, round_money
+
+# قیمت‌های تکراری (آیتم‌های منو) یک شیء int مشترک دارند تا بارگذاری انبوه محصولات برای تحلیل حافظه‌ی
+# کمتری بگیرد؛ اندازه‌ی این مخزن محدود است.
+_PRICE_POOL: Dict[int, int] = {}
+_PRICE_POOL_LIMIT = 4096
 
 class Product:
+    # قیمت به صورت صحیح در واحد خُرد نگه داشته می‌شود؛ price همچنان float برمی‌گرداند
+    # _version با هر تغییر قیمت/نام/دسته زیاد می‌شود تا سفارش‌ها و فاکتورهای دارای این محصول کش خود را باطل کنند
+    __slots__ = ("product_id", "name", "_price_minor", "category", "stock", "description", "created_at", "_version")
+
     def __init__(
         self,
         product_id: int,
@@ -12,6 +22,7 @@ class Product:
         description: Optional[str] = None,
         created_at: Optional[datetime] = None
     ):
+        self._version = 0
         self.product_id = product_id
         self.name = name
         self.price = price
@@ -20,6 +31,27 @@ class Product:
         self.description = description
         self.created_at = created_at or datetime.now()
 
+    @property
+    def price(self) -> float:
+        return self._price_minor / SCALE
+
+    @price.setter
+    def price(self, value: float) -> None:
+        minor = to_minor(value)
+        pooled = _PRICE_POOL.get(minor)
+        if pooled is None and len(_PRICE_POOL) < _PRICE_POOL_LIMIT:
+            pooled = _PRICE_POOL[minor] = minor
+        self._price_minor = minor if pooled is None else pooled
+        self._version += 1
+
+    @property
+    def price_minor(self) -> int:
+        return self._price_minor
+
+    @property
+    def version(self) -> int:
+        return self._version
+
     def update_stock(self, amount: int) -> None:
         self.stock += amount
         if self.stock < 0:
@@ -28,22 +60,24 @@ class Product:
     def apply_discount(self, percent: float) -> None:
         if percent < 0 or percent > 100:
             raise ValueError("Discount percent must be between 0 and 100")
-        self.price = round(self.price * (1 - percent / 100), 2)
+        self.price = round_money(self.price * (1 - percent / 100))
 
     def update_price(self, new_price: float) -> None:
         if new_price <= 0:
             raise ValueError("Price must be positive")
-        self.price = round(new_price, 2)
+        self.price = new_price
 
     def update_name(self, new_name: str) -> None:
         if not new_name:
             raise ValueError("Name cannot be empty")
         self.name = new_name.strip()
+        self._version += 1
 
     def update_category(self, new_category: str) -> None:
         if not new_category:
             raise ValueError("Category cannot be empty")
         self.category = new_category.strip()
+        self._version += 1
 
     def update_description(self, new_description: Optional[str]) -> None:
         self.description = new_description.strip() if new_description else None
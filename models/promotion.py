@@ -0,0 +1,95 @@
+from datetime import datetime, date, time, timedelta
+from typing import Optional, List, Tuple, Iterable
+
+def jalali_to_gregorian(jy: int, jm: int, jd: int) -> date:
+    """تبدیل تاریخ شمسی به میلادی (الگوریتم محاسباتی، بدون وابستگی به jdatetime)"""
+    jy += 1595
+    days = -355668 + (365 * jy) + ((jy // 33) * 8) + (((jy % 33) + 3) // 4) + jd
+    days += (jm - 1) * 31 if jm < 7 else ((jm - 7) * 30) + 186
+    gy = 400 * (days // 146097)
+    days %= 146097
+    if days > 36524:
+        days -= 1
+        gy += 100 * (days // 36524)
+        days %= 36524
+        if days >= 365:
+            days += 1
+    gy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        gy += (days - 1) // 365
+        days = (days - 1) % 365
+    gd = days + 1
+    leap = (gy % 4 == 0 and gy % 100 != 0) or (gy % 400 == 0)
+    month_days = [0, 31, 29 if leap else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    gm = 1
+    while gm <= 12 and gd > month_days[gm]:
+        gd -= month_days[gm]
+        gm += 1
+    return date(gy, gm, gd)
+
+
+class PromotionSchedule:
+    """
+    زمان‌بندی تکرارشونده‌ی یک تبلیغ/تخفیف.
+    - windows: بازه‌های روزانه [(شروع، پایان)]؛ اگر پایان <= شروع باشد بازه از نیمه‌شب عبور می‌کند.
+      بدون windows یعنی کل روز.
+    - weekdays: روزهای مجاز هفته (0=دوشنبه ... 5=شنبه، 6=یکشنبه مثل datetime.weekday)؛ None یعنی همه‌ی روزها.
+      روز هفته بر اساس روز شروع بازه سنجیده می‌شود.
+    - start_date / end_date: محدوده‌ی تاریخ (شامل هر دو سر)؛ برای تاریخ شمسی از jalali_range استفاده کنید.
+    """
+
+    def __init__(
+        self,
+        windows: Optional[Iterable[Tuple[time, time]]] = None,
+        weekdays: Optional[Iterable[int]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ):
+        self.windows: List[Tuple[time, time]] = list(windows or [(time.min, time.min)])
+        self.weekdays = frozenset(weekdays) if weekdays is not None else None
+        if self.weekdays is not None and not self.weekdays <= set(range(7)):
+            raise ValueError("Weekdays must be in 0..6")
+        if start_date and end_date and end_date < start_date:
+            raise ValueError("end_date must not be before start_date")
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @classmethod
+    def jalali_range(
+        cls,
+        start: Tuple[int, int, int],
+        end: Tuple[int, int, int],
+        windows: Optional[Iterable[Tuple[time, time]]] = None,
+        weekdays: Optional[Iterable[int]] = None,
+    ) -> "PromotionSchedule":
+        """محدوده‌ی تاریخ شمسی، مثلاً jalali_range((1403, 1, 1), (1403, 1, 13)) برای تعطیلات نوروز"""
+        return cls(windows, weekdays, jalali_to_gregorian(*start), jalali_to_gregorian(*end))
+
+    def occurrences(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """بازه‌های فعال [شروع، پایان) که با [start, end) هم‌پوشانی دارند"""
+        result: List[Tuple[datetime, datetime]] = []
+        # یک روز قبل هم بررسی می‌شود تا بازه‌های عبوری از نیمه‌شب از دست نروند
+        day = start.date() - timedelta(days=1)
+        last = end.date()
+        if self.start_date and day < self.start_date:
+            day = self.start_date
+        if self.end_date and last > self.end_date:
+            last = self.end_date
+        while day <= last:
+            if self.weekdays is None or day.weekday() in self.weekdays:
+                for w_start, w_end in self.windows:
+                    s = datetime.combine(day, w_start)
+                    e = datetime.combine(day, w_end)
+                    if e <= s:
+                        e += timedelta(days=1)
+                    if s < end and e > start:
+                        result.append((s, e))
+            day += timedelta(days=1)
+        return result
+
+    def is_active(self, at: datetime) -> bool:
+        return bool(self.occurrences(at, at + timedelta(microseconds=1)))
+
+    def __repr__(self) -> str:
+        return f"<PromotionSchedule windows={len(self.windows)} weekdays={sorted(self.weekdays) if self.weekdays is not None else '*'} from={self.start_date} to={self.end_date}>"
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+class Recipe:
+    """
+    دستور پخت (BOM) یک آیتم منو.
+    ingredients: {ingredient_sku: مقدار مصرفی به ازای yield_qty واحد محصول}
+    """
+
+    def __init__(
+        self,
+        product_id: Union[int, str],
+        name: str,
+        ingredients: Optional[Dict[str, float]] = None,
+        yield_qty: float = 1.0,
+        created_at: Optional[datetime] = None
+    ):
+        if yield_qty <= 0:
+            raise ValueError("Yield quantity must be positive")
+        self.product_id = product_id
+        self.name = name
+        self.ingredients: Dict[str, float] = {}
+        self.yield_qty = float(yield_qty)
+        self.created_at = created_at or datetime.now()
+        self.updated_at = self.created_at
+        for sku, qty in (ingredients or {}).items():
+            self.add_ingredient(sku, qty)
+
+    # --- مدیریت مواد اولیه ---
+    def add_ingredient(self, sku: str, quantity: float) -> None:
+        if not sku or not str(sku).strip():
+            raise ValueError("Ingredient SKU cannot be empty")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        sku = str(sku).strip()
+        self.ingredients[sku] = self.ingredients.get(sku, 0.0) + float(quantity)
+        self.updated_at = datetime.now()
+
+    def remove_ingredient(self, sku: str) -> None:
+        self.ingredients.pop(str(sku).strip(), None)
+        self.updated_at = datetime.now()
+
+    def update_quantity(self, sku: str, quantity: float) -> None:
+        sku = str(sku).strip()
+        if sku not in self.ingredients:
+            raise ValueError("Ingredient not found in recipe")
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        self.ingredients[sku] = float(quantity)
+        self.updated_at = datetime.now()
+
+    # --- محاسبات ---
+    def per_unit(self) -> Dict[str, float]:
+        """مصرف هر ماده اولیه به ازای یک واحد محصول"""
+        return {sku: qty / self.yield_qty for sku, qty in self.ingredients.items()}
+
+    def requirements(self, quantity: float) -> Dict[str, float]:
+        """مواد لازم برای تولید quantity واحد محصول"""
+        return {sku: round(qty * quantity, 4) for sku, qty in self.per_unit().items()}
+
+    def __repr__(self) -> str:
+        return f"<Recipe product={self.product_id} name={self.name} ingredients={len(self.ingredients)} yield={self.yield_qty}>"
@@ -0,0 +1,624 @@
+# printing/barcode_generator.py
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from fpdf import FPDF
+
+# ---------- Code 128 ----------
+# الگوی پهنای نوار/فاصله‌ی هر نماد (0..106)؛ 103..105 شروع A/B/C و 106 پایان
+_CODE128 = (
+    "212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 "
+    "221312 231212 112232 122132 122231 113222 123122 123221 223211 221132 "
+    "221231 213212 223112 312131 311222 321122 321221 312212 322112 322211 "
+    "212123 212321 232121 111323 131123 131321 112313 132113 132311 211313 "
+    "231113 231311 112133 112331 132131 113123 113321 133121 313121 211331 "
+    "231131 213113 213311 213131 311123 311321 331121 312113 312311 332111 "
+    "314111 221411 431111 111224 111422 121124 121421 141122 141221 112214 "
+    "112412 122114 122411 142112 142211 241211 221114 413111 241112 134111 "
+    "111242 121142 121241 114212 124112 124211 411212 421112 421211 212141 "
+    "214121 412121 111143 111341 131141 114113 114311 411113 411311 113141 "
+    "114131 311141 411131 211412 211214 211232 2331112"
+).split()
+_START_B, _START_C, _CODE_B, _CODE_C, _STOP = 104, 105, 100, 99, 106
+
+
+def _widths_to_modules(widths: str) -> List[int]:
+    out: List[int] = []
+    for i, w in enumerate(widths):
+        out.extend([1 - i % 2] * int(w))
+    return out
+
+
+def code128_modules(data: str) -> List[int]:
+    """
+    ماژول‌های Code 128 (1 = نوار). متن ASCII قابل چاپ با مجموعه‌ی B کدگذاری می‌شود و
+    دنباله‌های رقمی (حداقل 4 رقم) با مجموعه‌ی C فشرده می‌شوند.
+    """
+    if not data:
+        raise ValueError("Barcode data is empty")
+    if any(not (32 <= ord(c) <= 126) for c in data):
+        raise ValueError("Code 128 supports printable ASCII only")
+    values: List[int] = []
+    i, n = 0, len(data)
+    current = None
+    while i < n:
+        run = 0
+        while i + run < n and data[i + run].isdigit():
+            run += 1
+        if run >= 4:
+            # تعداد زوج رقم با C؛ رقم فرد اضافه با B
+            if run % 2:
+                if current != "B":
+                    values.append(_START_B if current is None else _CODE_B)
+                    current = "B"
+                values.append(ord(data[i]) - 32)
+                i += 1
+                run -= 1
+            values.append(_START_C if current is None else _CODE_C)
+            current = "C"
+            for k in range(i, i + run, 2):
+                values.append(int(data[k:k + 2]))
+            i += run
+        else:
+            if current != "B":
+                values.append(_START_B if current is None else _CODE_B)
+                current = "B"
+            values.append(ord(data[i]) - 32)
+            i += 1
+    checksum = values[0] + sum(v * pos for pos, v in enumerate(values[1:], start=1))
+    values.append(checksum % 103)
+    values.append(_STOP)
+    modules: List[int] = []
+    for v in values:
+        modules.extend(_widths_to_modules(_CODE128[v]))
+    return modules
+
+
+# ---------- EAN-13 ----------
+_EAN_R = ("1110010", "1100110", "1101100", "1000010", "1011100", "1001110", "1010000", "1000100", "1001000", "1110100")
+_EAN_L = tuple("".join("1" if b == "0" else "0" for b in r) for r in _EAN_R)
+_EAN_G = tuple(r[::-1] for r in _EAN_R)
+_EAN_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+
+def ean13_checksum(digits12: str) -> int:
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits12))
+    return (10 - total % 10) % 10
+
+
+def ean13_modules(code: str) -> List[int]:
+    """ماژول‌های EAN-13 از 12 رقم (رقم کنترل محاسبه می‌شود) یا 13 رقم (رقم کنترل بررسی می‌شود)"""
+    if not code.isdigit() or len(code) not in (12, 13):
+        raise ValueError("EAN-13 requires 12 or 13 digits")
+    check = ean13_checksum(code[:12])
+    if len(code) == 13 and int(code[12]) != check:
+        raise ValueError("Invalid EAN-13 check digit")
+    digits = code[:12] + str(check)
+    parity = _EAN_PARITY[int(digits[0])]
+    bits = "101"
+    for d, p in zip(digits[1:7], parity):
+        bits += (_EAN_L if p == "L" else _EAN_G)[int(d)]
+    bits += "01010"
+    for d in digits[7:]:
+        bits += _EAN_R[int(d)]
+    bits += "101"
+    return [int(b) for b in bits]
+
+
+# ---------- QR Code (حالت بایت، نسخه‌های 1 تا 40) ----------
+_QR_ECC_PER_BLOCK = (
+    (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+)
+_QR_BLOCKS = (
+    (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+)
+# سطح تصحیح خطا -> (اندیس جدول، بیت‌های format)
+_QR_LEVELS = {"L": (0, 1), "M": (1, 0), "Q": (2, 3), "H": (3, 2)}
+
+# جدول‌های لگاریتم/توان GF(256) با چندجمله‌ای 0x11D
+_GF_EXP = [0] * 512
+_GF_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _GF_EXP[_i] = _x
+    _GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+for _i in range(255, 512):
+    _GF_EXP[_i] = _GF_EXP[_i - 255]
+
+
+def _gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return _GF_EXP[_GF_LOG[a] + _GF_LOG[b]]
+
+
+def _rs_divisor(degree: int) -> List[int]:
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_mul(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_mul(root, 0x02)
+    return result
+
+
+def _rs_remainder(data: List[int], divisor: List[int]) -> List[int]:
+    result = [0] * len(divisor)
+    for b in data:
+        factor = b ^ result.pop(0)
+        result.append(0)
+        for i, coef in enumerate(divisor):
+            result[i] ^= _gf_mul(coef, factor)
+    return result
+
+
+def _qr_raw_modules(ver: int) -> int:
+    result = (16 * ver + 128) * ver + 64
+    if ver >= 2:
+        numalign = ver // 7 + 2
+        result -= (25 * numalign - 10) * numalign - 55
+        if ver >= 7:
+            result -= 36
+    return result
+
+
+def _qr_data_codewords(ver: int, level: int) -> int:
+    return _qr_raw_modules(ver) // 8 - _QR_ECC_PER_BLOCK[level][ver] * _QR_BLOCKS[level][ver]
+
+
+def _qr_alignment_positions(ver: int) -> List[int]:
+    if ver == 1:
+        return []
+    numalign = ver // 7 + 2
+    step = (ver * 8 + numalign * 3 + 5) // (numalign * 4 - 4) * 2
+    size = ver * 4 + 17
+    return [6] + sorted(size - 7 - i * step for i in range(numalign - 1))
+
+
+class _QRBuilder:
+    def __init__(self, ver: int, level: int, format_bits: int):
+        self.ver = ver
+        self.level = level
+        self.format_bits = format_bits
+        self.size = ver * 4 + 17
+        self.modules = [[False] * self.size for _ in range(self.size)]
+        self.function = [[False] * self.size for _ in range(self.size)]
+
+    def set_function(self, x: int, y: int, dark: bool) -> None:
+        self.modules[y][x] = dark
+        self.function[y][x] = True
+
+    def draw_function_patterns(self) -> None:
+        size = self.size
+        for i in range(size):
+            self.set_function(6, i, i % 2 == 0)
+            self.set_function(i, 6, i % 2 == 0)
+        for cx, cy in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < size and 0 <= y < size:
+                        self.set_function(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+        positions = _qr_alignment_positions(self.ver)
+        last = len(positions) - 1
+        for i, px in enumerate(positions):
+            for j, py in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self.set_function(px + dx, py + dy, max(abs(dx), abs(dy)) != 1)
+        self.draw_format(0)
+        self.draw_version()
+
+    def draw_format(self, mask: int) -> None:
+        size = self.size
+        data = self.format_bits << 3 | mask
+        rem = data
+        for _ in range(10):
+            rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+        bits = (data << 10 | rem) ^ 0x5412
+
+        def bit(i: int) -> bool:
+            return (bits >> i) & 1 != 0
+
+        for i in range(6):
+            self.set_function(8, i, bit(i))
+        self.set_function(8, 7, bit(6))
+        self.set_function(8, 8, bit(7))
+        self.set_function(7, 8, bit(8))
+        for i in range(9, 15):
+            self.set_function(14 - i, 8, bit(i))
+        for i in range(8):
+            self.set_function(size - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self.set_function(8, size - 15 + i, bit(i))
+        self.set_function(8, size - 8, True)
+
+    def draw_version(self) -> None:
+        if self.ver < 7:
+            return
+        rem = self.ver
+        for _ in range(12):
+            rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+        bits = self.ver << 12 | rem
+        for i in range(18):
+            dark = (bits >> i) & 1 != 0
+            a = self.size - 11 + i % 3
+            b = i // 3
+            self.set_function(a, b, dark)
+            self.set_function(b, a, dark)
+
+    def interleave(self, data: List[int]) -> List[int]:
+        numblocks = _QR_BLOCKS[self.level][self.ver]
+        ecclen = _QR_ECC_PER_BLOCK[self.level][self.ver]
+        raw = _qr_raw_modules(self.ver) // 8
+        numshort = numblocks - raw % numblocks
+        shortlen = raw // numblocks
+        divisor = _rs_divisor(ecclen)
+        blocks: List[List[int]] = []
+        k = 0
+        for i in range(numblocks):
+            dat = data[k:k + shortlen - ecclen + (0 if i < numshort else 1)]
+            k += len(dat)
+            ecc = _rs_remainder(dat, divisor)
+            if i < numshort:
+                dat = dat + [0]
+            blocks.append(dat + ecc)
+        result: List[int] = []
+        for i in range(len(blocks[0])):
+            for j, blk in enumerate(blocks):
+                if i != shortlen - ecclen or j >= numshort:
+                    result.append(blk[i])
+        return result
+
+    def draw_codewords(self, codewords: List[int]) -> None:
+        size = self.size
+        total = len(codewords) * 8
+        i = 0
+        right = size - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            upward = ((right + 1) & 2) == 0
+            for vert in range(size):
+                y = size - 1 - vert if upward else vert
+                for j in range(2):
+                    x = right - j
+                    if not self.function[y][x] and i < total:
+                        self.modules[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1 != 0
+                        i += 1
+            right -= 2
+
+    def apply_mask(self, mask: int) -> None:
+        cond = (
+            lambda x, y: (x + y) % 2 == 0,
+            lambda x, y: y % 2 == 0,
+            lambda x, y: x % 3 == 0,
+            lambda x, y: (x + y) % 3 == 0,
+            lambda x, y: (x // 3 + y // 2) % 2 == 0,
+            lambda x, y: x * y % 2 + x * y % 3 == 0,
+            lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+            lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+        )[mask]
+        for y in range(self.size):
+            row, fn = self.modules[y], self.function[y]
+            for x in range(self.size):
+                if not fn[x] and cond(x, y):
+                    row[x] = not row[x]
+
+    # --- امتیاز جریمه برای انتخاب ماسک ---
+    def _add_history(self, length: int, history: List[int]) -> None:
+        if history[0] == 0:
+            length += self.size
+        history.pop()
+        history.insert(0, length)
+
+    @staticmethod
+    def _count_patterns(h: List[int]) -> int:
+        n = h[1]
+        core = n > 0 and h[2] == h[4] == h[5] == n and h[3] == n * 3
+        return (1 if core and h[0] >= n * 4 and h[6] >= n else 0) + (1 if core and h[6] >= n * 4 and h[0] >= n else 0)
+
+    def _line_penalty(self, line: List[bool]) -> int:
+        result = 0
+        color = False
+        run = 0
+        history = [0] * 7
+        for dark in line:
+            if dark == color:
+                run += 1
+                if run == 5:
+                    result += 3
+                elif run > 5:
+                    result += 1
+            else:
+                self._add_history(run, history)
+                if not color:
+                    result += self._count_patterns(history) * 40
+                color = dark
+                run = 1
+        if color:
+            self._add_history(run, history)
+            run = 0
+        self._add_history(run + self.size, history)
+        return result + self._count_patterns(history) * 40
+
+    def penalty(self) -> int:
+        m = self.modules
+        size = self.size
+        result = sum(self._line_penalty(row) for row in m)
+        result += sum(self._line_penalty([m[y][x] for y in range(size)]) for x in range(size))
+        for y in range(size - 1):
+            for x in range(size - 1):
+                if m[y][x] == m[y][x + 1] == m[y + 1][x] == m[y + 1][x + 1]:
+                    result += 3
+        dark = sum(row.count(True) for row in m)
+        total = size * size
+        k = (abs(dark * 20 - total * 10) + total - 1) // total - 1
+        return result + k * 10
+
+
+def qr_matrix(data: str, level: str = "M") -> List[List[bool]]:
+    """ماتریس QR (True = تیره) برای متن UTF-8 در حالت بایت؛ کوچک‌ترین نسخه‌ی کافی انتخاب می‌شود"""
+    if level not in _QR_LEVELS:
+        raise ValueError(f"Unknown QR error correction level: {level}")
+    lvl, format_bits = _QR_LEVELS[level]
+    payload = data.encode("utf-8")
+    for ver in range(1, 41):
+        count_bits = 8 if ver <= 9 else 16
+        capacity = _qr_data_codewords(ver, lvl) * 8
+        if 4 + count_bits + len(payload) * 8 <= capacity:
+            break
+    else:
+        raise ValueError("Data too long for a QR code")
+
+    bits: List[int] = []
+
+    def put(value: int, length: int) -> None:
+        bits.extend((value >> i) & 1 for i in reversed(range(length)))
+
+    put(0b0100, 4)
+    put(len(payload), count_bits)
+    for b in payload:
+        put(b, 8)
+    put(0, min(4, capacity - len(bits)))
+    put(0, -len(bits) % 8)
+    codewords = [int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(codewords) * 8 < capacity:
+        codewords.append(pad)
+        pad ^= 0xEC ^ 0x11
+
+    qr = _QRBuilder(ver, lvl, format_bits)
+    qr.draw_function_patterns()
+    qr.draw_codewords(qr.interleave(codewords))
+    best, best_penalty = 0, None
+    for mask in range(8):
+        qr.apply_mask(mask)
+        qr.draw_format(mask)
+        p = qr.penalty()
+        if best_penalty is None or p < best_penalty:
+            best, best_penalty = mask, p
+        qr.apply_mask(mask)  # XOR دوباره ماسک را برمی‌گرداند
+    qr.apply_mask(best)
+    qr.draw_format(best)
+    return qr.modules
+
+
+# ---------- Raster ----------
+class Raster:
+    """تصویر تک‌بیتی فشرده (1 = سیاه، MSB اول) هم‌قالب PBM P4 و فرمان GS v 0 در ESC/POS"""
+    __slots__ = ("width", "height", "row_bytes", "data")
+
+    def __init__(self, rows: List[List[int]]):
+        self.height = len(rows)
+        self.width = len(rows[0]) if rows else 0
+        self.row_bytes = (self.width + 7) // 8
+        out = bytearray()
+        for row in rows:
+            padded = list(row) + [0] * (self.row_bytes * 8 - self.width)
+            for i in range(0, len(padded), 8):
+                byte = 0
+                for bit in padded[i:i + 8]:
+                    byte = (byte << 1) | bit
+                out.append(byte)
+        self.data = bytes(out)
+
+    def to_pbm(self) -> bytes:
+        return b"P4\n%d %d\n" % (self.width, self.height) + self.data
+
+    def escpos(self) -> bytes:
+        """فرمان GS v 0 (وسط‌چین)"""
+        return (b"\x1ba\x01\x1dv0\x00" + bytes([self.row_bytes & 0xFF, self.row_bytes >> 8,
+                                                 self.height & 0xFF, self.height >> 8])
+                + self.data + b"\n\x1ba\x00")
+
+
+class BarcodeGenerator:
+    """
+    تولید بارکد (Code 128، EAN-13) و QR با خروجی برداری برای PDF و رستری برای ESC/POS / PBM.
+    نتیجه‌ها (ماتریس، رستر، فرمان ESC/POS) در یک کش LRU با کلید (نوع، محتوا، اندازه) نگه داشته
+    می‌شوند تا رسیدهای تکراری یک سفارش یا برچسب یک محصول دوباره کدگذاری نشوند.
+    kind: "code128" | "ean13" | "qr" | "auto" (EAN-13 برای 12/13 رقم، در غیر این صورت Code 128)
+    """
+
+    QUIET_1D = 10  # ماژول سفید در دو طرف بارکد خطی
+    QUIET_QR = 4
+
+    def __init__(self, cache_size: int = 512):
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1")
+        self.cache_size = int(cache_size)
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: Tuple, build) -> Any:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def resolve_kind(kind: str, data: str) -> str:
+        if kind == "auto":
+            return "ean13" if data.isdigit() and len(data) in (12, 13) else "code128"
+        if kind not in ("code128", "ean13", "qr"):
+            raise ValueError(f"Unknown barcode kind: {kind}")
+        return kind
+
+    # ---------- Modules ----------
+    def modules(self, kind: str, data: str, level: str = "M") -> Any:
+        """بارکد خطی: لیست 0/1؛ QR: ماتریس bool (هر دو بدون حاشیه‌ی سفید)"""
+        data = str(data)
+        kind = self.resolve_kind(kind, data)
+        if kind == "qr":
+            return self._cached(("qr", data, level), lambda: qr_matrix(data, level))
+        build = code128_modules if kind == "code128" else ean13_modules
+        return self._cached((kind, data), lambda: build(data))
+
+    # ---------- Raster ----------
+    def raster(self, kind: str, data: str, module: int = 2, height: int = 80, level: str = "M") -> Raster:
+        """
+        تصویر تک‌بیتی؛ module پهنای هر ماژول به پیکسل (نقطه‌ی چاپگر) و height ارتفاع بارکد خطی است.
+        """
+        data = str(data)
+        kind = self.resolve_kind(kind, data)
+        key = ("raster", kind, data, int(module), int(height) if kind != "qr" else 0, level)
+        return self._cached(key, lambda: self._build_raster(kind, data, int(module), int(height), level))
+
+    def _build_raster(self, kind: str, data: str, module: int, height: int, level: str) -> Raster:
+        mods = self.modules(kind, data, level)
+        if kind == "qr":
+            q = self.QUIET_QR
+            size = len(mods)
+            blank = [0] * ((size + 2 * q) * module)
+            rows: List[List[int]] = [blank] * (q * module)
+            for r in mods:
+                line: List[int] = [0] * (q * module)
+                for dark in r:
+                    line.extend([int(dark)] * module)
+                line.extend([0] * (q * module))
+                rows.extend([line] * module)
+            rows.extend([blank] * (q * module))
+            return Raster(rows)
+        q = [0] * (self.QUIET_1D * module)
+        line = list(q)
+        for m in mods:
+            line.extend([m] * module)
+        line.extend(q)
+        return Raster([line] * height)
+
+    def escpos(self, kind: str, data: str, module: int = 2, height: int = 80, level: str = "M") -> bytes:
+        data = str(data)
+        key = ("escpos", self.resolve_kind(kind, data), data, int(module), int(height), level)
+        return self._cached(key, lambda: self.raster(kind, data, module, height, level).escpos())
+
+    # ---------- Vector (PDF) ----------
+    def runs(self, kind: str, data: str, level: str = "M") -> List[Tuple[int, int, int]]:
+        """نوارهای تیره به صورت (ردیف، ستون شروع، طول)؛ بارکد خطی فقط ردیف 0 دارد"""
+        data = str(data)
+        kind = self.resolve_kind(kind, data)
+        return self._cached(("runs", kind, data, level), lambda: self._build_runs(kind, data, level))
+
+    def _build_runs(self, kind: str, data: str, level: str) -> List[Tuple[int, int, int]]:
+        mods = self.modules(kind, data, level)
+        rows = mods if kind == "qr" else [mods]
+        out: List[Tuple[int, int, int]] = []
+        for y, row in enumerate(rows):
+            x = 0
+            while x < len(row):
+                if row[x]:
+                    start = x
+                    while x < len(row) and row[x]:
+                        x += 1
+                    out.append((y, start, x - start))
+                else:
+                    x += 1
+        return out
+
+    def draw_pdf(self, pdf: FPDF, kind: str, data: str, x: float, y: float, w: float,
+                 h: Optional[float] = None, level: str = "M") -> None:
+        """رسم برداری در FPDF؛ QR مربعی به ضلع w است و برای بارکد خطی h ارتفاع است"""
+        data = str(data)
+        kind = self.resolve_kind(kind, data)
+        mods = self.modules(kind, data, level)
+        count = len(mods[0]) if kind == "qr" else len(mods)
+        unit = w / count
+        row_h = unit if kind == "qr" else (h or w * 0.3)
+        pdf.set_fill_color(0, 0, 0)
+        for row, start, length in self.runs(kind, data, level):
+            pdf.rect(x + start * unit, y + row * row_h, length * unit, row_h, "F")
+
+    # ---------- Label sheets ----------
+    def label_sheet(self, items: Iterable[Tuple[str, str]], filename: str, columns: int = 3,
+                    label_w: float = 63.5, label_h: float = 38.1, margin: float = 10.0) -> Dict[str, Any]:
+        """
+        برگه‌ی برچسب A4 برای (نام، بارکد) همه‌ی محصولات. بارکد 12/13 رقمی EAN-13 و بقیه Code 128 است.
+        بارکدهای نامعتبر رد و در خروجی گزارش می‌شوند.
+        """
+        pdf = FPDF()
+        pdf.set_auto_page_break(False)
+        rows_per_page = int((297 - 2 * margin) // label_h)
+        per_page = rows_per_page * columns
+        printed = 0
+        skipped: List[Dict[str, Any]] = []
+        for name, code in items:
+            code = str(code or "").strip()
+            try:
+                kind = self.resolve_kind("auto", code)
+                self.modules(kind, code)
+            except ValueError as e:
+                skipped.append({"name": name, "barcode": code, "error": str(e)})
+                continue
+            slot = printed % per_page
+            if slot == 0:
+                pdf.add_page()
+                pdf.set_font("Arial", size=8)
+            x = margin + (slot % columns) * label_w
+            y = margin + (slot // columns) * label_h
+            safe_name = str(name or "").encode("latin-1", "replace").decode("latin-1")
+            pdf.set_xy(x + 2, y + 2)
+            pdf.cell(label_w - 4, 4, safe_name[:40], 0, 0, "C")
+            self.draw_pdf(pdf, kind, code, x + 4, y + 8, label_w - 8, label_h - 18)
+            pdf.set_xy(x + 2, y + label_h - 9)
+            pdf.cell(label_w - 4, 4, code, 0, 0, "C")
+            printed += 1
+        if printed == 0:
+            pdf.add_page()
+        pdf.output(filename)
+        return {"path": filename, "printed": printed, "skipped": skipped, "pages": pdf.page}
+
+    def catalog_labels(self, db: Any, filename: str, **kwargs) -> Dict[str, Any]:
+        """برچسب همه‌ی محصولات دارای بارکد در جدول products یک DatabaseManager"""
+        rows = db.execute_query(
+            "SELECT name, barcode FROM products WHERE barcode IS NOT NULL AND barcode != '' ORDER BY name"
+        ).fetchall()
+        return self.label_sheet(((r[0], r[1]) for r in rows), filename, **kwargs)
@@ -0,0 +1,208 @@
+# printing/invoice_builder.py
+import os
+import re
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from fpdf import FPDF, FPDF_VERSION
+
+from printing.template_engine import CompiledTemplate
+
+# قالب کامپایل‌شده‌ی هر فرایند کارگر (یک بار در initializer ساخته می‌شود)
+_WORKER_TEMPLATE: Optional[CompiledTemplate] = None
+
+# ارجاع به فونت در محتوای صفحه‌های FPDF: 'BT /F1 11.00 Tf ET'
+_FONT_REF = re.compile(r"/F(\d+) ([\d.]+) Tf")
+
+# ادغام صفحه‌ها به وضعیت داخلی FPDF نسخه‌ی 1.7 (pages به صورت رشته، state، fonts) وابسته است
+MERGE_SUPPORTED = FPDF_VERSION.startswith("1.7")
+
+
+def _init_worker(template_config: Optional[Dict[str, Any]]) -> None:
+    """کامپایل قالب و بارگذاری متریک فونت‌ها یک بار برای هر کارگر"""
+    global _WORKER_TEMPLATE
+    _WORKER_TEMPLATE = CompiledTemplate(template_config or {})
+    renderer = _WORKER_TEMPLATE.renderer("invoice")
+    try:
+        renderer({})
+    except Exception:
+        pass
+
+
+def _render_chunk(chunk: List[Tuple[int, Dict[str, Any], Optional[str]]]) -> List[Dict[str, Any]]:
+    """
+    رندر یک دسته فاکتور در کارگر. برای هر فاکتور با filename فایل PDF نوشته می‌شود؛ بدون filename
+    محتوای صفحه‌ها و جدول فونت برای ادغام در فرایند اصلی برگردانده می‌شود.
+    """
+    if _WORKER_TEMPLATE is None:
+        _init_worker(None)
+    results: List[Dict[str, Any]] = []
+    for index, data, filename in chunk:
+        started = time.perf_counter()
+        try:
+            pdf = _WORKER_TEMPLATE.render("invoice", data)
+            if filename:
+                pdf.output(filename)
+                result = {"index": index, "ok": True, "path": filename}
+            else:
+                # محتوای صفحه‌ها از قبل کامل است؛ ساخت بافر PDF (فشرده‌سازی) لازم نیست
+                fonts = {f["i"]: key for key, f in pdf.fonts.items()}
+                if any(f["type"] != "core" for f in pdf.fonts.values()):
+                    raise ValueError("Merged output supports core fonts only")
+                result = {"index": index, "ok": True, "pages": [pdf.pages[n] for n in range(1, pdf.page + 1)],
+                          "fonts": fonts}
+        except Exception as e:
+            result = {"index": index, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        result["seconds"] = time.perf_counter() - started
+        results.append(result)
+    return results
+
+
+def _split_font_key(key: str) -> Tuple[str, str]:
+    """'helveticaB' -> ('helvetica', 'B')؛ نام فونت‌های پایه با B/I تمام نمی‌شود"""
+    family = key.rstrip("BI")
+    return family, key[len(family):]
+
+
+class _Merger:
+    """
+    ادغام صفحه‌های تولیدشده در کارگرها در یک سند FPDF با نگاشت مجدد شماره‌ی فونت‌ها.
+    از وضعیت داخلی FPDF 1.7 استفاده می‌کند؛ build با نسخه‌های دیگر (مثلاً fpdf2) خروجی ادغام‌شده نمی‌سازد.
+    """
+
+    def __init__(self):
+        self.pdf = FPDF()
+        self._pages: List[str] = []
+
+    def add(self, pages: List[str], fonts: Dict[int, str]) -> None:
+        mapping: Dict[int, int] = {}
+        for i, key in fonts.items():
+            if key not in self.pdf.fonts:
+                family, style = _split_font_key(key)
+                # پیش از افزودن صفحه، set_font فقط فونت را ثبت می‌کند
+                self.pdf.set_font(family, style)
+            mapping[i] = self.pdf.fonts[key]["i"]
+        for content in pages:
+            self._pages.append(_FONT_REF.sub(lambda m: f"/F{mapping[int(m.group(1))]} {m.group(2)} Tf", content))
+
+    def output(self, path: str) -> str:
+        pdf = self.pdf
+        for content in self._pages:
+            pdf.page += 1
+            pdf.pages[pdf.page] = content
+        pdf.state = 2
+        pdf.output(path)
+        return path
+
+
+class InvoiceBatchBuilder:
+    """
+    تولید موازی فاکتورهای PDF (مثلاً بازتولید فاکتورهای رسمی کل روز در پایان شیفت).
+    - فاکتورها دسته‌بندی (chunk) و بین فرایندهای یک ProcessPool پخش می‌شوند؛ هر کارگر قالب و
+      متریک فونت‌ها را فقط یک بار آماده می‌کند.
+    - خروجی: یک فایل برای هر فاکتور در output_dir، یا یک PDF ادغام‌شده (merged_path) به ترتیب ورودی.
+    - گزارش شامل تعداد موفق/ناموفق، خطای هر فاکتور ناموفق و توان عملیاتی (فاکتور در ثانیه) است.
+    workers=1 (یا تعداد کم فاکتور) بدون ساخت pool و در همین فرایند اجرا می‌شود.
+    """
+
+    def __init__(self, template_config: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.template_config = dict(template_config or {})
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def _chunks(self, jobs: List[Tuple[int, Dict[str, Any], Optional[str]]], workers: int) -> List[List[Tuple]]:
+        # چند دسته برای هر کارگر تا بار بین کارگرها متوازن بماند
+        size = self.chunk_size or max(1, math.ceil(len(jobs) / (workers * 4)))
+        return [jobs[i:i + size] for i in range(0, len(jobs), size)]
+
+    @staticmethod
+    def _filename(pattern: str, index: int, data: Dict[str, Any]) -> str:
+        order_id = (data.get("header") or {}).get("order_id", index)
+        return pattern.format(index=index, order_id=order_id, invoice_id=data.get("invoice_id", index))
+
+    def _paths(self, invoices: List[Dict[str, Any]], output_dir: str, pattern: str) -> List[str]:
+        """مسیر فایل هر فاکتور؛ نام‌های تکراری در یک دسته (مثلاً order_id یکسان) با شماره‌ی ردیف یکتا می‌شوند"""
+        names = [self._filename(pattern, i, data) for i, data in enumerate(invoices)]
+        counts: Dict[str, int] = {}
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        paths = []
+        for i, name in enumerate(names):
+            if counts[name] > 1:
+                root, ext = os.path.splitext(name)
+                name = f"{root}_{i}{ext}"
+            paths.append(os.path.join(output_dir, name))
+        return paths
+
+    def build(self, invoices: List[Dict[str, Any]], output_dir: Optional[str] = None,
+              merged_path: Optional[str] = None, filename_pattern: str = "invoice_{order_id}.pdf") -> Dict[str, Any]:
+        """
+        رندر همه‌ی فاکتورها؛ دقیقاً یکی از output_dir و merged_path باید داده شود.
+        filename_pattern می‌تواند {order_id}، {invoice_id} و {index} داشته باشد؛ اگر دو فاکتور یک نام بگیرند
+        شماره‌ی ردیفشان به نام اضافه می‌شود تا فایل یکدیگر را بازنویسی نکنند.
+        خروجی: {"total", "succeeded", "failed", "failures": [{"index", "order_id", "error"}],
+                "outputs", "elapsed", "per_second", "render_seconds", "workers", "chunks"}
+        """
+        if (output_dir is None) == (merged_path is None):
+            raise ValueError("Provide exactly one of output_dir or merged_path")
+        if merged_path is not None and not MERGE_SUPPORTED:
+            raise RuntimeError(f"Merged output requires fpdf 1.7.x (installed: {FPDF_VERSION})")
+        started = time.perf_counter()
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            paths: List[Optional[str]] = list(self._paths(invoices, output_dir, filename_pattern))
+        else:
+            paths = [None] * len(invoices)
+        jobs = [(i, data, paths[i]) for i, data in enumerate(invoices)]
+        workers = max(1, min(self.workers, len(jobs)))
+        chunks = self._chunks(jobs, workers)
+
+        results: List[Dict[str, Any]] = []
+        if workers == 1:
+            _init_worker(self.template_config)
+            for chunk in chunks:
+                results.extend(_render_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.template_config,)) as pool:
+                for part in pool.map(_render_chunk, chunks):
+                    results.extend(part)
+        results.sort(key=lambda r: r["index"])
+
+        failures = [
+            {"index": r["index"], "order_id": (invoices[r["index"]].get("header") or {}).get("order_id"),
+             "error": r["error"]}
+            for r in results if not r["ok"]
+        ]
+        outputs: List[str] = []
+        if merged_path is not None:
+            merger = _Merger()
+            for r in results:
+                if r["ok"]:
+                    merger.add(r["pages"], r["fonts"])
+            if len(failures) < len(results):
+                outputs.append(merger.output(merged_path))
+        else:
+            outputs = [r["path"] for r in results if r["ok"]]
+
+        elapsed = time.perf_counter() - started
+        succeeded = len(results) - len(failures)
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(failures),
+            "failures": failures,
+            "outputs": outputs,
+            "elapsed": elapsed,
+            "per_second": succeeded / elapsed if elapsed > 0 else 0.0,
+            "render_seconds": sum(r["seconds"] for r in results),
+            "workers": workers,
+            "chunks": len(chunks),
+        }
@@ -0,0 +1,492 @@
+# printing/print_preview.py
+import re
+import json
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from fpdf import FPDF
+
+from services.auth_service import AuthService
+from printing.template_engine import TemplateEngine, CompiledTemplate
+
+# فونت بیت‌مپ 5x8 برای ASCII (هر نویسه 5 ستون؛ بیت 0 = ردیف بالا، ردیف 7 برای دنباله‌ی g/p/q/y)
+_FONT_DATA = (
+    "0000000000 00005f0000 0007000700 147f147f14 242a7f2a12 2313086462 3649562050 0008070300 "
+    "001c224100 0041221c00 2a1c7f1c2a 08083e0808 0080703000 0808080808 0000606000 2010080402 "
+    "3e5149453e 00427f4000 7249494946 2141494d33 1814127f10 2745454539 3c4a494931 4121110907 "
+    "3649494936 464949291e 0000140000 0040340000 0008142241 1414141414 0041221408 0201590906 "
+    "3e415d594e 7c1211127c 7f49494936 3e41414122 7f4141413e 7f49494941 7f09090901 3e41415173 "
+    "7f0808087f 00417f4100 2040413f01 7f08142241 7f40404040 7f021c027f 7f0408107f 3e4141413e "
+    "7f09090906 3e4151215e 7f09192946 2649494932 03017f0103 3f4040403f 1f2040201f 3f4038403f "
+    "6314081463 0304780403 6159494d43 007f414141 0204081020 004141417f 0402010204 4040404040 "
+    "0003070800 2054547840 7f28444438 3844444428 384444287f 3854545418 00087e0902 18a4a49c78 "
+    "7f08040478 00447d4000 2040403d00 7f10284400 00417f4000 7c0478047c 7c08040478 3844444438 "
+    "fc18242418 18242418fc 7c08040408 4854545424 04043f4424 3c4040207c 1c2040201c 3c4030403c "
+    "4428102844 4c9090907c 4464544c44 0008364100 0000770000 0041360800 0201020402"
+).split()
+_FONT: Dict[str, bytes] = {chr(32 + i): bytes.fromhex(h) for i, h in enumerate(_FONT_DATA)}
+
+# نشانه‌های جریان محتوای PDF تولیدشده توسط FPDF: رشته، نام، عدد، عملگر
+_TOKEN = re.compile(r"\((?:\\.|[^\\)])*\)|/[^\s/\[\]()<>]+|[-+]?(?:\d+\.?\d*|\.\d+)|[A-Za-z*']+")
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f", "(": "(", ")": ")", "\\": "\\"}
+
+
+def _unescape(literal: str) -> str:
+    body = literal[1:-1]
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+class PageImage:
+    """تصویر خاکستری 8 بیتی یک صفحه (255 = سفید)؛ to_pgm() مستقیماً در tk.PhotoImage قابل نمایش است"""
+    __slots__ = ("page", "width", "height", "dpi", "data")
+
+    def __init__(self, page: int, width: int, height: int, dpi: int, data: bytes):
+        self.page = page
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.data = data
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def pixel(self, x: int, y: int) -> int:
+        return self.data[y * self.width + x]
+
+    def to_pgm(self) -> bytes:
+        return b"P5\n%d %d\n255\n" % (self.width, self.height) + self.data
+
+    def __repr__(self) -> str:
+        return f"<PageImage page={self.page} {self.width}x{self.height}@{self.dpi}dpi>"
+
+
+class _Canvas:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.buf = bytearray(b"\xff" * (width * height))
+
+    def fill(self, x0: float, y0: float, x1: float, y1: float, gray: int) -> None:
+        ix0, ix1 = max(0, int(round(min(x0, x1)))), min(self.width, int(round(max(x0, x1))))
+        iy0, iy1 = max(0, int(round(min(y0, y1)))), min(self.height, int(round(max(y0, y1))))
+        if ix1 <= ix0:
+            ix1 = min(self.width, ix0 + 1)
+        if iy1 <= iy0:
+            iy1 = min(self.height, iy0 + 1)
+        if ix0 >= ix1 or iy0 >= iy1:
+            return
+        row = bytes([gray]) * (ix1 - ix0)
+        w = self.width
+        for y in range(iy0, iy1):
+            self.buf[y * w + ix0:y * w + ix1] = row
+
+    def line(self, x0: float, y0: float, x1: float, y1: float, width: float, gray: int) -> None:
+        half = max(1.0, width) / 2
+        if abs(y1 - y0) < 0.5 or abs(x1 - x0) < 0.5:
+            # خطوط افقی/عمودی (جدول‌ها و جداکننده‌ها) مستطیل باریک‌اند
+            self.fill(min(x0, x1) - half, min(y0, y1) - half, max(x0, x1) + half, max(y0, y1) + half, gray)
+            return
+        steps = int(max(abs(x1 - x0), abs(y1 - y0))) + 1
+        for i in range(steps + 1):
+            t = i / steps
+            x, y = x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+            self.fill(x - half, y - half, x + half, y + half, gray)
+
+    def glyph(self, ch: str, x: float, baseline: float, row_px: float, adv: float, bold: bool, gray: int) -> None:
+        cols = _FONT.get(ch)
+        if cols is None:
+            if ch.isspace():
+                return
+            cols = _FONT["?"]
+        col_px = min(row_px, adv / 6)
+        left = x + (adv - 5 * col_px) / 2
+        top = baseline - 7 * row_px
+        extra = max(1.0, col_px * 0.5) if bold else 0.0
+        for c, bits in enumerate(cols):
+            if not bits:
+                continue
+            cx0 = left + c * col_px
+            for r in range(8):
+                if bits >> r & 1:
+                    self.fill(cx0, top + r * row_px, cx0 + col_px + extra, top + (r + 1) * row_px, gray)
+
+
+def _gray(values: List[float]) -> int:
+    if len(values) >= 3:
+        r, g, b = values[-3:]
+        lum = 0.299 * r + 0.587 * g + 0.114 * b
+    else:
+        lum = values[-1] if values else 0.0
+    return max(0, min(255, int(round(lum * 255))))
+
+
+def rasterize_page(pdf: FPDF, page: int, dpi: int = 96) -> PageImage:
+    """
+    رستر یک صفحه‌ی FPDF از روی جریان محتوای آن (مستطیل، خط، متن و جای تصویر).
+    متن با فونت بیت‌مپ داخلی و پهنای واقعی نویسه‌های فونت PDF کشیده می‌شود تا چیدمان (چپ/راست‌چین،
+    ستون‌ها) با خروجی چاپ یکی باشد؛ متن فونت‌های غیرپایه (یونیکد) به صورت نوار خاکستری نمایش داده می‌شود.
+    """
+    scale = dpi / 72.0
+    page_h = pdf.h_pt
+    canvas = _Canvas(int(round(pdf.w_pt * scale)), int(round(page_h * scale)))
+    fonts = {f"F{f['i']}": (key, f) for key, f in pdf.fonts.items()}
+
+    fill_gray, stroke_gray, line_w = 0, 0, 0.57
+    stack: List[Tuple[int, int, float]] = []
+    path: List[Tuple[str, Tuple[float, ...]]] = []
+    operands: List[Any] = []
+    font: Optional[Tuple[str, Dict[str, Any]]] = None
+    font_size = 12.0
+    tx = ty = 0.0
+    matrix: Optional[List[float]] = None
+
+    def dev(x: float, y: float) -> Tuple[float, float]:
+        return x * scale, (page_h - y) * scale
+
+    def paint(do_fill: bool, do_stroke: bool) -> None:
+        for kind, args in path:
+            if kind == "re":
+                x, y, w, h = args
+                x0, y0 = dev(x, y)
+                x1, y1 = dev(x + w, y + h)
+                if do_fill:
+                    canvas.fill(x0, y0, x1, y1, fill_gray)
+                if do_stroke:
+                    lw = line_w * scale
+                    for a, b, c, d in ((x0, y0, x1, y0), (x0, y1, x1, y1), (x0, y0, x0, y1), (x1, y0, x1, y1)):
+                        canvas.line(a, b, c, d, lw, stroke_gray)
+            elif kind == "poly" and do_stroke:
+                pts = [dev(px, py) for px, py in zip(args[0::2], args[1::2])]
+                for (a, b), (c, d) in zip(pts, pts[1:]):
+                    canvas.line(a, b, c, d, line_w * scale, stroke_gray)
+
+    for token in _TOKEN.findall(pdf.pages[page]):
+        first = token[0]
+        if first == "(":
+            operands.append(_unescape(token))
+            continue
+        if first == "/":
+            operands.append(token[1:])
+            continue
+        if first.isdigit() or first in "-+.":
+            operands.append(float(token))
+            continue
+        op = token
+        nums = [v for v in operands if isinstance(v, float)]
+        if op == "re" and len(nums) >= 4:
+            path.append(("re", tuple(nums[-4:])))
+        elif op == "m" and len(nums) >= 2:
+            path.append(("poly", tuple(nums[-2:])))
+        elif op == "l" and len(nums) >= 2:
+            if path and path[-1][0] == "poly":
+                path[-1] = ("poly", path[-1][1] + tuple(nums[-2:]))
+            else:
+                path.append(("poly", tuple(nums[-2:])))
+        elif op in ("f", "f*", "F"):
+            paint(True, False)
+            path = []
+        elif op == "S" or op == "s":
+            paint(False, True)
+            path = []
+        elif op in ("B", "B*", "b", "b*"):
+            paint(True, True)
+            path = []
+        elif op == "n":
+            path = []
+        elif op == "g":
+            fill_gray = _gray(nums)
+        elif op == "rg":
+            fill_gray = _gray(nums)
+        elif op == "G" or op == "RG":
+            stroke_gray = _gray(nums)
+        elif op == "w" and nums:
+            line_w = nums[-1]
+        elif op == "q":
+            stack.append((fill_gray, stroke_gray, line_w))
+        elif op == "Q":
+            if stack:
+                fill_gray, stroke_gray, line_w = stack.pop()
+            matrix = None
+        elif op == "cm" and len(nums) >= 6:
+            matrix = nums[-6:]
+        elif op == "Do" and matrix:
+            # تصویرها رسم نمی‌شوند؛ جای آن‌ها با کادر خاکستری روشن مشخص می‌شود
+            w, _, _, h, x, y = matrix
+            x0, y0 = dev(x, y)
+            x1, y1 = dev(x + w, y + h)
+            canvas.fill(x0, y0, x1, y1, 230)
+        elif op == "BT":
+            tx = ty = 0.0
+        elif op == "Tf":
+            names = [v for v in operands if isinstance(v, str)]
+            if names:
+                font = fonts.get(names[-1])
+            if nums:
+                font_size = nums[-1]
+        elif op == "Td" and len(nums) >= 2:
+            tx, ty = tx + nums[-2], ty + nums[-1]
+        elif op == "Tj":
+            texts = [v for v in operands if isinstance(v, str)]
+            if texts and font is not None:
+                x, baseline = dev(tx, ty)
+                size_px = font_size * scale
+                key, meta = font
+                if meta.get("type") == "core":
+                    widths = meta["cw"]
+                    bold = key.endswith("B") or key.endswith("BI")
+                    row_px = size_px * 0.718 / 7
+                    for ch in texts[-1]:
+                        adv = widths.get(ch, 500) * size_px / 1000
+                        canvas.glyph(ch, x, baseline, row_px, adv, bold, fill_gray)
+                        x += adv
+                else:
+                    chars = len(texts[-1]) // 2 or len(texts[-1])
+                    canvas.fill(x, baseline - size_px * 0.5, x + chars * size_px * 0.5, baseline, 160)
+        operands = []
+    return PageImage(page, canvas.width, canvas.height, dpi, bytes(canvas.buf))
+
+
+class PreviewJob:
+    """
+    پیش‌نمایش در حال ساخت یا آماده. صفحه‌ها به ترتیب به pages اضافه می‌شوند، پس صفحه‌ی اول پیش از
+    رستر شدن بقیه در دسترس است؛ page(i) تا آماده شدن صفحه‌ی i صبر می‌کند.
+    """
+
+    def __init__(self, key: Tuple, kind: str, doc_id: Any, dpi: int):
+        self.key = key
+        self.kind = kind
+        self.doc_id = doc_id
+        self.dpi = dpi
+        self.pages: List[PageImage] = []
+        self.page_count: Optional[int] = None
+        self.error: Optional[str] = None
+        self.cached = False
+        self.cancelled = False
+        self._callbacks: List[Callable[[int, PageImage], None]] = []
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.page_count is not None and len(self.pages) >= self.page_count or self.error is not None
+
+    def add_callback(self, callback: Callable[[int, PageImage], None]) -> None:
+        """callback(index, image) برای صفحه‌های موجود فوراً و برای بقیه روی thread پس‌زمینه فراخوانی می‌شود"""
+        with self._cond:
+            ready = list(self.pages)
+            self._callbacks.append(callback)
+        for i, img in enumerate(ready):
+            try:
+                callback(i, img)
+            except Exception:
+                pass
+
+    def cancel(self) -> None:
+        """کار در صف دیگر رندر نمی‌شود (مثلاً وقتی کاربر از رسید رد شده است)"""
+        with self._cond:
+            self.cancelled = True
+            if not self.done:
+                self.error = "cancelled"
+            self._cond.notify_all()
+
+    def _add_page(self, img: PageImage) -> None:
+        with self._cond:
+            self.pages.append(img)
+            callbacks = list(self._callbacks)
+            self._cond.notify_all()
+        for cb in callbacks:
+            try:
+                cb(len(self.pages) - 1, img)
+            except Exception:
+                pass
+
+    def _finish(self, page_count: Optional[int] = None, error: Optional[str] = None) -> None:
+        with self._cond:
+            if page_count is not None:
+                self.page_count = page_count
+            if error is not None:
+                self.error = error
+            self._cond.notify_all()
+
+    def page(self, index: int, timeout: Optional[float] = None) -> Optional[PageImage]:
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.pages) > index or self.done, timeout)
+            return self.pages[index] if len(self.pages) > index else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+
+class PrintPreviewService:
+    """
+    پیش‌نمایش تصویری فاکتور، رسید و تیکت آشپزخانه در DPI صفحه‌نمایش.
+    - رندر PDF (با همان قالب کامپایل‌شده‌ی چاپ) و رستر صفحه‌ها روی یک thread پس‌زمینه انجام می‌شود؛
+      preview() فوراً یک PreviewJob برمی‌گرداند و صفحه‌ها یکی‌یکی (اول صفحه‌ی اول) آماده می‌شوند.
+    - درخواست‌های صف به ترتیب LIFO رندر می‌شوند تا هنگام پیمایش سریع رسیدها، رسید فعلی زودتر برسد.
+    - نتیجه با کلید (doc_id, kind, نسخه‌ی قالب, dpi) کش می‌شود؛ حجم کل تصویرها به max_bytes محدود است و
+      قدیمی‌ترین پیش‌نمایش‌های استفاده‌نشده (LRU) کنار گذاشته می‌شوند. تغییر قالب نسخه را عوض می‌کند
+      و پیش‌نمایش قدیمی دیگر استفاده نمی‌شود.
+    - درخواست تکراری برای پیش‌نمایشی که در حال ساخت است همان job را برمی‌گرداند.
+    """
+
+    def __init__(self, auth_service: Optional[AuthService] = None, template_engine: Optional[TemplateEngine] = None,
+                 dpi: int = 96, max_bytes: int = 64 * 1024 * 1024):
+        if dpi < 10:
+            raise ValueError("dpi must be at least 10")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.auth = auth_service
+        self.templates = template_engine or TemplateEngine()
+        self.dpi = int(dpi)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, List[PageImage]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[Tuple, PreviewJob] = {}
+        self._queue: "queue.LifoQueue[Optional[Tuple[PreviewJob, CompiledTemplate, Dict[str, Any]]]]" = queue.LifoQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.hits = 0
+        self.misses = 0
+
+    def _check_permission(self, token: Optional[str], permission: str):
+        if not self.auth:
+            return
+        if not token:
+            raise PermissionError("Missing actor token for permission check")
+        if self.auth.has_permission(token, "print.any"):
+            return
+        if not self.auth.has_permission(token, permission):
+            raise PermissionError(f"Permission denied: {permission}")
+
+    @staticmethod
+    def _doc_id(kind: str, data: Dict[str, Any]) -> Any:
+        if kind == "invoice":
+            return (data.get("header") or {}).get("order_id")
+        return data.get("order_id")
+
+    def _template(self, template_id: Optional[str], template_config: Optional[Dict[str, Any]],
+                  actor_token: Optional[str]) -> Tuple[CompiledTemplate, Any]:
+        if template_id:
+            compiled = self.templates.get(template_id, actor_token=actor_token)
+            return compiled, (template_id, compiled.version)
+        config = template_config or {}
+        digest = hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return self.templates.compile(config), ("config", digest)
+
+    def preview(self, kind: str, data: Dict[str, Any], doc_id: Any = None, template_id: Optional[str] = None,
+                template_config: Optional[Dict[str, Any]] = None, dpi: Optional[int] = None,
+                on_page: Optional[Callable[[int, PageImage], None]] = None,
+                actor_token: Optional[str] = None) -> PreviewJob:
+        """
+        kind: invoice / kitchen / receipt. doc_id پیش‌فرض شماره‌ی سفارش است؛ برای سندی که پس از
+        پیش‌نمایش تغییر می‌کند doc_id باید نسخه‌ی داده را هم داشته باشد.
+        """
+        if kind not in ("invoice", "kitchen", "receipt"):
+            raise ValueError(f"Unknown document kind: {kind}")
+        self._check_permission(actor_token, f"print.{kind}")
+        dpi = int(dpi or self.dpi)
+        if doc_id is None:
+            doc_id = self._doc_id(kind, data)
+        template, version = self._template(template_id, template_config, actor_token)
+        key = (doc_id, kind, version, dpi)
+        with self._lock:
+            pages = self._cache.get(key) if doc_id is not None else None
+            if pages is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                job = PreviewJob(key, kind, doc_id, dpi)
+                job.pages = list(pages)
+                job.page_count = len(pages)
+                job.cached = True
+            else:
+                job = self._inflight.get(key) if doc_id is not None else None
+                if job is None or job.cancelled:
+                    self.misses += 1
+                    job = PreviewJob(key, kind, doc_id, dpi)
+                    if doc_id is not None:
+                        self._inflight[key] = job
+                    self._queue.put((job, template, data))
+                    self._ensure_worker()
+        if on_page is not None:
+            job.add_callback(on_page)
+        return job
+
+    def preview_invoice(self, invoice: Any, **kwargs) -> PreviewJob:
+        """
+        پیش‌نمایش یک models.invoice.Invoice؛ تغییر سفارش، قیمت/نام محصولات، پرداخت یا مشتری
+        (Invoice.data_key) پیش‌نمایش تازه می‌سازد.
+        """
+        doc_id = ("invoice", invoice.invoice_id, invoice.data_key())
+        return self.preview("invoice", invoice.to_print_data(), doc_id=doc_id, **kwargs)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._worker, name="print-preview", daemon=True)
+            self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None or self._stopping:
+                return
+            job, template, data = item
+            if job.cancelled:
+                self._forget(job)
+                continue
+            try:
+                pdf = template.render(job.kind, data)
+                count = pdf.page
+                job._finish(page_count=count)
+                for n in range(1, count + 1):
+                    if job.cancelled:
+                        break
+                    job._add_page(rasterize_page(pdf, n, job.dpi))
+            except Exception as e:
+                job._finish(error=f"{type(e).__name__}: {e}")
+            if not job.cancelled and job.error is None:
+                self._store(job.key, job.pages)
+            self._forget(job)
+
+    def _forget(self, job: PreviewJob) -> None:
+        with self._lock:
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+
+    def _store(self, key: Tuple, pages: List[PageImage]) -> None:
+        if key[0] is None:
+            return
+        size = sum(p.nbytes for p in pages)
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._bytes -= sum(p.nbytes for p in old)
+            if size > self.max_bytes:
+                return
+            self._cache[key] = list(pages)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._bytes -= sum(p.nbytes for p in evicted)
+
+    def invalidate(self, doc_id: Any = None) -> None:
+        """حذف پیش‌نمایش‌های یک سند (یا همه)"""
+        with self._lock:
+            for key in [k for k in self._cache if doc_id is None or k[0] == doc_id]:
+                self._bytes -= sum(p.nbytes for p in self._cache.pop(key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._cache), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "pending": len(self._inflight)}
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        self._stopping = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
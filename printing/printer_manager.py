@@ -0,0 +1,396 @@
+# printing/printer_manager.py
+import os
+import json
+import time
+import uuid
+import heapq
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+from services.auth_service import AuthService
+from services.print_service import PrintService
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR = os.path.join(os.getcwd(), "print_spool")
+
+# اولویت پیش‌فرض هر نوع کار (عدد کمتر = زودتر)
+PRIORITIES: Dict[str, int] = {"kitchen": 0, "receipt": 10, "invoice": 20, "reprint": 50}
+
+# نوع کار -> (متد renderer، مجوز لازم)
+_KINDS: Dict[str, Tuple[str, str]] = {
+    "invoice": ("print_invoice", "print.invoice"),
+    "kitchen": ("print_kitchen_ticket", "print.kitchen"),
+    "receipt": ("print_receipt", "print.receipt"),
+}
+
+# وضعیت‌هایی که پس از راه‌اندازی مجدد دوباره در صف قرار می‌گیرند
+_PENDING = ("queued", "retrying", "printing")
+_FINAL = ("done", "failed", "cancelled")
+
+
+class _Printer:
+    __slots__ = ("name", "output_dir", "renderer", "sink", "ready", "delayed", "thread")
+
+    def __init__(self, name: str, output_dir: str, renderer: Any, sink: Optional[Callable[[str], None]]):
+        self.name = name
+        self.output_dir = output_dir
+        self.renderer = renderer
+        self.sink = sink
+        # (priority, seq, job_id) آماده‌ی چاپ
+        self.ready: List[Tuple[int, int, str]] = []
+        # (not_before, seq, job_id) منتظر تلاش مجدد
+        self.delayed: List[Tuple[float, int, str]] = []
+        self.thread: Optional[threading.Thread] = None
+
+
+class PrinterManager:
+    """
+    صف چاپ پس‌زمینه (spooler).
+    - هر کار چاپ به صورت فایل JSON در spool_dir ذخیره می‌شود؛ کارهای ناتمام پس از راه‌اندازی مجدد
+      دوباره در صف قرار می‌گیرند (کارهای در حال چاپ از اول چاپ می‌شوند).
+    - هر چاپگر یک thread کارگر و یک صف اولویت‌دار دارد؛ تیکت آشپزخانه جلوتر از رسید، فاکتور و چاپ مجدد است.
+    - خطای رندر یا ارسال تا max_retries بار با تأخیر نمایی (retry_delay * 2^n) دوباره تلاش می‌شود.
+    - تغییر وضعیت کارها (queued, printing, retrying, done, failed, cancelled) به callbackها اطلاع داده می‌شود؛
+      callbackها روی thread کارگر اجرا می‌شوند و خطایشان نادیده گرفته می‌شود.
+    submit فوراً برمی‌گردد؛ مجوز در همان لحظه بررسی می‌شود و کارگر بدون توکن رندر می‌کند، پس renderer
+    داده‌شده نباید خودش AuthService داشته باشد.
+    """
+
+    def __init__(self, auth_service: Optional[AuthService] = None, spool_dir: Optional[str] = None,
+                 renderer: Optional[Any] = None, max_retries: int = 3, retry_delay: float = 1.0):
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        self.auth = auth_service
+        self.spool_dir = spool_dir or SPOOL_DIR
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._renderer = renderer or PrintService()
+        self.max_retries = int(max_retries)
+        self.retry_delay = float(retry_delay)
+        self._lock = threading.Lock()
+        # برای wait(): با هر تغییر وضعیت بیدار می‌شود
+        self._changed = threading.Condition(self._lock)
+        self._printers: Dict[str, _Printer] = {}
+        self._conditions: Dict[str, threading.Condition] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._callbacks: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._seq = 0
+        self._stopping = False
+        self._recover()
+
+    def _now(self) -> float:
+        return time.time()
+
+    def _check_permission(self, token: Optional[str], permission: str):
+        if not self.auth:
+            return
+        if not token:
+            raise PermissionError("Missing actor token for permission check")
+        if self.auth.has_permission(token, "print.any"):
+            return
+        if not self.auth.has_permission(token, permission):
+            raise PermissionError(f"Permission denied: {permission}")
+
+    # ---------- Persistence ----------
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.spool_dir, f"job_{job_id}.json")
+
+    def _save(self, job: Dict[str, Any], strict: bool = False) -> None:
+        """
+        نوشتن اتمیک فایل کار در spool (داده‌ی کار پیش‌تر در submit از نظر JSON بودن بررسی شده است).
+        در صورت خطا فایل موقت پاک می‌شود؛ strict=True خطا را پرتاب می‌کند و در غیر این صورت فقط log می‌شود.
+        """
+        path = self._job_path(job["job_id"])
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(job, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            if strict:
+                raise
+            logger.error(f"Failed to write print job {job['job_id']} to spool: {e}")
+
+    def _discard(self, job_id: str) -> None:
+        try:
+            os.remove(self._job_path(job_id))
+        except OSError:
+            pass
+
+    def _recover(self) -> None:
+        jobs = []
+        for fn in os.listdir(self.spool_dir):
+            if not (fn.startswith("job_") and fn.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, fn), "r", encoding="utf-8") as fh:
+                    jobs.append(json.load(fh))
+            except Exception:
+                continue
+        for job in sorted(jobs, key=lambda j: j.get("seq", 0)):
+            self._seq = max(self._seq, int(job.get("seq", 0)))
+            if job.get("status") in _PENDING:
+                job["status"] = "queued"
+                job["not_before"] = 0.0
+            self._jobs[job["job_id"]] = job
+
+    # ---------- Printers ----------
+    def register_printer(self, name: str, output_dir: Optional[str] = None, renderer: Optional[Any] = None,
+                         sink: Optional[Callable[[str], None]] = None) -> None:
+        """
+        ثبت چاپگر و راه‌اندازی thread کارگر آن.
+        renderer: شیء با متدهای print_invoice / print_kitchen_ticket / print_receipt (پیش‌فرض: renderer مدیر)
+        sink(path): ارسال فایل رندرشده به دستگاه؛ پرتاب خطا یعنی تلاش مجدد.
+        """
+        if not name:
+            raise ValueError("Printer name is required")
+        out = output_dir or os.path.join(self.spool_dir, name)
+        os.makedirs(out, exist_ok=True)
+        with self._lock:
+            if name in self._printers:
+                raise ValueError(f"Printer already registered: {name}")
+            printer = _Printer(name, out, renderer or self._renderer, sink)
+            self._printers[name] = printer
+            self._conditions[name] = threading.Condition(self._lock)
+            # کارهای بازیابی‌شده یا ثبت‌شده پیش از معرفی چاپگر
+            for job in self._jobs.values():
+                if job["printer"] == name and job["status"] == "queued":
+                    heapq.heappush(printer.ready, (job["priority"], job["seq"], job["job_id"]))
+            printer.thread = threading.Thread(target=self._worker, args=(printer,),
+                                              name=f"printer-{name}", daemon=True)
+            printer.thread.start()
+
+    def list_printers(self) -> List[str]:
+        with self._lock:
+            return list(self._printers)
+
+    # ---------- Submission ----------
+    def submit(self, kind: str, data: Dict[str, Any], printer: str = "default",
+               template_config: Optional[Dict[str, Any]] = None, filename: Optional[str] = None,
+               priority: Optional[int] = None, on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+               actor_token: Optional[str] = None) -> str:
+        """
+        ثبت کار چاپ و بازگشت فوری job_id.
+        kind: invoice / kitchen / receipt؛ مجوز همان متد PrintService (یا 'print.any') لازم است.
+        data و template_config باید JSON-پذیر باشند (کار در spool ذخیره و پس از راه‌اندازی مجدد از همان خوانده
+        می‌شود)؛ مقادیری مثل datetime یا Decimal را پیش از ارسال به رشته/عدد تبدیل کنید، وگرنه ValueError.
+        """
+        if kind not in _KINDS:
+            raise ValueError(f"Unknown print job kind: {kind}")
+        self._check_permission(actor_token, _KINDS[kind][1])
+        try:
+            json.dumps({"data": data, "template_config": template_config}, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Print job data is not JSON serializable: {e}") from e
+        return self._enqueue({
+            "kind": kind,
+            "printer": printer,
+            "data": data,
+            "template_config": template_config,
+            "filename": filename,
+            "priority": PRIORITIES[kind] if priority is None else int(priority),
+            "reprint_of": None,
+        }, on_status)
+
+    def print_kitchen_ticket(self, order_like: Dict[str, Any], printer: str = "kitchen", **kwargs) -> str:
+        return self.submit("kitchen", order_like, printer=printer, **kwargs)
+
+    def print_receipt(self, order_like: Dict[str, Any], printer: str = "default", **kwargs) -> str:
+        return self.submit("receipt", order_like, printer=printer, **kwargs)
+
+    def print_invoice(self, invoice_data: Dict[str, Any], printer: str = "default", **kwargs) -> str:
+        return self.submit("invoice", invoice_data, printer=printer, **kwargs)
+
+    def reprint(self, job_id: str, printer: Optional[str] = None,
+                on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+                actor_token: Optional[str] = None) -> str:
+        """چاپ مجدد یک کار قبلی با اولویت 'reprint' (پشت کارهای جدید)"""
+        with self._lock:
+            source = self._jobs.get(job_id)
+            if source is None:
+                raise ValueError("Print job not found")
+            source = dict(source)
+        self._check_permission(actor_token, _KINDS[source["kind"]][1])
+        return self._enqueue({
+            "kind": source["kind"],
+            "printer": printer or source["printer"],
+            "data": source["data"],
+            "template_config": source["template_config"],
+            "filename": None,
+            "priority": PRIORITIES["reprint"],
+            "reprint_of": job_id,
+        }, on_status)
+
+    def _enqueue(self, fields: Dict[str, Any], on_status: Optional[Callable[[Dict[str, Any]], None]]) -> str:
+        job_id = uuid.uuid4().hex
+        now = self._now()
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("Printer manager is shut down")
+            self._seq += 1
+            job = dict(fields, job_id=job_id, seq=self._seq, status="queued", attempts=0,
+                       error=None, output=None, not_before=0.0, created_at=now, updated_at=now)
+            # کاری که در spool نوشته نشود پس از راه‌اندازی مجدد از دست می‌رود؛ پس ثبت آن رد می‌شود
+            self._save(job, strict=True)
+            self._jobs[job_id] = job
+            if on_status:
+                self._callbacks[job_id] = on_status
+            snapshot = dict(job)
+        # اطلاع «queued» پیش از سپردن کار به کارگر تا ترتیب رویدادها حفظ شود
+        self._notify(snapshot)
+        with self._lock:
+            printer = self._printers.get(job["printer"])
+            if printer is not None and job["status"] == "queued":
+                heapq.heappush(printer.ready, (job["priority"], job["seq"], job_id))
+                self._conditions[printer.name].notify()
+        return job_id
+
+    # ---------- Status ----------
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """callback(job) برای هر تغییر وضعیت همه‌ی کارها"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, job: Dict[str, Any]) -> None:
+        callbacks = list(self._listeners)
+        own = self._callbacks.get(job["job_id"])
+        if own:
+            callbacks.append(own)
+        for cb in callbacks:
+            try:
+                cb(dict(job))
+            except Exception:
+                pass
+        if job["status"] in _FINAL:
+            self._callbacks.pop(job["job_id"], None)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, status: Optional[str] = None, printer: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()
+                    if (status is None or j["status"] == status) and (printer is None or j["printer"] == printer)]
+        return sorted(jobs, key=lambda j: j["seq"])
+
+    def cancel(self, job_id: str) -> bool:
+        """لغو کاری که هنوز شروع به چاپ نشده است"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in ("queued", "retrying"):
+                return False
+            job["status"] = "cancelled"
+            job["updated_at"] = self._now()
+            self._discard(job_id)
+            self._changed.notify_all()
+            snapshot = dict(job)
+        self._notify(snapshot)
+        return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """انتظار تا پایان کار (done / failed / cancelled)؛ در صورت اتمام زمان وضعیت فعلی برگردانده می‌شود"""
+        deadline = None if timeout is None else self._now() + timeout
+        with self._lock:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in _FINAL:
+                    break
+                remaining = None if deadline is None else deadline - self._now()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return dict(job) if job else None
+
+    def clear_finished(self) -> int:
+        """حذف کارهای تمام‌شده از حافظه و فایل‌های failed از spool"""
+        with self._lock:
+            finished = [jid for jid, j in self._jobs.items() if j["status"] in _FINAL]
+            for jid in finished:
+                del self._jobs[jid]
+                self._discard(jid)
+        return len(finished)
+
+    # ---------- Workers ----------
+    def _set_status(self, job: Dict[str, Any], status: str, **fields) -> Dict[str, Any]:
+        """باید زیر قفل صدا زده شود"""
+        job.update(fields, status=status, updated_at=self._now())
+        if status in ("done", "cancelled"):
+            self._discard(job["job_id"])
+        else:
+            self._save(job)
+        self._changed.notify_all()
+        return dict(job)
+
+    def _next_job(self, printer: _Printer) -> Optional[Dict[str, Any]]:
+        """باید زیر قفل صدا زده شود؛ تا آماده شدن کار بعدی یا توقف منتظر می‌ماند"""
+        cond = self._conditions[printer.name]
+        while not self._stopping:
+            now = self._now()
+            while printer.delayed and printer.delayed[0][0] <= now:
+                _, seq, jid = heapq.heappop(printer.delayed)
+                job = self._jobs.get(jid)
+                if job is not None and job["status"] == "retrying":
+                    heapq.heappush(printer.ready, (job["priority"], seq, jid))
+            while printer.ready:
+                _, _, jid = heapq.heappop(printer.ready)
+                job = self._jobs.get(jid)
+                if job is not None and job["status"] in ("queued", "retrying"):
+                    return job
+            timeout = printer.delayed[0][0] - now if printer.delayed else None
+            cond.wait(timeout)
+        return None
+
+    def _render(self, printer: _Printer, job: Dict[str, Any]) -> str:
+        method = getattr(printer.renderer, _KINDS[job["kind"]][0])
+        filename = job["filename"] or os.path.join(printer.output_dir, f"{job['kind']}_{job['job_id']}.pdf")
+        path = method(job["data"], filename, job["template_config"])
+        if printer.sink:
+            printer.sink(path)
+        return path
+
+    def _worker(self, printer: _Printer) -> None:
+        while True:
+            with self._lock:
+                job = self._next_job(printer)
+                if job is None:
+                    return
+                snapshot = self._set_status(job, "printing", attempts=job["attempts"] + 1)
+            self._notify(snapshot)
+            try:
+                path = self._render(printer, snapshot)
+            except Exception as e:
+                with self._lock:
+                    if job["attempts"] <= self.max_retries:
+                        delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+                        snapshot = self._set_status(job, "retrying", error=str(e), not_before=self._now() + delay)
+                        heapq.heappush(printer.delayed, (job["not_before"], job["seq"], job["job_id"]))
+                    else:
+                        snapshot = self._set_status(job, "failed", error=str(e))
+            else:
+                with self._lock:
+                    snapshot = self._set_status(job, "done", output=path, error=None)
+            self._notify(snapshot)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        توقف کارگرها؛ کار در حال چاپ تمام می‌شود و کارهای باقی‌مانده در spool برای اجرای بعدی می‌مانند.
+        """
+        with self._lock:
+            self._stopping = True
+            for cond in self._conditions.values():
+                cond.notify_all()
+            threads = [p.thread for p in self._printers.values() if p.thread]
+        if wait:
+            for t in threads:
+                t.join(timeout)
@@ -0,0 +1,297 @@
+# printing/receipt_designer.py
+import os
+import codecs
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from i18n.text_shaping import shape, visual_order, glyph_candidates, Glyph
+from models.money import format_money
+from printing.barcode_generator import BarcodeGenerator
+
+# ---------- ESC/POS commands ----------
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+DOUBLE_ON = GS + b"!\x11"
+DOUBLE_OFF = GS + b"!\x00"
+CUT = GS + b"V\x42\x00"  # برش جزئی پس از تغذیه‌ی کاغذ
+_ALIGN = {"L": ESC + b"a\x00", "C": ESC + b"a\x01", "R": ESC + b"a\x02"}
+
+# شماره‌ی ESC t n کدپیج‌ها روی چاپگرهای سازگار با Epson؛ در صورت تفاوت با codepage_id بازنویسی کنید
+CODEPAGES: Dict[str, int] = {"cp437": 0, "cp720": 32, "cp864": 37, "cp1256": 50}
+
+
+def _read_pbm(path: str) -> Tuple[int, int, bytes]:
+    """خواندن تصویر PBM دودویی (P4) به صورت (بایت در هر ردیف، تعداد ردیف، داده)"""
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    fields: List[bytes] = []
+    pos = 0
+    while len(fields) < 3:
+        while raw[pos:pos + 1].isspace():
+            pos += 1
+        if raw[pos:pos + 1] == b"#":
+            pos = raw.index(b"\n", pos) + 1
+            continue
+        start = pos
+        while not raw[pos:pos + 1].isspace():
+            pos += 1
+        fields.append(raw[start:pos])
+    if fields[0] != b"P4":
+        raise ValueError("Logo must be a binary PBM (P4) image")
+    width, height = int(fields[1]), int(fields[2])
+    row_bytes = (width + 7) // 8
+    data = raw[pos + 1:pos + 1 + row_bytes * height]
+    if len(data) != row_bytes * height:
+        raise ValueError("Truncated PBM image")
+    return row_bytes, height, data
+
+
+class ReceiptDesigner:
+    """
+    رندر مستقیم رسید، تیکت آشپزخانه و فاکتور به صورت جریان بایت ESC/POS برای چاپگرهای حرارتی 80mm.
+    ورودی‌ها همان order_like / invoice_data / template_config سرویس PrintService است و متدهای print_*
+    هم‌امضای آن هستند، پس می‌تواند renderer یک چاپگر در PrinterManager باشد.
+    - متن فارسی شکل‌دهی (اتصال حروف) و به ترتیب نمایشی چپ‌به‌راست تبدیل می‌شود و با جایگزین‌های
+      کدپیج (مثلاً پ -> ب در cp864) رمزگذاری می‌شود.
+    - سربرگ، پانویس و لوگو (PBM) پس از اولین رندر به صورت بایت آماده کش می‌شوند؛ متن‌های تکراری
+      (نام محصولات) هم کش می‌شوند.
+    - width تعداد نویسه در هر خط با فونت A است (48 برای 80mm، 32 برای 58mm).
+    - اگر داده‌ی سند کلید "qr" داشته باشد (مثلاً لینک استعلام فاکتور)، QR پیش از پانویس چاپ می‌شود.
+    """
+
+    _TEXT_CACHE_LIMIT = 4096
+
+    def __init__(self, width: int = 48, codepage: str = "cp864", codepage_id: Optional[int] = None,
+                 cut: bool = True, feed_lines: int = 3, barcodes: Optional[BarcodeGenerator] = None):
+        if width < 16:
+            raise ValueError("width must be at least 16 characters")
+        if codepage_id is None and codepage not in CODEPAGES:
+            raise ValueError(f"Unknown codepage: {codepage}")
+        codecs.lookup(codepage)  # نام نامعتبر همین‌جا LookupError می‌دهد
+        self.width = int(width)
+        self.codepage = codepage
+        self.codepage_id = CODEPAGES[codepage] if codepage_id is None else int(codepage_id)
+        self.cut = cut
+        self.feed_lines = int(feed_lines)
+        self._prologue = INIT + ESC + b"t" + bytes([self.codepage_id])
+        self._glyph_cache: Dict[Glyph, bytes] = {}
+        self._text_cache: Dict[Tuple[str, int, str], bytes] = {}
+        self._block_cache: Dict[Tuple, bytes] = {}
+        self._logo_cache: Dict[str, Tuple[int, bytes]] = {}
+        self.barcodes = barcodes or BarcodeGenerator()
+
+    # ---------- Encoding ----------
+    def _encode_glyph(self, glyph: Glyph) -> bytes:
+        cached = self._glyph_cache.get(glyph)
+        if cached is None:
+            cached = b"?"
+            for candidate in glyph_candidates(glyph):
+                try:
+                    cached = candidate.encode(self.codepage)
+                    break
+                except UnicodeEncodeError:
+                    continue
+            self._glyph_cache[glyph] = cached
+        return cached
+
+    def _fit(self, text: str, width: int, align: str) -> bytes:
+        """متن یک خانه: شکل‌دهی، بریدن به width نویسه و پر کردن با فاصله بر اساس align"""
+        key = (text, width, align)
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            return cached
+        glyphs = shape(text.replace("\n", " "))[:width]
+        glyphs = visual_order(glyphs)
+        pad = width - len(glyphs)
+        if align == "R":
+            left = pad
+        elif align == "C":
+            left = pad // 2
+        else:
+            left = 0
+        out = b" " * left + b"".join(self._encode_glyph(g) for g in glyphs) + b" " * (pad - left)
+        if len(self._text_cache) >= self._TEXT_CACHE_LIMIT:
+            self._text_cache.clear()
+        self._text_cache[key] = out
+        return out
+
+    def encode_line(self, text: str, align: str = "L") -> bytes:
+        return self._fit(str(text), self.width, align) + b"\n"
+
+    # ---------- Cached blocks ----------
+    def _text_block(self, kind: str, cfg: Dict[str, Any], bold: bool) -> bytes:
+        lines = tuple(str(x) for x in cfg.get("lines", []))
+        align = cfg.get("align", "C")
+        key = (kind, lines, align)
+        block = self._block_cache.get(key)
+        if block is None:
+            body = b"".join(self.encode_line(x, align) for x in lines)
+            block = (BOLD_ON + body + BOLD_OFF) if bold else body
+            self._block_cache[key] = block
+        return block
+
+    def _title(self, title: str) -> bytes:
+        key = ("title", title)
+        block = self._block_cache.get(key)
+        if block is None:
+            # در اندازه‌ی دوبرابر هر خط نصف نویسه جا می‌گیرد
+            block = DOUBLE_ON + BOLD_ON + self._fit(title, self.width // 2, "C") + b"\n" + BOLD_OFF + DOUBLE_OFF
+            self._block_cache[key] = block
+        return block
+
+    def _logo(self, path: str) -> bytes:
+        """لوگوی PBM به صورت فرمان GS v 0؛ با تغییر فایل (mtime) دوباره خوانده می‌شود"""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._logo_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            row_bytes, height, data = _read_pbm(path)
+            cmd = (_ALIGN["C"] + GS + b"v0\x00" + bytes([row_bytes & 0xFF, row_bytes >> 8, height & 0xFF, height >> 8])
+                   + data + b"\n" + _ALIGN["L"])
+            cached = (mtime, cmd)
+            self._logo_cache[path] = cached
+        return cached[1]
+
+    def clear_cache(self) -> None:
+        self._glyph_cache.clear()
+        self._text_cache.clear()
+        self._block_cache.clear()
+        self._logo_cache.clear()
+
+    # ---------- Layout helpers ----------
+    def _epoch_to_str(self, ts: int) -> str:
+        try:
+            return datetime.fromtimestamp(int(ts)).strftime("%Y-%m-%d %H:%M")
+        except Exception:
+            return "-"
+
+    def _separator(self, char: bytes = b"-") -> bytes:
+        return char * self.width + b"\n"
+
+    def _column_widths(self, columns: List[Dict[str, Any]]) -> List[int]:
+        """پهنای ستون‌ها (میلی‌متر در قالب PDF) به نسبت، به تعداد نویسه تبدیل می‌شود؛ یک فاصله بین ستون‌ها"""
+        key = ("columns", tuple(float(c.get("width", 40)) for c in columns), self.width)
+        widths = self._block_cache.get(key)
+        if widths is None:
+            usable = self.width - (len(columns) - 1)
+            total = sum(key[1]) or 1.0
+            widths = [max(1, int(w / total * usable)) for w in key[1]]
+            # باقی‌مانده‌ی گرد کردن به ستون اول (معمولاً نام کالا) داده می‌شود
+            widths[0] += usable - sum(widths)
+            self._block_cache[key] = widths
+        return widths
+
+    def _table(self, columns: List[Dict[str, Any]], lines: List[Dict[str, Any]]) -> bytes:
+        widths = self._column_widths(columns)
+        head = b" ".join(
+            self._fit(str(c.get("title", c.get("key", ""))), w, c.get("align", "L")) for c, w in zip(columns, widths)
+        )
+        parts = [BOLD_ON, head, b"\n", BOLD_OFF, self._separator()]
+        for ln in lines:
+            cells = []
+            for col, w in zip(columns, widths):
+                val = ln.get(col.get("key"), "")
+                text = format_money(float(val)) if isinstance(val, (int, float)) else str(val)
+                cells.append(self._fit(text, w, col.get("align", "L")))
+            parts.append(b" ".join(cells) + b"\n")
+        return b"".join(parts)
+
+    def _totals(self, totals: Dict[str, Any]) -> bytes:
+        rows = [("Subtotal", "subtotal"), ("Discount", "discount_total"), ("Tax", "tax"), ("Grand total", "grand_total")]
+        out = [self._separator(), BOLD_ON]
+        for label, key in rows:
+            out.append(self.encode_line(f"{label}: {format_money(float(totals.get(key, 0)))}", "R"))
+        out.append(BOLD_OFF)
+        return b"".join(out)
+
+    def _document(self, title: str, fields: List[str], columns: List[Dict[str, Any]],
+                  lines: List[Dict[str, Any]], totals: Optional[Dict[str, Any]],
+                  template_config: Optional[Dict[str, Any]], qr: Optional[str] = None) -> bytes:
+        cfg = template_config or {}
+        parts = [self._prologue]
+        if cfg.get("logo"):
+            parts.append(self._logo(cfg["logo"]))
+        if cfg.get("header"):
+            parts.append(self._text_block("header", cfg["header"], bold=True))
+        else:
+            parts.append(self._title(title))
+        parts.extend(self.encode_line(f) for f in fields)
+        parts.append(self._separator())
+        parts.append(self._table(columns, lines))
+        if totals is not None:
+            parts.append(self._totals(totals))
+        if qr:
+            parts.append(b"\n" + self.barcodes.escpos("qr", qr, module=int(cfg.get("qr_module", 4))))
+        if cfg.get("footer"):
+            parts.append(b"\n" + self._text_block("footer", cfg["footer"], bold=False))
+        parts.append(ESC + b"d" + bytes([self.feed_lines]))
+        if self.cut:
+            parts.append(CUT)
+        return b"".join(parts)
+
+    # ---------- Rendering ----------
+    def render_invoice(self, invoice_data: Dict[str, Any], template_config: Optional[Dict[str, Any]] = None) -> bytes:
+        header = invoice_data.get("header", {})
+        columns = ((template_config or {}).get("table") or {}).get("columns") or [
+            {"key": "name", "title": "Item", "width": 80, "align": "L"},
+            {"key": "qty", "title": "Qty", "width": 20, "align": "C"},
+            {"key": "price", "title": "Price", "width": 30, "align": "R"},
+            {"key": "line_total", "title": "Total", "width": 30, "align": "R"},
+        ]
+        fields = [
+            f"Order ID: {header.get('order_id', '-')}",
+            f"Customer ID: {header.get('customer_id', '-')}",
+            f"Status: {header.get('status', '-')}",
+            f"Date: {self._epoch_to_str(header.get('created_at', 0))}",
+        ]
+        return self._document("Invoice", fields, columns, invoice_data.get("lines", []),
+                              invoice_data.get("totals", {}), template_config, qr=invoice_data.get("qr"))
+
+    def render_kitchen_ticket(self, order_like: Dict[str, Any], template_config: Optional[Dict[str, Any]] = None) -> bytes:
+        columns = ((template_config or {}).get("table") or {}).get("columns") or [
+            {"key": "name", "title": "Item", "width": 120, "align": "L"},
+            {"key": "qty", "title": "Qty", "width": 30, "align": "C"},
+        ]
+        fields = [
+            f"Order: {order_like.get('order_id', '-')}",
+            f"Time: {self._epoch_to_str(order_like.get('created_at', 0))}",
+        ]
+        return self._document("Kitchen Ticket", fields, columns, order_like.get("items", []), None, template_config)
+
+    def render_receipt(self, order_like: Dict[str, Any], template_config: Optional[Dict[str, Any]] = None) -> bytes:
+        columns = ((template_config or {}).get("table") or {}).get("columns") or [
+            {"key": "name", "title": "Item", "width": 110, "align": "L"},
+            {"key": "qty", "title": "Qty", "width": 30, "align": "C"},
+            {"key": "line_total", "title": "Amount", "width": 40, "align": "R"},
+        ]
+        lines = order_like.get("lines") or [
+            {"name": it.get("name"), "qty": it.get("qty"), "line_total": it.get("qty", 0) * it.get("price", 0)}
+            for it in order_like.get("items", [])
+        ]
+        fields = [
+            f"Order: {order_like.get('order_id', '-')}",
+            f"Time: {self._epoch_to_str(order_like.get('created_at', 0))}",
+        ]
+        return self._document("Receipt", fields, columns, lines, order_like.get("totals", {}), template_config,
+                              qr=order_like.get("qr"))
+
+    # ---------- Output (هم‌امضای PrintService) ----------
+    def _write(self, data: bytes, path: str) -> str:
+        """نوشتن روی فایل یا مسیر دستگاه (مثل /dev/usb/lp0)"""
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def print_invoice(self, invoice_data: Dict[str, Any], filename: str,
+                      template_config: Optional[Dict[str, Any]] = None) -> str:
+        return self._write(self.render_invoice(invoice_data, template_config), filename)
+
+    def print_kitchen_ticket(self, order_like: Dict[str, Any], filename: str,
+                             template_config: Optional[Dict[str, Any]] = None) -> str:
+        return self._write(self.render_kitchen_ticket(order_like, template_config), filename)
+
+    def print_receipt(self, order_like: Dict[str, Any], filename: str,
+                      template_config: Optional[Dict[str, Any]] = None) -> str:
+        return self._write(self.render_receipt(order_like, template_config), filename)
@@ -0,0 +1,376 @@
+# printing/template_engine.py
+import threading
+from datetime import datetime
+from string import Formatter
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from fpdf import FPDF
+
+from models.money import format_money
+from printing.barcode_generator import BarcodeGenerator
+
+# ستون‌های پیش‌فرض هر نوع سند (هم‌ارز PrintService)
+DEFAULT_COLUMNS: Dict[str, List[Dict[str, Any]]] = {
+    "invoice": [
+        {"key": "name", "title": "Item", "width": 80, "align": "L"},
+        {"key": "qty", "title": "Qty", "width": 20, "align": "C"},
+        {"key": "price", "title": "Price", "width": 30, "align": "R"},
+        {"key": "discount", "title": "Discount", "width": 30, "align": "R"},
+        {"key": "line_total", "title": "Line total", "width": 30, "align": "R"},
+    ],
+    "kitchen": [
+        {"key": "name", "title": "Item", "width": 120, "align": "L"},
+        {"key": "qty", "title": "Qty", "width": 30, "align": "C"},
+    ],
+    "receipt": [
+        {"key": "name", "title": "Item", "width": 110, "align": "L"},
+        {"key": "qty", "title": "Qty", "width": 30, "align": "C"},
+        {"key": "line_total", "title": "Amount", "width": 40, "align": "R"},
+    ],
+}
+
+_TOTALS = [
+    {"text": "Subtotal: {totals.subtotal|money}", "align": "R", "bold": True},
+    {"text": "Discount: {totals.discount_total|money}", "align": "R", "bold": True},
+    {"text": "Tax: {totals.tax|money}", "align": "R", "bold": True},
+    {"text": "Grand total: {totals.grand_total|money}", "align": "R", "bold": True},
+]
+
+# بدنه‌ی پیش‌فرض هر نوع سند وقتی قالب body ندارد
+DEFAULT_BODIES: Dict[str, List[Dict[str, Any]]] = {
+    "invoice": [
+        {"block": "title", "text": "Invoice"},
+        {"text": "Order ID: {header.order_id}"},
+        {"text": "Customer ID: {header.customer_id}"},
+        {"text": "Status: {header.status}"},
+        {"text": "Date: {header.created_at|datetime}"},
+        {"ln": 2},
+        {"table": "lines"},
+        {"ln": 4},
+        *_TOTALS,
+        {"block": "footer"},
+    ],
+    "kitchen": [
+        {"block": "title", "text": "Kitchen Ticket"},
+        {"text": "Order: {order_id}"},
+        {"text": "Time: {created_at|datetime}"},
+        {"ln": 2},
+        {"table": "items"},
+        {"block": "footer"},
+    ],
+    "receipt": [
+        {"block": "title", "text": "Receipt"},
+        {"text": "Order: {order_id}"},
+        {"text": "Time: {created_at|datetime}"},
+        {"ln": 2},
+        {"table": "lines", "from_items": True},
+        {"ln": 4},
+        *_TOTALS,
+        {"block": "footer"},
+    ],
+}
+
+
+# ---------- Runtime helpers (در کد کامپایل‌شده استفاده می‌شوند) ----------
+def _g(obj: Any, keys: Tuple[str, ...]) -> Any:
+    for k in keys:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(k)
+    return obj
+
+
+def _s(value: Any) -> str:
+    return "-" if value is None else str(value)
+
+
+def _money(value: Any) -> str:
+    return format_money(float(value or 0))
+
+
+def _dt(value: Any) -> str:
+    try:
+        return datetime.fromtimestamp(int(value or 0)).strftime("%Y-%m-%d %H:%M")
+    except Exception:
+        return "-"
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, (int, float)):
+        return format_money(float(value))
+    return str(value)
+
+
+def _rows(d: Dict[str, Any], source: str, from_items: bool) -> List[Dict[str, Any]]:
+    rows = d.get(source)
+    if not rows and from_items:
+        rows = [{"name": it.get("name"), "qty": it.get("qty"), "line_total": it.get("qty", 0) * it.get("price", 0)}
+                for it in d.get("items", [])]
+    return rows or []
+
+
+def _code(pdf: FPDF, kind: str, value: Any, w: float, h: float, align: str, level: str) -> None:
+    """بارکد/QR در خط جاری؛ مقدار خالی چیزی چاپ نمی‌کند"""
+    if value is None or value == "":
+        return
+    x = {"L": pdf.l_margin, "R": pdf.w - pdf.r_margin - w}.get(align, (pdf.w - w) / 2)
+    _BARCODES.draw_pdf(pdf, kind, str(value), x, pdf.get_y(), w, h, level=level)
+    pdf.ln(w if kind == "qr" else h)
+
+
+# کش ماتریس‌ها بین همه‌ی قالب‌ها مشترک است
+_BARCODES = BarcodeGenerator()
+_FILTERS = {None: "_s", "money": "_money", "datetime": "_dt"}
+_RUNTIME = {"FPDF": FPDF, "_g": _g, "_s": _s, "_money": _money, "_dt": _dt, "_cell": _cell, "_rows": _rows,
+            "_code": _code}
+
+
+class _Compiler:
+    """تبدیل یک template_config به کد پایتون برای یک نوع سند"""
+
+    def __init__(self, config: Dict[str, Any], kind: str):
+        self.config = config
+        self.kind = kind
+        self.lines: List[str] = []
+        self.loops: List[str] = []
+
+    def emit(self, depth: int, code: str) -> None:
+        self.lines.append("    " * depth + code)
+
+    def path(self, path: str) -> str:
+        parts = path.strip().split(".")
+        if parts[0] == "item":
+            if not self.loops:
+                raise ValueError(f"'item' used outside a loop: {path}")
+            return f"_g({self.loops[-1]}, {tuple(parts[1:])!r})"
+        return f"_g(d, {tuple(parts)!r})"
+
+    def text(self, template: str) -> str:
+        """'Order: {header.order_id}' -> عبارت پایتون؛ فیلترها: |money و |datetime"""
+        pieces: List[str] = []
+        for literal, field, spec, _ in Formatter().parse(template):
+            if literal:
+                pieces.append(repr(literal))
+            if field is None:
+                continue
+            name, _, flt = field.partition("|")
+            if (flt or None) not in _FILTERS:
+                raise ValueError(f"Unknown template filter: {flt}")
+            expr = self.path(name)
+            if spec:
+                pieces.append(f"format({expr}, {spec!r})")
+            else:
+                pieces.append(f"{_FILTERS[flt or None]}({expr})")
+        return " + ".join(pieces) or "''"
+
+    def static_lines(self, depth: int, cfg: Dict[str, Any], height: int, bold: bool) -> None:
+        align = cfg.get("align", "C")
+        if bold:
+            self.emit(depth, 'pdf.set_font("", "B")')
+        for line in cfg.get("lines", []):
+            self.emit(depth, f"pdf.cell(0, {height}, {str(line)!r}, ln=True, align={align!r})")
+
+    def block(self, depth: int, node: Dict[str, Any]) -> None:
+        if "text" in node and "block" not in node:
+            bold = bool(node.get("bold"))
+            if bold:
+                self.emit(depth, 'pdf.set_font("", "B")')
+            self.emit(depth, f"pdf.cell(0, {int(node.get('height', 8))}, {self.text(str(node['text']))}, "
+                             f"ln=True, align={node.get('align', 'L')!r})")
+            if bold:
+                self.emit(depth, 'pdf.set_font("", "")')
+        elif "ln" in node:
+            self.emit(depth, f"pdf.ln({float(node['ln'])!r})")
+        elif "font" in node:
+            f = node["font"]
+            size = f", {float(f['size'])!r}" if "size" in f else ""
+            self.emit(depth, f"pdf.set_font({str(f.get('name', ''))!r}, {str(f.get('style', ''))!r}{size})")
+        elif node.get("block") == "title":
+            if self.config.get("header"):
+                self.static_lines(depth, self.config["header"], 8, bold=True)
+                self.emit(depth, "pdf.ln(2)")
+                self.emit(depth, 'pdf.set_font("", "")')
+            else:
+                self.emit(depth, 'pdf.set_font("Arial", "B", 16)')
+                self.emit(depth, f"pdf.cell(0, 10, {str(node.get('text', ''))!r}, ln=True, align='C')")
+                self.emit(depth, 'pdf.set_font("Arial", "", 11)')
+        elif node.get("block") == "footer":
+            if self.config.get("footer"):
+                self.emit(depth, "pdf.ln(4)")
+                self.emit(depth, 'pdf.set_font("", "")')
+                self.static_lines(depth, self.config["footer"], 6, bold=False)
+        elif "table" in node:
+            self.table(depth, node)
+        elif "qr" in node or "barcode" in node:
+            is_qr = "qr" in node
+            kind = "qr" if is_qr else str(node.get("kind", "auto"))
+            BarcodeGenerator.resolve_kind(kind, "")
+            w = float(node.get("size", 30) if is_qr else node.get("width", 60))
+            h = float(node.get("height", 15))
+            self.emit(depth, f"_code(pdf, {kind!r}, {self.path(str(node['qr' if is_qr else 'barcode']))}, {w!r}, "
+                             f"{h!r}, {node.get('align', 'C')!r}, {str(node.get('level', 'M'))!r})")
+        elif "if" in node:
+            cond = self.path(str(node["if"]))
+            if "equals" in node:
+                cond = f"{cond} == {node['equals']!r}"
+            self.emit(depth, f"if {cond}:")
+            self.body(depth + 1, node.get("then", []))
+            if node.get("else"):
+                self.emit(depth, "else:")
+                self.body(depth + 1, node["else"])
+        elif "for" in node:
+            var = f"it{len(self.loops)}"
+            self.emit(depth, f"for {var} in ({self.path(str(node['for']))} or ()):")
+            self.loops.append(var)
+            self.body(depth + 1, node.get("do", []))
+            self.loops.pop()
+        else:
+            raise ValueError(f"Unknown template block: {node}")
+
+    def table(self, depth: int, node: Dict[str, Any]) -> None:
+        columns = (self.config.get("table") or {}).get("columns") or DEFAULT_COLUMNS[self.kind]
+        cols = [(col.get("key"), float(col.get("width", 40)), col.get("align", "L"),
+                 str(col.get("title", col.get("key", "")))) for col in columns]
+        self.emit(depth, 'pdf.set_font("", "B")')
+        for _, w, align, title in cols:
+            self.emit(depth, f"pdf.cell({w!r}, 8, {title!r}, 1, 0, {align!r})")
+        self.emit(depth, "pdf.ln()")
+        self.emit(depth, 'pdf.set_font("", "")')
+        self.emit(depth, f"for row in _rows(d, {str(node['table'])!r}, {bool(node.get('from_items'))!r}):")
+        for key, w, align, _ in cols:
+            self.emit(depth + 1, f"pdf.cell({w!r}, 8, _cell(row.get({key!r}, '')), 1, 0, {align!r})")
+        self.emit(depth + 1, "pdf.ln()")
+
+    def body(self, depth: int, nodes: List[Dict[str, Any]]) -> None:
+        if not nodes:
+            self.emit(depth, "pass")
+        for node in nodes:
+            self.block(depth, node)
+
+    def compile(self) -> str:
+        margins = self.config.get("margins", {})
+        font = self.config.get("font", {})
+        self.emit(0, "def render(d):")
+        self.emit(1, "pdf = FPDF()")
+        self.emit(1, "pdf.add_page()")
+        self.emit(1, f"pdf.set_left_margin({margins.get('left', 10)!r})")
+        self.emit(1, f"pdf.set_top_margin({margins.get('top', 10)!r})")
+        self.emit(1, f"pdf.set_right_margin({margins.get('right', 10)!r})")
+        self.emit(1, f"pdf.set_font({font.get('name', 'Arial')!r}, size={font.get('size', 11)!r})")
+        bodies = self.config.get("bodies") or {}
+        self.body(1, bodies.get(self.kind) or self.config.get("body") or DEFAULT_BODIES[self.kind])
+        self.emit(1, "return pdf")
+        return "\n".join(self.lines) + "\n"
+
+
+class CompiledTemplate:
+    """
+    قالب کامپایل‌شده: برای هر نوع سند (invoice / kitchen / receipt) یک تابع render(data) -> FPDF
+    که فقط یک بار از روی template_config ساخته می‌شود؛ ثابت‌ها (حاشیه‌ها، ستون‌ها، سربرگ) در کد
+    تولیدشده جاسازی شده‌اند و در زمان رندر دیگر دیکشنری قالب خوانده نمی‌شود.
+    """
+    __slots__ = ("template_id", "version", "config", "_renderers", "sources", "_lock")
+
+    def __init__(self, config: Dict[str, Any], template_id: Optional[str] = None, version: Optional[int] = None):
+        self.template_id = template_id
+        self.version = version
+        self.config = dict(config or {})
+        self._renderers: Dict[str, Callable[[Dict[str, Any]], FPDF]] = {}
+        self.sources: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def renderer(self, kind: str) -> Callable[[Dict[str, Any]], FPDF]:
+        fn = self._renderers.get(kind)
+        if fn is None:
+            if kind not in DEFAULT_BODIES:
+                raise ValueError(f"Unknown document kind: {kind}")
+            with self._lock:
+                fn = self._renderers.get(kind)
+                if fn is None:
+                    source = _Compiler(self.config, kind).compile()
+                    namespace = dict(_RUNTIME)
+                    exec(compile(source, f"<template {self.template_id or '-'}:{kind}>", "exec"), namespace)
+                    fn = namespace["render"]
+                    self.sources[kind] = source
+                    self._renderers[kind] = fn
+        return fn
+
+    def render(self, kind: str, data: Dict[str, Any]) -> FPDF:
+        return self.renderer(kind)(data)
+
+    def output(self, kind: str, data: Dict[str, Any], filename: str) -> str:
+        self.render(kind, data).output(filename)
+        return filename
+
+
+class TemplateEngine:
+    """
+    کامپایل و کش قالب‌های چاپ.
+    - get(template_id) قالب را از TemplateService می‌خواند، یک بار کامپایل می‌کند و بر اساس
+      (template_id, version) نگه می‌دارد؛ با به‌روزرسانی یا حذف قالب (listener) و در هر get با مقایسه‌ی
+      نسخه‌ی ایندکس سرویس (template_version، بدون خواندن دیسک) نسخه‌ی کامپایل‌شده‌ی کهنه کنار گذاشته
+      می‌شود؛ پس تغییراتی که سرویس با scan پیدا می‌کند (نمونه‌ی دیگر، ویرایش دستی) هم دیده می‌شوند.
+    - compile(config) برای template_config های بدون شناسه است و کش نمی‌شود.
+    - مجوز 'templates.view' فقط هنگام بارگذاری از TemplateService بررسی می‌شود.
+
+    قالب علاوه بر کلیدهای PrintService (margins, font, header, footer, table) می‌تواند body
+    (یا bodies برای هر نوع سند) داشته باشد: فهرستی از بلوک‌های
+      {"text": "Order: {order_id}", "align", "bold", "height"}  فیلترها: {x|money} {x|datetime}
+      {"ln": 2} | {"font": {"name", "style", "size"}} | {"block": "title", "text"} | {"block": "footer"}
+      {"table": "lines", "from_items": bool}
+      {"if": "header.tax_rate", "equals"?: v, "then": [...], "else": [...]}
+      {"for": "lines", "do": [... {item.name} ...]}
+      {"qr": "qr", "size": 30, "level": "M", "align"} | {"barcode": "item.barcode", "kind", "width", "height"}
+    """
+
+    def __init__(self, template_service: Optional[Any] = None):
+        self._service = template_service
+        self._lock = threading.Lock()
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        if template_service is not None:
+            template_service.register_listener(self._on_template_event)
+
+    def compile(self, config: Dict[str, Any]) -> CompiledTemplate:
+        return CompiledTemplate(config)
+
+    def get(self, template_id: str, actor_token: Optional[str] = None) -> CompiledTemplate:
+        compiled = self._compiled.get(template_id)
+        if compiled is not None:
+            version_of = getattr(self._service, "template_version", None)
+            if version_of is None or version_of(template_id) == compiled.version:
+                return compiled
+            with self._lock:
+                if self._compiled.get(template_id) is compiled:
+                    del self._compiled[template_id]
+        if self._service is None:
+            raise ValueError("No template service configured")
+        rec = self._service.get_template(template_id, actor_token=actor_token)
+        if not rec:
+            raise ValueError("Template not found")
+        compiled = CompiledTemplate(rec.get("content", {}), template_id, int(rec.get("version", 1)))
+        with self._lock:
+            current = self._compiled.get(template_id)
+            # اگر هم‌زمان نسخه‌ی جدیدتری کش شده باشد همان حفظ می‌شود
+            if current is None or (current.version or 0) < compiled.version:
+                self._compiled[template_id] = compiled
+            else:
+                compiled = current
+        return compiled
+
+    def _on_template_event(self, event: Dict[str, Any]) -> None:
+        tid = event.get("template_id")
+        with self._lock:
+            current = self._compiled.get(tid)
+            if current is not None and (event.get("event") == "deleted" or current.version != event.get("version")):
+                del self._compiled[tid]
+
+    def invalidate(self, template_id: Optional[str] = None) -> None:
+        """کنار گذاشتن نسخه‌ی کامپایل‌شده (همه اگر template_id داده نشود)؛ برای تغییرات خارج از این فرایند"""
+        with self._lock:
+            if template_id is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(template_id, None)
+
+    def render(self, template_id: str, kind: str, data: Dict[str, Any], filename: str) -> str:
+        return self.get(template_id).output(kind, data, filename)
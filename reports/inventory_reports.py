@@ -1,11 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 from models.inventory import Inventory
 from models.order import Order
+from analytics.order_batch import OrderBatch
 
 class InventoryReports:
-    def __init__(self, inventory: Inventory, orders: List[Order] = None):
+    def __init__(self, inventory: Inventory, orders: Union[List[Order], OrderBatch] = None):
         self.inventory = inventory
-        self.orders = orders or []
+        self.batch = orders if isinstance(orders, OrderBatch) else None
+        self.orders = [] if self.batch is not None else (orders or [])
 
     def generate_inventory_summary(self) -> Dict[str, Any]:
         """
@@ -49,6 +51,15 @@ class InventoryReports:
         """
         محصولات پرفروش بر اساس سفارش‌ها (کاهش موجودی)
         """
+        if self.batch is not None:
+            b = self.batch
+            qty = OrderBatch.sum_by(b.product, b.qty, len(b.product_ids)).tolist()
+            ranked = sorted(
+                ({"product_id": int(pid), "name": name, "qty": q}
+                 for pid, name, q in zip(b.product_ids.tolist(), b.product_names, qty)),
+                key=lambda x: x["qty"], reverse=True,
+            )
+            return ranked[:limit]
         counts: Dict[int, Dict[str, Any]] = {}
         for o in self.orders:
             for item in o.products:
@@ -1,117 +1,260 @@
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
 
 # این کلاس‌ها فرض شده‌اند در models موجودند و توسط سیستم شما استفاده می‌شوند.
 from models.order import Order
 from models.payment import Payment
 from models.discount import Discount
+from models.money import SCALE, to_minor, round_money
+from analytics.order_batch import OrderBatch
 
 class SalesReports:
-    def __init__(self, orders: List[Order], payments: List[Payment], discounts: Optional[List[Discount]] = None):
-        self.orders = orders
+    """
+    گزارش فروش از روی سفارش‌ها (لیست Order یا OrderBatch) و پرداخت‌ها.
+    همه‌ی معیارها (تعداد، درآمد، تخفیف، محصولات و مشتریان برتر) در aggregate با یک گذر روی سفارش‌ها و
+    یک گذر روی پرداخت‌های بازه محاسبه می‌شوند. سفارش‌ها بر اساس created_at و پرداخت‌ها بر اساس paid_at
+    یک بار مرتب می‌شوند و بازه‌ی زمانی با bisect پیدا می‌شود. با افزودن/حذف سفارش و پرداخت یا جایگزینی
+    لیست‌ها (تغییر id/طول) اندیس خودکار بازسازی می‌شود؛ پس از تغییر زمان رکوردهای موجود refresh() را صدا بزنید.
+    """
+
+    METRICS = ("summary", "products", "customers")
+
+    def __init__(self, orders: Union[List[Order], OrderBatch], payments: List[Payment], discounts: Optional[List[Discount]] = None):
+        # با OrderBatch بخش سفارش‌ها به صورت برداری روی ستون‌ها محاسبه می‌شود
+        self.batch = orders if isinstance(orders, OrderBatch) else None
+        self.orders = [] if self.batch is not None else orders
         self.payments = payments
         self.discounts = discounts or []
+        self._index: Optional[Dict[str, Any]] = None
+
+    # ---------- Time index ----------
+    @staticmethod
+    def _sorted_positions(stamps: List[Optional[datetime]]) -> Dict[str, Any]:
+        """اندیس‌های مرتب بر اساس زمان (پایدار) و اندیس‌های بدون زمان"""
+        timed = sorted((i for i, t in enumerate(stamps) if t is not None), key=stamps.__getitem__)
+        return {"keys": [stamps[i] for i in timed], "positions": timed,
+                "untimed": [i for i, t in enumerate(stamps) if t is None]}
+
+    def refresh(self) -> None:
+        """بازسازی اندیس زمانی و نگاشت سفارش -> مشتری (پس از تغییر orders/payments)"""
+        self._index = None
+
+    def _signature(self) -> tuple:
+        source = self.batch if self.batch is not None else self.orders
+        return id(source), len(source), id(self.payments), len(self.payments)
+
+    def _get_index(self) -> Dict[str, Any]:
+        sig = self._signature()
+        if self._index is None or self._index["signature"] != sig:
+            index: Dict[str, Any] = {"signature": sig, "payments": self._sorted_positions([p.paid_at for p in self.payments])}
+            if self.batch is not None:
+                ts = self.batch.order_timestamp
+                valid = np.flatnonzero(~np.isnat(ts))
+                order = valid[np.argsort(ts[valid], kind="stable")]
+                index["batch_order"] = order
+                index["batch_ts"] = ts[order]
+                index["customers"] = self._batch_order_customers()
+            else:
+                index["orders"] = self._sorted_positions([getattr(o, "created_at", None) for o in self.orders])
+                index["customers"] = {o.order_id: o.customer for o in self.orders}
+            self._index = index
+        return self._index
+
+    @staticmethod
+    def _select(idx: Dict[str, Any], start: Optional[datetime], end: Optional[datetime]) -> List[int]:
+        """
+        اندیس اصلی رکوردهای داخل بازه‌ی بسته‌ی [start, end] به ترتیب زمان؛ هر مرز None یعنی بدون محدودیت
+        از آن سمت، و رکورد بدون زمان فقط وقتی پذیرفته می‌شود که هیچ مرزی داده نشده باشد.
+        """
+        keys, positions = idx["keys"], idx["positions"]
+        if start is None and end is None:
+            return positions + idx["untimed"]
+        lo = bisect_left(keys, start) if start else 0
+        hi = bisect_right(keys, end) if end else len(keys)
+        return positions[lo:hi]
+
+    def _batch_mask(self, start: Optional[datetime], end: Optional[datetime]) -> np.ndarray:
+        b = self.batch
+        if start is None and end is None:
+            return np.ones(len(b), dtype=bool)
+        index = self._get_index()
+        ts = index["batch_ts"]
+        lo = int(np.searchsorted(ts, np.datetime64(start.replace(tzinfo=None), "s"), "left")) if start else 0
+        hi = int(np.searchsorted(ts, np.datetime64(end.replace(tzinfo=None), "s"), "right")) if end else len(ts)
+        mask = np.zeros(len(b), dtype=bool)
+        mask[index["batch_order"][lo:hi]] = True
+        return mask
+
+    # ---------- Aggregation ----------
+    def aggregate(self, start: Optional[datetime] = None, end: Optional[datetime] = None, top_n: int = 5,
+                  metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        محاسبه‌ی معیارهای خواسته‌شده در یک گذر.
+        metrics: زیرمجموعه‌ای از ("summary", "products", "customers")؛ پیش‌فرض همه.
+        خروجی: {"summary": ...، "top_products": [...]، "top_customers": [...]} (فقط کلیدهای خواسته‌شده)
+        """
+        metrics = tuple(metrics or self.METRICS)
+        unknown = set(metrics) - set(self.METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(sorted(unknown))}")
+        want_summary, want_products, want_customers = (m in metrics for m in self.METRICS)
+        index = self._get_index()
+        result: Dict[str, Any] = {}
+
+        # --- سفارش‌ها ---
+        total_orders = 0
+        discount_minor = 0
+        products: Dict[int, Dict[str, Any]] = {}
+        if self.batch is not None:
+            if want_summary or want_products:
+                mask = self._batch_mask(start, end)
+                total_orders = int(mask.sum())
+                discount_minor = int(self.batch.order_discount_minor[mask].sum())
+                if want_products:
+                    result["top_products"] = self._top_products_batch(top_n, mask)
+        elif want_summary or want_products:
+            for pos in self._select(index["orders"], start, end):
+                o = self.orders[pos]
+                total_orders += 1
+                # اگر Order ها مقدار discount_amount دارند از آن استفاده می‌کنیم؛ در غیر این صورت صفر
+                discount_minor += to_minor(getattr(o, "discount_amount", 0.0) or 0.0)
+                if not want_products:
+                    continue
+                for n, item in enumerate(o.products):
+                    p = item["product"]
+                    rec = products.get(p.product_id)
+                    if rec is None:
+                        rec = products[p.product_id] = {"product_id": p.product_id, "name": p.name,
+                                                        "category": getattr(p, "category", None), "qty": 0,
+                                                        "revenue": 0, "_first": (pos, n)}
+                    elif (pos, n) < rec["_first"]:
+                        rec["_first"] = (pos, n)
+                    rec["qty"] += item["quantity"]
+                    rec["revenue"] += item.line_total_minor
+            if want_products:
+                result["top_products"] = self._rank(products, ("qty", "revenue"), top_n)
+
+        # --- پرداخت‌ها ---
+        completed = 0
+        revenue_minor = 0
+        customers: Dict[int, Dict[str, Any]] = {}
+        if want_summary or want_customers:
+            order_customer = index["customers"]
+            for pos in self._select(index["payments"], start, end):
+                p = self.payments[pos]
+                if p.status != "Completed":
+                    continue
+                amount = to_minor(p.amount)
+                completed += 1
+                revenue_minor += amount
+                if not want_customers:
+                    continue
+                cust = order_customer.get(p.order.order_id)
+                if not cust:
+                    continue
+                rec = customers.get(cust.customer_id)
+                if rec is None:
+                    rec = customers[cust.customer_id] = {"customer_id": cust.customer_id, "name": cust.name,
+                                                         "orders": 0, "revenue": 0, "_first": pos}
+                else:
+                    rec["_first"] = min(rec["_first"], pos)
+                rec["orders"] += 1
+                rec["revenue"] += amount
+            if want_customers:
+                result["top_customers"] = self._rank(customers, ("revenue", "orders"), top_n)
+
+        if want_summary:
+            total_revenue = revenue_minor / SCALE
+            result["summary"] = {
+                "date_range": self._fmt_range(start, end),
+                "total_orders": total_orders,
+                "completed_payments": completed,
+                "total_revenue": total_revenue,
+                "average_payment": round_money(total_revenue / completed) if completed > 0 else 0.0,
+                "total_discount": discount_minor / SCALE,
+            }
+        return result
+
+    @staticmethod
+    def _rank(entries: Dict[int, Dict[str, Any]], keys: tuple, limit: int) -> List[Dict[str, Any]]:
+        """
+        رتبه‌بندی نزولی بر اساس keys؛ در تساوی ترتیب اولین مشاهده در لیست اصلی (نه ترتیب زمانی) حفظ
+        می‌شود تا خروجی با مسیر OrderBatch یکسان بماند.
+        """
+        rows = sorted(entries.values(), key=lambda r: r.pop("_first"))
+        for r in rows:
+            r["revenue"] = r["revenue"] / SCALE
+        return sorted(rows, key=lambda r: tuple(r[k] for k in keys), reverse=True)[:limit]
 
     def generate_sales_summary(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
         """
         خلاصه فروش: تعداد سفارش، تعداد پرداخت تکمیل‌شده، مجموع دریافتی (فقط پرداخت‌های Completed)،
         میانگین مبلغ پرداخت، مجموع تخفیف اعمال‌شده (در صورت وجود داده).
         """
-        filtered_orders = [o for o in self.orders if self._in_range(getattr(o, "created_at", None), start, end)]
-        filtered_payments = [p for p in self.payments if self._in_range(p.paid_at, start, end) and p.status == "Completed"]
-
-        total_orders = len(filtered_orders)
-        completed_payments = len(filtered_payments)
-        total_revenue = round(sum(p.amount for p in filtered_payments), 2)
-        avg_payment = round(total_revenue / completed_payments, 2) if completed_payments > 0 else 0.0
-
-        # اگر Order ها مقدار discount_amount دارند از آن استفاده می‌کنیم؛ در غیر این صورت صفر
-        total_discount = 0.0
-        for o in filtered_orders:
-            da = getattr(o, "discount_amount", 0.0)
-            total_discount += (da or 0.0)
-        total_discount = round(total_discount, 2)
-
-        return {
-            "date_range": self._fmt_range(start, end),
-            "total_orders": total_orders,
-            "completed_payments": completed_payments,
-            "total_revenue": total_revenue,
-            "average_payment": avg_payment,
-            "total_discount": total_discount
-        }
+        return self.aggregate(start, end, metrics=["summary"])["summary"]
 
     def top_products(self, limit: int = 5, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         محصولات پرفروش بر اساس تعداد، در بازه زمانی.
         """
-        counts: Dict[int, Dict[str, Any]] = {}
-        for o in self.orders:
-            if not self._in_range(getattr(o, "created_at", None), start, end):
-                continue
-            for item in o.products:
-                p = item["product"]
-                q = item["quantity"]
-                if p.product_id not in counts:
-                    counts[p.product_id] = {"product_id": p.product_id, "name": p.name, "category": getattr(p, "category", None), "qty": 0, "revenue": 0.0}
-                counts[p.product_id]["qty"] += q
-                counts[p.product_id]["revenue"] += round(p.price * q, 2)
-
-        ranked = sorted(counts.values(), key=lambda x: (x["qty"], x["revenue"]), reverse=True)
-        return ranked[:limit]
+        return self.aggregate(start, end, top_n=limit, metrics=["products"])["top_products"]
 
     def top_customers(self, limit: int = 5, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         مشتریان برتر بر اساس مجموع پرداخت تکمیل‌شده در بازه زمانی.
         """
-        # نگاشت order_id -> customer
-        order_customer = {o.order_id: o.customer for o in self.orders}
-
-        totals: Dict[int, Dict[str, Any]] = {}
-        for p in self.payments:
-            if p.status != "Completed" or not self._in_range(p.paid_at, start, end):
-                continue
-            cust = order_customer.get(p.order.order_id)
-            if not cust:
-                continue
-            cid = cust.customer_id
-            if cid not in totals:
-                totals[cid] = {"customer_id": cid, "name": cust.name, "orders": 0, "revenue": 0.0}
-            totals[cid]["orders"] += 1
-            totals[cid]["revenue"] += round(p.amount, 2)
-
-        ranked = sorted(totals.values(), key=lambda x: (x["revenue"], x["orders"]), reverse=True)
+        return self.aggregate(start, end, top_n=limit, metrics=["customers"])["top_customers"]
+
+    def _top_products_batch(self, limit: int, mask: np.ndarray) -> List[Dict[str, Any]]:
+        b = self.batch
+        line_mask = mask[b.line_order]
+        codes = b.product[line_mask]
+        n = len(b.product_ids)
+        qty = OrderBatch.sum_by(codes, b.qty[line_mask], n).tolist()
+        revenue = (OrderBatch.sum_by(codes, b.line_total_minor[line_mask], n) / SCALE).tolist()
+        sold = np.zeros(n, dtype=bool)
+        sold[codes] = True
+        counts = [
+            {"product_id": int(b.product_ids[i]), "name": b.product_names[i],
+             "category": b.categories[b.product_category[i]], "qty": qty[i], "revenue": revenue[i]}
+            for i in np.flatnonzero(sold)
+        ]
+        ranked = sorted(counts, key=lambda x: (x["qty"], x["revenue"]), reverse=True)
         return ranked[:limit]
 
+    def _batch_order_customers(self) -> Dict[int, Any]:
+        """نگاشت order_id -> مشتری (شیء سبک با customer_id و name) از ستون‌های OrderBatch"""
+        b = self.batch
+        result: Dict[int, Any] = {}
+        for oid, cid in zip(b.order_ids.tolist(), b.order_customer_id.tolist()):
+            if cid >= 0:
+                result[oid] = SimpleNamespace(customer_id=cid, name=b.customer_names.get(cid))
+        return result
+
     def render_text_report(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> str:
         """
         خروجی متنی استاندارد برای نمایش سریع در UI.
         """
-        summary = self.generate_sales_summary(start, end)
+        agg = self.aggregate(start, end, top_n=5)
+        summary = agg["summary"]
         lines = []
         lines.append(f"Sales Report | Range: {summary['date_range']}")
         lines.append(f"Orders: {summary['total_orders']} | Completed Payments: {summary['completed_payments']}")
         lines.append(f"Revenue: {summary['total_revenue']} | Average Payment: {summary['average_payment']} | Discounts: {summary['total_discount']}")
         lines.append("-" * 40)
         lines.append("Top Products:")
-        for tp in self.top_products(limit=5, start=start, end=end):
-            lines.append(f" - {tp['name']} x{tp['qty']} | Rev: {round(tp['revenue'], 2)} | Cat: {tp['category']}")
+        for tp in agg["top_products"]:
+            lines.append(f" - {tp['name']} x{tp['qty']} | Rev: {tp['revenue']} | Cat: {tp['category']}")
         lines.append("-" * 40)
         lines.append("Top Customers:")
-        for tc in self.top_customers(limit=5, start=start, end=end):
-            lines.append(f" - {tc['name']} | Orders: {tc['orders']} | Rev: {round(tc['revenue'], 2)}")
+        for tc in agg["top_customers"]:
+            lines.append(f" - {tc['name']} | Orders: {tc['orders']} | Rev: {tc['revenue']}")
         return "\n".join(lines)
 
-    @staticmethod
-    def _in_range(dt: Optional[datetime], start: Optional[datetime], end: Optional[datetime]) -> bool:
-        if dt is None:
-            return True if (start is None and end is None) else False
-        if start and dt < start:
-            return False
-        if end and dt > end:
-            return False
-        return True
-
     @staticmethod
     def _fmt_range(start: Optional[datetime], end: Optional[datetime]) -> str:
         s = start.isoformat(timespec="seconds") if start else "-"
@@ -1,37 +1,71 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from models.order import Order
 from models.payment import Payment
+from models.invoice import Invoice
+from models.money import SCALE, to_minor
+from calculators.tax_calculator import TaxCalculator
 
 class TaxReports:
-    def __init__(self, orders: List[Order], payments: List[Payment]):
+    """
+    گزارش مالیات. بدون calculator مالیات با یک نرخ ثابت روی درآمد خالص پرداخت‌ها حساب می‌شود؛ با
+    TaxCalculator مالیات هر سطر سفارش‌ها (به جز لغوشده‌ها) با نرخ خودش محاسبه و به تفکیک نرخ گزارش می‌شود.
+    با invoices گزارش نرخ‌ها با جمع فاکتورهای صادرشده (با تخفیف خود فاکتور) تطبیق داده می‌شود.
+    """
+
+    def __init__(self, orders: List[Order], payments: List[Payment], calculator: Optional[TaxCalculator] = None,
+                 invoices: Optional[List[Invoice]] = None):
         self.orders = orders
         self.payments = payments
+        self.calculator = calculator
+        self.invoices = invoices
 
-    def generate_tax_summary(self) -> Dict[str, Any]:
-        completed = [p for p in self.payments if p.status == "Completed"]
-        gross_revenue = round(sum(p.amount for p in completed), 2)
-
-        total_discount = 0.0
-        for o in self.orders:
-            da = getattr(o, "discount_amount", 0.0)
-            total_discount += (da or 0.0)
+    def _summary_minor(self) -> Dict[str, int]:
+        # مبالغ به صورت صحیح در واحد خُرد جمع زده می‌شوند
+        gross = sum(to_minor(p.amount) for p in self.payments if p.status == "Completed")
+        discount = sum(to_minor(getattr(o, "discount_amount", 0.0) or 0.0) for o in self.orders)
+        return {"gross_revenue": gross, "total_discount": discount, "net_revenue": gross - discount}
 
-        net_revenue = round(gross_revenue - total_discount, 2)
+    def generate_tax_summary(self) -> Dict[str, Any]:
+        return {k: v / SCALE for k, v in self._summary_minor().items()}
 
-        return {
-            "gross_revenue": gross_revenue,
-            "total_discount": round(total_discount, 2),
-            "net_revenue": net_revenue
-        }
+    def tax_by_rate(self) -> Dict[str, Any]:
+        """
+        گزارش TaxCalculator.tax_report برای سفارش‌های غیرلغوشده (نیاز به calculator)؛ اگر invoices داده شده باشد
+        با فاکتورهای همان سفارش‌ها تطبیق داده می‌شود.
+        """
+        if self.calculator is None:
+            raise ValueError("No tax calculator configured")
+        orders = [o for o in self.orders if o.status != "Cancelled"]
+        invoices = None
+        if self.invoices is not None:
+            ids = {id(o) for o in orders}
+            invoices = [inv for inv in self.invoices if id(inv.order) in ids]
+        return self.calculator.tax_report(orders, invoices)
 
-    def calculate_tax(self, rate: float = 0.09) -> float:
-        summary = self.generate_tax_summary()
-        return round(summary["net_revenue"] * rate, 2)
+    def calculate_tax(self, rate: Optional[float] = None) -> float:
+        """
+        با rate (یا بدون calculator، نرخ پیش‌فرض 0.09): نرخ ثابت روی درآمد خالص.
+        بدون rate و با calculator: جمع مالیات سطرها با نرخ‌های چندگانه.
+        """
+        if rate is None and self.calculator is not None:
+            return self.tax_by_rate()["totals"]["tax"]
+        rate = 0.09 if rate is None else rate
+        net = self._summary_minor()["net_revenue"]
+        return to_minor(net * rate, 1) / SCALE
 
-    def render_text_report(self, rate: float = 0.09) -> str:
+    def render_text_report(self, rate: Optional[float] = None) -> str:
         summary = self.generate_tax_summary()
-        tax = self.calculate_tax(rate)
         lines = []
         lines.append(f"Tax Report | Gross Revenue: {summary['gross_revenue']} | Discounts: {summary['total_discount']} | Net Revenue: {summary['net_revenue']}")
-        lines.append(f"Tax Rate: {rate*100}% | Tax Payable: {tax}")
+        if rate is None and self.calculator is not None:
+            report = self.tax_by_rate()
+            for r in report["rates"]:
+                lines.append(f" - {r['label']}: Net {r['net']} | Tax {r['tax']} | Gross {r['gross']} | Lines {r['lines']}")
+            t = report["totals"]
+            if "invoice_total" in t:
+                lines.append(f"Invoice Total: {t['invoice_total']} | Difference: {t['difference']}")
+            lines.append(f"Tax Payable: {t['tax']}")
+        else:
+            rate = 0.09 if rate is None else rate
+            lines.append(f"Tax Rate: {rate*100}% | Tax Payable: {self.calculate_tax(rate)}")
         return "\n".join(lines)
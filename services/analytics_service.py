@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from collections import defaultdict, Counter
 
 from services.auth_service import AuthService
+from services.sales_aggregates import SalesAggregates, bucket_keys
 
 ANALYTICS_DIR = os.path.join(os.getcwd(), "analytics")
 os.makedirs(ANALYTICS_DIR, exist_ok=True)
@@ -14,7 +15,10 @@ class AnalyticsService:
     """
     سرویس جمع‌آوری و خلاصه‌سازی رویدادها.
     - رویدادها به صورت دیکشنری ذخیره می‌شوند: {event_id, type, payload, ts}
-    - متدهای خلاصه‌سازی پایه ارائه می‌شود.
+    - متدهای خلاصه‌سازی پایه ارائه می‌شود؛ خلاصه‌ها هنگام ثبت رویداد به‌روز می‌شوند و خواندنشان به
+      تعداد رویدادها بستگی ندارد.
+    - sales: تجمیع افزایشی SalesAggregates از رویدادهای order.*/payment.refunded (با در نظر گرفتن
+      ویرایش، لغو و استرداد) برای داشبورد زنده.
     """
 
     def __init__(self, auth_service: Optional[AuthService] = None, storage_dir: Optional[str] = None):
@@ -22,6 +26,10 @@ class AnalyticsService:
         self.storage_dir = storage_dir or ANALYTICS_DIR
         os.makedirs(self.storage_dir, exist_ok=True)
         self._events: List[Dict[str, Any]] = []
+        self._sales_by_day: Dict[str, float] = defaultdict(float)
+        self._orders_by_day: Dict[str, int] = defaultdict(int)
+        self._items: Counter = Counter()
+        self.sales = SalesAggregates()
 
     def _now(self) -> int:
         return int(time.time())
@@ -42,8 +50,37 @@ class AnalyticsService:
         eid = f"evt_{int(self._now())}_{len(self._events)+1}"
         rec = {"event_id": eid, "type": event_type, "payload": dict(payload or {}), "ts": self._now()}
         self._events.append(rec)
+        self._aggregate(rec)
+        self.sales.apply_event(event_type, rec["payload"], rec["ts"])
         return dict(rec)
 
+    @staticmethod
+    def _event_amount(payload: Dict[str, Any]) -> float:
+        # تلاش برای یافتن مقدار فروش در چند مسیر ممکن
+        if "totals" in payload and isinstance(payload["totals"], dict):
+            return float(payload["totals"].get("grand_total", 0) or 0)
+        if "amount" in payload:
+            return float(payload.get("amount", 0) or 0)
+        return 0.0
+
+    def _aggregate(self, e: Dict[str, Any], sales_by_day: Optional[Dict[str, float]] = None,
+                   orders_by_day: Optional[Dict[str, int]] = None, items: Optional[Counter] = None) -> None:
+        """اعمال یک رویداد روی خلاصه‌های روزانه و آیتم‌ها (پیش‌فرض: خلاصه‌های خود سرویس)"""
+        etype = e.get("type")
+        if etype not in ("order", "payment"):
+            return
+        sales_by_day = self._sales_by_day if sales_by_day is None else sales_by_day
+        orders_by_day = self._orders_by_day if orders_by_day is None else orders_by_day
+        items = self._items if items is None else items
+        day = bucket_keys(e.get("ts", 0))[0]
+        payload = e.get("payload", {})
+        sales_by_day[day] += self._event_amount(payload)
+        if etype == "order":
+            orders_by_day[day] += 1
+            for ln in payload.get("lines", []) or []:
+                name = ln.get("name") or ln.get("sku") or "unknown"
+                items[name] += int(float(ln.get("qty", 0) or 0))
+
     def list_events(self, actor_token: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """
         فهرست رویدادها؛ نیاز به 'analytics.view'.
@@ -57,30 +94,11 @@ class AnalyticsService:
         نیاز به 'analytics.view'.
         """
         self._check_permission(actor_token, "analytics.view")
-        by_day: Dict[str, float] = defaultdict(float)
-        for e in self._events:
-            if e.get("type") in ("order", "payment"):
-                ts = int(e.get("ts", 0))
-                day = time.strftime("%Y-%m-%d", time.localtime(ts)) if ts else "unknown"
-                amt = 0.0
-                payload = e.get("payload", {})
-                # تلاش برای یافتن مقدار فروش در چند مسیر ممکن
-                if "totals" in payload and isinstance(payload["totals"], dict):
-                    amt = float(payload["totals"].get("grand_total", 0) or 0)
-                elif "amount" in payload:
-                    amt = float(payload.get("amount", 0) or 0)
-                by_day[day] += amt
-        return dict(by_day)
+        return dict(self._sales_by_day)
 
     def orders_count_by_day(self, actor_token: Optional[str] = None) -> Dict[str, int]:
         self._check_permission(actor_token, "analytics.view")
-        by_day: Dict[str, int] = defaultdict(int)
-        for e in self._events:
-            if e.get("type") == "order":
-                ts = int(e.get("ts", 0))
-                day = time.strftime("%Y-%m-%d", time.localtime(ts)) if ts else "unknown"
-                by_day[day] += 1
-        return dict(by_day)
+        return dict(self._orders_by_day)
 
     def top_items(self, top_n: int = 10, actor_token: Optional[str] = None) -> List[Tuple[str, int]]:
         """
@@ -88,16 +106,31 @@ class AnalyticsService:
         خروجی: لیست تاپ N به صورت (item_name_or_sku, qty)
         """
         self._check_permission(actor_token, "analytics.view")
-        counter = Counter()
+        return self._items.most_common(top_n)
+
+    def live_sales(self, actor_token: Optional[str] = None) -> Dict[str, Any]:
+        """جمع‌های زنده‌ی داشبورد (فروش خالص، تعداد سفارش، استرداد، میانگین) از O(1)؛ نیاز به 'analytics.view'"""
+        self._check_permission(actor_token, "analytics.view")
+        return self.sales.totals()
+
+    def reconcile(self, repair: bool = True, actor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        بررسی خلاصه‌های افزایشی در برابر محاسبه‌ی کامل از روی همه‌ی رویدادها؛ نیاز به 'analytics.manage'.
+        خروجی نتیجه‌ی SalesAggregates.reconcile به‌علاوه‌ی "daily_ok" برای خلاصه‌های روزانه/آیتم‌ها.
+        """
+        self._check_permission(actor_token, "analytics.manage")
+        sales_by_day: Dict[str, float] = defaultdict(float)
+        orders_by_day: Dict[str, int] = defaultdict(int)
+        items: Counter = Counter()
         for e in self._events:
-            if e.get("type") == "order":
-                payload = e.get("payload", {})
-                lines = payload.get("lines", []) or []
-                for ln in lines:
-                    name = ln.get("name") or ln.get("sku") or "unknown"
-                    qty = float(ln.get("qty", 0) or 0)
-                    counter[name] += int(qty)
-        return counter.most_common(top_n)
+            self._aggregate(e, sales_by_day, orders_by_day, items)
+        daily_ok = (dict(orders_by_day) == dict(self._orders_by_day) and items == self._items
+                    and sales_by_day.keys() == self._sales_by_day.keys()
+                    and all(abs(v - self._sales_by_day[k]) <= 1e-6 * max(1.0, abs(v)) for k, v in sales_by_day.items()))
+        if not daily_ok and repair:
+            self._sales_by_day, self._orders_by_day, self._items = sales_by_day, orders_by_day, items
+        result = self.sales.reconcile(events=self._events, repair=repair)
+        return dict(result, daily_ok=daily_ok)
 
     def export_events(self, filename: str, actor_token: Optional[str] = None) -> str:
         """
@@ -0,0 +1,173 @@
+# services/discount_usage_service.py
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from models.discount import Discount
+from services.auth_service import AuthService
+
+class DiscountUsageService:
+    """
+    شمارنده‌ی پایدار و اتمیک مصرف کدهای تخفیف روی جدول discounts (ستون times_used).
+    - افزایش شمارنده با یک UPDATE شرطی (compare-and-set روی times_used) انجام می‌شود، پس حتی با چند
+      ترمینال روی یک فایل SQLite سقف مصرف هرگز رد نمی‌شود.
+    - برای کدهای پرترافیک هر ترمینال یک «اجاره» (lease) از چند مصرف را یک‌جا برمی‌دارد و مصرف‌ها و
+      اعتبارسنجی‌ها تا تمام شدن آن بدون رفتن به دیسک انجام می‌شوند. اجاره حداکثر lease_size و حداکثر
+      lease_fraction از باقی‌مانده است؛ نزدیک سقف اجاره‌ها تک‌تایی می‌شوند.
+    - register_discount مدل Discount را به سرویس وصل می‌کند تا consume() و is_exhausted() آن (و در
+      نتیجه DiscountCalculator.apply_best) از همین شمارنده استفاده کنند.
+    - مصرف‌های اجاره‌شده‌ی استفاده‌نشده با release() برگردانده می‌شوند؛ اگر ترمینال بدون release
+      بسته شود آن‌ها مصرف‌شده حساب می‌شوند (محافظه‌کارانه: سقف هرگز رد نمی‌شود).
+    - اجاره‌ی محلی با یک قفل در برابر threadهای هم‌زمان محافظت می‌شود؛ اتصال پیش‌فرض sqlite3 فقط در
+      thread سازنده قابل استفاده است و هر ترمینال باید DatabaseManager خودش را داشته باشد.
+    """
+
+    def __init__(self, db: Any, lease_size: int = 10, lease_fraction: float = 0.1,
+                 exhausted_ttl: float = 5.0, auth_service: Optional[AuthService] = None):
+        if lease_size < 1:
+            raise ValueError("lease_size must be at least 1")
+        if not 0 < lease_fraction <= 1:
+            raise ValueError("lease_fraction must be in (0, 1]")
+        self._db = db
+        self.lease_size = int(lease_size)
+        self.lease_fraction = float(lease_fraction)
+        self._exhausted_ttl = float(exhausted_ttl)
+        self.auth = auth_service
+        self._lock = threading.Lock()
+        # code -> تعداد مصرف اجاره‌شده‌ی باقی‌مانده
+        self._leases: Dict[str, int] = {}
+        # code -> زمانی که آخرین بار تمام‌شده دیده شد (برای جلوگیری از پرسش مکرر دیسک)
+        self._exhausted: Dict[str, float] = {}
+
+    def _clock(self) -> float:
+        return time.monotonic()
+
+    def _check_permission(self, token: Optional[str], permission: str):
+        if not self.auth:
+            return
+        if not token:
+            raise PermissionError("Missing actor token for permission check")
+        if not self.auth.has_permission(token, permission):
+            raise PermissionError(f"Permission denied: {permission}")
+
+    def _execute(self, query: str, params: tuple) -> int:
+        cursor = self._db.execute_query(query, params)
+        self._db.connection.commit()
+        return cursor.rowcount
+
+    # ---------- Registration ----------
+    def register_discount(self, discount: Discount, actor_token: Optional[str] = None) -> None:
+        """
+        ثبت کد در جدول discounts اگر وجود ندارد (times_used موجود دست نمی‌خورد) و وصل کردن مدل به سرویس.
+        usage_limit=None یعنی نامحدود.
+        """
+        self._check_permission(actor_token, "discounts.manage")
+        scope = "global" if discount.scope == "order" else discount.scope
+        self._execute(
+            "INSERT OR IGNORE INTO discounts (code, discount_type, value, scope, min_order_total, usage_limit, times_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (discount.code, discount.kind, float(discount.value), scope,
+             float(discount.min_order_total or 0), discount.usage_limit, int(discount.used_count)),
+        )
+        discount.usage_service = self
+
+    def sync(self, discount: Discount) -> Discount:
+        """خواندن times_used از دیسک و به‌روزرسانی used_count مدل (بدون احتساب اجاره‌ی محلی)"""
+        row = self._row(discount.code)
+        if row is not None:
+            discount.used_count = int(row["times_used"]) - self._leases.get(discount.code, 0)
+        return discount
+
+    def _row(self, code: str) -> Optional[Dict[str, Any]]:
+        return self._db.fetch_one(
+            "SELECT usage_limit, times_used, is_active FROM discounts WHERE code = ?", (code,)
+        )
+
+    # ---------- Leasing ----------
+    def _lease_amount(self, left: int) -> int:
+        """اندازه‌ی اجاره برای کدی با left مصرف باقی‌مانده: کسری از باقی‌مانده، و ۱ وقتی چیزی نمانده"""
+        return max(1, min(self.lease_size, int(left * self.lease_fraction)))
+
+    def _acquire(self, code: str) -> int:
+        """
+        گرفتن اجاره‌ی جدید از دیسک؛ تعداد مصرف به‌دست‌آمده.
+        اندازه‌ی اجاره‌ی کدهای محدود از روی باقی‌مانده‌ی فعلی حساب و با compare-and-set روی times_used
+        گرفته می‌شود تا یک ترمینال آخرین مصرف‌ها را از بقیه نگیرد.
+        """
+        for _ in range(5):
+            row = self._row(code)
+            if row is None or not row["is_active"]:
+                return 0
+            used = int(row["times_used"])
+            if row["usage_limit"] is None:
+                n = self.lease_size
+            else:
+                left = int(row["usage_limit"]) - used
+                if left <= 0:
+                    return 0
+                n = self._lease_amount(left)
+            if self._execute(
+                "UPDATE discounts SET times_used = ? WHERE code = ? AND is_active = 1 AND times_used = ?",
+                (used + n, code, used),
+            ):
+                return n
+        return 0
+
+    def _has_capacity(self, code: str) -> bool:
+        """باید زیر قفل صدا زده شود؛ در صورت نیاز اجاره‌ی جدید می‌گیرد"""
+        if self._leases.get(code, 0) > 0:
+            return True
+        seen = self._exhausted.get(code)
+        if seen is not None and self._clock() - seen < self._exhausted_ttl:
+            return False
+        got = self._acquire(code)
+        if got <= 0:
+            self._exhausted[code] = self._clock()
+            return False
+        self._exhausted.pop(code, None)
+        self._leases[code] = got
+        return True
+
+    def can_use(self, code: str) -> bool:
+        """اعتبارسنجی سریع؛ تا وقتی اجاره‌ی محلی باقی است به دیسک نمی‌رود"""
+        with self._lock:
+            return self._has_capacity(code)
+
+    def try_consume(self, code: str, discount: Optional[Discount] = None) -> bool:
+        """
+        بررسی و مصرف اتمیک یک بار از کد. در صورت موفقیت used_count مدل (اگر داده شود) هم افزایش می‌یابد.
+        """
+        with self._lock:
+            if not self._has_capacity(code):
+                return False
+            self._leases[code] -= 1
+        if discount is not None:
+            discount.used_count += 1
+        return True
+
+    def release(self, code: Optional[str] = None) -> int:
+        """برگرداندن مصرف‌های اجاره‌شده‌ی استفاده‌نشده به دیسک (همه‌ی کدها اگر code داده نشود)"""
+        with self._lock:
+            codes = [code] if code is not None else list(self._leases)
+            returned = 0
+            for c in codes:
+                n = self._leases.pop(c, 0)
+                if n > 0:
+                    self._execute(
+                        "UPDATE discounts SET times_used = MAX(times_used - ?, 0) WHERE code = ?", (n, c)
+                    )
+                    returned += n
+                self._exhausted.pop(c, None)
+            return returned
+
+    def remaining(self, code: str) -> Optional[int]:
+        """تعداد مصرف باقی‌مانده‌ی کل (دیسک + اجاره‌ی محلی)؛ None برای نامحدود یا کد ناموجود"""
+        row = self._row(code)
+        if row is None or row["usage_limit"] is None:
+            return None
+        with self._lock:
+            local = self._leases.get(code, 0)
+        return int(row["usage_limit"]) - int(row["times_used"]) + local
+
+    def close(self) -> None:
+        self.release()
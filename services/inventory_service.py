@@ -1,5 +1,8 @@
 # services/inventory_service.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+from bisect import bisect_right
+from datetime import datetime
+from itertools import islice
 import time
 
 from services.auth_service import AuthService
@@ -14,13 +17,27 @@ class InventoryService:
 
     def __init__(self, auth_service: Optional[AuthService] = None,
                  notification_service: Optional[Any] = None,
-                 analytics_service: Optional[Any] = None):
+                 analytics_service: Optional[Any] = None,
+                 checkpoint_every: int = 500,
+                 max_checkpoints: Optional[int] = None):
         self._items: Dict[str, Dict[str, Any]] = {}
         self._transactions: List[Dict[str, Any]] = []
         self._reservations: Dict[str, List[Dict[str, Any]]] = {}
         self.auth = auth_service
         self._notif = notification_service
         self._analytics = analytics_service
+        # ژورنال موجودی در کنار دفتر تراکنش‌ها: (at, sku, stock, item_snapshot یا None)
+        # رزرو/آزادسازی و upsert در دفتر تراکنش ثبت نمی‌شوند، پس بازسازی دقیق از روی این ژورنال انجام می‌شود.
+        self._journal: List[Tuple[int, str, float, Optional[Dict[str, Any]]]] = []
+        # checkpointها: {"at", "offset", "items"}؛ مرتب بر اساس زمان
+        self._checkpoints: List[Dict[str, Any]] = []
+        self._checkpoint_times: List[int] = []
+        self._checkpoint_every = max(1, int(checkpoint_every))
+        # پیش‌فرض: کل تاریخچه نگه داشته می‌شود و as_of برای هر زمانی کار می‌کند. فشرده‌سازی با compact()
+        # صریح است؛ اگر max_checkpoints داده شود پس از هر checkpoint خودکار compact(max_checkpoints) اجرا می‌شود.
+        self._max_checkpoints = max(1, int(max_checkpoints)) if max_checkpoints is not None else None
+        # زمان قدیمی‌ترین checkpoint باقی‌مانده پس از فشرده‌سازی؛ as_of پیش از آن ممکن نیست
+        self._history_start: Optional[int] = None
 
     def _now(self) -> int:
         return int(time.time())
@@ -57,6 +74,98 @@ class InventoryService:
         except Exception:
             pass
 
+    # ---------- Point-in-time snapshots ----------
+    def _journal_stock(self, sku: str, full: bool = False):
+        """
+        ثبت وضعیت جدید یک SKU در ژورنال و ساخت checkpoint پس از هر checkpoint_every ورودی.
+        full=True کل رکورد آیتم را نگه می‌دارد (برای upsert که نام/قیمت را هم تغییر می‌دهد).
+        """
+        item = self._items[sku]
+        self._journal.append((item["updated_at"], sku, item["stock"], dict(item) if full else None))
+        last_offset = self._checkpoints[-1]["offset"] if self._checkpoints else 0
+        if len(self._journal) - last_offset >= self._checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        ثبت اسنپ‌شات کامل از _items در موقعیت فعلی ژورنال.
+        معمولاً خودکار صدا زده می‌شود؛ فراخوانی دستی (مثلاً در پایان شیفت) هم مجاز است.
+        آیتم‌هایی که از checkpoint قبلی تغییر نکرده‌اند کپی نمی‌شوند و همان دیکشنری قبلی را به اشتراک می‌گذارند.
+        """
+        at = self._journal[-1][0] if self._journal else self._now()
+        if self._checkpoint_times and at < self._checkpoint_times[-1]:
+            at = self._checkpoint_times[-1]
+        prev = self._checkpoints[-1]["items"] if self._checkpoints else {}
+        items = {}
+        for sku, it in self._items.items():
+            old = prev.get(sku)
+            items[sku] = old if old == it else dict(it)
+        cp = {"at": at, "offset": len(self._journal), "items": items}
+        self._checkpoints.append(cp)
+        self._checkpoint_times.append(at)
+        if self._max_checkpoints is not None and len(self._checkpoints) > self._max_checkpoints:
+            self.compact(self._max_checkpoints)
+        return {"at": cp["at"], "offset": cp["offset"], "items": len(cp["items"])}
+
+    def compact(self, keep: int) -> int:
+        """
+        فشرده‌سازی تاریخچه: فقط keep checkpoint آخر و ژورنال پس از قدیمی‌ترین آن‌ها نگه داشته می‌شود.
+        پس از آن as_of برای زمان‌های پیش از قدیمی‌ترین checkpoint باقی‌مانده ValueError می‌دهد.
+        خروجی: تعداد checkpointهای حذف‌شده.
+        """
+        keep = max(1, int(keep))
+        drop = len(self._checkpoints) - keep
+        if drop <= 0:
+            return 0
+        first = self._checkpoints[drop]
+        cut = first["offset"]
+        del self._journal[:cut]
+        del self._checkpoints[:drop]
+        del self._checkpoint_times[:drop]
+        for cp in self._checkpoints:
+            cp["offset"] -= cut
+        self._history_start = first["at"]
+        return drop
+
+    def checkpoints(self) -> List[Dict[str, Any]]:
+        """متادیتای checkpointهای موجود (بدون محتوای اسنپ‌شات)"""
+        return [{"at": cp["at"], "offset": cp["offset"], "items": len(cp["items"])} for cp in self._checkpoints]
+
+    def as_of(self, timestamp: Union[int, float, datetime], skus: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        وضعیت موجودی همه‌ی SKUها در لحظه‌ی timestamp (epoch یا datetime).
+        نزدیک‌ترین checkpoint قبل از آن زمان بازیابی و فقط دنباله‌ی ژورنال پس از آن بازپخش می‌شود؛
+        بنابراین هزینه به فاصله‌ی checkpointها محدود است نه به طول کل تاریخچه.
+        پس از فشرده‌سازی تاریخچه، زمان‌های پیش از قدیمی‌ترین checkpoint باقی‌مانده ValueError می‌دهند.
+        """
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        ts = int(timestamp)
+
+        pos = bisect_right(self._checkpoint_times, ts)
+        if pos:
+            cp = self._checkpoints[pos - 1]
+            state = {sku: dict(it) for sku, it in cp["items"].items()}
+            offset = cp["offset"]
+        elif self._history_start is not None:
+            raise ValueError(f"Inventory history before {self._history_start} has been compacted")
+        else:
+            state, offset = {}, 0
+
+        for at, sku, stock, snapshot in islice(self._journal, offset, None):
+            if at > ts:
+                break
+            if snapshot is not None:
+                state[sku] = dict(snapshot)
+            elif sku in state:
+                state[sku]["stock"] = stock
+                state[sku]["updated_at"] = at
+
+        if skus is not None:
+            wanted = {str(s).strip() for s in skus}
+            return [it for sku, it in state.items() if sku in wanted]
+        return list(state.values())
+
     # ---------- Item management ----------
     def upsert_item(self, sku: str, name: str, stock: float, price: float, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         item = {
@@ -68,6 +177,7 @@ class InventoryService:
             "updated_at": self._now(),
         }
         self._items[item["sku"]] = item
+        self._journal_stock(item["sku"], full=True)
         return dict(item)
 
     def get_item(self, sku: str) -> Optional[Dict[str, Any]]:
@@ -111,6 +221,7 @@ class InventoryService:
 
         self._items[sku]["stock"] = round(new_stock, 2)
         self._items[sku]["updated_at"] = self._now()
+        self._journal_stock(sku)
 
         tx = {
             "sku": sku,
@@ -124,11 +235,51 @@ class InventoryService:
         self._emit_event("inventory.adjusted", tx, actor_token=actor_token)
         return dict(tx)
 
-    def transactions(self) -> List[Dict[str, Any]]:
+    def adjust_stock_batch(self, deltas: Dict[str, float], reason: str, meta: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        اعمال گروهی تغییرات موجودی به صورت یک نوشتن واحد در دفتر تراکنش‌ها.
+        - deltas: {sku: delta}
+        قبل از هر تغییری وجود همه‌ی SKUها بررسی می‌شود تا دسته یا کامل اعمال شود یا اصلاً اعمال نشود.
+        مجوز و رویداد فقط یک بار (برای کل دسته) بررسی/ارسال می‌شوند.
+        """
+        self._check_permission(actor_token, "inventory.adjust")
+
+        normalized = {str(sku).strip(): float(delta) for sku, delta in deltas.items()}
+        missing = [sku for sku in normalized if sku not in self._items]
+        if missing:
+            raise ValueError(f"Item not found: {', '.join(missing)}")
+
+        meta = dict(meta or {})
+        allow_negative = bool(meta.get("allow_negative", False))
+        now = self._now()
+        batch: List[Dict[str, Any]] = []
+        for sku, delta in normalized.items():
+            item = self._items[sku]
+            new_stock = item["stock"] + delta
+            if not allow_negative and new_stock < 0:
+                new_stock = 0.0
+            item["stock"] = round(new_stock, 2)
+            item["updated_at"] = now
+            self._journal_stock(sku)
+            batch.append({
+                "sku": sku,
+                "delta": delta,
+                "reason": str(reason),
+                "meta": dict(meta),
+                "at": now,
+                "final_stock": item["stock"],
+            })
+
+        self._transactions.extend(batch)
+        self._emit_event("inventory.batch_adjusted", {"reason": str(reason), "count": len(batch), "at": now}, actor_token=actor_token)
+        return [dict(t) for t in batch]
+
+    def transactions(self, offset: int = 0) -> List[Dict[str, Any]]:
         """
         لیست تراکنش‌های موجودی (تاریخچه‌ی تغییرات).
+        offset: فقط تراکنش‌های بعد از این موقعیت (برای خواندن افزایشی دفتر).
         """
-        return [dict(t) for t in self._transactions]
+        return [dict(t) for t in self._transactions[int(offset):]]
 
     # ---------- Reservations and order flow ----------
     def reserve_for_order(self, order_id: str, lines: List[Dict[str, Any]], actor_token: Optional[str] = None) -> Dict[str, Any]:
@@ -159,6 +310,7 @@ class InventoryService:
             qty = float(ln.get("qty", 0.0))
             self._items[sku]["stock"] = round(self._items[sku]["stock"] - qty, 2)
             self._items[sku]["updated_at"] = self._now()
+            self._journal_stock(sku)
             reservation.append({"sku": sku, "qty": qty})
 
         self._reservations[order_id] = reservation
@@ -182,6 +334,7 @@ class InventoryService:
             sku = r["sku"]; qty = float(r["qty"])
             self._items[sku]["stock"] = round(self._items[sku]["stock"] + qty, 2)
             self._items[sku]["updated_at"] = self._now()
+            self._journal_stock(sku)
 
         self._reservations.pop(order_id, None)
         res = {"order_id": order_id, "released": [dict(r) for r in reservation], "released_at": self._now()}
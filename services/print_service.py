@@ -2,19 +2,24 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from fpdf import FPDF
 from services.auth_service import AuthService
+from models.money import format_money
+from printing.invoice_builder import InvoiceBatchBuilder
 
 class PrintService:
     """
     سرویس چاپ PDF با پشتیبانی از template_config ساده و چک مجوزها.
     اگر نمونهٔ AuthService به سازنده پاس داده شود، متدهای چاپ قبل از اجرا
     بررسی مجوز خواهند شد. پارامتر actor_token در متدها اختیاری است.
+    با TemplateEngine می‌توان به جای template_config شناسهٔ قالب (template_id) داد؛ در این
+    حالت نسخهٔ کامپایل‌شده و کش‌شدهٔ قالب رندر می‌شود.
     """
 
-    def __init__(self, auth_service: Optional[AuthService] = None):
+    def __init__(self, auth_service: Optional[AuthService] = None, template_engine: Optional[Any] = None):
         self.auth = auth_service
+        self.templates = template_engine
 
     def _format_money(self, amount: float) -> str:
-        return f"{int(round(amount)):,}"
+        return format_money(amount)
 
     def _epoch_to_str(self, ts: int) -> str:
         try:
@@ -38,6 +43,11 @@ class PrintService:
         if not self.auth.has_permission(token, permission):
             raise PermissionError(f"Permission denied: {permission}")
 
+    def _render_template(self, kind: str, template_id: str, data: Dict[str, Any], filename: str) -> str:
+        if self.templates is None:
+            raise ValueError("No template engine configured")
+        return self.templates.render(template_id, kind, data, filename)
+
     def _apply_margins_and_font(self, pdf: FPDF, template_config: Optional[Dict[str, Any]]):
         margins = (template_config or {}).get("margins", {})
         left = margins.get("left", 10)
@@ -92,13 +102,16 @@ class PrintService:
                 pdf.cell(w, 8, text, 1, 0, align)
             pdf.ln()
 
-    def print_invoice(self, invoice_data: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> str:
+    def print_invoice(self, invoice_data: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None,
+                      template_id: Optional[str] = None) -> str:
         """
         تولید فاکتور رسمی PDF.
         نیاز به مجوز 'print.invoice' یا 'print.any' در صورت وجود AuthService.
         """
         # بررسی مجوز
         self._check_permission(actor_token, "print.invoice")
+        if template_id:
+            return self._render_template("invoice", template_id, invoice_data, filename)
 
         header = invoice_data.get("header", {})
         lines: List[Dict[str, Any]] = invoice_data.get("lines", [])
@@ -149,12 +162,32 @@ class PrintService:
         pdf.output(filename)
         return filename
 
-    def print_kitchen_ticket(self, order_like: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> str:
+    def print_invoices(self, invoices: List[Dict[str, Any]], output_dir: Optional[str] = None, merged_path: Optional[str] = None,
+                       template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None,
+                       template_id: Optional[str] = None, workers: Optional[int] = None,
+                       chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        تولید موازی دسته‌ای فاکتورها (InvoiceBatchBuilder) در output_dir یا یک PDF ادغام‌شده.
+        نیاز به مجوز 'print.invoice' یا 'print.any' در صورت وجود AuthService.
+        بازمی‌گرداند گزارش شامل خطای هر فاکتور و توان عملیاتی.
+        """
+        self._check_permission(actor_token, "print.invoice")
+        if template_id:
+            if self.templates is None:
+                raise ValueError("No template engine configured")
+            template_config = self.templates.get(template_id).config
+        builder = InvoiceBatchBuilder(template_config, workers=workers, chunk_size=chunk_size)
+        return builder.build(invoices, output_dir=output_dir, merged_path=merged_path)
+
+    def print_kitchen_ticket(self, order_like: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None,
+                             template_id: Optional[str] = None) -> str:
         """
         تولید تیکت آشپزخانه.
         نیاز به مجوز 'print.kitchen' یا 'print.any' در صورت وجود AuthService.
         """
         self._check_permission(actor_token, "print.kitchen")
+        if template_id:
+            return self._render_template("kitchen", template_id, order_like, filename)
 
         pdf = FPDF()
         pdf.add_page()
@@ -184,12 +217,15 @@ class PrintService:
         pdf.output(filename)
         return filename
 
-    def print_receipt(self, order_like: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> str:
+    def print_receipt(self, order_like: Dict[str, Any], filename: str, template_config: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None,
+                      template_id: Optional[str] = None) -> str:
         """
         تولید رسید مشتری.
         نیاز به مجوز 'print.receipt' یا 'print.any' در صورت وجود AuthService.
         """
         self._check_permission(actor_token, "print.receipt")
+        if template_id:
+            return self._render_template("receipt", template_id, order_like, filename)
 
         pdf = FPDF()
         pdf.add_page()
@@ -0,0 +1,189 @@
+# services/promotion_service.py
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from models.discount import Discount
+from models.promotion import PromotionSchedule
+from services.auth_service import AuthService
+
+class PromotionService:
+    """
+    زمان‌بندی تبلیغات (happy hour، روزهای هفته، بازه‌های تاریخ شمسی) با تقویم فعال‌سازی از پیش محاسبه‌شده.
+    - برای یک افق زمانی (horizon_days) همه‌ی بازه‌های فعال باز می‌شوند و با یک جاروب (sweep)
+      به قطعه‌های زمانی با مجموعه‌ی فعال ثابت تبدیل می‌شوند.
+    - پرسش «الان چه تبلیغاتی فعال است» یک جست‌وجوی دودویی روی مرز قطعه‌هاست: O(log n + k).
+    - advance(now) که توسط یک زمان‌سنج مرکزی صدا زده می‌شود، رویدادهای شروع/پایان را به مشترکین
+      و notification/analytics می‌فرستد؛ next_change_at() زمان دقیق بیدار شدن بعدی را می‌دهد.
+    تخفیف بدون زمان‌بندی از start_at / end_at خودش استفاده می‌کند.
+    """
+
+    def __init__(self, auth_service: Optional[AuthService] = None,
+                 notification_service: Optional[Any] = None,
+                 analytics_service: Optional[Any] = None,
+                 horizon_days: int = 7):
+        if horizon_days < 1:
+            raise ValueError("horizon_days must be at least 1")
+        self.auth = auth_service
+        self._notif = notification_service
+        self._analytics = analytics_service
+        self._horizon = timedelta(days=int(horizon_days))
+        self._promotions: Dict[str, Tuple[Discount, Optional[PromotionSchedule]]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # تقویم: مرزهای مرتب و مجموعه‌ی فعال هر قطعه [bounds[i], bounds[i+1])
+        self._bounds: List[datetime] = []
+        self._segments: List[Tuple[str, ...]] = []
+        self._window: Optional[Tuple[datetime, datetime]] = None
+        self._last_active: Optional[Tuple[str, ...]] = None
+
+    def _now(self) -> datetime:
+        return datetime.now()
+
+    def _check_permission(self, token: Optional[str], permission: str):
+        if not self.auth:
+            return
+        if not token:
+            raise PermissionError("Missing actor token for permission check")
+        if not self.auth.has_permission(token, permission):
+            raise PermissionError(f"Permission denied: {permission}")
+
+    def _emit_event(self, event_type: str, payload: Dict[str, Any], actor_token: Optional[str] = None):
+        """ارسال رویداد به مشترکین، notification و analytics؛ خطاها عملیات اصلی را متوقف نمی‌کنند."""
+        event = {"type": event_type, **payload}
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass
+        try:
+            if self._notif:
+                try:
+                    self._notif.send_internal(f"event:{event_type}", str(payload), {"payload": payload}, actor_token=actor_token)
+                except PermissionError:
+                    pass
+            if self._analytics:
+                try:
+                    self._analytics.record_event(event_type, payload, actor_token=actor_token)
+                except PermissionError:
+                    pass
+        except Exception:
+            pass
+
+    # ---------- Registry ----------
+    def register(self, discount: Discount, schedule: Optional[PromotionSchedule] = None,
+                 actor_token: Optional[str] = None) -> None:
+        """ثبت یا جایگزینی یک تبلیغ؛ نیاز به 'discounts.manage' در صورت وجود AuthService."""
+        self._check_permission(actor_token, "discounts.manage")
+        if not discount.code:
+            raise ValueError("Discount code is required")
+        self._promotions[discount.code] = (discount, schedule)
+        self._window = None
+
+    def unregister(self, code: str, actor_token: Optional[str] = None) -> bool:
+        self._check_permission(actor_token, "discounts.manage")
+        removed = self._promotions.pop(code, None) is not None
+        if removed:
+            self._window = None
+        return removed
+
+    def get(self, code: str) -> Optional[Discount]:
+        entry = self._promotions.get(code)
+        return entry[0] if entry else None
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """listener(event) برای رویدادهای promotion.started / promotion.ended"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ---------- Activation calendar ----------
+    def _intervals(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, str]]:
+        out: List[Tuple[datetime, datetime, str]] = []
+        for code, (discount, schedule) in self._promotions.items():
+            if schedule is not None:
+                for s, e in schedule.occurrences(start, end):
+                    out.append((s, e, code))
+            else:
+                # end_at شامل است؛ بازه‌ی نیم‌باز با یک میکروثانیه بعد از آن بسته می‌شود
+                s = discount.start_at or start
+                e = discount.end_at + timedelta(microseconds=1) if discount.end_at else end
+                if s < end and e > start:
+                    out.append((s, e, code))
+        return out
+
+    def _build(self, at: datetime) -> None:
+        start, end = at, at + self._horizon
+        points: Dict[datetime, List[Tuple[int, str]]] = {}
+        for s, e, code in self._intervals(start, end):
+            points.setdefault(max(s, start), []).append((1, code))
+            if e < end:
+                points.setdefault(e, []).append((-1, code))
+        points.setdefault(start, [])
+
+        bounds: List[datetime] = []
+        segments: List[Tuple[str, ...]] = []
+        counts: Dict[str, int] = {}
+        order = {code: i for i, code in enumerate(self._promotions)}
+        for t in sorted(points):
+            for delta, code in points[t]:
+                n = counts.get(code, 0) + delta
+                if n > 0:
+                    counts[code] = n
+                else:
+                    counts.pop(code, None)
+            active = tuple(sorted(counts, key=order.__getitem__))
+            if segments and segments[-1] == active:
+                continue
+            bounds.append(t)
+            segments.append(active)
+        self._bounds = bounds
+        self._segments = segments
+        self._window = (start, end)
+
+    def _segment(self, at: datetime) -> int:
+        if self._window is None or not (self._window[0] <= at < self._window[1]):
+            self._build(at)
+        return bisect_right(self._bounds, at) - 1
+
+    def active_codes(self, at: Optional[datetime] = None) -> List[str]:
+        """کد تبلیغات فعال در لحظه‌ی at (پیش‌فرض: الان)"""
+        at = at or self._now()
+        i = self._segment(at)
+        return list(self._segments[i])
+
+    def active_discounts(self, at: Optional[datetime] = None) -> List[Discount]:
+        return [self._promotions[code][0] for code in self.active_codes(at)]
+
+    def is_active(self, code: str, at: Optional[datetime] = None) -> bool:
+        return code in self.active_codes(at)
+
+    def next_change_at(self, at: Optional[datetime] = None) -> datetime:
+        """
+        زمان تغییر بعدی مجموعه‌ی فعال. اگر تا انتهای افق تغییری نباشد، انتهای افق برگردانده می‌شود
+        تا زمان‌سنج در آن لحظه تقویم را دوباره بسازد.
+        """
+        at = at or self._now()
+        i = self._segment(at)
+        if i + 1 < len(self._bounds):
+            return self._bounds[i + 1]
+        return self._window[1]
+
+    def advance(self, at: Optional[datetime] = None, actor_token: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        به‌روزرسانی وضعیت تا لحظه‌ی at و ارسال رویداد برای تبلیغاتی که شروع یا تمام شده‌اند.
+        (بین دو فراخوانی فقط وضعیت نهایی مقایسه می‌شود.)
+        """
+        at = at or self._now()
+        current = tuple(self.active_codes(at))
+        previous = self._last_active or ()
+        started = [c for c in current if c not in previous]
+        ended = [c for c in previous if c not in current]
+        self._last_active = current
+        when = at.isoformat(timespec="seconds")
+        for code in started:
+            self._emit_event("promotion.started", {"code": code, "at": when}, actor_token=actor_token)
+        for code in ended:
+            self._emit_event("promotion.ended", {"code": code, "at": when}, actor_token=actor_token)
+        return {"started": started, "ended": ended}
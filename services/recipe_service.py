@@ -0,0 +1,167 @@
+# services/recipe_service.py
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Union
+
+import numpy as np
+
+from models.recipe import Recipe
+from services.auth_service import AuthService
+from services.inventory_service import InventoryService
+
+class RecipeService:
+    """
+    مدیریت دستور پخت‌ها (BOM) و موتور کسر مواد اولیه از موجودی.
+    دستورها یک بار به ماتریس تُنُک محصول×ماده‌اولیه (قالب CSR) کامپایل می‌شوند و
+    مصرف مواد یک دسته سفارش با یک عملیات برداری NumPy محاسبه می‌شود.
+    ثبت در موجودی از طریق InventoryService.adjust_stock_batch و به صورت یک نوشتن گروهی انجام می‌شود.
+    """
+
+    def __init__(self, inventory_service: InventoryService, auth_service: Optional[AuthService] = None):
+        self._inventory = inventory_service
+        self.auth = auth_service
+        self._recipes: Dict[str, Recipe] = {}
+        # ساختار کامپایل‌شده؛ با هر تغییر در دستورها باطل می‌شود
+        self._dirty = True
+        self._product_index: Dict[str, int] = {}
+        self._ingredient_skus: List[str] = []
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0, dtype=np.float64)
+
+    def _check_permission(self, token: Optional[str], permission: str):
+        if not self.auth:
+            return
+        if not token:
+            raise PermissionError("Missing actor token for permission check")
+        if not self.auth.has_permission(token, permission):
+            raise PermissionError(f"Permission denied: {permission}")
+
+    @staticmethod
+    def _key(product_id: Union[int, str]) -> str:
+        return str(product_id).strip()
+
+    # ---------- Recipe management ----------
+    def register_recipe(self, recipe: Recipe, actor_token: Optional[str] = None) -> None:
+        """
+        ثبت یا جایگزینی دستور پخت یک محصول؛ نیاز به 'inventory.adjust' در صورت وجود AuthService.
+        """
+        self._check_permission(actor_token, "inventory.adjust")
+        if not recipe.ingredients:
+            raise ValueError("Recipe must have at least one ingredient")
+        self._recipes[self._key(recipe.product_id)] = recipe
+        self._dirty = True
+
+    def remove_recipe(self, product_id: Union[int, str], actor_token: Optional[str] = None) -> bool:
+        self._check_permission(actor_token, "inventory.adjust")
+        removed = self._recipes.pop(self._key(product_id), None) is not None
+        if removed:
+            self._dirty = True
+        return removed
+
+    def get_recipe(self, product_id: Union[int, str]) -> Optional[Recipe]:
+        return self._recipes.get(self._key(product_id))
+
+    def list_recipes(self) -> List[Recipe]:
+        return list(self._recipes.values())
+
+    def invalidate(self) -> None:
+        """اگر یک Recipe ثبت‌شده مستقیماً ویرایش شد، این متد را صدا بزنید."""
+        self._dirty = True
+
+    # ---------- Compilation ----------
+    def compile(self) -> Dict[str, int]:
+        """
+        ساخت ماتریس تُنُک CSR:
+        سطرها = محصولات، ستون‌ها = مواد اولیه، مقدار = مصرف به ازای یک واحد محصول.
+        """
+        ingredient_index: Dict[str, int] = {}
+        product_index: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for key, recipe in self._recipes.items():
+            product_index[key] = len(product_index)
+            for sku, qty in recipe.per_unit().items():
+                col = ingredient_index.setdefault(sku, len(ingredient_index))
+                indices.append(col)
+                data.append(qty)
+            indptr.append(len(indices))
+
+        self._product_index = product_index
+        self._ingredient_skus = list(ingredient_index.keys())
+        self._indptr = np.asarray(indptr, dtype=np.int64)
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._data = np.asarray(data, dtype=np.float64)
+        self._dirty = False
+        return {"products": len(product_index), "ingredients": len(ingredient_index), "nnz": len(data)}
+
+    def _ensure_compiled(self) -> None:
+        if self._dirty:
+            self.compile()
+
+    # ---------- Consumption ----------
+    @staticmethod
+    def _iter_order_lines(order: Any) -> Iterable[Tuple[Any, float]]:
+        """
+        پشتیبانی از مدل Order (products: [{"product", "quantity"}]) و سفارش‌های دیکشنری
+        سرویس سفارش (lines/items: [{"product_id" یا "sku", "qty" یا "quantity"}]).
+        """
+        if isinstance(order, dict):
+            for ln in order.get("lines") or order.get("items") or []:
+                pid = ln.get("product_id", ln.get("sku"))
+                qty = ln.get("qty", ln.get("quantity", 0))
+                yield pid, float(qty or 0)
+        else:
+            for item in getattr(order, "products", []):
+                yield item["product"].product_id, float(item["quantity"])
+
+    def consumption_vector(self, orders: Iterable[Any]) -> Tuple[List[str], np.ndarray]:
+        """
+        محاسبه‌ی برداری مصرف مواد اولیه برای یک دسته سفارش.
+        خروجی: (لیست SKU مواد اولیه، آرایه‌ی مصرف هم‌ترتیب با آن)
+        خطوط سفارشی که دستور پخت ندارند نادیده گرفته می‌شوند.
+        """
+        self._ensure_compiled()
+        n_products = len(self._product_index)
+        n_ingredients = len(self._ingredient_skus)
+        index = self._product_index
+
+        rows: List[int] = []
+        qtys: List[float] = []
+        for order in orders:
+            for pid, qty in self._iter_order_lines(order):
+                rows.append(index.get(self._key(pid), -1))
+                qtys.append(qty)
+
+        row_arr = np.asarray(rows, dtype=np.int64)
+        qty_arr = np.asarray(qtys, dtype=np.float64)
+        mask = row_arr >= 0
+        # تجمیع تعداد فروش هر محصول، سپس ضرب بردار در ماتریس CSR
+        sold = np.bincount(row_arr[mask], weights=qty_arr[mask], minlength=n_products)
+        weights = self._data * np.repeat(sold, np.diff(self._indptr))
+        consumption = np.bincount(self._indices, weights=weights, minlength=n_ingredients)
+        return list(self._ingredient_skus), consumption
+
+    def compute_consumption(self, orders: Iterable[Any]) -> Dict[str, float]:
+        """مصرف مواد اولیه به صورت {sku: مقدار}؛ فقط مواد با مصرف غیرصفر"""
+        skus, consumption = self.consumption_vector(orders)
+        nz = np.flatnonzero(consumption)
+        return {skus[i]: round(float(consumption[i]), 4) for i in nz}
+
+    def deplete_orders(self, orders: Iterable[Any], reason: str = "recipe_depletion",
+                       meta: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        کسر مواد اولیه‌ی مصرف‌شده برای یک دسته سفارش از موجودی با یک نوشتن گروهی.
+        نیاز به مجوز 'inventory.adjust' (از طریق InventoryService).
+        """
+        orders = list(orders)
+        consumption = self.compute_consumption(orders)
+        if not consumption:
+            return {"orders": len(orders), "consumption": {}, "transactions": []}
+        batch_meta = {"orders": len(orders), **dict(meta or {})}
+        txs = self._inventory.adjust_stock_batch(
+            {sku: -qty for sku, qty in consumption.items()},
+            reason=reason,
+            meta=batch_meta,
+            actor_token=actor_token,
+        )
+        return {"orders": len(orders), "consumption": consumption, "transactions": txs}
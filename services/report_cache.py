@@ -0,0 +1,206 @@
+# services/report_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+
+class ReportCache:
+    """
+    کش نتایج گزارش با کلید محتوایی: sha256 از (report_type، پارامترهای نرمال‌شده، نسخه‌ی داده).
+    - هر نتیجه یک فایل report_<key>.json است؛ فهرست ورودی‌ها (به ترتیب LRU) در index.json نگه داشته
+      می‌شود تا پس از راه‌اندازی مجدد بدون scan پوشه بارگذاری شود.
+    - حذف: ورودی‌های منقضی (ttl ثانیه پس از ساخت)، سپس قدیمی‌ترین استفاده‌ها تا حجم کل زیر max_bytes و
+      تعداد زیر max_entries بماند.
+    - payloadهای خوانده‌شده در حافظه هم نگه داشته می‌شوند؛ درخواست‌های تکراری (مثلاً داشبورد) به دیسک
+      نمی‌روند. زمان آخرین استفاده حداکثر هر flush_interval ثانیه یک بار در index.json نوشته می‌شود.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 50 * 1024 * 1024, max_entries: int = 1000,
+                 ttl: Optional[float] = 300.0, flush_interval: float = 5.0):
+        if max_bytes < 1 or max_entries < 1:
+            raise ValueError("max_bytes and max_entries must be positive")
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.ttl = ttl
+        self.flush_interval = float(flush_interval)
+        self._lock = threading.RLock()
+        # key -> {"file", "report_id", "type", "size", "created_at", "accessed_at"} به ترتیب LRU
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_report: Dict[str, str] = {}
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._bytes = 0
+        self._dirty = False
+        self._last_flush = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _now(self) -> float:
+        return time.time()
+
+    @staticmethod
+    def make_key(report_type: str, params: Dict[str, Any], data_version: Any) -> str:
+        blob = json.dumps([report_type, params, data_version], sort_keys=True, ensure_ascii=False,
+                          separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # ---------- Index ----------
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _load_index(self) -> None:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as fh:
+                entries = json.load(fh).get("entries", [])
+        except Exception:
+            entries = []
+        for e in entries:
+            path = os.path.join(self.cache_dir, str(e.get("file", "")))
+            if not e.get("key") or not os.path.isfile(path):
+                continue
+            key = e.pop("key")
+            self._entries[key] = e
+            self._by_report[e.get("report_id")] = key
+            self._bytes += int(e.get("size", 0))
+        self._evict()
+
+    def _write_index(self) -> None:
+        data = {"entries": [dict(e, key=k) for k, e in self._entries.items()]}
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, self._index_path())
+        self._dirty = False
+        self._last_flush = self._now()
+
+    def flush(self, force: bool = True) -> None:
+        with self._lock:
+            if self._dirty and (force or self._now() - self._last_flush >= self.flush_interval):
+                self._write_index()
+
+    # ---------- Eviction ----------
+    def _drop(self, key: str) -> None:
+        e = self._entries.pop(key, None)
+        if e is None:
+            return
+        self._memory.pop(key, None)
+        if self._by_report.get(e.get("report_id")) == key:
+            del self._by_report[e.get("report_id")]
+        self._bytes -= int(e.get("size", 0))
+        try:
+            os.remove(os.path.join(self.cache_dir, e["file"]))
+        except OSError:
+            pass
+        self._dirty = True
+
+    def _expired(self, e: Dict[str, Any]) -> bool:
+        ttl = e.get("ttl", self.ttl)
+        return ttl is not None and self._now() - float(e.get("created_at", 0)) > ttl
+
+    def _evict(self) -> int:
+        removed = 0
+        for key in [k for k, e in self._entries.items() if self._expired(e)]:
+            self._drop(key)
+            removed += 1
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            self._drop(next(iter(self._entries)))
+            removed += 1
+        return removed
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            removed = self._evict()
+            self.flush()
+            return removed
+
+    # ---------- Access ----------
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None or self._expired(e):
+                if e is not None:
+                    self._drop(key)
+                    self.flush()
+                self.misses += 1
+                return None
+            payload = self._memory.get(key)
+            if payload is None:
+                try:
+                    with open(os.path.join(self.cache_dir, e["file"]), "r", encoding="utf-8") as fh:
+                        payload = json.load(fh)
+                except Exception:
+                    self._drop(key)
+                    self.flush()
+                    self.misses += 1
+                    return None
+                self._memory[key] = payload
+            self._entries.move_to_end(key)
+            e["accessed_at"] = self._now()
+            self._dirty = True
+            self.hits += 1
+            self.flush(force=False)
+            return payload
+
+    def put(self, key: str, payload: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """ttl: عمر این ورودی به جای ttl پیش‌فرض کش (مثلاً برای گزارش‌های از پیش محاسبه‌شده)"""
+        blob = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        filename = f"report_{key}.json"
+        with self._lock:
+            self._drop(key)
+            if len(blob) > self.max_bytes:
+                self.flush()
+                return
+            tmp = os.path.join(self.cache_dir, filename + ".tmp")
+            with open(tmp, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, os.path.join(self.cache_dir, filename))
+            now = self._now()
+            self._entries[key] = {"file": filename, "report_id": payload.get("report_id"),
+                                  "type": payload.get("type"), "size": len(blob),
+                                  "created_at": now, "accessed_at": now}
+            if ttl is not None:
+                self._entries[key]["ttl"] = float(ttl)
+            self._by_report[payload.get("report_id")] = key
+            self._memory[key] = payload
+            self._bytes += len(blob)
+            self._dirty = True
+            self._evict()
+            self.flush()
+
+    def find(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """جستجو با report_id از روی index (بدون فهرست کردن پوشه)"""
+        with self._lock:
+            key = self._by_report.get(report_id)
+        return self.get(key) if key else None
+
+    def delete(self, report_id: str) -> bool:
+        with self._lock:
+            key = self._by_report.get(report_id)
+            if key is None:
+                return False
+            self._drop(key)
+            self.flush()
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self.flush()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(e, key=k) for k, e in self._entries.items()]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "max_entries": self.max_entries, "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,279 @@
+# services/report_scheduler.py
+import os
+import json
+import time
+import pickle
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+
+_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+            "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+
+def _run_builder(builder: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+                 bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """اجرای builder گزارش در فرایند کارگر"""
+    return builder(bundle, params)
+
+
+class CronRule:
+    """
+    قاعده‌ی زمان‌بندی به سبک cron با پنج فیلد 'دقیقه ساعت روز ماه روزهفته' (به وقت محلی).
+    هر فیلد: *، عدد، بازه (1-5)، فهرست (1,3) و گام (*/15 یا 0-6/2)؛ روز هفته 0 یا 7 = یکشنبه.
+    اگر هم روز ماه و هم روز هفته محدود شده باشند، مانند cron تطبیق هر کدام کافی است.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = str(expr).strip()
+        parts = _ALIASES.get(self.expr, self.expr).split()
+        if len(parts) != 5:
+            raise ValueError(f"Invalid cron expression: {expr}")
+        sets = [self._parse(p, lo, hi) for p, (_, lo, hi) in zip(parts, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = sets
+        self.weekdays = {d % 7 for d in weekdays}
+        self._dom_any = parts[2] == "*"
+        self._dow_any = parts[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> set:
+        out = set()
+        for part in field.split(","):
+            rng, _, step = part.partition("/")
+            try:
+                step_n = int(step) if step else 1
+                if rng == "*":
+                    start, end = lo, hi
+                elif "-" in rng:
+                    start, end = (int(x) for x in rng.split("-", 1))
+                else:
+                    start = end = int(rng)
+                    if step:
+                        end = hi
+            except ValueError:
+                raise ValueError(f"Invalid cron field: {field}")
+            if step_n < 1 or start < lo or end > hi or start > end:
+                raise ValueError(f"Invalid cron field: {field}")
+            out.update(range(start, end + 1, step_n))
+        return out
+
+    def _day_matches(self, d: datetime) -> bool:
+        if d.month not in self.months:
+            return False
+        dom = d.day in self.days
+        dow = (d.weekday() + 1) % 7 in self.weekdays
+        if self._dom_any or self._dow_any:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, ts: float) -> bool:
+        d = datetime.fromtimestamp(ts)
+        return self._day_matches(d) and d.hour in self.hours and d.minute in self.minutes
+
+    def next_after(self, ts: float) -> float:
+        """اولین زمان (ثانیه‌ی صفر دقیقه) بعد از ts که با قاعده تطبیق دارد"""
+        start = datetime.fromtimestamp(ts).replace(second=0, microsecond=0)
+        day = start.replace(hour=0, minute=0)
+        hours, minutes = sorted(self.hours), sorted(self.minutes)
+        for _ in range(366 * 8):
+            if self._day_matches(day):
+                for h in hours:
+                    for m in minutes:
+                        t = day.replace(hour=h, minute=m).timestamp()
+                        if t > ts:
+                            return t
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression never matches: {self.expr}")
+
+
+class ReportScheduler:
+    """
+    پیش‌محاسبه‌ی زمان‌بندی‌شده‌ی گزارش‌ها (مثلاً گزارش‌های صبحگاهی مدیران در ساعات خلوت شب).
+    - هر job: نوع گزارش، پارامترها، قاعده‌ی cron و عمر نتیجه در کش (ttl).
+    - فقط مرحله‌ی builder گزارش در یک فرایند جدا (ProcessPool تک‌کارگره) اجرا می‌شود. خواندن داده‌ی
+      providerها همیشه در همین فرایند (در thread اجراکننده) انجام می‌شود، و builderهایی که pickle نمی‌شوند
+      (closure) هم در همین فرایند اجرا می‌شوند؛ record["process"] نشان می‌دهد builder کجا اجرا شده است.
+    - قفل scheduler در طول ساخت گزارش نگه داشته نمی‌شود، پس list_jobs/add_job/history در این مدت مسدود
+      نمی‌شوند؛ یک job هم‌زمان دو بار اجرا نمی‌شود.
+    - نتیجه از طریق ReportingService.precompute در ReportCache نوشته می‌شود؛ اگر نسخه‌ی داده از اجرای قبلی
+      تغییر نکرده و نتیجه هنوز در کش باشد، اجرا با وضعیت "skipped" رد می‌شود.
+    - اگر provider داده‌ای خطا بدهد اجرا "failed" ثبت و نتیجه کش نمی‌شود.
+    - زمان اجرای هر بار (computed/skipped/failed) در history ثبت و در صورت وجود history_file ذخیره می‌شود.
+    - start() یک thread پس‌زمینه راه می‌اندازد که هر poll_interval ثانیه run_pending را صدا می‌زند.
+    """
+
+    def __init__(self, reporting_service: Any, history_file: Optional[str] = None, use_process: bool = True,
+                 history_limit: int = 50, timeout: Optional[float] = 600.0):
+        self.reporting = reporting_service
+        self.history_file = history_file
+        self.use_process = use_process
+        self.history_limit = max(1, int(history_limit))
+        self.timeout = timeout
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._running: set = set()
+        self._lock = threading.RLock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load_history()
+
+    def _now(self) -> float:
+        return time.time()
+
+    # ---------- Jobs ----------
+    def add_job(self, job_id: str, report_type: str, cron: str, params: Optional[Dict[str, Any]] = None,
+                ttl: Optional[float] = 86400.0) -> Dict[str, Any]:
+        """ثبت (یا جایگزینی) job؛ نوع گزارش و پارامترها همین‌جا بررسی می‌شوند"""
+        rt = self.reporting.describe_report_type(report_type)
+        unknown = sorted(set(params or {}) - set(rt["params"]))
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {report_type}: {', '.join(unknown)}")
+        rule = CronRule(cron)
+        job = {"job_id": str(job_id), "report_type": report_type, "params": dict(params or {}), "cron": rule.expr,
+               "ttl": ttl, "rule": rule, "next_run": rule.next_after(self._now())}
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+        return self._describe(job)
+
+    def remove_job(self, job_id: str) -> bool:
+        with self._lock:
+            return self._jobs.pop(str(job_id), None) is not None
+
+    def _describe(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        runs = self._history.get(job["job_id"], [])
+        computed = [r["elapsed"] for r in runs if r["status"] == "computed"]
+        return {
+            "job_id": job["job_id"], "report_type": job["report_type"], "params": dict(job["params"]),
+            "cron": job["cron"], "ttl": job["ttl"], "next_run": job["next_run"],
+            "last_run": dict(runs[-1]) if runs else None,
+            "avg_runtime": sum(computed) / len(computed) if computed else None,
+        }
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._describe(j) for j in self._jobs.values()]
+
+    def history(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in self._history.get(str(job_id), [])]
+
+    # ---------- Running ----------
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=1)
+            return self._pool
+
+    def _runner(self, record: Dict[str, Any]) -> Callable[..., Dict[str, Any]]:
+        def run(builder: Callable[..., Dict[str, Any]], bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+            if self.use_process:
+                try:
+                    pickle.dumps(builder)
+                except Exception:
+                    pass
+                else:
+                    record["process"] = True
+                    return self._executor().submit(_run_builder, builder, bundle, params).result(timeout=self.timeout)
+            return builder(bundle, params)
+        return run
+
+    def run_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        اجرای فوری یک job؛ خروجی رکورد history: {job_id, started_at, elapsed, status, report_id, process, error}
+        قفل scheduler فقط برای خواندن job و ثبت history گرفته می‌شود، نه در طول ساخت گزارش.
+        """
+        with self._lock:
+            job = self._jobs.get(str(job_id))
+            if job is None:
+                raise ValueError("Job not found")
+            if job["job_id"] in self._running:
+                raise ValueError("Job is already running")
+            self._running.add(job["job_id"])
+            report_type, params, ttl = job["report_type"], dict(job["params"]), job["ttl"]
+        record: Dict[str, Any] = {"job_id": job["job_id"], "started_at": self._now(), "elapsed": 0.0,
+                                  "status": "computed", "report_id": None, "process": False, "error": None}
+        started = time.perf_counter()
+        try:
+            payload = self.reporting.precompute(report_type, params, ttl=ttl, runner=self._runner(record))
+            record["report_id"] = payload.get("report_id")
+            errors = payload.get("errors")
+            if errors:
+                # ReportingService گزارش ناقص را کش نمی‌کند؛ اجرا ناموفق ثبت می‌شود
+                record["status"] = "failed"
+                record["error"] = "; ".join(f"{name}: {msg}" for name, msg in sorted(errors.items()))
+            elif payload.get("cached"):
+                record["status"] = "skipped"
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["elapsed"] = time.perf_counter() - started
+        with self._lock:
+            self._running.discard(job["job_id"])
+            runs = self._history.setdefault(job["job_id"], [])
+            runs.append(record)
+            del runs[:-self.history_limit]
+            self._save_history()
+        return dict(record)
+
+    def run_pending(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """اجرای jobهای سررسیده (اجراهای جامانده فقط یک بار) و تعیین نوبت بعدی؛ jobهای در حال اجرا رد می‌شوند"""
+        now = self._now() if now is None else now
+        with self._lock:
+            due = [j for j in self._jobs.values() if j["next_run"] <= now and j["job_id"] not in self._running]
+            for job in due:
+                job["next_run"] = job["rule"].next_after(now)
+        results = []
+        for job in due:
+            try:
+                results.append(self.run_job(job["job_id"]))
+            except ValueError:
+                # job در این فاصله حذف شده یا از جای دیگر اجرا شده است
+                pass
+        return results
+
+    def start(self, poll_interval: float = 30.0) -> None:
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be positive")
+        self.close()
+        self._stop = threading.Event()
+
+        def loop(stop: threading.Event) -> None:
+            while not stop.wait(poll_interval):
+                try:
+                    self.run_pending()
+                except Exception:
+                    pass
+
+        self._thread = threading.Thread(target=loop, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    # ---------- History persistence ----------
+    def _load_history(self) -> None:
+        if not self.history_file or not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._history = {str(k): list(v)[-self.history_limit:] for k, v in dict(data).items()}
+        except Exception:
+            self._history = {}
+
+    def _save_history(self) -> None:
+        if not self.history_file:
+            return
+        tmp = self.history_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._history, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.history_file)
@@ -3,32 +3,130 @@ import json
 import csv
 import time
 import uuid
-from typing import Callable, Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Callable, Dict, Any, Optional, List, Tuple, Iterable
 
 from services.auth_service import AuthService
+from services.report_cache import ReportCache
+from services.sales_aggregates import SalesAggregates
+from exports.stream_exporter import StreamExporter
 
 REPORTS_DIR = os.path.join(os.getcwd(), "reports_cache")
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+class _ReportType:
+    __slots__ = ("name", "builder", "providers", "params")
+
+    def __init__(self, name: str, builder: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+                 providers: List[str], params: Dict[str, Any]):
+        self.name = name
+        self.builder = builder
+        self.providers = tuple(dict.fromkeys(str(p) for p in providers))
+        self.params = dict(params)
+
+
 class ReportingService:
     """
     سرویس تولید و صادرسازی گزارش‌ها با پشتیبانی از providers و چک مجوزها.
     - providers: name -> callable() -> dict (داده‌های خام برای گزارش)
-    - گزارش‌های تولیدشده در حافظه و به صورت فایل JSON در reports_cache ذخیره می‌شوند.
+    - هر نوع گزارش providerهای مورد نیاز و پارامترهای قابل قبولش را اعلام می‌کند؛ فقط همان providerها
+      (و در صورت نیاز به چند provider، به صورت همزمان) فراخوانی می‌شوند. در generate_reports نتیجه‌ی هر
+      provider بین همه‌ی گزارش‌های دسته مشترک است.
+    - نتیجه‌ها در ReportCache (پوشه‌ی reports_cache) با کلید (نوع گزارش، پارامترهای نرمال‌شده، نسخه‌ی داده)
+      ذخیره می‌شوند و درخواست تکراری از کش پاسخ داده می‌شود. نسخه‌ی داده‌ی هر provider خروجی تابع version
+      اختیاری آن (مثلاً بیشترین updated_at) به‌علاوه‌ی شمارنده‌ای است که notify_data_changed زیادش می‌کند.
+      گزارش‌هایی که provider بدون version دارند کش نمی‌شوند (تغییر داده‌شان قابل تشخیص نیست)، مگر آن provider
+      با cacheable=True ثبت شده باشد؛ در آن صورت گزارش فقط در همین نمونه‌ی سرویس و تا ttl یا
+      notify_data_changed از کش خوانده می‌شود و ممکن است کهنه باشد.
     """
 
-    def __init__(self, auth_service: Optional[AuthService] = None, cache_dir: Optional[str] = None):
+    def __init__(self, auth_service: Optional[AuthService] = None, cache_dir: Optional[str] = None,
+                 max_workers: int = 4, cache_ttl: Optional[float] = 300.0,
+                 cache_max_bytes: int = 50 * 1024 * 1024, cache_max_entries: int = 1000):
         self.auth = auth_service
         self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._provider_versions: Dict[str, Callable[[], Any]] = {}
+        # providerهای بدون version که کش شدن (و احتمال کهنگی) گزارش‌هایشان را پذیرفته‌اند
+        self._cacheable: set = set()
+        self._data_versions: Dict[str, int] = {}
+        self._epoch = uuid.uuid4().hex
         self._cache_dir = cache_dir or REPORTS_DIR
         os.makedirs(self._cache_dir, exist_ok=True)
-        self._cache_index: Dict[str, Dict[str, Any]] = {}  # report_id -> meta
+        self.cache = ReportCache(self._cache_dir, max_bytes=cache_max_bytes, max_entries=cache_max_entries,
+                                 ttl=cache_ttl)
+        self.max_workers = max(1, int(max_workers))
+        self._report_types: Dict[str, _ReportType] = {}
+        self.register_report_type("sales_summary", self._build_sales_summary, ["orders"])
+        self.register_report_type("inventory_status", self._build_inventory_status, ["inventory"], {"threshold": 5})
+        self.register_report_type("orders_by_customer", self._build_orders_by_customer, ["orders"])
 
     # ---------- Provider management ----------
-    def register_data_provider(self, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    def register_data_provider(self, name: str, provider: Callable[[], Dict[str, Any]],
+                               version: Optional[Callable[[], Any]] = None, cacheable: bool = False) -> None:
+        """
+        version: تابع ارزان و اختیاری که با تغییر داده‌ی provider مقدار تازه‌ای برمی‌گرداند.
+        cacheable: برای provider بدون version، اجازه‌ی کش گزارش‌ها تا ttl یا notify_data_changed.
+        """
         if not callable(provider):
             raise ValueError("provider must be callable")
-        self._providers[str(name)] = provider
+        if version is not None and not callable(version):
+            raise ValueError("version must be callable")
+        name = str(name)
+        self._providers[name] = provider
+        if cacheable:
+            self._cacheable.add(name)
+        else:
+            self._cacheable.discard(name)
+        if version is not None:
+            self._provider_versions[name] = version
+            self._data_versions[name] = 0
+        else:
+            self._provider_versions.pop(name, None)
+            self.notify_data_changed(name)
+
+    def attach_sales_aggregates(self, aggregates: SalesAggregates, name: str = "sales") -> None:
+        """
+        خواندن sales_summary و orders_by_customer از تجمیع افزایشی به جای پیمایش همه‌ی سفارش‌ها.
+        provider با نام name ثبت می‌شود و نسخه‌اش aggregates.version است؛ سفارش‌های لغوشده شمرده نمی‌شوند
+        و استردادها از فروش کم می‌شوند.
+        """
+        self.register_data_provider(name, aggregates.snapshot, version=lambda: aggregates.version)
+        self.register_report_type("sales_summary", self._sales_builder(name, self._build_sales_summary_live), [name])
+        self.register_report_type("orders_by_customer", self._sales_builder(name, self._build_orders_by_customer_live),
+                                  [name])
+
+    @staticmethod
+    def _sales_builder(name: str, build: Callable[[Dict[str, Any]], Dict[str, Any]]
+                       ) -> Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]:
+        def builder(bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+            snap = bundle.get(name)
+            if not isinstance(snap, dict) or "totals" not in snap:
+                raise ValueError(f"Sales aggregates unavailable: {(snap or {}).get('_error', name)}")
+            return build(snap)
+        return builder
+
+    def notify_data_changed(self, name: Optional[str] = None) -> None:
+        """اعلام تغییر داده‌ی یک provider (یا همه)؛ گزارش‌های کش‌شده‌ی وابسته دیگر استفاده نمی‌شوند"""
+        for n in ([name] if name is not None else list(self._providers)):
+            self._data_versions[n] = self._data_versions.get(n, 0) + 1
+
+    def data_version(self, report_type: str) -> Optional[Dict[str, Any]]:
+        """
+        نسخه‌ی داده‌ی providerهای یک نوع گزارش؛ None (کش استفاده نمی‌شود) اگر تابع version خطا بدهد یا
+        providerی بدون version و بدون cacheable باشد.
+        """
+        rt = self._get_report_type(report_type)
+        out: Dict[str, Any] = {}
+        for name in rt.providers:
+            fn = self._provider_versions.get(name)
+            if fn is None and name not in self._cacheable:
+                return None
+            try:
+                out[name] = [fn() if fn else self._epoch, self._data_versions.get(name, 0)]
+            except Exception:
+                return None
+        return out
 
     def list_providers(self) -> List[str]:
         return list(self._providers.keys())
@@ -42,126 +140,227 @@ class ReportingService:
         if not self.auth.has_permission(token, permission):
             raise PermissionError(f"Permission denied: {permission}")
 
-    # ---------- Report generation ----------
+    # ---------- Report types ----------
+    def register_report_type(self, name: str, builder: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+                             providers: Optional[List[str]] = None, params: Optional[Dict[str, Any]] = None) -> None:
+        """
+        ثبت نوع گزارش.
+        - builder(bundle, params) -> data؛ bundle فقط شامل providers اعلام‌شده است.
+        - providers: نام providerهایی که گزارش می‌خواند (فقط همین‌ها فراخوانی می‌شوند).
+        - params: پارامترهای قابل قبول -> مقدار پیش‌فرض؛ پارامتر ناشناخته رد می‌شود.
+        """
+        if not callable(builder):
+            raise ValueError("builder must be callable")
+        self._report_types[str(name)] = _ReportType(str(name), builder, providers or [], params or {})
+
     def list_report_types(self) -> List[str]:
-        return ["sales_summary", "inventory_status", "orders_by_customer"]
+        return list(self._report_types.keys())
+
+    def describe_report_type(self, report_type: str) -> Dict[str, Any]:
+        rt = self._get_report_type(report_type)
+        return {"type": rt.name, "providers": list(rt.providers), "params": dict(rt.params)}
 
-    def generate_report(self, report_type: str, params: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> Dict[str, Any]:
+    def _get_report_type(self, report_type: str) -> "_ReportType":
+        rt = self._report_types.get(report_type)
+        if rt is None:
+            raise ValueError("Unknown report type")
+        return rt
+
+    @staticmethod
+    def _normalize_params(rt: "_ReportType", params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        params = dict(params or {})
+        unknown = sorted(set(params) - set(rt.params))
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {rt.name}: {', '.join(unknown)}")
+        return {**rt.params, **params}
+
+    # ---------- Provider invocation ----------
+    def _call_provider(self, name: str) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        prov = self._providers.get(name)
+        if prov is None:
+            result: Any = {"_error": f"Provider not registered: {name}"}
+        else:
+            try:
+                result = prov() or {}
+            except Exception as e:
+                result = {"_error": str(e)}
+        return result, time.perf_counter() - started
+
+    def _collect(self, names: List[str], shared: Dict[str, Any], timings: Dict[str, float]) -> None:
+        """
+        فراخوانی providerهای لازمی که هنوز در shared نیستند؛ چند provider به صورت همزمان
+        (در thread) اجرا می‌شوند و زمان هر کدام در timings ثبت می‌شود.
+        """
+        missing = [n for n in dict.fromkeys(names) if n not in shared]
+        if not missing:
+            return
+        if len(missing) == 1 or self.max_workers <= 1:
+            results = [self._call_provider(n) for n in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.max_workers)) as pool:
+                results = list(pool.map(self._call_provider, missing))
+        for name, (result, seconds) in zip(missing, results):
+            shared[name] = result
+            timings[name] = seconds
+
+    # ---------- Report generation ----------
+    def generate_report(self, report_type: str, params: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None,
+                        use_cache: bool = True) -> Dict[str, Any]:
         """
         تولید گزارش بر اساس report_type و params.
-        خروجی: {report_id, type, generated_at, params, data}
+        خروجی: {report_id, type, generated_at, params, data, providers, errors, cached}
+        providers زمان اجرای هر provider خوانده‌شده (ثانیه) و errors خطای providerهای ناموفق است؛ گزارشی که
+        provider ناموفق دارد در کش نوشته نمی‌شود. با use_cache=False گزارش دوباره ساخته
+        (و جایگزین نسخه‌ی کش‌شده) می‌شود.
         نیاز به مجوز 'reports.view' در صورت وجود AuthService.
         """
         self._check_permission(actor_token, "reports.view")
-        params = params or {}
+        rt = self._get_report_type(report_type)
+        params = self._normalize_params(rt, params)
+        key = self._cache_key(rt.name, params)
+        if use_cache and key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached, cached=True)
+        return self._generate(rt.name, params, {}, {}, key)
+
+    def generate_reports(self, requests: List[Dict[str, Any]], actor_token: Optional[str] = None,
+                         use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        تولید دسته‌ای گزارش‌ها؛ requests: [{"type": ..., "params": {...}}].
+        گزارش‌های موجود در کش ساخته نمی‌شوند؛ برای بقیه هر provider در کل دسته حداکثر یک بار
+        (و همه‌ی providerهای لازم همزمان) فراخوانی می‌شود.
+        """
+        self._check_permission(actor_token, "reports.view")
+        jobs = []
+        for req in requests:
+            rt = self._get_report_type(req.get("type"))
+            params = self._normalize_params(rt, req.get("params"))
+            key = self._cache_key(rt.name, params)
+            cached = self.cache.get(key) if use_cache and key else None
+            jobs.append((rt.name, params, key, cached))
+        shared: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        needed = [p for name, _, _, cached in jobs if cached is None for p in self._report_types[name].providers]
+        self._collect(needed, shared, timings)
+        return [dict(cached, cached=True) if cached is not None else self._generate(name, params, shared, timings, key)
+                for name, params, key, cached in jobs]
+
+    def _cache_key(self, report_type: str, params: Dict[str, Any]) -> Optional[str]:
+        version = self.data_version(report_type)
+        if version is None:
+            return None
+        return ReportCache.make_key(report_type, params, version)
+
+    def precompute(self, report_type: str, params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None,
+                   runner: Optional[Callable[..., Dict[str, Any]]] = None,
+                   actor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        ساخت گزارش و نگه‌داشتن آن در کش (برای زمان‌بندی خارج از ساعات اوج). اگر نسخه‌ی داده تغییر نکرده و
+        نتیجه هنوز در کش باشد گزارش دوباره ساخته نمی‌شود (cached=True).
+        - ttl: عمر ورودی کش به جای ttl پیش‌فرض.
+        - runner(builder, bundle, params) -> data: اجرای builder (مثلاً در فرایند جدا)؛ پیش‌فرض فراخوانی مستقیم.
+        """
+        self._check_permission(actor_token, "reports.view")
+        rt = self._get_report_type(report_type)
+        params = self._normalize_params(rt, params)
+        key = self._cache_key(rt.name, params)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached, cached=True)
+        return self._generate(rt.name, params, {}, {}, key, ttl=ttl, runner=runner)
+
+    def _generate(self, report_type: str, params: Dict[str, Any], shared: Dict[str, Any],
+                  timings: Dict[str, float], key: Optional[str], ttl: Optional[float] = None,
+                  runner: Optional[Callable[..., Dict[str, Any]]] = None) -> Dict[str, Any]:
+        rt = self._get_report_type(report_type)
         report_id = str(uuid.uuid4())
         generated_at = int(time.time())
 
-        # جمع‌آوری داده‌ها از providers ثبت‌شده
-        data_bundle: Dict[str, Any] = {}
-        for name, prov in self._providers.items():
-            try:
-                data_bundle[name] = prov() or {}
-            except Exception as e:
-                data_bundle[name] = {"_error": str(e)}
-
-        # تولید گزارش‌های نمونه بر اساس نوع
-        if report_type == "sales_summary":
-            # انتظار داریم provider orders وجود داشته باشد
-            orders = data_bundle.get("orders", {}).get("orders", []) if isinstance(data_bundle.get("orders"), dict) else []
-            total_sales = 0.0
-            count = 0
-            by_day: Dict[str, float] = {}
-            for o in orders:
-                amt = float(o.get("totals", {}).get("grand_total", 0) or 0)
-                ts = int(o.get("created_at", 0) or 0)
-                day = time.strftime("%Y-%m-%d", time.localtime(ts)) if ts else "unknown"
-                by_day[day] = by_day.get(day, 0.0) + amt
-                total_sales += amt
-                count += 1
-            report_data = {"total_sales": total_sales, "orders_count": count, "by_day": by_day}
-
-        elif report_type == "inventory_status":
-            items = data_bundle.get("inventory", {}).get("items", []) if isinstance(data_bundle.get("inventory"), dict) else []
-            low_stock = []
-            for it in items:
-                try:
-                    stock = float(it.get("stock", 0) or 0)
-                except Exception:
-                    stock = 0.0
-                if stock <= float(params.get("threshold", 5)):
-                    low_stock.append({"sku": it.get("sku"), "name": it.get("name"), "stock": stock})
-            report_data = {"total_items": len(items), "low_stock": low_stock}
-
-        elif report_type == "orders_by_customer":
-            orders = data_bundle.get("orders", {}).get("orders", []) if isinstance(data_bundle.get("orders"), dict) else []
-            by_customer: Dict[str, Dict[str, Any]] = {}
-            for o in orders:
-                cid = str(o.get("customer_id", "anonymous"))
-                amt = float(o.get("totals", {}).get("grand_total", 0) or 0)
-                rec = by_customer.setdefault(cid, {"customer_id": cid, "orders": 0, "total": 0.0})
-                rec["orders"] += 1
-                rec["total"] += amt
-            report_data = {"customers": list(by_customer.values())}
-
-        else:
-            raise ValueError("Unknown report type")
+        # فقط providerهای اعلام‌شده‌ی این نوع گزارش
+        self._collect(list(rt.providers), shared, timings)
+        bundle = {name: shared[name] for name in rt.providers}
+        errors = {name: b["_error"] for name, b in bundle.items() if isinstance(b, dict) and "_error" in b}
+        report_data = runner(rt.builder, bundle, params) if runner else rt.builder(bundle, params)
 
         payload = {
             "report_id": report_id,
             "type": report_type,
             "generated_at": generated_at,
             "params": params,
-            "data": report_data
+            "data": report_data,
+            "providers": {name: timings.get(name, 0.0) for name in rt.providers},
+            "errors": errors,
         }
 
-        # ذخیره در کش به صورت فایل JSON
-        filename = f"report_{generated_at}_{report_id}.json"
-        path = os.path.join(self._cache_dir, filename)
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump(payload, fh, ensure_ascii=False, indent=2)
+        # گزارش ناقص (provider ناموفق) کش نمی‌شود تا اجرای بعدی دوباره تلاش کند
+        if key and not errors:
+            self.cache.put(key, payload, ttl=ttl)
+        return dict(payload, cached=False)
 
-        self._cache_index[report_id] = {"file": filename, "path": path, "meta": {"type": report_type, "generated_at": generated_at}}
-        return dict(payload)
+    # ---------- Built-in report builders ----------
+    @staticmethod
+    def _orders(bundle: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return bundle.get("orders", {}).get("orders", []) if isinstance(bundle.get("orders"), dict) else []
+
+    @staticmethod
+    def _build_sales_summary(bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+        orders = ReportingService._orders(bundle)
+        total_sales = 0.0
+        count = 0
+        by_day: Dict[str, float] = {}
+        for o in orders:
+            amt = float(o.get("totals", {}).get("grand_total", 0) or 0)
+            ts = int(o.get("created_at", 0) or 0)
+            day = time.strftime("%Y-%m-%d", time.localtime(ts)) if ts else "unknown"
+            by_day[day] = by_day.get(day, 0.0) + amt
+            total_sales += amt
+            count += 1
+        return {"total_sales": total_sales, "orders_count": count, "by_day": by_day}
+
+    @staticmethod
+    def _build_inventory_status(bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+        items = bundle.get("inventory", {}).get("items", []) if isinstance(bundle.get("inventory"), dict) else []
+        threshold = float(params.get("threshold", 5))
+        low_stock = []
+        for it in items:
+            try:
+                stock = float(it.get("stock", 0) or 0)
+            except Exception:
+                stock = 0.0
+            if stock <= threshold:
+                low_stock.append({"sku": it.get("sku"), "name": it.get("name"), "stock": stock})
+        return {"total_items": len(items), "low_stock": low_stock}
+
+    @staticmethod
+    def _build_orders_by_customer(bundle: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+        by_customer: Dict[str, Dict[str, Any]] = {}
+        for o in ReportingService._orders(bundle):
+            cid = str(o.get("customer_id", "anonymous"))
+            amt = float(o.get("totals", {}).get("grand_total", 0) or 0)
+            rec = by_customer.setdefault(cid, {"customer_id": cid, "orders": 0, "total": 0.0})
+            rec["orders"] += 1
+            rec["total"] += amt
+        return {"customers": list(by_customer.values())}
+
+    @staticmethod
+    def _build_sales_summary_live(snap: Dict[str, Any]) -> Dict[str, Any]:
+        return {"total_sales": snap["totals"]["sales"], "orders_count": snap["totals"]["orders"],
+                "by_day": {day: b["sales"] for day, b in snap["by_day"].items()}}
+
+    @staticmethod
+    def _build_orders_by_customer_live(snap: Dict[str, Any]) -> Dict[str, Any]:
+        return {"customers": [{"customer_id": cid, "orders": b["orders"], "total": b["sales"]}
+                              for cid, b in snap["by_customer"].items()]}
 
     # ---------- Cache management ----------
     def get_cached_report(self, report_id: str) -> Optional[Dict[str, Any]]:
-        meta = self._cache_index.get(report_id)
-        if not meta:
-            # تلاش برای یافتن در دایرکتوری
-            for fn in os.listdir(self._cache_dir):
-                if report_id in fn:
-                    p = os.path.join(self._cache_dir, fn)
-                    try:
-                        with open(p, "r", encoding="utf-8") as fh:
-                            return json.load(fh)
-                    except Exception:
-                        return None
-            return None
-        try:
-            with open(meta["path"], "r", encoding="utf-8") as fh:
-                return json.load(fh)
-        except Exception:
-            return None
+        return self.cache.find(report_id)
 
     def delete_cached_report(self, report_id: str) -> bool:
-        meta = self._cache_index.get(report_id)
-        if meta:
-            try:
-                os.remove(meta["path"])
-            except Exception:
-                pass
-            self._cache_index.pop(report_id, None)
-            return True
-        # تلاش برای حذف فایل بر اساس نام
-        for fn in os.listdir(self._cache_dir):
-            if report_id in fn:
-                try:
-                    os.remove(os.path.join(self._cache_dir, fn))
-                    return True
-                except Exception:
-                    return False
-        return False
+        return self.cache.delete(report_id)
 
     # ---------- Export ----------
     def export_report(self, report_payload: Dict[str, Any], format: str, filename: str, actor_token: Optional[str] = None) -> str:
@@ -213,3 +412,19 @@ class ReportingService:
             return filename
         else:
             raise ValueError("Unsupported export format")
+
+    def export_rows(self, rows: Iterable[Dict[str, Any]], filename: str, format: str = "csv",
+                    compression: Optional[str] = None, fieldnames: Optional[List[str]] = None,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    cancel_event: Optional[threading.Event] = None,
+                    actor_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        خروجی جریانی سطرها (مثلاً اقلام فروش یک سال از rows_from_cursor) به csv یا jsonl با فشرده‌سازی
+        اختیاری gzip/zstd؛ حافظه‌ی مصرفی به تعداد سطرها بستگی ندارد.
+        نیاز به مجوز 'reports.export' در صورت وجود AuthService.
+        خروجی: {"path", "rows", "bytes", "elapsed", "cancelled"}
+        """
+        self._check_permission(actor_token, "reports.export")
+        exporter = StreamExporter(filename, format=format, compression=compression, fieldnames=fieldnames,
+                                  progress=progress, cancel_event=cancel_event)
+        return exporter.export(rows)
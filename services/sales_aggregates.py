@@ -0,0 +1,323 @@
+# services/sales_aggregates.py
+import time
+import threading
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Callable
+
+CANCELLED_STATUSES = ("cancelled", "canceled")
+
+# رویدادهایی که کل رکورد سفارش را دارند (order.created / order.updated از OrderService)
+_ORDER_UPSERT_EVENTS = ("order", "order.created", "order.updated")
+
+_EPS = 1e-9
+
+
+@lru_cache(maxsize=8192)
+def _slot_keys(slot: int) -> Tuple[str, str]:
+    hour = time.strftime("%Y-%m-%d %H", time.localtime(slot * 900))
+    return hour[:10], hour
+
+
+def bucket_keys(ts: Any) -> Tuple[str, str]:
+    """
+    کلید روز و ساعت محلی ('YYYY-MM-DD', 'YYYY-MM-DD HH') برای timestamp.
+    strftime فقط یک بار برای هر بازه‌ی ۱۵ دقیقه‌ای اجرا می‌شود (همه‌ی اختلاف‌های ساعت محلی مضرب ۱۵ دقیقه‌اند).
+    """
+    ts = int(ts or 0)
+    if not ts:
+        return "unknown", "unknown"
+    return _slot_keys(ts // 900)
+
+
+def _amount(order: Dict[str, Any]) -> float:
+    totals = order.get("totals")
+    if isinstance(totals, dict):
+        return float(totals.get("grand_total", 0) or 0)
+    return float(order.get("amount", 0) or 0)
+
+
+def _lines(order: Dict[str, Any]) -> List[Tuple[str, float, float]]:
+    out = []
+    for ln in order.get("lines", []) or []:
+        name = str(ln.get("name") or ln.get("sku") or "unknown")
+        qty = float(ln.get("qty", 0) or 0)
+        if ln.get("total") is not None:
+            revenue = float(ln.get("total") or 0)
+        else:
+            revenue = qty * float(ln.get("price", ln.get("unit_price", 0)) or 0)
+        out.append((name, qty, revenue))
+    return out
+
+
+class SalesAggregates:
+    """
+    تجمیع افزایشی فروش (کل، روز، ساعت، مشتری، محصول) از رویدادهای سفارش و پرداخت.
+    - سهم هر سفارش از روی آخرین وضعیتش حساب می‌شود: با به‌روزرسانی سهم قبلی کم و سهم تازه اضافه
+      می‌شود؛ سفارش لغوشده (و استردادهایش) سهمی ندارد و با حذف سفارش سهمش برداشته می‌شود.
+    - استرداد (payment.refunded) در روز/ساعت خودِ استرداد از فروش کم می‌شود و با tx_id یکتاست؛ استرداد
+      سفارشی که هنوز دیده نشده تا رسیدن سفارش معلق می‌ماند.
+    - خواندن totals() از O(1) و snapshot() از مرتبه‌ی تعداد سطل‌هاست (نه تعداد سفارش‌ها).
+    - reconcile() سطل‌ها را با محاسبه‌ی کامل دوباره (از سفارش‌ها/استردادها یا رویدادهای داده‌شده) مقایسه و
+      در صورت اختلاف اصلاح می‌کند؛ start_reconcile همین کار را به صورت دوره‌ای در thread پس‌زمینه انجام می‌دهد.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._pending_refunds: Dict[str, Dict[str, Tuple[float, int]]] = {}
+        self._refund_orders: Dict[str, str] = {}
+        self._reset()
+        self.version = 0
+        self.last_reconcile: Optional[Dict[str, Any]] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._stop = threading.Event()
+        self._job: Optional[threading.Thread] = None
+
+    def _reset(self) -> None:
+        self._sales = 0.0
+        self._count = 0
+        self._refunds = 0.0
+        # سطل -> [مبلغ، تعداد]؛ برای محصول [درآمد، تعداد فروخته‌شده]
+        self._by_day: Dict[str, List[float]] = {}
+        self._by_hour: Dict[str, List[float]] = {}
+        self._by_customer: Dict[str, List[float]] = {}
+        self._by_product: Dict[str, List[float]] = {}
+
+    def register_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        """fn(result) پس از هر reconcile که اختلاف پیدا کرده فراخوانی می‌شود"""
+        self._listeners.append(fn)
+
+    # ---------- Buckets ----------
+    @staticmethod
+    def _add(buckets: Dict[str, List[float]], key: str, amount: float, count: float) -> None:
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = [0.0, 0]
+        b[0] += amount
+        b[1] += count
+        if abs(b[1]) < _EPS and abs(b[0]) < _EPS:
+            del buckets[key]
+
+    def _apply(self, st: Dict[str, Any], sign: int) -> None:
+        """افزودن (sign=1) یا برداشتن (sign=-1) سهم یک سفارش"""
+        if st["status"] in CANCELLED_STATUSES:
+            return
+        day, hour = bucket_keys(st["ts"])
+        amount = sign * st["amount"]
+        self._add(self._by_day, day, amount, sign)
+        self._add(self._by_hour, hour, amount, sign)
+        self._add(self._by_customer, st["customer"], amount, sign)
+        for name, qty, revenue in st["lines"]:
+            self._add(self._by_product, name, sign * revenue, sign * qty)
+        self._sales += amount
+        self._count += sign
+        for refund, ts in st["refunds"].values():
+            day, hour = bucket_keys(ts)
+            refund *= sign
+            self._add(self._by_day, day, -refund, 0)
+            self._add(self._by_hour, hour, -refund, 0)
+            self._add(self._by_customer, st["customer"], -refund, 0)
+            self._sales -= refund
+            self._refunds += refund
+
+    # ---------- Updates ----------
+    def upsert_order(self, order: Dict[str, Any]) -> None:
+        oid = str(order.get("order_id") or "")
+        if not oid:
+            return
+        with self._lock:
+            old = self._orders.get(oid)
+            st = {
+                "customer": str(order.get("customer_id") or "anonymous"),
+                "ts": int(order.get("created_at") or (old or {}).get("ts") or 0),
+                "amount": _amount(order),
+                "lines": _lines(order),
+                "status": str(order.get("status") or "").lower(),
+                "refunds": old["refunds"] if old else self._pending_refunds.pop(oid, {}),
+            }
+            if old is not None:
+                self._apply(old, -1)
+            self._orders[oid] = st
+            self._apply(st, 1)
+            self.version += 1
+
+    def set_status(self, order_id: str, status: str) -> None:
+        with self._lock:
+            st = self._orders.get(str(order_id))
+            if st is None:
+                return
+            self._apply(st, -1)
+            st["status"] = str(status or "").lower()
+            self._apply(st, 1)
+            self.version += 1
+
+    def remove_order(self, order_id: str) -> None:
+        with self._lock:
+            st = self._orders.pop(str(order_id), None)
+            if st is None:
+                return
+            self._apply(st, -1)
+            for rid in st["refunds"]:
+                self._refund_orders.pop(rid, None)
+            self.version += 1
+
+    def add_refund(self, refund_id: str, order_id: str, amount: float, ts: Optional[int] = None) -> None:
+        rid, oid = str(refund_id), str(order_id or "")
+        if not oid:
+            return
+        with self._lock:
+            if rid in self._refund_orders:
+                return
+            self._refund_orders[rid] = oid
+            entry = (float(amount or 0), int(ts or time.time()))
+            st = self._orders.get(oid)
+            if st is None:
+                self._pending_refunds.setdefault(oid, {})[rid] = entry
+                return
+            self._apply(st, -1)
+            st["refunds"][rid] = entry
+            self._apply(st, 1)
+            self.version += 1
+
+    def apply_event(self, event_type: str, payload: Dict[str, Any], ts: Optional[int] = None) -> None:
+        """به‌روزرسانی از رویدادهای OrderService/PaymentService (همان نام‌هایی که در Analytics ثبت می‌شوند)"""
+        payload = payload or {}
+        if event_type in _ORDER_UPSERT_EVENTS:
+            with self._lock:
+                # زمان رویداد فقط برای سفارش تازه جای created_at را می‌گیرد؛ به‌روزرسانی بعدی زمان ثبت را جابه‌جا نمی‌کند
+                if ts and not payload.get("created_at") and str(payload.get("order_id") or "") not in self._orders:
+                    payload = dict(payload, created_at=ts)
+                self.upsert_order(payload)
+        elif event_type == "order.status_changed":
+            self.set_status(payload.get("order_id"), payload.get("status"))
+        elif event_type == "order.cancelled":
+            self.set_status(payload.get("order_id"), "cancelled")
+        elif event_type == "order.deleted":
+            self.remove_order(payload.get("order_id"))
+        elif event_type == "payment.refunded":
+            self.add_refund(payload.get("tx_id"), payload.get("order_id"), payload.get("amount"),
+                            payload.get("created_at") or ts)
+
+    # ---------- Reads ----------
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"sales": self._sales, "orders": self._count, "refunds": self._refunds,
+                    "average": self._sales / self._count if self._count else 0.0}
+
+    @staticmethod
+    def _view(buckets: Dict[str, List[float]], amount: str, count: str) -> Dict[str, Dict[str, float]]:
+        return {k: {amount: b[0], count: b[1]} for k, b in buckets.items()}
+
+    def sales_by_day(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: b[0] for k, b in self._by_day.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"totals", "by_day", "by_hour", "by_customer": {key: {"sales", "orders"}}, "by_product": {name: {"revenue", "qty"}}, "version"}"""
+        with self._lock:
+            return {
+                "totals": self.totals(),
+                "by_day": self._view(self._by_day, "sales", "orders"),
+                "by_hour": self._view(self._by_hour, "sales", "orders"),
+                "by_customer": self._view(self._by_customer, "sales", "orders"),
+                "by_product": self._view(self._by_product, "revenue", "qty"),
+                "version": self.version,
+            }
+
+    def top_products(self, top_n: int = 10) -> List[Tuple[str, float]]:
+        with self._lock:
+            items = [(k, b[1]) for k, b in self._by_product.items()]
+        return sorted(items, key=lambda kv: kv[1], reverse=True)[:top_n]
+
+    # ---------- Reconcile ----------
+    @classmethod
+    def from_records(cls, orders: Iterable[Dict[str, Any]] = (), refunds: Iterable[Dict[str, Any]] = (),
+                     events: Iterable[Dict[str, Any]] = ()) -> "SalesAggregates":
+        """محاسبه‌ی کامل از سفارش‌ها، تراکنش‌های استرداد و/یا رویدادهای ثبت‌شده ({type, payload, ts})"""
+        agg = cls()
+        for o in orders:
+            agg.upsert_order(o)
+        for r in refunds:
+            if r.get("type", "refund") == "refund":
+                agg.add_refund(r.get("tx_id"), r.get("order_id"), r.get("amount"), r.get("created_at"))
+        for e in events:
+            agg.apply_event(e.get("type"), e.get("payload"), e.get("ts"))
+        return agg
+
+    @staticmethod
+    def _diff(name: str, expected: Dict[str, List[float]], actual: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+        out = []
+        for key in expected.keys() | actual.keys():
+            e, a = expected.get(key, [0.0, 0]), actual.get(key, [0.0, 0])
+            if any(abs(x - y) > 1e-6 * max(1.0, abs(x)) for x, y in zip(e, a)):
+                out.append({"bucket": name, "key": key, "expected": list(e), "actual": list(a)})
+        return out
+
+    def reconcile(self, orders: Optional[Iterable[Dict[str, Any]]] = None,
+                  refunds: Optional[Iterable[Dict[str, Any]]] = None,
+                  events: Optional[Iterable[Dict[str, Any]]] = None, repair: bool = True) -> Dict[str, Any]:
+        """
+        مقایسه با محاسبه‌ی کامل. بدون ورودی، از وضعیت ذخیره‌شده‌ی سفارش‌ها دوباره حساب می‌شود (انحراف سطل‌ها).
+        خروجی: {"ok", "mismatches": [{"bucket", "key", "expected", "actual"}], "orders", "elapsed", "repaired"}
+        """
+        started = time.perf_counter()
+        with self._lock:
+            if orders is None and refunds is None and events is None:
+                expected = SalesAggregates()
+                expected._orders = {k: dict(st, refunds=dict(st["refunds"])) for k, st in self._orders.items()}
+                expected._pending_refunds = {k: dict(v) for k, v in self._pending_refunds.items()}
+                expected._refund_orders = dict(self._refund_orders)
+                for st in expected._orders.values():
+                    expected._apply(st, 1)
+            else:
+                expected = self.from_records(orders or (), refunds or (), events or ())
+            mismatches = [
+                {"bucket": "totals", "key": key, "expected": [e, 0], "actual": [a, 0]}
+                for key, e, a in (("sales", expected._sales, self._sales), ("orders", expected._count, self._count),
+                                  ("refunds", expected._refunds, self._refunds))
+                if abs(e - a) > 1e-6 * max(1.0, abs(e))
+            ]
+            for name in ("by_day", "by_hour", "by_customer", "by_product"):
+                mismatches.extend(self._diff(name, getattr(expected, "_" + name), getattr(self, "_" + name)))
+            repaired = bool(mismatches) and repair
+            if repaired:
+                for attr in ("_orders", "_pending_refunds", "_refund_orders", "_sales", "_count", "_refunds",
+                             "_by_day", "_by_hour", "_by_customer", "_by_product"):
+                    setattr(self, attr, getattr(expected, attr))
+                self.version += 1
+            result = {"ok": not mismatches, "mismatches": mismatches, "orders": len(expected._orders),
+                      "elapsed": time.perf_counter() - started, "repaired": repaired, "at": int(time.time())}
+            self.last_reconcile = result
+        if mismatches:
+            for fn in list(self._listeners):
+                try:
+                    fn(result)
+                except Exception:
+                    pass
+        return result
+
+    def start_reconcile(self, source: Optional[Callable[[], Dict[str, Any]]] = None, interval: float = 3600.0) -> None:
+        """
+        اجرای دوره‌ای reconcile در thread پس‌زمینه. source() -> {"orders": ..., "refunds": ..., "events": ...}
+        (مثلاً از پایگاه داده)؛ بدون source از وضعیت ذخیره‌شده استفاده می‌شود.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.close()
+        self._stop = threading.Event()
+
+        def run(stop: threading.Event) -> None:
+            while not stop.wait(interval):
+                try:
+                    self.reconcile(**(source() if source else {}))
+                except Exception:
+                    pass
+
+        self._job = threading.Thread(target=run, args=(self._stop,), daemon=True)
+        self._job.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._job is not None:
+            self._job.join(timeout=5)
+            self._job = None
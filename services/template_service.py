@@ -1,7 +1,9 @@
 import os
+import copy
 import json
 import time
 import uuid
+import threading
 from typing import Dict, Any, Optional, List, Callable
 
 from services.auth_service import AuthService
@@ -13,12 +15,38 @@ class TemplateService:
     """
     مدیریت قالب‌ها (templates) با ذخیره‌سازی در دیسک و پشتیبانی از چک مجوزها.
     قالب‌ها به صورت فایل JSON در پوشه templates/ ذخیره می‌شوند.
+    هر قالب یک شماره‌ی version دارد که با هر به‌روزرسانی یک واحد زیاد می‌شود؛ listenerها
+    (مثلاً کش TemplateEngine) از ایجاد، به‌روزرسانی و حذف قالب‌ها باخبر می‌شوند.
+
+    محتوای همه‌ی قالب‌ها در یک ایندکس حافظه نگه داشته می‌شود و get_template / list_templates
+    به دیسک دست نمی‌زنند:
+    - create/update/delete فایل را به صورت اتمیک (فایل موقت + os.replace) می‌نویسند و همزمان ایندکس
+      را به‌روز می‌کنند.
+    - تغییرات بیرونی (ویرایش دستی، کپی فایل، نمونه‌ی دیگر سرویس) با scan پوشه بر اساس mtime/اندازه پیدا
+      می‌شوند؛ فقط فایل‌های تغییرکرده دوباره خوانده و به listenerها اطلاع داده می‌شوند. scan فقط در این
+      حالت‌ها انجام می‌شود: refresh() صریح، thread ناظر اختیاری (watch_interval ثانیه) یا بدون ناظر، حداکثر
+      هر rescan_interval ثانیه یک بار هنگام دسترسی (None = فقط refresh). update_template پیش از نوشتن فقط
+      فایل همان قالب را بررسی می‌کند.
     """
 
-    def __init__(self, auth_service: Optional[AuthService] = None, templates_dir: Optional[str] = None):
+    def __init__(self, auth_service: Optional[AuthService] = None, templates_dir: Optional[str] = None,
+                 watch_interval: Optional[float] = None, rescan_interval: Optional[float] = 10.0):
         self.auth = auth_service
         self.templates_dir = templates_dir or TEMPLATES_DIR
         os.makedirs(self.templates_dir, exist_ok=True)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # نام فایل -> {"sig": (mtime_ns, size), "rec": رکورد}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.watch_interval = watch_interval
+        self.rescan_interval = rescan_interval
+        self._last_scan = 0.0
+        self._scan(notify=False)
+        if watch_interval:
+            self._watcher = threading.Thread(target=self._watch, name="template-watcher", daemon=True)
+            self._watcher.start()
 
     def _now(self) -> int:
         return int(time.time())
@@ -31,10 +59,108 @@ class TemplateService:
         if not self.auth.has_permission(token, permission):
             raise PermissionError(f"Permission denied: {permission}")
 
+    def register_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        ثبت listener برای تغییر قالب‌ها؛ callback یک event با کلیدهای
+        event (created/updated/deleted)، template_id و version می‌گیرد.
+        """
+        if callable(callback):
+            self._listeners.append(callback)
+
+    def _notify(self, event: str, template_id: str, version: Optional[int]) -> None:
+        payload = {"event": event, "template_id": template_id, "version": version}
+        for cb in list(self._listeners):
+            try:
+                cb(payload)
+            except Exception:
+                pass
+
     def _template_path(self, template_id: str) -> str:
         safe = str(template_id).strip()
         return os.path.join(self.templates_dir, f"template_{safe}.json")
 
+    # ---------- Index ----------
+    @staticmethod
+    def _is_template_file(name: str) -> bool:
+        return name.startswith("template_") and name.endswith(".json")
+
+    def _scan(self, notify: bool = True, only: Optional[str] = None) -> int:
+        """
+        هماهنگ‌سازی ایندکس با پوشه بر اساس mtime و اندازه‌ی فایل‌ها؛ تعداد تغییرات را برمی‌گرداند.
+        only: فقط همین نام فایل بررسی می‌شود (یک stat به جای scan کل پوشه).
+        """
+        if only is not None:
+            try:
+                entries = {only: os.stat(os.path.join(self.templates_dir, only))}
+            except OSError:
+                entries = {}
+        else:
+            try:
+                entries = {e.name: e.stat() for e in os.scandir(self.templates_dir)
+                           if self._is_template_file(e.name) and e.is_file()}
+            except OSError:
+                return 0
+            self._last_scan = time.monotonic()
+        events = []
+        with self._lock:
+            for name, st in entries.items():
+                sig = (st.st_mtime_ns, st.st_size)
+                cur = self._index.get(name)
+                if cur is not None and cur["sig"] == sig:
+                    continue
+                try:
+                    with open(os.path.join(self.templates_dir, name), "r", encoding="utf-8") as fh:
+                        rec = json.load(fh)
+                except Exception:
+                    # فایل نیمه‌نوشته یا خراب: در scan بعدی دوباره بررسی می‌شود
+                    continue
+                self._index[name] = {"sig": sig, "rec": rec}
+                events.append(("updated" if cur is not None else "created", rec))
+            if only is None:
+                stale = [n for n in self._index if n not in entries]
+            else:
+                stale = [only] if only in self._index and not entries else []
+            for name in stale:
+                rec = self._index.pop(name)["rec"]
+                events.append(("deleted", dict(rec, version=None)))
+        if notify:
+            for event, rec in events:
+                self._notify(event, rec.get("template_id"), rec.get("version", 1))
+        return len(events)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self._scan(notify=True)
+            except Exception:
+                pass
+
+    def refresh(self) -> int:
+        """scan فوری پوشه (مثلاً پس از کپی دستی قالب‌ها)"""
+        return self._scan(notify=True)
+
+    def close(self) -> None:
+        """توقف thread ناظر پوشه"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _ensure_fresh(self) -> None:
+        # بدون thread ناظر، پوشه حداکثر هر rescan_interval ثانیه یک بار هنگام دسترسی scan می‌شود
+        if self._watcher is None and self.rescan_interval is not None \
+                and time.monotonic() - self._last_scan >= self.rescan_interval:
+            self._scan(notify=True)
+
+    def _write(self, path: str, rec: Dict[str, Any]) -> None:
+        """نوشتن اتمیک فایل قالب و به‌روزرسانی ایندکس"""
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(rec, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        st = os.stat(path)
+        self._index[os.path.basename(path)] = {"sig": (st.st_mtime_ns, st.st_size), "rec": copy.deepcopy(rec)}
+
     def create_template(self, name: str, content: Dict[str, Any], meta: Optional[Dict[str, Any]] = None, actor_token: Optional[str] = None) -> Dict[str, Any]:
         """
         ایجاد قالب جدید. نیاز به مجوز 'templates.manage' در صورت وجود AuthService.
@@ -49,13 +175,15 @@ class TemplateService:
             "name": str(name).strip(),
             "content": dict(content or {}),
             "meta": dict(meta or {}),
+            "version": 1,
             "created_at": self._now(),
             "updated_at": self._now(),
         }
         path = self._template_path(tid)
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump(rec, fh, ensure_ascii=False, indent=2)
-        return {"template_id": tid, "path": path, "name": rec["name"], "created_at": rec["created_at"]}
+        with self._lock:
+            self._write(path, rec)
+        self._notify("created", tid, rec["version"])
+        return {"template_id": tid, "path": path, "name": rec["name"], "version": rec["version"], "created_at": rec["created_at"]}
 
     def update_template(self, template_id: str, updates: Dict[str, Any], actor_token: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -63,38 +191,42 @@ class TemplateService:
         """
         self._check_permission(actor_token, "templates.manage")
         path = self._template_path(template_id)
-        if not os.path.exists(path):
-            raise ValueError("Template not found")
-        try:
-            with open(path, "r", encoding="utf-8") as fh:
-                rec = json.load(fh)
-        except Exception:
-            raise ValueError("Cannot read template file")
-        if "name" in updates:
-            rec["name"] = str(updates["name"]).strip()
-        if "content" in updates:
-            rec["content"] = dict(updates["content"] or {})
-        if "meta" in updates:
-            rec["meta"].update(dict(updates.get("meta", {}) or {}))
-        rec["updated_at"] = self._now()
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump(rec, fh, ensure_ascii=False, indent=2)
-        return {"template_id": rec["template_id"], "name": rec["name"], "updated_at": rec["updated_at"]}
+        # نسخه‌ی جدید بر اساس آخرین محتوای همین فایل (شاید نوشته‌شده توسط نمونه‌ی دیگر) ساخته می‌شود
+        self._scan(notify=True, only=os.path.basename(path))
+        with self._lock:
+            entry = self._index.get(os.path.basename(path))
+            if entry is None:
+                raise ValueError("Template not found")
+            rec = copy.deepcopy(entry["rec"])
+            if "name" in updates:
+                rec["name"] = str(updates["name"]).strip()
+            if "content" in updates:
+                rec["content"] = dict(updates["content"] or {})
+            if "meta" in updates:
+                rec.setdefault("meta", {}).update(dict(updates.get("meta", {}) or {}))
+            rec["version"] = int(rec.get("version", 1)) + 1
+            rec["updated_at"] = self._now()
+            self._write(path, rec)
+        self._notify("updated", rec["template_id"], rec["version"])
+        return {"template_id": rec["template_id"], "name": rec["name"], "version": rec["version"], "updated_at": rec["updated_at"]}
 
     def get_template(self, template_id: str, actor_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         خواندن قالب؛ نیاز به 'templates.view' در صورت وجود AuthService.
+        رکورد از ایندکس حافظه خوانده می‌شود و یک کپی مستقل برگردانده می‌شود.
         """
         self._check_permission(actor_token, "templates.view")
-        path = self._template_path(template_id)
-        if not os.path.exists(path):
-            return None
-        try:
-            with open(path, "r", encoding="utf-8") as fh:
-                rec = json.load(fh)
-            return rec
-        except Exception:
-            return None
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._index.get(os.path.basename(self._template_path(template_id)))
+            return copy.deepcopy(entry["rec"]) if entry is not None else None
+
+    def template_version(self, template_id: str) -> Optional[int]:
+        """نسخه‌ی فعلی قالب در ایندکس (بدون خواندن دیسک و بدون کپی رکورد)؛ None اگر قالب وجود نداشته باشد"""
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._index.get(os.path.basename(self._template_path(template_id)))
+            return int(entry["rec"].get("version", 1)) if entry is not None else None
 
     def delete_template(self, template_id: str, actor_token: Optional[str] = None) -> bool:
         """
@@ -102,13 +234,17 @@ class TemplateService:
         """
         self._check_permission(actor_token, "templates.manage")
         path = self._template_path(template_id)
-        if os.path.exists(path):
+        with self._lock:
+            if not os.path.exists(path):
+                self._index.pop(os.path.basename(path), None)
+                return False
             try:
                 os.remove(path)
-                return True
             except Exception:
                 return False
-        return False
+            self._index.pop(os.path.basename(path), None)
+        self._notify("deleted", template_id, None)
+        return True
 
     def list_templates(self, actor_token: Optional[str] = None, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
@@ -118,19 +254,16 @@ class TemplateService:
         self._check_permission(actor_token, "templates.view")
         filters = filters or {}
         name_contains = str(filters.get("name_contains", "")).lower().strip()
+        self._ensure_fresh()
         results = []
-        for fn in sorted(os.listdir(self.templates_dir), reverse=True):
-            if not fn.startswith("template_") or not fn.endswith(".json"):
-                continue
-            p = os.path.join(self.templates_dir, fn)
-            try:
-                with open(p, "r", encoding="utf-8") as fh:
-                    rec = json.load(fh)
-                if name_contains and name_contains not in rec.get("name", "").lower():
+        with self._lock:
+            for fn in sorted(self._index, reverse=True):
+                rec = self._index[fn]["rec"]
+                if name_contains and name_contains not in str(rec.get("name", "")).lower():
                     continue
-                results.append({"template_id": rec.get("template_id"), "name": rec.get("name"), "path": p, "updated_at": rec.get("updated_at")})
-            except Exception:
-                continue
+                results.append({"template_id": rec.get("template_id"), "name": rec.get("name"),
+                                "path": os.path.join(self.templates_dir, fn),
+                                "version": rec.get("version", 1), "updated_at": rec.get("updated_at")})
         return results
 
     def export_template(self, template_id: str, dest_path: str, actor_token: Optional[str] = None) -> str:
@@ -0,0 +1,146 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import gc
+import tracemalloc
+from datetime import datetime
+from models.customer import Customer
+from models.product import Product
+from models.order import Order, OrderLine
+from models.payment import Payment
+
+# نسخهٔ قدیمی (بدون __slots__ و با سطرهای دیکشنری) فقط برای مقایسه‌ی حافظه
+class _LegacyProduct:
+    def __init__(self, product_id, name, price, category):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.category = category
+        self.stock = 0
+        self.description = None
+        self.created_at = datetime.now()
+
+class _LegacyOrder:
+    def __init__(self, order_id, customer):
+        self.order_id = order_id
+        self.customer = customer
+        self.products = []
+        self.status = "Pending"
+        self.delivery_method = None
+        self.delivery_fee = 0.0
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    objs = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return size
+
+
+class TestModelMemory(unittest.TestCase):
+    N_ORDERS = 20000
+    LINES = 3
+
+    def setUp(self):
+        self.customer = Customer(1, "Ahmad", "0912000000")
+
+    def _build_slotted(self):
+        orders = []
+        for i in range(self.N_ORDERS):
+            o = Order(i, self.customer)
+            for j in range(self.LINES):
+                o.add_product(Product(j, "Burger", 50.0, "Food"), 1 + j)
+            orders.append(o)
+        return orders
+
+    def _build_legacy(self):
+        orders = []
+        for i in range(self.N_ORDERS):
+            o = _LegacyOrder(i, self.customer)
+            for j in range(self.LINES):
+                o.products.append({"product": _LegacyProduct(j, "Burger", 50.0, "Food"), "quantity": 1 + j})
+            orders.append(o)
+        return orders
+
+    def test_models_have_no_instance_dict(self):
+        o = Order(1, self.customer)
+        o.add_product(Product(1, "Burger", 50.0, "Food"), 2)
+        p = Payment(1, o, 100.0, "cash")
+        for obj in (o, o.products[0], o.products[0].product, self.customer, p):
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+    def test_memory_reduction(self):
+        legacy = _measure(self._build_legacy)
+        slotted = _measure(self._build_slotted)
+        self.assertLess(slotted, legacy * 0.7,
+                        f"legacy={legacy / 1e6:.1f}MB slotted={slotted / 1e6:.1f}MB ratio={slotted / legacy:.2f}")
+
+    def test_legacy_dict_access_still_works(self):
+        o = Order(1, self.customer, products=[{"product": Product(1, "Burger", 50.0, "Food"), "quantity": 2}])
+        line = o.products[0]
+        self.assertIsInstance(line, OrderLine)
+        self.assertEqual(line["quantity"], 2)
+        line["quantity"] = 3
+        self.assertEqual(line.quantity, 3)
+        self.assertEqual(line.get("missing", 0), 0)
+        self.assertEqual(o.calculate_total(), 150.0)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestModelMemory)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestModelMemory)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Model Memory Benchmark Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,133 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from printing.barcode_generator import (
+    BarcodeGenerator, code128_modules, ean13_modules, ean13_checksum, qr_matrix,
+)
+from printing.receipt_designer import ReceiptDesigner
+from printing.template_engine import CompiledTemplate
+
+
+class TestBarcodeGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.gen = BarcodeGenerator(cache_size=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_ean13(self):
+        self.assertEqual(ean13_checksum("590123412345"), 7)
+        mods = ean13_modules("5901234123457")
+        self.assertEqual(len(mods), 95)
+        self.assertEqual(mods[:3], [1, 0, 1])
+        self.assertEqual(mods[45:50], [0, 1, 0, 1, 0])
+        self.assertEqual(ean13_modules("590123412345"), mods)
+        with self.assertRaises(ValueError):
+            ean13_modules("5901234123458")
+
+    def test_code128(self):
+        # Start B + "AB" + checksum + Stop: 11 ماژول برای هر نماد و 13 برای Stop
+        self.assertEqual(len(code128_modules("AB")), 11 * 4 + 13)
+        # ارقام زوج با مجموعه‌ی C فشرده می‌شوند
+        self.assertEqual(len(code128_modules("12345678")), 11 * 6 + 13)
+        with self.assertRaises(ValueError):
+            code128_modules("سلام")
+
+    def test_qr_structure(self):
+        m = qr_matrix("https://example.com/i/42", "M")
+        self.assertEqual(len(m), 25)  # نسخه‌ی 2
+        for x0, y0 in ((0, 0), (18, 0), (0, 18)):
+            self.assertTrue(all(m[y0][x0 + i] for i in range(7)))
+            self.assertFalse(m[y0 + 1][x0 + 1])
+            self.assertTrue(m[y0 + 3][x0 + 3])
+        # الگوی زمان‌بندی
+        self.assertEqual([m[6][x] for x in range(8, 17)], [x % 2 == 0 for x in range(8, 17)])
+        self.assertTrue(m[len(m) - 8][8])  # ماژول تیره‌ی ثابت
+        with self.assertRaises(ValueError):
+            qr_matrix("x" * 3000, "L")
+
+    def test_cache_and_raster(self):
+        r1 = self.gen.raster("qr", "order-42", module=3)
+        self.assertIs(self.gen.raster("qr", "order-42", module=3), r1)
+        self.assertEqual(self.gen.hits, 1)
+        self.assertEqual(r1.width, (21 + 8) * 3)
+        self.assertEqual(len(r1.data), r1.row_bytes * r1.height)
+        for i in range(6):
+            self.gen.modules("code128", f"P{i}")
+        self.assertLessEqual(len(self.gen._cache), 4)
+
+    def test_receipt_and_template_integration(self):
+        order = {"order_id": 7, "created_at": 0, "items": [], "qr": "https://example.com/i/7"}
+        data = ReceiptDesigner(width=32).render_receipt(order)
+        self.assertIn(b"\x1dv0\x00", data)
+        tpl = CompiledTemplate({"bodies": {"receipt": [{"text": "Order {order_id}"}, {"qr": "qr", "size": 25}]}})
+        path = tpl.output("receipt", order, os.path.join(self.tmp, "r.pdf"))
+        self.assertTrue(os.path.getsize(path) > 0)
+        self.assertIn("_code(pdf, 'qr'", tpl.sources["receipt"])
+
+    def test_label_sheet(self):
+        items = [(f"Item {i}", "59012341234%d" % i) for i in range(10)] + [("Bad", "5901234123458"), ("SKU", "A-17")]
+        report = self.gen.label_sheet(items, os.path.join(self.tmp, "labels.pdf"), columns=3)
+        self.assertEqual(report["printed"], 11)
+        self.assertEqual(len(report["skipped"]), 1)
+        self.assertEqual(report["pages"], 1)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestBarcodeGenerator)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestBarcodeGenerator)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Barcode Generator Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
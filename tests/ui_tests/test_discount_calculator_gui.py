@@ -0,0 +1,135 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from datetime import datetime, timedelta
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.discount import Discount
+from calculators.discount_calculator import DiscountCalculator
+
+class TestDiscountCalculator(unittest.TestCase):
+    def setUp(self):
+        self.customer = Customer(1, "Ahmad", "0912000000", "ahmad@example.com", "Tehran", membership_code="M-1")
+        self.burger = Product(1, "Burger", 50.0, "Food")
+        self.pizza = Product(3, "Pizza", 80.0, "Food")
+        self.soda = Product(2, "Soda", 20.0, "Drink")
+        self.order = Order(1, self.customer)
+        self.order.add_product(self.burger, 2)  # 100
+        self.order.add_product(self.pizza, 1)   # 80
+        self.order.add_product(self.soda, 3)    # 60
+        self.order.set_delivery("Courier", 10.0)  # total 250
+
+    def test_applicable_matches_model(self):
+        ds = [
+            Discount("OFF10", "percentage", 10, scope="order"),
+            Discount("FOOD5", "percentage", 5, scope="category", category="Food"),
+            Discount("BURGER20", "fixed", 20, scope="product", product_id=1),
+            Discount("PASTA", "fixed", 20, scope="product", product_id=99),
+            Discount("MIN1000", "fixed", 5, scope="order", min_order_total=1000),
+        ]
+        calc = DiscountCalculator(ds)
+        rows = {r["code"]: r["amount"] for r in calc.applicable(self.order)}
+        self.assertEqual(set(rows), {"OFF10", "FOOD5", "BURGER20"})
+        for d in ds:
+            if d.code in rows:
+                self.assertEqual(rows[d.code], d.calculate_discount(self.order))
+
+    def test_best_combination_prefers_line_level(self):
+        calc = DiscountCalculator([
+            Discount("OFF5", "percentage", 5, scope="order"),                        # 12
+            Discount("FOOD5", "percentage", 5, scope="category", category="Food"),   # 9
+            Discount("BURGER20", "fixed", 20, scope="product", product_id=1),        # 20
+            Discount("PIZZA10", "fixed", 10, scope="product", product_id=3),         # 10
+            Discount("SODA", "fixed", 4, scope="category", category="Drink"),        # 4
+        ])
+        best = calc.best_combination(self.order)
+        self.assertEqual({r["code"] for r in best["discounts"]}, {"BURGER20", "PIZZA10", "SODA"})
+        self.assertEqual(best["discount_total"], 34.0)
+        self.assertEqual(best["new_total"], 216.0)
+
+    def test_best_combination_order_level_wins(self):
+        calc = DiscountCalculator([
+            Discount("OFF20", "percentage", 20, scope="order"),                      # 48
+            Discount("FOOD30", "fixed", 30, scope="category", category="Food"),
+            Discount("BURGER20", "fixed", 20, scope="product", product_id=1),
+        ])
+        best = calc.best_combination(self.order)
+        self.assertEqual([r["code"] for r in best["discounts"]], ["OFF20"])
+        self.assertEqual(best["new_total"], 202.0)
+
+    def test_time_window_index(self):
+        now = datetime(2024, 5, 1, 12, 0)
+        calc = DiscountCalculator([
+            Discount("LUNCH", "fixed", 10, scope="order", start_at=now, end_at=now + timedelta(hours=2)),
+            Discount("LATER", "fixed", 15, scope="order", start_at=now + timedelta(days=1)),
+        ])
+        self.assertEqual(calc.applicable(self.order, now - timedelta(minutes=1)), [])
+        self.assertEqual([r["code"] for r in calc.applicable(self.order, now)], ["LUNCH"])
+        self.assertEqual(calc.applicable(self.order, now + timedelta(hours=3)), [])
+        self.assertEqual([r["code"] for r in calc.applicable(self.order, now + timedelta(days=2))], ["LATER"])
+
+    def test_apply_best_consumes_codes(self):
+        d = Discount("ONCE", "fixed", 10, scope="order", usage_limit=1)
+        calc = DiscountCalculator([d])
+        result = calc.apply_best(self.order)
+        self.assertEqual(self.order.discount_amount, 10.0)
+        self.assertEqual(result["new_total"], 240.0)
+        self.assertEqual(d.used_count, 1)
+        self.assertEqual(calc.best_combination(self.order)["discounts"], [])
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDiscountCalculator)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestDiscountCalculator)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Discount Calculator Test Results Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
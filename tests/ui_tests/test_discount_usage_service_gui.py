@@ -0,0 +1,159 @@
+import os
+import tempfile
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.discount import Discount
+from calculators.discount_calculator import DiscountCalculator
+from database.database_manager import DatabaseManager
+from services.discount_usage_service import DiscountUsageService
+
+class TestDiscountUsageService(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "usage.db")
+        self.db_a = DatabaseManager(self.path)
+        self.db_a.initialize_database()
+        self.db_b = DatabaseManager(self.path)
+        # دو ترمینال روی یک فایل
+        self.term_a = DiscountUsageService(self.db_a, lease_size=10)
+        self.term_b = DiscountUsageService(self.db_b, lease_size=10)
+        self.d = Discount("LIMIT25", "fixed", 5, scope="order", usage_limit=25)
+        self.term_a.register_discount(self.d)
+
+    def tearDown(self):
+        self.db_a.disconnect()
+        self.db_b.disconnect()
+
+    def _times_used(self):
+        return self.db_a.fetch_one("SELECT times_used FROM discounts WHERE code = ?", ("LIMIT25",))["times_used"]
+
+    def test_limit_enforced_across_terminals(self):
+        used_a = sum(self.term_a.try_consume("LIMIT25") for _ in range(12))
+        used_b = sum(self.term_b.try_consume("LIMIT25") for _ in range(20))
+        self.assertEqual(used_a, 12)
+        # اجاره‌ها به کسری از باقی‌مانده محدودند، پس A مصرف‌های B را نگه نمی‌دارد
+        self.assertEqual(used_b, 13)
+        self.assertEqual(self._times_used(), 25)
+        self.assertFalse(self.term_b.can_use("LIMIT25"))
+        self.assertEqual(self.term_a.release(), 0)
+        self.assertEqual(self.term_b.remaining("LIMIT25"), 0)
+
+    def test_lease_capped_by_remaining(self):
+        self.assertTrue(self.term_a.can_use("LIMIT25"))
+        # ۱۰٪ از ۲۵ باقی‌مانده
+        self.assertEqual(self._times_used(), 2)
+        for _ in range(20):
+            self.term_b.try_consume("LIMIT25")
+        # اجاره‌های B: ۲، ۲ و سپس نزدیک سقف تک‌تایی
+        self.assertEqual(self._times_used(), 22)
+        self.assertTrue(self.term_b.try_consume("LIMIT25"))
+        self.assertEqual(self._times_used(), 23)
+        self.assertEqual(self.term_a.remaining("LIMIT25"), 4)
+
+    def test_lease_avoids_disk_round_trips(self):
+        d = Discount("BIG", "fixed", 5, scope="order", usage_limit=1000)
+        self.term_a.register_discount(d)
+        calls = []
+        original = self.db_a.execute_query
+        self.db_a.execute_query = lambda q, p=(): calls.append(q) or original(q, p)
+        for _ in range(10):
+            self.assertTrue(self.term_a.can_use("BIG"))
+            self.assertTrue(self.term_a.try_consume("BIG", d))
+        # یک SELECT و یک UPDATE برای کل اجاره
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(d.used_count, 10)
+
+    def test_model_consume_uses_service(self):
+        other = Discount("LIMIT25", "fixed", 5, scope="order", usage_limit=25)
+        self.term_b.register_discount(other)
+        for _ in range(20):
+            self.d.consume()
+        for _ in range(5):
+            other.consume()
+        self.assertEqual(self._times_used(), 25)
+        self.assertTrue(other.is_exhausted())
+        with self.assertRaises(ValueError):
+            other.consume()
+
+    def test_apply_best_consumes_through_service(self):
+        order = Order(1, Customer(1, "Ali", "0912", "a@ex.com", "Tehran"))
+        order.add_product(Product(1, "Burger", 50.0, "Food"), 1)
+        calc = DiscountCalculator([self.d])
+        self.assertEqual(calc.apply_best(order)["discounts"][0]["code"], "LIMIT25")
+        self.assertEqual(self.term_a.remaining("LIMIT25"), 24)
+        self.assertEqual(self.d.used_count, 1)
+
+    def test_persisted_across_restart(self):
+        for _ in range(3):
+            self.term_a.try_consume("LIMIT25")
+        self.term_a.close()
+        restarted = DiscountUsageService(DatabaseManager(self.path), lease_size=10)
+        fresh = Discount("LIMIT25", "fixed", 5, scope="order", usage_limit=25)
+        restarted.register_discount(fresh)   # ردیف موجود بازنویسی نمی‌شود
+        self.assertEqual(restarted.sync(fresh).used_count, 3)
+        self.assertEqual(restarted.remaining("LIMIT25"), 22)
+
+    def test_unlimited_and_unknown_codes(self):
+        self.term_a.register_discount(Discount("FREE", "percentage", 5, scope="order"))
+        self.assertTrue(all(self.term_a.try_consume("FREE") for _ in range(30)))
+        self.assertIsNone(self.term_a.remaining("FREE"))
+        self.assertFalse(self.term_a.try_consume("NOPE"))
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDiscountUsageService)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestDiscountUsageService)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Discount Usage Service Test Results Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
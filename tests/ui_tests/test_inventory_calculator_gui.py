@@ -0,0 +1,135 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from datetime import datetime, timedelta
+from services.inventory_service import InventoryService
+from calculators.inventory_calculator import InventoryCalculator
+
+class TestInventoryCalculator(unittest.TestCase):
+    def setUp(self):
+        # زمان مرجع: ظهر یک روز مشخص
+        self.now = int(datetime(2025, 6, 30, 12, 0).timestamp())
+        self.clock = {"t": self.now - 27 * 86400}
+        self.inv = InventoryService()
+        self.inv._now = lambda: self.clock["t"]
+        self.inv.upsert_item("BUN", "Bun", 10000, 5000, {"supplier": "Bakery"})
+        self.inv.upsert_item("PATTY", "Patty", 10000, 40000, {"supplier": "Butcher"})
+        self.inv.upsert_item("NAPKIN", "Napkin", 50, 100)
+        # ۲۸ روز فروش: BUN ثابت ۱۰ در روز، PATTY جمعه‌ها ۳۰ و بقیه ۱۰
+        for d in range(28):
+            self.clock["t"] = self.now - (27 - d) * 86400
+            day = datetime.fromtimestamp(self.clock["t"])
+            self.inv.adjust_stock("BUN", -10, "sale")
+            self.inv.adjust_stock("PATTY", -(30 if day.weekday() == 4 else 10), "sale")
+        self.calc = InventoryCalculator(self.inv, history_days=28, alpha=0.3, lead_time_days=2)
+
+    def test_daily_demand_and_ewma(self):
+        r = self.calc.compute(as_of=self.now)
+        i = r["skus"].index("BUN")
+        self.assertEqual(r["daily_demand"].shape, (3, 28))
+        self.assertAlmostEqual(float(r["daily_demand"][i].sum()), 280.0)
+        self.assertAlmostEqual(float(r["ewma"][i]), 10.0)
+        self.assertAlmostEqual(float(r["safety_stock"][i]), 0.0)
+        self.assertAlmostEqual(float(r["reorder_point"][i]), 20.0)
+        self.assertAlmostEqual(float(r["hourly_profile"][i][12]), 10.0)
+
+    def test_day_of_week_seasonality(self):
+        r = self.calc.compute(as_of=self.now)
+        i = r["skus"].index("PATTY")
+        friday, monday = r["seasonal"][i][4], r["seasonal"][i][0]
+        self.assertGreater(friday, 2.0)
+        self.assertLess(monday, 1.0)
+        self.assertGreater(float(r["safety_stock"][i]), 0.0)
+
+    def test_cached_until_new_data(self):
+        r1 = self.calc.compute(as_of=self.now)
+        self.assertIs(self.calc.compute(as_of=self.now), r1)
+        self.inv.adjust_stock("BUN", -5, "sale")
+        r2 = self.calc.compute(as_of=self.now)
+        self.assertIsNot(r2, r1)
+        self.assertAlmostEqual(float(r2["daily_demand"][r2["skus"].index("BUN")].sum()), 285.0)
+
+    def test_alerts_and_purchase_suggestions(self):
+        self.inv.upsert_item("BUN", "Bun", 15, 5000, {"supplier": "Bakery"})
+        alerts = self.calc.low_stock_alerts(as_of=self.now)
+        self.assertEqual([a["sku"] for a in alerts], ["BUN"])
+        sugg = self.calc.purchase_suggestions(review_days=7, as_of=self.now)
+        self.assertEqual(sugg["Bakery"][0]["quantity"], 20 + 70 - 15)
+        self.assertNotIn("Butcher", sugg)
+
+    def test_record_orders_and_commit(self):
+        calc = InventoryCalculator(None, history_days=7)
+        orders = [{"created_at": self.now - d * 86400, "lines": [{"sku": "SODA", "qty": 4}]} for d in range(7)]
+        self.assertEqual(calc.record_orders(orders), 7)
+        table = calc.demand_table(as_of=self.now)
+        self.assertEqual(table[0]["sku"], "SODA")
+        self.assertEqual(table[0]["avg_daily"], 4.0)
+        # رزرو + تأیید سفارش هم به عنوان تقاضا شمرده می‌شود
+        self.clock["t"] = self.now
+        self.inv.reserve_for_order("ORD-1", [{"sku": "NAPKIN", "qty": 14}])
+        self.inv.commit_order("ORD-1")
+        r = self.calc.compute(as_of=self.now)
+        self.assertAlmostEqual(float(r["daily_demand"][r["skus"].index("NAPKIN")].sum()), 14.0)
+
+    def test_thousands_of_skus(self):
+        calc = InventoryCalculator(None, history_days=28)
+        orders = [{"created_at": self.now - (i % 28) * 86400, "lines": [{"sku": f"SKU-{i % 3000}", "qty": 1}]} for i in range(60000)]
+        calc.record_orders(orders)
+        r = calc.compute(as_of=self.now)
+        self.assertEqual(len(r["skus"]), 3000)
+        self.assertEqual(r["daily_demand"].shape, (3000, 28))
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestInventoryCalculator)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestInventoryCalculator)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Inventory Calculator Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -44,6 +44,67 @@ class TestInventoryService(unittest.TestCase):
         txs = self.srv.transactions()
         self.assertGreaterEqual(len(txs), 2)
 
+    def test_as_of_point_in_time(self):
+        # ساعت ساختگی برای کنترل زمان رویدادها
+        clock = {"t": 1000}
+        srv = InventoryService(checkpoint_every=3)
+        srv._now = lambda: clock["t"]
+        srv.upsert_item("FOOD-001", "Burger", 10, 120000)
+        for i in range(8):
+            clock["t"] += 60
+            srv.adjust_stock("FOOD-001", -1, "sale")
+        clock["t"] += 60
+        srv.reserve_for_order("ORD-1", [{"sku": "FOOD-001", "qty": 2}])
+        self.assertGreaterEqual(len(srv.checkpoints()), 3)
+        self.assertEqual(srv.as_of(999), [])
+        self.assertEqual(srv.as_of(1000)[0]["stock"], 10.0)
+        self.assertEqual(srv.as_of(1000 + 60 * 4 + 30)[0]["stock"], 6.0)
+        self.assertEqual(srv.as_of(1000 + 60 * 8)[0]["stock"], 2.0)
+        # رزرو هم در وضعیت تاریخی دیده می‌شود
+        self.assertEqual(srv.as_of(1000 + 60 * 9, skus=["FOOD-001"])[0]["stock"], 0.0)
+        clock["t"] += 60
+        srv.release_order("ORD-1")
+        self.assertEqual(srv.as_of(clock["t"])[0]["stock"], srv.get_item("FOOD-001")["stock"])
+
+    def test_as_of_history_compaction(self):
+        clock = {"t": 1000}
+        srv = InventoryService(checkpoint_every=2)
+        srv._now = lambda: clock["t"]
+        srv.upsert_item("FOOD-001", "Burger", 20, 120000)
+        srv.upsert_item("DRINK-002", "Soda", 5, 30000)
+        for i in range(10):
+            clock["t"] += 60
+            srv.adjust_stock("FOOD-001", -1, "sale")
+        # بدون compact کل تاریخچه در دسترس است
+        self.assertEqual(srv.as_of(1000, skus=["FOOD-001"])[0]["stock"], 20.0)
+        self.assertEqual(srv.compact(2), 4)
+        cps = srv.checkpoints()
+        self.assertEqual(len(cps), 2)
+        self.assertLessEqual(len(srv._journal), 4)
+        # آیتم بدون تغییر بین checkpointها به اشتراک گذاشته می‌شود
+        first, last = srv._checkpoints
+        self.assertIs(first["items"]["DRINK-002"], last["items"]["DRINK-002"])
+        self.assertEqual(srv.as_of(clock["t"], skus=["FOOD-001"])[0]["stock"], 10.0)
+        self.assertEqual(srv.as_of(cps[0]["at"], skus=["FOOD-001"])[0]["stock"],
+                         20.0 - (cps[0]["at"] - 1000) // 60)
+        with self.assertRaises(ValueError):
+            srv.as_of(1000)
+
+    def test_max_checkpoints_compacts_automatically(self):
+        srv = InventoryService(checkpoint_every=2, max_checkpoints=2)
+        srv.upsert_item("FOOD-001", "Burger", 20, 120000)
+        for i in range(10):
+            srv.adjust_stock("FOOD-001", -1, "sale")
+        self.assertEqual(len(srv.checkpoints()), 2)
+
+    def test_adjust_stock_batch(self):
+        txs = self.srv.adjust_stock_batch({"FOOD-001": -10, "SIDE-003": 5}, reason="count")
+        self.assertEqual(len(txs), 2)
+        self.assertEqual(self.srv.get_item("FOOD-001")["stock"], 90.0)
+        with self.assertRaises(ValueError):
+            self.srv.adjust_stock_batch({"FOOD-001": -1, "NOPE": 1}, reason="count")
+        self.assertEqual(self.srv.get_item("FOOD-001")["stock"], 90.0)
+
 
 def run_suite_and_collect():
     suite = unittest.TestLoader().loadTestsFromTestCase(TestInventoryService)
@@ -0,0 +1,133 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import re
+import shutil
+import tempfile
+
+from printing.invoice_builder import InvoiceBatchBuilder
+from services.auth_service import AuthService
+from services.print_service import PrintService
+
+
+def _invoice(i, lines=3):
+    return {
+        "header": {"order_id": f"ORD-{i}", "customer_id": i, "status": "paid", "created_at": 0},
+        "lines": [{"name": f"Item {n}", "qty": 1, "price": 1000, "discount": 0, "line_total": 1000} for n in range(lines)],
+        "totals": {"subtotal": 1000 * lines, "grand_total": 1000 * lines},
+    }
+
+
+class TestInvoiceBatchBuilder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_directory_output_reports_failures(self):
+        invoices = [_invoice(i) for i in range(6)]
+        invoices[2] = {"header": {"order_id": "BROKEN"}, "lines": [None]}
+        report = InvoiceBatchBuilder(workers=2, chunk_size=2).build(invoices, output_dir=self.tmp)
+        self.assertEqual((report["total"], report["succeeded"], report["failed"]), (6, 5, 1))
+        self.assertEqual(report["failures"][0]["order_id"], "BROKEN")
+        self.assertEqual(report["chunks"], 3)
+        self.assertGreater(report["per_second"], 0)
+        self.assertEqual(len(report["outputs"]), 5)
+        self.assertTrue(all(os.path.exists(p) for p in report["outputs"]))
+        self.assertTrue(report["outputs"][0].endswith("invoice_ORD-0.pdf"))
+
+    def test_duplicate_order_ids_get_distinct_files(self):
+        invoices = [_invoice(1), _invoice(2), _invoice(1)]
+        report = InvoiceBatchBuilder(workers=1).build(invoices, output_dir=self.tmp)
+        names = [os.path.basename(p) for p in report["outputs"]]
+        self.assertEqual(names, ["invoice_ORD-1_0.pdf", "invoice_ORD-2.pdf", "invoice_ORD-1_2.pdf"])
+        self.assertEqual(len(set(os.listdir(self.tmp))), 3)
+
+    def test_merged_output_keeps_order_and_fonts(self):
+        invoices = [_invoice(i, lines=40 if i == 1 else 2) for i in range(5)]
+        path = os.path.join(self.tmp, "day.pdf")
+        report = InvoiceBatchBuilder({"header": {"lines": ["Shop"]}}, workers=2, chunk_size=1).build(invoices, merged_path=path)
+        self.assertEqual(report["outputs"], [path])
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        # فاکتور دوم دو صفحه است
+        self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", raw)), 6)
+        defined = set(re.findall(rb"/F(\d+) \d+ 0 R", raw))
+        self.assertTrue(defined)
+
+    def test_merged_matches_serial_rendering(self):
+        invoices = [_invoice(i) for i in range(3)]
+        serial = os.path.join(self.tmp, "serial.pdf")
+        parallel = os.path.join(self.tmp, "parallel.pdf")
+        InvoiceBatchBuilder(workers=1).build(invoices, merged_path=serial)
+        InvoiceBatchBuilder(workers=3, chunk_size=1).build(invoices, merged_path=parallel)
+        with open(serial, "rb") as a, open(parallel, "rb") as b:
+            self.assertEqual(a.read().split(b"/CreationDate")[0], b.read().split(b"/CreationDate")[0])
+
+    def test_print_service_batch_permission(self):
+        auth = AuthService()
+        auth.set_role_permissions("cashier", ["print.receipt"])
+        auth.register("c", "cpass", roles=["cashier"])
+        token = auth.authenticate("c", "cpass")["token"]
+        psrv = PrintService(auth_service=auth)
+        with self.assertRaises(PermissionError):
+            psrv.print_invoices([_invoice(1)], output_dir=self.tmp, actor_token=token)
+        report = PrintService().print_invoices([_invoice(1), _invoice(2)], output_dir=self.tmp, workers=1)
+        self.assertEqual(report["succeeded"], 2)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestInvoiceBatchBuilder)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestInvoiceBatchBuilder)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Invoice Batch Builder Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -49,6 +49,43 @@ class TestInvoiceModel(unittest.TestCase):
         self.assertEqual(d["payment"]["status"], "Completed")
         self.assertGreater(len(d["lines"]), 0)
 
+    def test_generate_data_cached_until_change(self):
+        payment = Payment(4, self.order, amount=self.order.calculate_total(), method="Card")
+        invoice = Invoice(1004, self.order, payment)
+        first = invoice.generate_data()
+        self.assertIs(invoice.generate_data(), first)
+        payment.process_payment(True, "TX-INV-004")
+        second = invoice.generate_data()
+        self.assertIsNot(second, first)
+        self.assertEqual(second["payment"]["status"], "Completed")
+        self.order.add_product(self.drink, 1)
+        self.assertEqual(invoice.generate_data()["summary"]["total"], 190.0)
+        self.customer.address = "Karaj"
+        self.assertEqual(invoice.generate_data()["customer"]["address"], "Karaj")
+
+    def test_generate_data_tracks_product_changes(self):
+        payment = Payment(5, self.order, amount=self.order.calculate_total(), method="Card")
+        invoice = Invoice(1005, self.order, payment)
+        self.assertEqual(invoice.generate_data()["summary"]["total"], 170.0)
+        self.burger.update_price(40.0)
+        self.assertEqual(invoice.generate_data()["summary"]["total"], 150.0)
+        self.burger.update_name("Cheese Burger")
+        self.assertEqual(invoice.generate_data()["lines"][0]["name"], "Cheese Burger")
+        self.order.update_quantity(2, 1)
+        self.assertEqual(invoice.generate_data()["summary"]["total"], 110.0)
+
+    def test_generate_many_shares_sub_dicts(self):
+        invoices = []
+        for i in range(3):
+            payment = Payment(10 + i, self.order, amount=self.order.calculate_total(), method="Cash")
+            invoices.append(Invoice(2000 + i, self.order, payment, store_name="Demo POS", store_address="Tehran"))
+        data = Invoice.generate_many(invoices)
+        self.assertEqual([d["invoice_id"] for d in data], [2000, 2001, 2002])
+        self.assertIs(data[0]["store"], data[2]["store"])
+        self.assertIs(data[0]["customer"], data[1]["customer"])
+        self.assertIs(invoices[1].generate_data(), data[1])
+        self.assertEqual(data[0]["summary"]["total"], 170.0)
+
 def run_suite_and_collect():
     suite = unittest.TestLoader().loadTestsFromTestCase(TestInvoiceModel)
     stream = StringIO()
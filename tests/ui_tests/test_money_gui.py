@@ -0,0 +1,106 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+from models.money import Money, to_minor, round_money, format_money, to_minor_array, line_totals_minor
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+
+class TestMoney(unittest.TestCase):
+    def test_bankers_rounding(self):
+        self.assertEqual(to_minor(2.675), 268)    # round(2.675, 2) == 2.67 به خاطر خطای دودویی
+        self.assertEqual(to_minor(2.665), 266)
+        self.assertEqual(to_minor(0.125), 12)
+        self.assertEqual(to_minor(-0.135), -14)
+        self.assertEqual(to_minor(120000), 12000000)
+        self.assertEqual(to_minor("10.005"), 1000)
+        self.assertEqual(round_money(0.1 + 0.2), 0.3)
+        self.assertEqual(format_money(1234567.5), "1,234,568")
+        self.assertEqual(format_money(2.5), "2")
+
+    def test_vectorized_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        values = np.concatenate([rng.uniform(-1e6, 1e6, 2000).round(3), [2.675, 2.665, 0.125, 1e9 + 0.005]])
+        expected = [int(Decimal(repr(float(v))).scaleb(2).to_integral_value(ROUND_HALF_EVEN)) for v in values]
+        self.assertEqual(to_minor_array(values).tolist(), expected)
+        self.assertEqual([to_minor(float(v)) for v in values], expected)
+        self.assertEqual(line_totals_minor(np.array([1050, 333]), np.array([3, 2])).tolist(), [3150, 666])
+
+    def test_money_arithmetic(self):
+        a, b = Money.of(0.1), Money.of(0.2)
+        self.assertEqual(a + b, Money.of("0.3"))
+        self.assertEqual((b - a).minor, 10)
+        self.assertEqual((a * 3).amount, 0.3)
+        self.assertEqual(Money.of(10).percent(12.5).minor, 125)
+        self.assertEqual(sum([a, b, a]), Money(40))
+        self.assertTrue(Money.of(5) > Money.of(4.99))
+        self.assertEqual(str(Money.of(12.5)), "12.50")
+
+    def test_order_totals_exact(self):
+        order = Order(1, Customer(1, "Ali", "0912", "a@ex.com", "Tehran"))
+        p = Product(1, "Tea", 0.1, "Drink")
+        order.add_product(p, 3)
+        order.set_delivery("Courier", 0.2)
+        self.assertEqual(order.subtotal_minor(), 30)
+        self.assertEqual(order.calculate_subtotal(), 0.3)
+        self.assertEqual(order.calculate_total(), 0.5)
+        self.assertEqual(order.products[0].line_total, 0.3)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestMoney)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestMoney)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Money Test Results Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from datetime import datetime, timedelta
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.payment import Payment
+from models.inventory import Inventory
+from analytics.order_batch import OrderBatch
+from analytics.sales_analytics import SalesAnalytics
+from analytics.inventory_analytics import InventoryAnalytics
+from analytics.customer_analytics import CustomerAnalytics
+from reports.sales_reports import SalesReports
+from reports.inventory_reports import InventoryReports
+from database.database_manager import DatabaseManager
+
+class TestOrderBatch(unittest.TestCase):
+    def setUp(self):
+        c1 = Customer(1, "Ahmad", "0912", "a@ex.com", "Mashhad")
+        c2 = Customer(2, "Sara", "0935", "s@ex.com", "Tehran")
+        burger = Product(1, "Burger", 50.0, "Food", stock=100)
+        soda = Product(2, "Soda", 20.0, "Drink", stock=100)
+        fries = Product(3, "Fries", 15.5, "Side", stock=100)
+        base = datetime(2024, 3, 30, 12, 0, 0)
+        self.orders = []
+        for i in range(6):
+            o = Order(100 + i, c1 if i % 3 else c2)
+            o.add_product(burger, 1 + i % 2)
+            o.add_product(soda, 2)
+            if i % 2:
+                o.add_product(fries, 3)
+                o.set_delivery("Courier", 10.0)
+            o.discount_amount = float(i)
+            o.created_at = base + timedelta(days=i)
+            self.orders.append(o)
+        self.payments = []
+        for o in self.orders[:4]:
+            pay = Payment(o.order_id, o, amount=o.calculate_total(), method="Card")
+            pay.process_payment(True, f"TX-{o.order_id}")
+            pay.paid_at = o.created_at
+            self.payments.append(pay)
+        self.batch = OrderBatch.from_orders(self.orders)
+        self.inventory = Inventory()
+        self.inventory.add_product(burger, 10)
+
+    def test_columns(self):
+        b = self.batch
+        self.assertEqual(len(b), 6)
+        self.assertEqual(b.n_lines, 15)
+        self.assertEqual(b.product_names, ["Burger", "Soda", "Fries"])
+        self.assertEqual(b.categories, ["Food", "Drink", "Side"])
+        self.assertEqual(b.order_id[:2].tolist(), [100, 100])
+        self.assertEqual(b.product_id[:3].tolist(), [1, 2, 1])
+        self.assertAlmostEqual(float(b.line_total.sum()), sum(o.calculate_subtotal() for o in self.orders), places=6)
+        self.assertEqual(b.order_total.tolist(), [o.calculate_total() for o in self.orders])
+
+    def test_sales_analytics_matches(self):
+        for period in ("daily", "monthly", "weekly"):
+            a, b = SalesAnalytics(self.orders), SalesAnalytics(self.batch)
+            self.assertEqual(a.sales_trend(period), b.sales_trend(period))
+            self.assertEqual({k: dict(v) for k, v in a.top_products_over_time(period).items()},
+                             b.top_products_over_time(period))
+        self.assertEqual(SalesAnalytics(self.orders).average_sales("monthly"),
+                         SalesAnalytics(self.batch).average_sales("monthly"))
+
+    def test_inventory_and_customer_analytics_match(self):
+        self.assertEqual(InventoryAnalytics(self.inventory, self.orders).fast_moving_products(2),
+                         InventoryAnalytics(self.inventory, self.batch).fast_moving_products(2))
+        self.assertEqual(CustomerAnalytics([], self.orders, []).loyal_customers(),
+                         CustomerAnalytics([], self.batch, []).loyal_customers())
+        self.assertEqual(InventoryReports(self.inventory, self.orders).top_consumed_products(),
+                         InventoryReports(self.inventory, self.batch).top_consumed_products())
+
+    def test_sales_reports_match(self):
+        a = SalesReports(self.orders, self.payments)
+        b = SalesReports(self.batch, self.payments)
+        start, end = datetime(2024, 3, 31), datetime(2024, 4, 3, 23, 59)
+        for rng in ((None, None), (start, end)):
+            self.assertEqual(a.generate_sales_summary(*rng), b.generate_sales_summary(*rng))
+            self.assertEqual(a.top_products(5, *rng), b.top_products(5, *rng))
+            self.assertEqual(a.top_customers(5, *rng), b.top_customers(5, *rng))
+        self.assertEqual(a.render_text_report(), b.render_text_report())
+
+    def test_from_sql(self):
+        path = os.path.join(tempfile.mkdtemp(), "batch.db")
+        db = DatabaseManager(path)
+        db.initialize_database()
+        uid = db.insert("users", {"username": "u", "password_hash": "x"})
+        cat = db.insert("categories", {"name": "Food"})
+        pid = db.insert("products", {"name": "Burger", "price": 50.0, "category_id": cat})
+        cid = db.insert("customers", {"name": "Ahmad", "phone": "0912"})
+        for n, (qty, ts) in enumerate([(2, "2024-04-01 10:00:00"), (1, "2024-04-02 11:30:00")]):
+            oid = db.insert("orders", {"order_number": f"N-{n}", "customer_id": cid, "user_id": uid,
+                                       "total_amount": 50.0 * qty, "created_at": ts})
+            db.insert("order_items", {"order_id": oid, "product_id": pid, "quantity": qty,
+                                      "unit_price": 50.0, "subtotal": 50.0 * qty})
+        batch = OrderBatch.from_sql(db)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.qty.tolist(), [2, 1])
+        self.assertEqual(batch.categories, ["Food"])
+        self.assertEqual(SalesAnalytics(batch).sales_trend(), {"2024-04-01": 100.0, "2024-04-02": 50.0})
+        self.assertEqual(len(OrderBatch.from_sql(db, start=datetime(2024, 4, 2))), 1)
+        db.disconnect()
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestOrderBatch)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestOrderBatch)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Order Batch Test Results Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
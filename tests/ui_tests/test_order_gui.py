@@ -39,6 +39,65 @@ class TestOrderModel(unittest.TestCase):
         self.order.apply_discount(10)
         self.assertEqual(self.order.products[0]["product"].price, 45.0)
 
+    def test_total_cache_invalidation(self):
+        self.order.add_product(self.product1, 2)
+        self.assertEqual(self.order.calculate_total(), 100.0)
+        self.order.add_product(self.product2, 1)
+        self.assertEqual(self.order.calculate_total(), 180.0)
+        self.order.update_quantity(2, 2)
+        self.assertEqual(self.order.calculate_total(), 260.0)
+        self.order.set_delivery("Courier", 15.0)
+        self.assertEqual(self.order.calculate_total(), 275.0)
+        self.order.remove_product(1)
+        self.assertEqual(self.order.calculate_subtotal(), 160.0)
+        self.order.apply_discount(50)
+        self.assertEqual(self.order.calculate_total(), 95.0)
+        # تغییر قیمت محصول (نسخه‌ی محصول) بدون باطل‌سازی دستی دیده می‌شود
+        self.product2.price = 10.0
+        self.assertEqual(self.order.calculate_total(), 35.0)
+        # تغییر مستقیم سطر نیاز به invalidate_totals دارد
+        self.order.products[0].quantity = 3
+        self.order.invalidate_totals()
+        self.assertEqual(self.order.calculate_total(), 45.0)
+        self.order.delivery_fee = 0.0
+        self.assertEqual(self.order.calculate_total(), 30.0)
+
+    def test_shared_product_price_change(self):
+        other = Order(2, self.customer)
+        self.order.add_product(self.product1, 1)
+        other.add_product(self.product1, 1)
+        self.assertEqual(other.calculate_total(), 50.0)
+        self.order.apply_discount(50)
+        self.assertEqual(other.calculate_total(), 25.0)
+        self.product1.update_price(40.0)
+        self.assertEqual(self.order.calculate_total(), 40.0)
+        self.assertEqual(other.calculate_total(), 40.0)
+
+    def test_line_index_survives_quantity_updates(self):
+        products = [Product(i, f"P{i}", 1.0, "Food") for i in range(50)]
+        for p in products:
+            self.order.add_product(p, 1)
+        index = self.order._index()
+        self.order.update_quantity(7, 4)
+        unrelated = Product(99, "Other", 3.0, "Food")
+        unrelated.update_price(5.0)
+        self.assertIs(self.order._index(), index)
+        self.assertEqual(self.order.get_line(7).quantity, 4)
+        self.order.remove_product(7)
+        self.assertIsNone(self.order.get_line(7))
+        self.assertIs(self.order._index(), index)
+        self.assertEqual(self.order.calculate_subtotal(), 49.0)
+
+    def test_line_index(self):
+        self.order.add_product(self.product1, 2)
+        self.order.add_product(self.product2, 1)
+        self.assertIs(self.order.get_line(2), self.order.products[1])
+        self.order.remove_product(1)
+        self.assertIsNone(self.order.get_line(1))
+        self.assertEqual(len(self.order.products), 1)
+        with self.assertRaises(ValueError):
+            self.order.update_quantity(1, 3)
+
     def test_update_status_valid(self):
         self.order.update_status("Paid")
         self.assertEqual(self.order.status, "Paid")
@@ -0,0 +1,147 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import threading
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.payment import Payment
+from models.invoice import Invoice
+from printing.print_preview import PrintPreviewService, rasterize_page
+from printing.template_engine import CompiledTemplate
+
+
+class TestPrintPreview(unittest.TestCase):
+    def setUp(self):
+        self.service = PrintPreviewService(dpi=50)
+        self.receipt = {
+            "order_id": 9,
+            "created_at": 0,
+            "items": [{"name": f"Item {i}", "qty": 1, "price": 1000} for i in range(50)],
+            "totals": {"subtotal": 50000, "grand_total": 50000},
+        }
+
+    def tearDown(self):
+        self.service.shutdown(timeout=5)
+
+    def test_rasterize_draws_text_and_table(self):
+        pdf = CompiledTemplate({}).render("receipt", self.receipt)
+        img = rasterize_page(pdf, 1, dpi=72)
+        self.assertEqual((img.width, img.height), (595, 842))
+        self.assertTrue(img.to_pgm().startswith(b"P5\n595 842\n255\n"))
+        # کادر جدول: ستون اول از x=28.35pt شروع می‌شود
+        self.assertLess(img.pixel(28, 120), 128)
+        dark = sum(1 for b in img.data if b < 128)
+        self.assertGreater(dark, 2000)
+        self.assertLess(dark, img.nbytes // 4)
+
+    def test_progressive_pages_and_cache(self):
+        seen = []
+        first_page = threading.Event()
+
+        def on_page(index, image):
+            seen.append(index)
+            first_page.set()
+
+        job = self.service.preview("receipt", self.receipt, on_page=on_page)
+        self.assertTrue(first_page.wait(5))
+        self.assertIsNotNone(job.page(0, timeout=5))
+        self.assertTrue(job.wait(5))
+        self.assertIsNone(job.error)
+        self.assertEqual(job.page_count, 2)
+        self.assertEqual(seen, [0, 1])
+
+        again = self.service.preview("receipt", self.receipt)
+        self.assertTrue(again.cached)
+        self.assertIs(again.pages[0], job.pages[0])
+        self.assertEqual(self.service.stats()["hits"], 1)
+        # DPI دیگر کلید دیگری است
+        self.assertFalse(self.service.preview("receipt", self.receipt, dpi=40).cached)
+
+    def test_size_bounded_eviction(self):
+        page_bytes = 413 * 585  # A4 در 50 DPI
+        service = PrintPreviewService(dpi=50, max_bytes=page_bytes * 3)
+        try:
+            for order_id in range(4):
+                data = dict(self.receipt, order_id=order_id, items=self.receipt["items"][:3])
+                self.assertTrue(service.preview("receipt", data).wait(5))
+            stats = service.stats()
+            self.assertEqual(stats["entries"], 3)
+            self.assertLessEqual(stats["bytes"], page_bytes * 3)
+            self.assertFalse(service.preview("receipt", dict(self.receipt, order_id=0)).cached)
+        finally:
+            service.shutdown(timeout=5)
+
+    def test_invoice_model_preview(self):
+        customer = Customer(1, "Ahmad", "0912000000", "ahmad@example.com", "Tehran, Iran")
+        order = Order(1, customer)
+        order.add_product(Product(1, "Burger", 50.0, "Food", stock=10), 2)
+        invoice = Invoice(7, order, Payment(1, order, amount=order.calculate_total(), method="Card"))
+        job = self.service.preview_invoice(invoice)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(len(job.pages), 1)
+        self.assertTrue(self.service.preview_invoice(invoice).cached)
+        # تغییر قیمت یا نام محصول پیش‌نمایش کش‌شده را کهنه می‌کند
+        order.products[0].product.update_price(40.0)
+        repriced = self.service.preview_invoice(invoice)
+        self.assertFalse(repriced.cached)
+        self.assertTrue(repriced.wait(5))
+        order.products[0].product.update_name("Cheese Burger")
+        self.assertFalse(self.service.preview_invoice(invoice).cached)
+        self.assertEqual(invoice.to_print_data()["totals"]["grand_total"], invoice.generate_data()["summary"]["total"])
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPrintPreview)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestPrintPreview)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Print Preview Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,190 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import tempfile
+import threading
+import json
+from datetime import datetime
+from unittest import mock
+
+from printing.printer_manager import PrinterManager
+
+
+class _FakeRenderer:
+    def __init__(self):
+        self.calls = []
+        self.gate = None
+
+    def _out(self, kind, data, filename):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append((kind, data.get("order_id")))
+        with open(filename, "w", encoding="utf-8") as fh:
+            fh.write(kind)
+        return filename
+
+    def print_kitchen_ticket(self, data, filename, template_config=None):
+        return self._out("kitchen", data, filename)
+
+    def print_receipt(self, data, filename, template_config=None):
+        return self._out("receipt", data, filename)
+
+    def print_invoice(self, data, filename, template_config=None):
+        return self._out("invoice", data, filename)
+
+
+class TestPrinterManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.renderer = _FakeRenderer()
+        self.managers = []
+
+    def tearDown(self):
+        for m in self.managers:
+            m.shutdown()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _manager(self, **kwargs):
+        m = PrinterManager(spool_dir=self.tmp, renderer=self.renderer, retry_delay=0.01, **kwargs)
+        self.managers.append(m)
+        return m
+
+    def test_job_completes_in_background(self):
+        m = self._manager()
+        m.register_printer("default")
+        statuses = []
+        jid = m.print_receipt({"order_id": 1}, on_status=lambda j: statuses.append(j["status"]))
+        job = m.wait(jid, timeout=5)
+        self.assertEqual(job["status"], "done")
+        self.assertTrue(os.path.exists(job["output"]))
+        self.assertEqual(statuses, ["queued", "printing", "done"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, f"job_{jid}.json")))
+
+    def test_kitchen_jumps_ahead_of_reprint(self):
+        m = self._manager()
+        self.renderer.gate = threading.Event()
+        m.register_printer("kitchen")
+        first = m.print_kitchen_ticket({"order_id": 1})
+        again = m.reprint(first)
+        m.print_receipt({"order_id": 2}, printer="kitchen")
+        last = m.print_kitchen_ticket({"order_id": 3})
+        self.renderer.gate.set()
+        m.wait(again, timeout=5)
+        m.wait(last, timeout=5)
+        self.assertEqual(self.renderer.calls, [("kitchen", 1), ("kitchen", 3), ("receipt", 2), ("kitchen", 1)])
+
+    def test_retry_then_fail(self):
+        m = self._manager(max_retries=2)
+        attempts = []
+
+        def flaky(path):
+            attempts.append(path)
+            if len(attempts) < 2:
+                raise IOError("paper jam")
+        m.register_printer("bar", sink=flaky)
+        ok = m.print_receipt({"order_id": 5}, printer="bar")
+        self.assertEqual(m.wait(ok, timeout=5)["attempts"], 2)
+
+        def broken(path):
+            raise IOError("offline")
+        m.register_printer("dead", sink=broken)
+        bad = m.print_receipt({"order_id": 6}, printer="dead")
+        job = m.wait(bad, timeout=5)
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["attempts"], 3)
+        self.assertEqual(job["error"], "offline")
+
+    def test_jobs_survive_restart(self):
+        m = self._manager()
+        jid = m.print_invoice({"order_id": 9}, printer="office")
+        self.assertTrue(m.cancel(m.print_invoice({"order_id": 10}, printer="office")))
+        m.shutdown()
+        m2 = self._manager()
+        self.assertEqual([j["job_id"] for j in m2.list_jobs(status="queued")], [jid])
+        m2.register_printer("office")
+        self.assertEqual(m2.wait(jid, timeout=5)["status"], "done")
+        self.assertEqual(self.renderer.calls, [("invoice", 9)])
+
+    def test_spool_write_errors(self):
+        m = self._manager()
+        # داده‌ی غیر JSON هنگام ثبت رد می‌شود و چیزی در spool نوشته نمی‌شود
+        with self.assertRaises(ValueError):
+            m.print_receipt({"order_id": 10, "paid_at": datetime(2024, 1, 2, 3, 4)}, printer="front")
+        self.assertEqual(m.list_jobs(), [])
+        jid = m.print_receipt({"order_id": 11, "paid_at": "2024-01-02 03:04:00"}, printer="front")
+        with open(os.path.join(self.tmp, f"job_{jid}.json"), encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh)["data"]["paid_at"], "2024-01-02 03:04:00")
+        # خطای نوشتن: ثبت کار رد و فایل موقت پاک می‌شود
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                m.print_receipt({"order_id": 12}, printer="front")
+        self.assertEqual(len(m.list_jobs()), 1)
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.endswith(".tmp")], [])
+        # خطای نوشتن هنگام تغییر وضعیت در کارگر فقط log می‌شود و چاپ ادامه پیدا می‌کند
+        with mock.patch("os.replace", side_effect=OSError("disk full")), \
+                self.assertLogs("printing.printer_manager", level="ERROR"):
+            m.register_printer("front")
+            self.assertEqual(m.wait(jid, timeout=5)["status"], "done")
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.endswith(".tmp")], [])
+
+    def test_unknown_kind_rejected(self):
+        m = self._manager()
+        with self.assertRaises(ValueError):
+            m.submit("label", {})
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPrinterManager)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestPrinterManager)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Printer Manager Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,124 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from datetime import datetime, date, time, timedelta
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.discount import Discount
+from models.promotion import PromotionSchedule, jalali_to_gregorian
+from services.promotion_service import PromotionService
+from calculators.discount_calculator import DiscountCalculator
+
+class TestPromotionService(unittest.TestCase):
+    def setUp(self):
+        # 2024-05-06 دوشنبه است
+        self.monday = datetime(2024, 5, 6, 0, 0)
+        self.srv = PromotionService(horizon_days=7)
+        self.happy = Discount("HAPPY", "percentage", 20, scope="order")
+        self.srv.register(self.happy, PromotionSchedule(windows=[(time(16), time(18))]))
+        self.weekend = Discount("WEEKEND", "fixed", 10, scope="order")
+        self.srv.register(self.weekend, PromotionSchedule(weekdays=[3, 4]))   # پنج‌شنبه و جمعه
+        self.late = Discount("LATE", "fixed", 5, scope="order")
+        self.srv.register(self.late, PromotionSchedule(windows=[(time(23), time(2))]))
+
+    def test_jalali_conversion(self):
+        self.assertEqual(jalali_to_gregorian(1403, 1, 1), date(2024, 3, 20))
+        self.assertEqual(jalali_to_gregorian(1399, 12, 30), date(2021, 3, 20))
+        nowruz = PromotionSchedule.jalali_range((1403, 1, 1), (1403, 1, 13))
+        self.assertTrue(nowruz.is_active(datetime(2024, 4, 1, 12)))
+        self.assertFalse(nowruz.is_active(datetime(2024, 4, 2, 12)))
+
+    def test_active_lookup(self):
+        m = self.monday
+        self.assertEqual(self.srv.active_codes(m + timedelta(hours=12)), [])
+        self.assertEqual(self.srv.active_codes(m + timedelta(hours=17)), ["HAPPY"])
+        self.assertEqual(self.srv.active_codes(m + timedelta(hours=18)), [])
+        self.assertEqual(self.srv.active_codes(m + timedelta(hours=1)), ["LATE"])   # از یکشنبه شب
+        self.assertEqual(self.srv.active_codes(m + timedelta(days=3, hours=17)), ["HAPPY", "WEEKEND"])
+        # بیرون از افق: تقویم دوباره ساخته می‌شود
+        self.assertEqual(self.srv.active_codes(m + timedelta(days=10, hours=17)), ["HAPPY", "WEEKEND"])
+
+    def test_next_change_and_events(self):
+        events = []
+        self.srv.subscribe(events.append)
+        m = self.monday + timedelta(hours=12)
+        self.assertEqual(self.srv.advance(m), {"started": [], "ended": []})
+        nxt = self.srv.next_change_at(m)
+        self.assertEqual(nxt, self.monday + timedelta(hours=16))
+        self.assertEqual(self.srv.advance(nxt)["started"], ["HAPPY"])
+        self.assertEqual(self.srv.advance(self.srv.next_change_at(nxt))["ended"], ["HAPPY"])
+        self.assertEqual([(e["type"], e["code"]) for e in events],
+                         [("promotion.started", "HAPPY"), ("promotion.ended", "HAPPY")])
+
+    def test_unscheduled_uses_discount_window(self):
+        m = self.monday
+        d = Discount("ONE", "fixed", 1, scope="order", start_at=m + timedelta(hours=1), end_at=m + timedelta(hours=2))
+        self.srv.register(d)
+        self.assertTrue(self.srv.is_active("ONE", m + timedelta(hours=2)))
+        self.assertFalse(self.srv.is_active("ONE", m + timedelta(hours=2, seconds=1)))
+
+    def test_discount_calculator_integration(self):
+        order = Order(1, Customer(1, "Ali", "0912", "a@ex.com", "Tehran"))
+        order.add_product(Product(1, "Burger", 50.0, "Food"), 2)
+        calc = DiscountCalculator([self.happy, self.weekend, self.late], promotions=self.srv)
+        m = self.monday
+        self.assertEqual(calc.applicable(order, m + timedelta(hours=12)), [])
+        self.assertEqual(calc.best_combination(order, m + timedelta(hours=17))["discount_total"], 20.0)
+        self.assertEqual(calc.applicable(order, m + timedelta(hours=19)), [])
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPromotionService)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestPromotionService)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Promotion Service Test Results Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
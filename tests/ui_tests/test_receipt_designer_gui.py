@@ -0,0 +1,131 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from i18n.text_shaping import shape_text
+from printing.receipt_designer import ReceiptDesigner, INIT, CUT
+from printing.printer_manager import PrinterManager
+
+
+class TestReceiptDesigner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.designer = ReceiptDesigner(width=32)
+        self.order = {
+            "order_id": 42,
+            "created_at": 0,
+            "items": [{"name": "پیتزا", "qty": 2, "price": 120000}, {"name": "Cola", "qty": 1, "price": 30000}],
+            "totals": {"subtotal": 270000, "grand_total": 270000},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_persian_shaping_and_order(self):
+        # س آغازی، لام‌الف پایانی، م تنها؛ ترتیب نمایشی وارونه
+        self.assertEqual(shape_text("سلام"), "ﻡﻼﺳ")
+        self.assertEqual(shape_text("جمع: 12.50"), "12.50 :ﻊﻤﺟ")
+        self.assertEqual(shape_text("Total: 12"), "Total: 12")
+
+    def test_cp864_fallback_for_persian_letters(self):
+        encoded = self.designer.encode_line("پ", "L")
+        # پ در cp864 وجود ندارد و با ب تنها جایگزین می‌شود
+        self.assertEqual(encoded[:1], "ﺏ".encode("cp864"))
+        self.assertNotIn(b"?", encoded)
+
+    def test_ticket_layout(self):
+        data = self.designer.render_kitchen_ticket(self.order)
+        self.assertTrue(data.startswith(INIT))
+        self.assertTrue(data.endswith(CUT))
+        self.assertIn(b"Order: 42".ljust(32) + b"\n", data)
+        plain = [ln for ln in data.split(b"\n")[2:] if ln and b"\x1b" not in ln and b"\x1d" not in ln]
+        self.assertEqual(len(plain), 4)
+        for ln in plain:
+            self.assertEqual(len(ln), 32)
+        self.assertTrue(plain[-1].startswith(b"Cola"))
+
+    def test_header_cached(self):
+        cfg = {"header": {"lines": ["فست‌فود", "Tehran"]}, "footer": {"lines": ["Thanks"]}}
+        first = self.designer.render_receipt(self.order, cfg)
+        block = self.designer._block_cache[("header", ("فست‌فود", "Tehran"), "C")]
+        self.assertIn(block, first)
+        self.assertEqual(self.designer.render_receipt(self.order, cfg), first)
+        self.assertIs(self.designer._block_cache[("header", ("فست‌فود", "Tehran"), "C")], block)
+        self.assertIn(b"270,000", first)
+
+    def test_logo_from_pbm(self):
+        path = os.path.join(self.tmp, "logo.pbm")
+        with open(path, "wb") as fh:
+            fh.write(b"P4\n# logo\n16 2\n\xff\x00\x0f\xf0")
+        data = self.designer.render_receipt(self.order, {"logo": path})
+        self.assertIn(b"\x1dv0\x00\x02\x00\x02\x00\xff\x00\x0f\xf0", data)
+
+    def test_plugs_into_printer_manager(self):
+        manager = PrinterManager(spool_dir=self.tmp, renderer=self.designer, retry_delay=0.01)
+        try:
+            manager.register_printer("kitchen")
+            target = os.path.join(self.tmp, "ticket.bin")
+            job = manager.wait(manager.print_kitchen_ticket(self.order, filename=target), timeout=5)
+            self.assertEqual(job["status"], "done")
+            with open(target, "rb") as fh:
+                self.assertEqual(fh.read(), self.designer.render_kitchen_ticket(self.order))
+        finally:
+            manager.shutdown()
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestReceiptDesigner)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestReceiptDesigner)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Receipt Designer Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,125 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.recipe import Recipe
+from services.inventory_service import InventoryService
+from services.recipe_service import RecipeService
+
+class TestRecipeService(unittest.TestCase):
+    def setUp(self):
+        self.inv = InventoryService()
+        # مواد اولیه
+        self.inv.upsert_item("BUN", "Bun", 100, 5000)
+        self.inv.upsert_item("PATTY", "Patty", 100, 40000)
+        self.inv.upsert_item("SAUCE", "Sauce (g)", 1000, 100)
+        self.srv = RecipeService(self.inv)
+        self.srv.register_recipe(Recipe(1, "Burger", {"BUN": 1, "PATTY": 1, "SAUCE": 20}))
+        self.srv.register_recipe(Recipe(2, "Double Burger", {"BUN": 1, "PATTY": 2, "SAUCE": 30}))
+        self.customer = Customer(1, "Ahmad", "0912000000")
+        self.burger = Product(1, "Burger", 120000, "Food")
+        self.double = Product(2, "Double Burger", 180000, "Food")
+        self.soda = Product(3, "Soda", 20000, "Drink")
+
+    def test_recipe_model(self):
+        r = Recipe("FRIES", "Fries", {"POTATO": 300}, yield_qty=2)
+        self.assertEqual(r.per_unit(), {"POTATO": 150.0})
+        self.assertEqual(r.requirements(3), {"POTATO": 450.0})
+        with self.assertRaises(ValueError):
+            r.add_ingredient("OIL", 0)
+
+    def test_compile_sparse_matrix(self):
+        info = self.srv.compile()
+        self.assertEqual(info, {"products": 2, "ingredients": 3, "nnz": 6})
+
+    def test_compute_consumption_models_and_dicts(self):
+        o1 = Order(1, self.customer)
+        o1.add_product(self.burger, 2)
+        o1.add_product(self.soda, 1)  # بدون دستور پخت؛ نادیده گرفته می‌شود
+        o2 = {"order_id": "O2", "lines": [{"product_id": 2, "qty": 3}, {"sku": "1", "qty": 1}]}
+        cons = self.srv.compute_consumption([o1, o2])
+        self.assertEqual(cons, {"BUN": 6.0, "PATTY": 9.0, "SAUCE": 150.0})
+
+    def test_deplete_orders_single_batch(self):
+        o = {"lines": [{"product_id": 1, "qty": 4}]}
+        before = len(self.inv.transactions())
+        res = self.srv.deplete_orders([o])
+        self.assertEqual(len(res["transactions"]), 3)
+        self.assertEqual(len(self.inv.transactions()) - before, 3)
+        self.assertEqual(self.inv.get_item("PATTY")["stock"], 96.0)
+        self.assertEqual(self.inv.get_item("SAUCE")["stock"], 920.0)
+
+    def test_batch_is_all_or_nothing(self):
+        self.srv.register_recipe(Recipe(9, "Salad", {"LETTUCE": 1}))
+        with self.assertRaises(ValueError):
+            self.srv.deplete_orders([{"lines": [{"product_id": 9, "qty": 1}, {"product_id": 1, "qty": 1}]}])
+        self.assertEqual(self.inv.get_item("BUN")["stock"], 100.0)
+
+    def test_recipe_change_recompiles(self):
+        self.srv.compute_consumption([])
+        self.srv.register_recipe(Recipe(1, "Burger", {"BUN": 2}))
+        cons = self.srv.compute_consumption([{"lines": [{"product_id": 1, "qty": 1}]}])
+        self.assertEqual(cons, {"BUN": 2.0})
+
+    def test_full_day_batch(self):
+        orders = [{"lines": [{"product_id": 1 + (i % 2), "qty": 1}]} for i in range(20000)]
+        cons = self.srv.compute_consumption(orders)
+        self.assertEqual(cons["BUN"], 20000.0)
+        self.assertEqual(cons["PATTY"], 30000.0)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestRecipeService)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestRecipeService)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Recipe Service Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,169 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from services.report_cache import ReportCache
+from services.reporting_service import ReportingService
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.calls = 0
+        self.version = 1
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _inventory(self):
+        self.calls += 1
+        return {"items": [{"sku": "A", "name": "Burger", "stock": 2}]}
+
+    def _service(self, **kwargs):
+        srv = ReportingService(cache_dir=self.tmp, **kwargs)
+        srv.register_data_provider("inventory", self._inventory, version=lambda: self.version)
+        return srv
+
+    def test_repeat_requests_hit_cache(self):
+        srv = self._service()
+        first = srv.generate_report("inventory_status")
+        second = srv.generate_report("inventory_status", {"threshold": 5})
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["report_id"], first["report_id"])
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(srv.generate_report("inventory_status", {"threshold": 1})["cached"])
+        self.assertFalse(srv.generate_report("inventory_status", use_cache=False)["cached"])
+        self.assertEqual(self.calls, 3)
+
+    def test_data_version_invalidates(self):
+        srv = self._service()
+        srv.generate_report("inventory_status")
+        self.version = 2
+        self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        srv.notify_data_changed("inventory")
+        self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        self.assertEqual(self.calls, 3)
+
+    def test_persistent_index(self):
+        rid = self._service().generate_report("inventory_status")["report_id"]
+        srv = self._service()
+        self.assertTrue(srv.generate_report("inventory_status")["cached"])
+        self.assertEqual(srv.get_cached_report(rid)["report_id"], rid)
+        self.assertTrue(srv.delete_cached_report(rid))
+        self.assertIsNone(srv.get_cached_report(rid))
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.startswith("report_")], [])
+
+    def test_unversioned_provider_not_cached_by_default(self):
+        srv = ReportingService(cache_dir=self.tmp)
+        srv.register_data_provider("inventory", self._inventory)
+        self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(srv.cache.entries(), [])
+
+    def test_unversioned_provider_not_shared_across_instances(self):
+        for _ in range(2):
+            srv = ReportingService(cache_dir=self.tmp)
+            srv.register_data_provider("inventory", self._inventory, cacheable=True)
+            self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        self.assertTrue(srv.generate_report("inventory_status")["cached"])
+
+    def test_provider_error_not_cached(self):
+        srv = self._service()
+        fail = [True]
+
+        def inventory():
+            if fail[0]:
+                raise RuntimeError("db down")
+            return self._inventory()
+
+        srv.register_data_provider("inventory", inventory, version=lambda: self.version)
+        first = srv.generate_report("inventory_status")
+        self.assertEqual(first["errors"], {"inventory": "db down"})
+        self.assertFalse(srv.generate_report("inventory_status")["cached"])
+        fail[0] = False
+        ok = srv.generate_report("inventory_status")
+        self.assertEqual(ok["errors"], {})
+        self.assertFalse(ok["cached"])
+        self.assertTrue(srv.generate_report("inventory_status")["cached"])
+
+    def test_lru_ttl_and_bytes(self):
+        cache = ReportCache(self.tmp, max_entries=2, ttl=60)
+        now = [1000.0]
+        cache._now = lambda: now[0]
+        for i in range(3):
+            cache.put(f"k{i}", {"report_id": f"r{i}", "data": i})
+            now[0] += 1
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(cache.get("k1")["data"], 1)
+        cache.put("k3", {"report_id": "r3", "data": 3})
+        # k2 کمتر از k1 استفاده شده است
+        self.assertIsNone(cache.get("k2"))
+        now[0] += 120
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+        small = ReportCache(os.path.join(self.tmp, "small"), max_bytes=200, ttl=None)
+        small.put("a", {"report_id": "a", "data": "x" * 120})
+        small.put("b", {"report_id": "b", "data": "y" * 120})
+        self.assertEqual([e["key"] for e in small.entries()], ["b"])
+        self.assertLessEqual(small.stats()["bytes"], 200)
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestReportCache)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestReportCache)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Report Cache Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,183 @@
+# tests/ui_tests/test_report_scheduler_gui.py
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import json
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from services.reporting_service import ReportingService
+from services.report_scheduler import CronRule, ReportScheduler
+
+
+class TestReportScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = os.path.join(os.getcwd(), "report_scheduler_test")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.version = 1
+        self.calls = 0
+        self.rep = ReportingService(cache_dir=os.path.join(self.tmp, "cache"), cache_ttl=60)
+        self.rep.register_data_provider("orders", self._orders, version=lambda: self.version)
+        self.history = os.path.join(self.tmp, "history.json")
+        self.sched = ReportScheduler(self.rep, history_file=self.history)
+
+    def tearDown(self):
+        self.sched.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _orders(self):
+        self.calls += 1
+        return {"orders": [{"order_id": "O1", "customer_id": "C1", "totals": {"grand_total": 100}, "created_at": 0}]}
+
+    def test_cron_rule(self):
+        rule = CronRule("30 2 * * 1-5")
+        friday = datetime(2024, 3, 22, 3, 0).timestamp()
+        self.assertEqual(datetime.fromtimestamp(rule.next_after(friday)), datetime(2024, 3, 25, 2, 30))
+        self.assertTrue(rule.matches(datetime(2024, 3, 25, 2, 30).timestamp()))
+        every = CronRule("*/15 * * * *")
+        self.assertEqual(datetime.fromtimestamp(every.next_after(datetime(2024, 1, 1, 10, 15).timestamp())),
+                         datetime(2024, 1, 1, 10, 30))
+        self.assertEqual(datetime.fromtimestamp(CronRule("@daily").next_after(friday)), datetime(2024, 3, 23))
+        # روز ماه یا روز هفته
+        either = CronRule("0 0 1 * 0")
+        self.assertEqual(datetime.fromtimestamp(either.next_after(friday)), datetime(2024, 3, 24))
+        for bad in ("* * *", "61 * * * *", "a * * * *", "0 0 31 2 *"):
+            with self.assertRaises(ValueError):
+                CronRule(bad).next_after(friday)
+
+    def test_precompute_in_process_and_skip_unchanged(self):
+        job = self.sched.add_job("morning", "sales_summary", "0 3 * * *")
+        self.assertGreater(job["next_run"], time.time())
+        first = self.sched.run_job("morning")
+        self.assertEqual(first["status"], "computed")
+        self.assertTrue(first["process"])
+        self.assertEqual(self.rep.cache.entries()[0]["ttl"], 86400.0)
+        # گزارش صبح از کش خوانده می‌شود
+        report = self.rep.generate_report("sales_summary")
+        self.assertTrue(report["cached"])
+        self.assertEqual(report["report_id"], first["report_id"])
+        self.assertEqual(report["data"]["total_sales"], 100)
+        # داده تغییر نکرده: اجرا رد می‌شود و provider خوانده نمی‌شود
+        calls = self.calls
+        self.assertEqual(self.sched.run_job("morning")["status"], "skipped")
+        self.assertEqual(self.calls, calls)
+        self.version = 2
+        self.assertEqual(self.sched.run_job("morning")["status"], "computed")
+        listed = self.sched.list_jobs()[0]
+        self.assertEqual(listed["last_run"]["status"], "computed")
+        self.assertIsNotNone(listed["avg_runtime"])
+        with open(self.history) as fh:
+            self.assertEqual([r["status"] for r in json.load(fh)["morning"]], ["computed", "skipped", "computed"])
+        reloaded = ReportScheduler(self.rep, history_file=self.history)
+        self.assertEqual(len(reloaded.history("morning")), 3)
+
+    def test_run_pending_and_failures(self):
+        self.rep.register_report_type("live", lambda bundle, params: {"n": len(bundle)}, ["orders"])
+        self.sched.add_job("live", "live", "*/5 * * * *")
+        self.sched.add_job("night", "sales_summary", "0 2 * * *")
+        self.assertEqual(self.sched.run_pending(), [])
+        now = max(j["next_run"] for j in self.sched.list_jobs() if j["job_id"] == "live")
+        ran = self.sched.run_pending(now=now)
+        self.assertEqual([r["job_id"] for r in ran], ["live"])
+        self.assertFalse(ran[0]["process"])  # closure در همین فرایند اجرا می‌شود
+        self.assertGreater(self.sched.list_jobs()[0]["next_run"], now)
+        self.rep.register_report_type("failing", lambda b, p: 1 / 0, ["orders"])
+        self.sched.add_job("failing", "failing", "@hourly")
+        result = self.sched.run_job("failing")
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("ZeroDivisionError", result["error"])
+        # provider ناموفق: اجرا failed و گزارش ناقص در کش نوشته نمی‌شود
+        self.rep.register_data_provider("inventory", lambda: 1 / 0, version=lambda: self.version)
+        self.sched.add_job("stock", "inventory_status", "@daily")
+        cached = len(self.rep.cache.entries())
+        result = self.sched.run_job("stock")
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("inventory", result["error"])
+        self.assertEqual(len(self.rep.cache.entries()), cached)
+        self.assertEqual(self.sched.run_job("stock")["status"], "failed")
+        with self.assertRaises(ValueError):
+            self.sched.add_job("bad", "inventory_status", "@daily", params={"limit": 1})
+        with self.assertRaises(ValueError):
+            self.sched.run_job("unknown")
+
+    def test_lock_released_while_running(self):
+        entered, resume = threading.Event(), threading.Event()
+
+        def slow(bundle, params):
+            entered.set()
+            resume.wait(5)
+            return {"ok": True}
+
+        self.rep.register_report_type("slow", slow, ["orders"])
+        self.sched.add_job("slow", "slow", "@daily")
+        worker = threading.Thread(target=self.sched.run_job, args=("slow",))
+        worker.start()
+        self.assertTrue(entered.wait(5))
+        try:
+            # در طول ساخت گزارش scheduler پاسخ می‌دهد ولی همان job دوباره اجرا نمی‌شود
+            self.assertEqual(len(self.sched.list_jobs()), 1)
+            with self.assertRaises(ValueError):
+                self.sched.run_job("slow")
+        finally:
+            resume.set()
+            worker.join(5)
+        self.assertEqual(self.sched.history("slow")[0]["status"], "computed")
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestReportScheduler)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestReportScheduler)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Report Scheduler Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
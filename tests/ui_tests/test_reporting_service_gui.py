@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import ttk
 from io import StringIO
 import os
+import time
 import shutil
 from services.reporting_service import ReportingService
 from services.auth_service import AuthService
@@ -79,6 +80,46 @@ class TestReportingService(unittest.TestCase):
         out = os.path.join(self.out_dir, "bad_export.csv")
         with self.assertRaises(PermissionError):
             self.rsrv.export_report(rpt, "csv", out, actor_token=token)
+    def test_only_declared_providers_called(self):
+        calls = []
+        self.rsrv.register_data_provider("orders", lambda: calls.append("orders") or orders_provider())
+        self.rsrv.register_data_provider("inventory", lambda: calls.append("inventory") or inventory_provider())
+        token = self.auth.authenticate("ana", "analystpass")["token"]
+        rpt = self.rsrv.generate_report("inventory_status", {"threshold": 3}, actor_token=token)
+        self.assertEqual(calls, ["inventory"])
+        self.assertEqual(list(rpt["providers"]), ["inventory"])
+        self.assertEqual(len(rpt["data"]["low_stock"]), 1)
+        self.assertEqual(self.rsrv.describe_report_type("inventory_status")["params"], {"threshold": 5})
+        with self.assertRaises(ValueError):
+            self.rsrv.generate_report("inventory_status", {"treshold": 3}, actor_token=token)
+
+    def test_batch_shares_providers_and_runs_concurrently(self):
+        calls = []
+        spans = {}
+
+        def slow(name, result):
+            def provider():
+                calls.append(name)
+                started = time.perf_counter()
+                time.sleep(0.2)
+                spans[name] = (started, time.perf_counter())
+                return result
+            return provider
+
+        self.rsrv.register_data_provider("orders", slow("orders", orders_provider()))
+        self.rsrv.register_data_provider("inventory", slow("inventory", inventory_provider()))
+        token = self.auth.authenticate("ana", "analystpass")["token"]
+        reports = self.rsrv.generate_reports([
+            {"type": "sales_summary"},
+            {"type": "orders_by_customer"},
+            {"type": "inventory_status", "params": {"threshold": 20}},
+        ], actor_token=token)
+        self.assertEqual(sorted(calls), ["inventory", "orders"])
+        # دو provider همزمان اجرا شده‌اند: بازه‌های اجرا هم‌پوشانی دارند
+        self.assertLess(max(s for s, _ in spans.values()), min(e for _, e in spans.values()))
+        self.assertEqual(reports[0]["data"]["orders_count"], 2)
+        self.assertEqual(len(reports[2]["data"]["low_stock"]), 2)
+        self.assertGreaterEqual(reports[1]["providers"]["orders"], 0.2)
 
 def run_suite_and_collect():
     suite = unittest.TestLoader().loadTestsFromTestCase(TestReportingService)
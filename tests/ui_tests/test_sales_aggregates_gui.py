@@ -0,0 +1,189 @@
+# tests/ui_tests/test_sales_aggregates_gui.py
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import time
+
+from services.auth_service import AuthService
+from services.analytics_service import AnalyticsService
+from services.order_service import OrderService
+from services.payment_service import PaymentService
+from services.reporting_service import ReportingService
+from services.sales_aggregates import SalesAggregates, bucket_keys
+
+DAY1 = int(time.mktime((2024, 3, 20, 10, 15, 0, 0, 0, -1)))
+DAY2 = DAY1 + 86400
+
+
+def order(oid, cid, total, ts=DAY1, status="new", lines=None):
+    return {"order_id": oid, "customer_id": cid, "totals": {"grand_total": total}, "created_at": ts,
+            "status": status, "lines": lines or [{"name": "Burger", "qty": 1, "price": total}]}
+
+
+class TestSalesAggregates(unittest.TestCase):
+    def setUp(self):
+        self.auth = AuthService()
+        self.auth.set_role_permissions("admin", ["*"])
+        self.auth.register("admin", "adminpass", roles=["admin"])
+        self.token = self.auth.authenticate("admin", "adminpass")["token"]
+        self.tmp = os.path.join(os.getcwd(), "sales_aggregates_test")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        self.analytics = AnalyticsService(auth_service=self.auth, storage_dir=self.tmp)
+        self.orders = OrderService(auth_service=self.auth, analytics_service=self.analytics)
+        self.payments = PaymentService(auth_service=self.auth, analytics_service=self.analytics)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_update_cancel_refund(self):
+        agg = SalesAggregates()
+        agg.upsert_order(order("O1", "C1", 100))
+        agg.upsert_order(order("O2", "C2", 50, ts=DAY2))
+        agg.upsert_order(order("O1", "C1", 120))  # ویرایش
+        self.assertEqual(agg.totals()["sales"], 170)
+        self.assertEqual(agg.totals()["orders"], 2)
+        agg.add_refund("R1", "O2", 20, ts=DAY2)
+        agg.add_refund("R1", "O2", 20, ts=DAY2)  # تکراری نادیده گرفته می‌شود
+        self.assertEqual(agg.sales_by_day(), {"2024-03-20": 120, "2024-03-21": 30})
+        agg.apply_event("order.cancelled", {"order_id": "O2"})
+        self.assertEqual(agg.totals(), {"sales": 120, "orders": 1, "refunds": 0, "average": 120})
+        self.assertNotIn("C2", agg.snapshot()["by_customer"])
+        agg.apply_event("order.status_changed", {"order_id": "O2", "status": "paid"})
+        self.assertEqual(agg.totals()["sales"], 150)
+        self.assertEqual(agg.snapshot()["by_hour"]["2024-03-20 10"], {"sales": 120, "orders": 1})
+        self.assertEqual(agg.snapshot()["by_product"]["Burger"], {"revenue": 170, "qty": 2})
+
+    def test_refund_before_order_and_delete(self):
+        agg = SalesAggregates()
+        agg.apply_event("payment.refunded", {"tx_id": "R1", "order_id": "O1", "amount": 10, "created_at": DAY1})
+        self.assertEqual(agg.totals()["sales"], 0)
+        agg.apply_event("order.created", order("O1", "C1", 40))
+        self.assertEqual(agg.totals()["sales"], 30)
+        agg.apply_event("order.deleted", {"order_id": "O1"})
+        self.assertEqual(agg.snapshot()["by_day"], {})
+        self.assertEqual(agg.totals()["sales"], 0)
+
+    def test_update_event_keeps_created_day(self):
+        agg = SalesAggregates()
+        created = order("O1", "C1", 100)
+        del created["created_at"]
+        agg.apply_event("order.created", created, ts=DAY1)
+        # ویرایش سه روز بعد بدون created_at در payload
+        agg.apply_event("order.updated", dict(created, status="paid"), ts=DAY1 + 3 * 86400)
+        self.assertEqual(agg.sales_by_day(), {"2024-03-20": 100})
+
+    def test_reconcile_detects_and_repairs(self):
+        agg = SalesAggregates()
+        orders = [order(f"O{i}", f"C{i % 3}", 10 + i, ts=DAY1 + i * 3600) for i in range(30)]
+        for o in orders:
+            agg.upsert_order(o)
+        self.assertTrue(agg.reconcile(orders=orders)["ok"])
+        agg._by_day["2024-03-20"][0] += 5  # انحراف عمدی
+        seen = []
+        agg.register_listener(seen.append)
+        result = agg.reconcile()
+        self.assertFalse(result["ok"])
+        self.assertTrue(result["repaired"])
+        self.assertEqual(result["mismatches"][0]["bucket"], "by_day")
+        self.assertEqual(len(seen), 1)
+        self.assertTrue(agg.reconcile(orders=orders)["ok"])
+        # منبع بیرونی با سفارش اضافه
+        result = agg.reconcile(orders=orders + [order("X", "C9", 99)])
+        self.assertFalse(result["ok"])
+        self.assertEqual(agg.totals()["orders"], 31)
+
+    def test_bucket_keys_match_strftime(self):
+        for ts in range(DAY1 - 7200, DAY1 + 7200, 601):
+            self.assertEqual(bucket_keys(ts)[1], time.strftime("%Y-%m-%d %H", time.localtime(ts)))
+        self.assertEqual(bucket_keys(0), ("unknown", "unknown"))
+
+    def test_events_flow_into_reports(self):
+        o1 = self.orders.create_order({"customer_id": "C1", "totals": {"grand_total": 100}}, actor_token=self.token)
+        o2 = self.orders.create_order({"customer_id": "C2", "totals": {"grand_total": 80}}, actor_token=self.token)
+        self.orders.update_order(o1["order_id"], {"totals": {"grand_total": 150}}, actor_token=self.token)
+        self.orders.cancel_order(o2["order_id"], actor_token=self.token)
+        tx = self.payments.process_payment(o1["order_id"], 150, actor_token=self.token)
+        self.payments.refund_payment(tx["tx_id"], 25, actor_token=self.token)
+        self.assertEqual(self.analytics.live_sales(actor_token=self.token)["sales"], 125)
+
+        rep = ReportingService(cache_dir=os.path.join(self.tmp, "reports"))
+        rep.attach_sales_aggregates(self.analytics.sales)
+        summary = rep.generate_report("sales_summary")
+        self.assertEqual(summary["data"]["total_sales"], 125)
+        self.assertEqual(summary["data"]["orders_count"], 1)
+        self.assertTrue(rep.generate_report("sales_summary")["cached"])
+        self.orders.create_order({"customer_id": "C1", "totals": {"grand_total": 10}}, actor_token=self.token)
+        by_customer = rep.generate_report("orders_by_customer")
+        self.assertFalse(by_customer["cached"])
+        self.assertEqual(by_customer["data"]["customers"], [{"customer_id": "C1", "orders": 2, "total": 135}])
+        self.assertTrue(self.analytics.reconcile(actor_token=self.token)["ok"])
+
+    def test_legacy_daily_summaries_and_reconcile(self):
+        self.analytics.record_event("order", {"totals": {"grand_total": 100}, "lines": [{"name": "Soda", "qty": 2}]},
+                                    actor_token=self.token)
+        self.analytics.record_event("payment", {"amount": 40}, actor_token=self.token)
+        day = time.strftime("%Y-%m-%d")
+        self.assertEqual(self.analytics.sales_by_day(actor_token=self.token), {day: 140})
+        self.assertEqual(self.analytics.orders_count_by_day(actor_token=self.token), {day: 1})
+        self.analytics._sales_by_day[day] = 1
+        result = self.analytics.reconcile(actor_token=self.token)
+        self.assertFalse(result["daily_ok"])
+        self.assertEqual(self.analytics.sales_by_day(actor_token=self.token), {day: 140})
+        self.assertEqual(self.analytics.top_items(actor_token=self.token), [("Soda", 2)])
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSalesAggregates)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestSalesAggregates)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Sales Aggregates Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -74,6 +74,62 @@ class TestSalesReports(unittest.TestCase):
         self.assertIn("Top Products:", txt)
         self.assertIn("Top Customers:", txt)
 
+    def test_aggregate_single_pass_matches_range_filter(self):
+        base = datetime(2024, 3, 1, 12, 0)
+        orders, payments = [], []
+        for i in range(40):
+            o = Order(1000 + i, self.c1 if i % 3 else self.c2)
+            o.add_product(self.p_burger if i % 2 else self.p_soda, 1 + i % 4)
+            # ترتیب لیست با ترتیب زمانی یکی نیست
+            o.created_at = base + timedelta(hours=(i * 7) % 40)
+            o.discount_amount = float(i % 5)
+            orders.append(o)
+            p = Payment(3000 + i, o, amount=o.calculate_total(), method="Card")
+            p.process_payment(i % 6 != 0, f"TX-{i}")
+            p.paid_at = o.created_at + timedelta(minutes=5)
+            payments.append(p)
+        reports = SalesReports(orders, payments)
+        start, end = base + timedelta(hours=10), base + timedelta(hours=25)
+        agg = reports.aggregate(start, end, top_n=2)
+        in_range = [o for o in orders if start <= o.created_at <= end]
+        paid = [p for p in payments if p.status == "Completed" and start <= p.paid_at <= end]
+        self.assertEqual(agg["summary"]["total_orders"], len(in_range))
+        self.assertEqual(agg["summary"]["total_discount"], sum(o.discount_amount for o in in_range))
+        self.assertEqual(agg["summary"]["completed_payments"], len(paid))
+        self.assertAlmostEqual(agg["summary"]["total_revenue"], sum(p.amount for p in paid))
+        qty = sum(item["quantity"] for o in in_range for item in o.products if item["product"] is self.p_burger)
+        self.assertEqual({t["name"]: t["qty"] for t in agg["top_products"]}["Burger"], qty)
+        self.assertEqual(sum(t["orders"] for t in agg["top_customers"]), len(paid))
+        self.assertEqual(agg["top_products"], reports.top_products(2, start, end))
+        self.assertEqual(list(reports.aggregate(start, end, metrics=["summary"])), ["summary"])
+        with self.assertRaises(ValueError):
+            reports.aggregate(metrics=["margin"])
+
+    def test_refresh_after_timestamp_change(self):
+        self.assertEqual(self.reports.generate_sales_summary(start=datetime.now() - timedelta(hours=2))["total_orders"], 1)
+        self.o1.created_at = datetime.now() - timedelta(minutes=30)
+        self.reports.refresh()
+        self.assertEqual(self.reports.generate_sales_summary(start=datetime.now() - timedelta(hours=2))["total_orders"], 2)
+
+    def test_index_follows_list_changes(self):
+        self.assertEqual(self.reports.generate_sales_summary()["total_orders"], 2)
+        o3 = Order(103, self.c2)
+        o3.add_product(self.p_soda, 1)
+        p3 = Payment(203, o3, amount=o3.calculate_total(), method="Cash")
+        p3.process_payment(True, "TX-3")
+        self.reports.orders.append(o3)
+        self.reports.payments.append(p3)
+        summary = self.reports.generate_sales_summary()
+        self.assertEqual(summary["total_orders"], 3)
+        self.assertEqual(summary["completed_payments"], 3)
+        del self.reports.orders[0]
+        self.reports.payments.pop(0)
+        summary = self.reports.generate_sales_summary()
+        self.assertEqual(summary["total_orders"], 2)
+        self.assertEqual(summary["total_revenue"], 50.0 + 20.0)
+        self.reports.orders = [self.o2]
+        self.assertEqual(self.reports.generate_sales_summary()["total_orders"], 1)
+
 def run_suite_and_collect():
     suite = unittest.TestLoader().loadTestsFromTestCase(TestSalesReports)
     stream = StringIO()
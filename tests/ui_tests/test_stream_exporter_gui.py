@@ -0,0 +1,146 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import csv
+import gzip
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import tracemalloc
+
+from exports.stream_exporter import StreamExporter, rows_from_cursor
+from services.reporting_service import ReportingService
+
+
+def line_items(n):
+    for i in range(n):
+        yield {"order_id": i // 3, "product": f"Item {i % 50}", "qty": 1 + i % 4, "amount": (i % 97) * 1000}
+
+
+class TestStreamExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_csv_gzip_roundtrip(self):
+        path = os.path.join(self.tmp, "items.csv.gz")
+        report = StreamExporter(path, "csv", compression="gzip", chunk_rows=100).export(line_items(1000))
+        self.assertEqual(report["rows"], 1000)
+        self.assertFalse(report["cancelled"])
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(rows[4], {"order_id": "1", "product": "Item 4", "qty": "1", "amount": "4000"})
+
+    def test_jsonl_from_cursor(self):
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+        db.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"برگر {i}") for i in range(250)])
+        path = os.path.join(self.tmp, "items.jsonl")
+        cursor = db.execute("SELECT id, name FROM items ORDER BY id")
+        report = StreamExporter(path, "jsonl").export(rows_from_cursor(cursor, batch_size=64))
+        with open(path, encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(report["rows"], 250)
+        self.assertEqual(json.loads(lines[-1]), {"id": 249, "name": "برگر 249"})
+
+    def test_constant_memory(self):
+        path = os.path.join(self.tmp, "big.csv")
+        tracemalloc.start()
+        try:
+            StreamExporter(path, "csv", chunk_rows=500).export(line_items(60000))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(os.path.getsize(path), 1_000_000)
+        self.assertLess(peak, 1_000_000)
+
+    def test_progress_and_cancel(self):
+        path = os.path.join(self.tmp, "cancel.csv")
+        with open(path, "w") as fh:
+            fh.write("previous export")
+        cancel = threading.Event()
+        seen = []
+
+        def progress(rows, nbytes):
+            seen.append(rows)
+            if rows >= 300:
+                cancel.set()
+
+        report = StreamExporter(path, "csv", chunk_rows=100, progress=progress,
+                                cancel_event=cancel).export(line_items(10000))
+        self.assertTrue(report["cancelled"])
+        self.assertEqual(seen, [100, 200, 300])
+        with open(path) as fh:
+            self.assertEqual(fh.read(), "previous export")
+        self.assertFalse(os.path.exists(path + ".part"))
+
+    def test_reporting_service_export_rows(self):
+        srv = ReportingService(cache_dir=os.path.join(self.tmp, "cache"))
+        path = os.path.join(self.tmp, "out.jsonl.gz")
+        report = srv.export_rows(line_items(10), path, format="jsonl", compression="gzip")
+        self.assertEqual(report["rows"], 10)
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            self.assertEqual(len(fh.read().splitlines()), 10)
+        with self.assertRaises(ValueError):
+            srv.export_rows([], path, format="xml")
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestStreamExporter)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestStreamExporter)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Stream Exporter Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -0,0 +1,161 @@
+# tests/ui_tests/test_tax_calculator_gui.py
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import random
+
+import numpy as np
+
+from models.customer import Customer
+from models.product import Product
+from models.order import Order
+from models.payment import Payment
+from models.invoice import Invoice
+from analytics.order_batch import OrderBatch
+from calculators.tax_calculator import TaxCalculator, EXEMPT, _round_div
+
+
+class TestTaxCalculator(unittest.TestCase):
+    def setUp(self):
+        self.c1 = Customer(1, "Ahmad", "0912", "a@ex.com", "Mashhad")
+        self.burger = Product(1, "Burger", 50.0, "Food", stock=100)
+        self.soda = Product(2, "Soda", 20.0, "Drink", stock=100)
+        self.water = Product(3, "Water", 3.33, "Drink", stock=100)
+        self.bread = Product(4, "Bread", 7.0, "Bakery", stock=100)
+        self.calc = TaxCalculator(0.09, category_rates={"Drink": 0.10}, exempt_categories=["Bakery"],
+                                  exempt_products=[3])
+
+    def _order(self, oid=101, discount=0.0):
+        o = Order(oid, self.c1)
+        o.add_product(self.burger, 2)
+        o.add_product(self.soda, 3)
+        o.add_product(self.water, 7)
+        o.set_delivery("Courier", 10.0)
+        o.discount_amount = discount
+        return o
+
+    def test_rate_precedence(self):
+        self.assertEqual(self.calc.rate_for(self.burger), 0.09)
+        self.assertEqual(self.calc.rate_for(self.soda), 0.10)
+        self.assertEqual(self.calc.rate_for(self.water), EXEMPT)
+        self.assertEqual(self.calc.rate_for(self.bread), EXEMPT)
+        self.calc.set_product_rate(2, 0.05)
+        self.assertEqual(self.calc.rate_for(self.soda), 0.05)
+        with self.assertRaises(ValueError):
+            self.calc.set_category_rate("Food", 1.5)
+        with self.assertRaises(ValueError):
+            TaxCalculator(rounding="bankers")
+
+    def test_exclusive_lines_with_discount(self):
+        result = self.calc.calculate_order(self._order(discount=17.01))
+        burger, soda, water = result["lines"]
+        # تخفیف 17.01 به نسبت 100 / 60 / 23.31 / 10 تقسیم می‌شود
+        self.assertEqual((burger["net"], burger["tax"]), (91.2, 8.21))
+        self.assertEqual((soda["net"], soda["tax"], soda["rate"]), (54.72, 5.47, 0.10))
+        self.assertEqual((water["net"], water["tax"]), (21.26, 0.0))
+        self.assertEqual(result["delivery"]["tax"], 0.82)
+        self.assertEqual(result["total"], 176.3)
+        self.assertAlmostEqual(result["gross"], 176.3 + result["tax"])
+
+    def test_report_reconciles_with_invoices(self):
+        orders = [self._order(101, 17.01), self._order(102, 0.0)]
+        invoices = [Invoice(o.order_id, o, Payment(o.order_id, o, amount=0, method="Card"), discount_amount=o.discount_amount)
+                    for o in orders]
+        report = self.calc.tax_report(orders, invoices)
+        self.assertTrue(report["reconciled"])
+        self.assertEqual(report["totals"]["difference"], 0)
+        self.assertEqual([r["label"] for r in report["rates"]], ["exempt", "9%", "10%"])
+        self.assertAlmostEqual(report["totals"]["invoice_total"], sum(i.generate_data()["summary"]["total"] for i in invoices))
+        self.assertAlmostEqual(sum(r["net"] for r in report["rates"]), report["totals"]["invoice_total"])
+        inclusive = TaxCalculator(0.09, inclusive=True, rounding="half_up").tax_report(orders, invoices)
+        self.assertTrue(inclusive["reconciled"])
+        self.assertEqual(inclusive["totals"]["gross"], inclusive["totals"]["invoice_total"])
+        # فاکتوری که تخفیفش با سفارش فرق دارد اختلاف نشان می‌دهد
+        invoices[1] = Invoice(102, orders[1], invoices[1].payment, discount_amount=5.0)
+        mismatch = self.calc.tax_report(orders, invoices)
+        self.assertFalse(mismatch["reconciled"])
+        self.assertEqual(mismatch["totals"]["difference"], 5.0)
+        # بدون فاکتور تطبیقی انجام نمی‌شود
+        self.assertNotIn("reconciled", self.calc.tax_report(orders))
+
+    def test_batch_matches_per_order(self):
+        rng = random.Random(7)
+        products = [Product(i, f"P{i}", rng.choice([1.99, 3.5, 12.25, 40.0]), rng.choice(["Food", "Drink", "Bakery"]))
+                    for i in range(1, 30)]
+        self.calc.compile(products)
+        orders = []
+        for n in range(300):
+            o = Order(n, self.c1)
+            for _ in range(rng.randint(1, 5)):
+                o.add_product(rng.choice(products), rng.randint(1, 4))
+            o.set_delivery("Courier", rng.choice([0.0, 5.0, 7.5]))
+            o.discount_amount = rng.choice([0.0, 1.0, 3.33])
+            orders.append(o)
+        batch = OrderBatch.from_orders(orders)
+        result = self.calc.calculate_batch(batch)
+        per_order = [self.calc.calculate_order(o) for o in orders]
+        self.assertEqual((result["order_tax"] / 100).tolist(), [r["tax"] for r in per_order])
+        report = self.calc.tax_report(batch)
+        self.assertEqual(report["totals"]["tax"], sum(round(r["tax"] * 100) for r in per_order) / 100)
+
+    def test_rounding_modes(self):
+        num = np.array([5, 15, 25, -5, 7])
+        self.assertEqual(_round_div(num, 10, "half_even").tolist(), [0, 2, 2, 0, 1])
+        self.assertEqual(_round_div(num, 10, "half_up").tolist(), [1, 2, 3, 0, 1])
+        self.assertEqual(_round_div(num, 10, "floor").tolist(), [0, 1, 2, -1, 0])
+        self.assertEqual(_round_div(num, 10, "ceil").tolist(), [1, 2, 3, 0, 1])
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestTaxCalculator)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestTaxCalculator)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Tax Calculator Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -7,7 +7,9 @@ from models.product import Product
 from models.order import Order
 from models.payment import Payment
 from models.discount import Discount
+from models.invoice import Invoice
 from reports.tax_reports import TaxReports
+from calculators.tax_calculator import TaxCalculator
 
 class TestTaxReports(unittest.TestCase):
     def setUp(self):
@@ -50,6 +52,21 @@ class TestTaxReports(unittest.TestCase):
         self.assertIn("Tax Report", txt)
         self.assertIn("Tax Payable", txt)
 
+    def test_multi_rate_calculator(self):
+        calc = TaxCalculator(0.09, category_rates={"Drink": 0.10}, delivery_exempt=True)
+        invoices = [Invoice(301, self.o1, self.p1, discount_amount=self.o1.discount_amount), Invoice(302, self.o2, self.p2)]
+        reports = TaxReports(orders=[self.o1, self.o2], payments=[self.p1, self.p2], calculator=calc, invoices=invoices)
+        # تخفیف 10 بین Burger (100) و ارسال (10) تقسیم می‌شود: 90.91 × 9% = 8.18؛ Soda: 100 × 10%؛ ارسال معاف
+        self.assertEqual(reports.calculate_tax(), 18.18)
+        self.assertEqual(reports.calculate_tax(rate=0.09), self.reports.calculate_tax(rate=0.09))
+        report = reports.tax_by_rate()
+        self.assertTrue(report["reconciled"])
+        self.assertEqual(report["totals"]["invoice_total"], self.p1.amount + self.p2.amount)
+        txt = reports.render_text_report()
+        self.assertIn("10%: Net 100.0 | Tax 10.0", txt)
+        self.o2.update_status("Cancelled")
+        self.assertEqual(reports.calculate_tax(), 8.18)
+
 # -------------------------------
 # اجرای تست‌ها و نمایش گرافیکی
 # -------------------------------
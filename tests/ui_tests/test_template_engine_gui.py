@@ -0,0 +1,148 @@
+import unittest
+import tkinter as tk
+from tkinter import ttk
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from printing.template_engine import TemplateEngine
+from services.template_service import TemplateService
+from services.print_service import PrintService
+
+
+class TestTemplateEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.tsvc = TemplateService(templates_dir=self.tmp)
+        self.engine = TemplateEngine(self.tsvc)
+        self.invoice = {
+            "header": {"order_id": "ORD-1", "customer_id": 5, "status": "paid", "created_at": 0, "tax_rate": 9.0},
+            "lines": [{"name": "Burger", "qty": 2, "price": 120000, "discount": 0, "line_total": 240000}],
+            "totals": {"subtotal": 240000, "grand_total": 240000},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _page(self, pdf):
+        return pdf.pages[1]
+
+    def test_default_layout(self):
+        compiled = self.engine.compile({"header": {"lines": ["FastFood Co."]}})
+        page = self._page(compiled.render("invoice", self.invoice))
+        for text in ("FastFood Co.", "Order ID: ORD-1", "Burger", "240,000", "Grand total: 240,000"):
+            self.assertIn(text, page)
+        # ثابت‌های قالب در کد تولیدشده جاسازی شده‌اند
+        self.assertIn("'FastFood Co.'", compiled.sources["invoice"])
+
+    def test_conditionals_and_loops(self):
+        compiled = self.engine.compile({"body": [
+            {"if": "header.tax_rate", "then": [{"text": "VAT {header.tax_rate}%"}], "else": [{"text": "No VAT"}]},
+            {"if": "header.status", "equals": "void", "then": [{"text": "VOID"}]},
+            {"for": "lines", "do": [{"text": "{item.name} x{item.qty} = {item.line_total|money}"}]},
+        ]})
+        page = self._page(compiled.render("invoice", self.invoice))
+        self.assertIn("VAT 9.0%", page)
+        self.assertNotIn("VOID", page)
+        self.assertIn("Burger x2 = 240,000", page)
+        self.invoice["header"]["tax_rate"] = 0
+        self.assertIn("No VAT", self._page(compiled.render("invoice", self.invoice)))
+
+    def test_invalid_template_rejected(self):
+        with self.assertRaises(ValueError):
+            self.engine.compile({"body": [{"unknown": 1}]}).renderer("invoice")
+        with self.assertRaises(ValueError):
+            self.engine.compile({"body": [{"text": "{item.name}"}]}).renderer("invoice")
+
+    def test_cache_by_id_and_version(self):
+        tid = self.tsvc.create_template("t", {"body": [{"text": "v1"}]})["template_id"]
+        first = self.engine.get(tid)
+        self.assertEqual(first.version, 1)
+        self.assertIs(self.engine.get(tid), first)
+        self.assertEqual(self.tsvc.update_template(tid, {"content": {"body": [{"text": "v2"}]}})["version"], 2)
+        second = self.engine.get(tid)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.version, 2)
+        self.assertIn("v2", self._page(second.render("receipt", {})))
+        self.tsvc.delete_template(tid)
+        with self.assertRaises(ValueError):
+            self.engine.get(tid)
+
+    def test_update_from_other_service_instance(self):
+        tsvc = TemplateService(templates_dir=self.tmp, rescan_interval=0.05)
+        engine = TemplateEngine(tsvc)
+        tid = tsvc.create_template("t", {"body": [{"text": "v1"}]})["template_id"]
+        first = engine.get(tid)
+        # به‌روزرسانی از نمونه‌ی دیگر سرویس (مثلاً ترمینال دیگر)
+        other = TemplateService(templates_dir=self.tmp, rescan_interval=None)
+        other.update_template(tid, {"content": {"body": [{"text": "v2"}]}})
+        tsvc._last_scan = 0.0
+        second = engine.get(tid)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.version, 2)
+        self.assertIn("v2", self._page(second.render("receipt", {})))
+        self.assertIs(engine.get(tid), second)
+
+    def test_print_service_with_template_id(self):
+        tid = self.tsvc.create_template("receipt", {"footer": {"lines": ["Thanks"]}})["template_id"]
+        psrv = PrintService(template_engine=self.engine)
+        out = os.path.join(self.tmp, "receipt.pdf")
+        order = {"order_id": 3, "items": [{"name": "Soda", "qty": 2, "price": 20000}], "totals": {}}
+        self.assertEqual(psrv.print_receipt(order, out, template_id=tid), out)
+        self.assertTrue(os.path.exists(out))
+        self.assertIn("Soda", self._page(self.engine.get(tid).render("receipt", order)))
+
+
+def run_suite_and_collect():
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestTemplateEngine)
+    stream = StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
+    result = runner.run(suite)
+    output_text = stream.getvalue()
+
+    expected = unittest.TestLoader().getTestCaseNames(TestTemplateEngine)
+    status_map = {name: ("✅ Passed", "") for name in expected}
+    for test, tb in result.failures:
+        status_map[test.id().split(".")[-1]] = ("❌ Failed", tb)
+    for test, tb in result.errors:
+        status_map[test.id().split(".")[-1]] = ("⚠️ Error", tb)
+
+    test_status = [(i+1, name, status_map[name][0], status_map[name][1]) for i, name in enumerate(expected)]
+    total = result.testsRun; failed = len(result.failures); errors = len(result.errors)
+    passed = total - failed - errors
+    return test_status, total, passed, failed, errors, output_text
+
+
+def show_results_gui():
+    test_status, total, passed, failed, errors, output_text = run_suite_and_collect()
+    root = tk.Tk()
+    root.title("Template Engine Tests Test Results")
+
+    # پنجره وسط صفحه
+    root.update_idletasks()
+    w, h = 780, 580
+    x = (root.winfo_screenwidth() // 2) - (w // 2)
+    y = (root.winfo_screenheight() // 2) - (h // 2)
+    root.geometry(f"{w}x{h}+{x}+{y}")
+
+    tk.Label(root, text=f"Total: {total} | Passed: {passed} | Failed: {failed} | Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+
+    tree = ttk.Treeview(root, columns=("No", "Test", "Result"), show="headings", height=10)
+    tree.heading("No", text="#"); tree.heading("Test", text="Test Case"); tree.heading("Result", text="Result")
+    tree.column("No", width=50, anchor="center"); tree.column("Test", width=440, anchor="w"); tree.column("Result", width=180, anchor="center")
+    for num, name, status, _ in test_status:
+        tree.insert("", "end", values=(num, name, status))
+    tree.pack(expand=True, fill="both", padx=10, pady=10)
+
+    tk.Label(root, text="Console-like output").pack(padx=10, pady=(10, 0), anchor="w")
+    box = tk.Text(root, height=14, wrap="word")
+    box.insert("1.0", output_text); box.configure(state="disabled")
+    box.pack(expand=True, fill="both", padx=10, pady=(0, 10))
+
+    tk.Label(root, text=f"Summary → Total: {total}, Passed: {passed}, Failed: {failed}, Errors: {errors}").pack(padx=10, pady=10, anchor="w")
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    show_results_gui()
@@ -3,7 +3,10 @@ import tkinter as tk
 from tkinter import ttk
 from io import StringIO
 import os
+import json
 import shutil
+import time
+from unittest import mock
 from services.auth_service import AuthService
 from services.template_service import TemplateService
 
@@ -27,6 +30,7 @@ class TestTemplateService(unittest.TestCase):
         self.srv = TemplateService(auth_service=self.auth, templates_dir=self.test_dir)
 
     def tearDown(self):
+        self.srv.close()
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
 
@@ -75,6 +79,57 @@ class TestTemplateService(unittest.TestCase):
         imported = self.srv.import_template(path, actor_token=token)
         self.assertIn("template_id", imported)
         self.assertNotEqual(imported["template_id"], tid)
+    def test_reads_served_from_index(self):
+        # به صورت پیش‌فرض (بدون thread ناظر) خواندن‌ها از ایندکس حافظه انجام می‌شوند و به دیسک دست نمی‌زنند
+        token = self.auth.authenticate("ed", "edpass")["token"]
+        tid = self.srv.create_template("Indexed", {"layout": "A4"}, {}, actor_token=token)["template_id"]
+        self.assertIsNone(self.srv._watcher)
+        with mock.patch("builtins.open", side_effect=AssertionError("disk read")), \
+                mock.patch("os.scandir", side_effect=AssertionError("disk scan")), \
+                mock.patch("os.stat", side_effect=AssertionError("disk stat")):
+            for _ in range(3):
+                self.assertEqual(self.srv.get_template(tid, actor_token=token)["content"], {"layout": "A4"})
+                self.assertEqual(len(self.srv.list_templates(actor_token=token)), 1)
+        # رکورد برگشتی کپی است و تغییرش ایندکس را خراب نمی‌کند
+        self.srv.get_template(tid, actor_token=token)["content"]["layout"] = "X"
+        self.assertEqual(self.srv.get_template(tid, actor_token=token)["content"]["layout"], "A4")
+        self.assertEqual([f for f in os.listdir(self.test_dir) if f.endswith(".tmp")], [])
+
+    def test_external_changes_detected(self):
+        token = self.auth.authenticate("ed", "edpass")["token"]
+        tid = self.srv.create_template("Ext", {"layout": "A4"}, {}, actor_token=token)["template_id"]
+        self.srv.close()  # scan فقط با refresh() تا نتیجه به زمان‌بندی thread ناظر وابسته نباشد
+        events = []
+        self.srv.register_listener(events.append)
+        self.assertEqual(self.srv.refresh(), 0)
+        path = os.path.join(self.test_dir, f"template_{tid}.json")
+        with open(path, "r", encoding="utf-8") as fh:
+            rec = json.load(fh)
+        rec["content"] = {"layout": "A5, edited by hand"}
+        rec["version"] = 5
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(rec, fh)
+        self.assertEqual(self.srv.refresh(), 1)
+        self.assertEqual(events[-1], {"event": "updated", "template_id": tid, "version": 5})
+        self.assertEqual(self.srv.get_template(tid, actor_token=token)["content"]["layout"], "A5, edited by hand")
+        os.remove(path)
+        self.srv.refresh()
+        self.assertEqual(events[-1]["event"], "deleted")
+        self.assertIsNone(self.srv.get_template(tid, actor_token=token))
+
+    def test_periodic_rescan_without_watcher(self):
+        srv = TemplateService(templates_dir=self.test_dir, rescan_interval=0.05)
+        manual = TemplateService(templates_dir=self.test_dir, rescan_interval=None)
+        tid = self.srv.create_template("Shared", {}, {}, actor_token=self.auth.authenticate("ed", "edpass")["token"])["template_id"]
+        # تا رسیدن نوبت scan بعدی، ایندکس قبلی استفاده می‌شود
+        srv._last_scan = time.monotonic()
+        self.assertIsNone(srv.get_template(tid))
+        time.sleep(0.06)
+        self.assertEqual(srv.get_template(tid)["name"], "Shared")
+        # rescan_interval=None: فقط refresh() صریح
+        self.assertIsNone(manual.get_template(tid))
+        self.assertEqual(manual.refresh(), 1)
+        self.assertEqual(manual.get_template(tid)["name"], "Shared")
 
 def run_suite_and_collect():
     suite = unittest.TestLoader().loadTestsFromTestCase(TestTemplateService)